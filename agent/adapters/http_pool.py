@@ -0,0 +1,244 @@
+"""
+Shared, pooled HTTP client for the HTTP LLM backends.
+
+Every adapter used to own a private ``requests.Session`` (or none at all), so
+each client instance paid its own TCP+TLS handshakes and concurrent calls
+could not share connections. ``get_http_pool()`` returns one process-wide
+pool with keep-alive connections sized for concurrent use:
+
+  - with ``httpx`` installed, an ``httpx.Client`` (HTTP/2 when ``h2`` is
+    installed too, so concurrent requests to one host share a connection)
+  - otherwise a ``requests.Session`` with an enlarged connection pool
+
+Both backends expose the ``requests`` surface the adapters already use:
+``post``/``get`` return objects with ``status_code``, ``headers``, ``text``,
+``json()`` and ``raise_for_status()``, and transport failures are raised as
+``requests.Timeout`` / ``requests.ConnectionError``.
+
+``apost`` is the asyncio entry point; calls run on worker threads against the
+same pool, so async callers and sync callers share connections.
+
+Requests made under a run's cancellation token (``agent.autonomous.cancellation``)
+have their timeout capped at the run deadline. With the ``requests`` backend the
+socket of a request in flight is shut down when the token fires, so the wait
+ends at once and the provider sees the client go away; ``RunCancelledError``
+is raised instead of the transport error. ``httpx`` requests only get the
+capped timeout.
+
+Environment overrides:
+  AGENT_HTTP_MAX_CONNECTIONS   pool size per host (default: 16)
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from agent.autonomous.cancellation import current_token
+from agent.autonomous.exceptions import RunCancelledError
+
+try:
+    import httpx as _httpx
+except ImportError:  # pragma: no cover - optional dependency
+    _httpx = None
+
+try:
+    import h2 as _h2  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    _h2 = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONNECTIONS = 16
+
+
+class _HttpxResponse:
+    """``requests``-style view of an ``httpx.Response``."""
+
+    def __init__(self, response: Any):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self) -> Any:
+        return self._response.json()
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error for url: {self.url}", response=self)
+
+
+_checked_out = threading.local()
+
+
+class _TrackingMixin:
+    """Remember connections handed to this thread while a cancellable request runs."""
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        conns = getattr(_checked_out, "conns", None)
+        if conns is not None:
+            conns.append(conn)
+        return conn
+
+
+class _TrackingHTTPConnectionPool(_TrackingMixin, HTTPConnectionPool):
+    pass
+
+
+class _TrackingHTTPSConnectionPool(_TrackingMixin, HTTPSConnectionPool):
+    pass
+
+
+class _AbortableAdapter(HTTPAdapter):
+    """``HTTPAdapter`` whose in-flight connections can be shut down from another thread."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackingHTTPConnectionPool,
+            "https": _TrackingHTTPSConnectionPool,
+        }
+
+
+def _shutdown(conn: Any) -> None:
+    sock = getattr(conn, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class HttpPool:
+    """Thread-safe keep-alive connection pool for JSON APIs."""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS, *, use_httpx: Optional[bool] = None):
+        self.max_connections = max(1, int(max_connections))
+        if use_httpx is None:
+            use_httpx = _httpx is not None
+        self.backend = "httpx" if use_httpx and _httpx is not None else "requests"
+        self.http2 = self.backend == "httpx" and _h2 is not None
+        if self.backend == "httpx":
+            self._client = _httpx.Client(
+                http2=self.http2,
+                limits=_httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        else:
+            session = requests.Session()
+            adapter = _AbortableAdapter(pool_connections=8, pool_maxsize=self.max_connections, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._client = session
+
+    def request(self, method: str, url: str, *, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        token = current_token()
+        if token is None:
+            return self._send(method, url, timeout=timeout, **kwargs)
+        token.raise_if_cancelled()
+        if timeout is None or isinstance(timeout, (int, float)):
+            timeout = token.clamp(timeout)
+        if self.backend != "requests":
+            return self._send(method, url, timeout=timeout, **kwargs)
+
+        conns: List[Any] = []
+        _checked_out.conns = conns
+        try:
+            with token.registered(lambda: [_shutdown(conn) for conn in list(conns)]):
+                return self._send(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException as exc:
+            if token.cancelled:
+                raise RunCancelledError(token.reason or "cancelled") from exc
+            raise
+        finally:
+            _checked_out.conns = None
+
+    def _send(self, method: str, url: str, *, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        if self.backend == "requests":
+            return self._client.request(method, url, timeout=timeout, **kwargs)
+        try:
+            return _HttpxResponse(self._client.request(method, url, timeout=timeout, **kwargs))
+        except _httpx.TimeoutException as exc:
+            raise requests.Timeout(str(exc)) from exc
+        except _httpx.TransportError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+
+    def post(self, url: str, **kwargs: Any) -> Any:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        return self.request("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(self.post, url, **kwargs)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_pool: Optional[HttpPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpPool:
+    """The process-wide pool shared by all HTTP LLM clients."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    size = int(os.getenv("AGENT_HTTP_MAX_CONNECTIONS") or DEFAULT_MAX_CONNECTIONS)
+                except ValueError:
+                    size = DEFAULT_MAX_CONNECTIONS
+                _pool = HttpPool(size)
+                logger.debug(f"HTTP pool: backend={_pool.backend} http2={_pool.http2} size={_pool.max_connections}")
+    return _pool
+
+
+def bounded_map(fn: Callable[[T], R], items: Iterable[T], *, max_concurrency: int = 4) -> List[Any]:
+    """``[fn(item) ...]`` with at most ``max_concurrency`` calls in flight.
+
+    Results keep the input order; a call that raised yields its exception in
+    place of a result, so one failure does not discard the rest of the batch.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def _call(item: T) -> Any:
+        try:
+            return fn(item)
+        except Exception as exc:
+            return exc
+
+    workers = max(1, min(int(max_concurrency), len(items)))
+    if workers == 1:
+        return [_call(item) for item in items]
+    # One context copy per item so the caller's cancellation token reaches each worker.
+    runners = [contextvars.copy_context().run for _ in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-batch") as pool:
+        return list(pool.map(lambda run, item: run(_call, item), runners, items))
+
+
+__all__ = ["HttpPool", "bounded_map", "get_http_pool"]
@@ -6,6 +6,8 @@ It handles provider selection, failover, retries, and error classification.
 """
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import json
 import logging
 import os
@@ -14,7 +16,20 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+from agent.autonomous.exceptions import RunCancelledError
+from agent.autonomous.retry_utils import (
+    LLM_RETRY_CONFIG,
+    CircuitBreaker,
+    backoff_delay,
+    get_breaker,
+    retry_after_hint,
+    time_remaining,
+)
+
+from .http_pool import bounded_map
 
 logger = logging.getLogger(__name__)
 
@@ -102,6 +117,7 @@ class LLMResponse:
     usage: Dict[str, int] = field(default_factory=dict)
     finish_reason: Optional[str] = None
     raw_response: Optional[Dict[str, Any]] = None
+    prefix_hash: Optional[str] = None  # identifies the cacheable request prefix
 
     @property
     def input_tokens(self) -> int:
@@ -115,6 +131,15 @@ class LLMResponse:
     def total_tokens(self) -> int:
         return self.usage.get("total_tokens", self.input_tokens + self.output_tokens)
 
+    @property
+    def cached_tokens(self) -> int:
+        """Prompt tokens the provider served from its prefix cache."""
+        return self.usage.get("cached_tokens", 0)
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
 
 # =============================================================================
 # Base Client Interface
@@ -201,7 +226,9 @@ class LLMClient(ABC):
         """
         Chat with automatic retry on transient failures.
 
-        Uses exponential backoff for retries.
+        Uses exponential backoff, waits at least as long as a rate
+        limit's ``retry_after``, and gives up once the wait would overrun the
+        current retry deadline.
         """
         last_error = None
 
@@ -213,9 +240,15 @@ class LLMClient(ABC):
                 if not e.retryable:
                     raise
 
-                delay = base_delay * (2 ** attempt)
-                if hasattr(e, 'retry_after') and e.retry_after:
-                    delay = max(delay, e.retry_after)
+                if attempt + 1 >= max_retries:
+                    break
+                delay = backoff_delay(base_delay * (2 ** attempt), LLM_RETRY_CONFIG.jitter)
+                hint = retry_after_hint(e)
+                if hint:
+                    delay = max(delay, hint)
+                remaining = time_remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
 
                 logger.warning(
                     f"LLM call failed (attempt {attempt + 1}/{max_retries}): {e}. "
@@ -225,6 +258,55 @@ class LLMClient(ABC):
 
         raise last_error or LLMError("Max retries exceeded", error_type=LLMErrorType.FATAL)
 
+    def batch_chat(
+        self,
+        messages: Sequence[str],
+        system_prompt: Optional[str] = None,
+        max_concurrency: int = 4,
+        **kwargs,
+    ) -> List[Union[LLMResponse, LLMError]]:
+        """
+        Send several independent messages concurrently.
+
+        At most ``max_concurrency`` requests are in flight. Results are in input
+        order; a failed message yields its ``LLMError`` instead of a response.
+        """
+        results = bounded_map(
+            lambda message: self.chat(message, system_prompt=system_prompt, **kwargs),
+            messages,
+            max_concurrency=max_concurrency,
+        )
+        return [_as_llm_error(r, self.provider_name) if isinstance(r, Exception) else r for r in results]
+
+    async def achat(self, message: str, system_prompt: Optional[str] = None, **kwargs) -> LLMResponse:
+        """Async ``chat``; runs on a worker thread over the shared HTTP pool."""
+        return await asyncio.to_thread(self.chat, message, system_prompt=system_prompt, **kwargs)
+
+    async def abatch_chat(
+        self,
+        messages: Sequence[str],
+        system_prompt: Optional[str] = None,
+        max_concurrency: int = 4,
+        **kwargs,
+    ) -> List[Union[LLMResponse, LLMError]]:
+        """Async ``batch_chat``."""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _one(message: str) -> Union[LLMResponse, LLMError]:
+            async with semaphore:
+                try:
+                    return await self.achat(message, system_prompt=system_prompt, **kwargs)
+                except Exception as e:
+                    return _as_llm_error(e, self.provider_name)
+
+        return list(await asyncio.gather(*(_one(m) for m in messages)))
+
+
+def _as_llm_error(error: Exception, provider: str) -> LLMError:
+    if isinstance(error, LLMError):
+        return error
+    return LLMError(str(error), error_type=LLMErrorType.FATAL, provider=provider, original_error=error)
+
 
 # =============================================================================
 # Multi-Provider Client with Failover
@@ -235,11 +317,24 @@ class MultiProviderClient(LLMClient):
     LLM client that tries multiple providers in order.
 
     If one provider fails with an auth error, it falls back to the next.
+
+    Each provider has a circuit breaker (``llm:<provider_name>``). Providers
+    whose breaker is open are skipped until it half-opens, and a rate limit
+    opens it for the ``retry_after`` period, so later calls go straight to the
+    fallback instead of waiting on the degraded provider first.
+
+    With ``hedge_after`` set, ``chat`` also sends the request to the next
+    provider when the first has not answered within that many seconds, and
+    returns whichever succeeds first. The slower request is abandoned, not
+    cancelled, so hedging trades extra spend for tail latency.
     """
 
-    def __init__(self, providers: List[LLMClient]):
+    def __init__(self, providers: List[LLMClient], hedge_after: Optional[float] = None):
         self._providers = providers
         self._current_index = 0
+        self.hedge_after = hedge_after if hedge_after and hedge_after > 0 else None
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0}
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
 
     @property
     def provider_name(self) -> str:
@@ -274,8 +369,24 @@ class MultiProviderClient(LLMClient):
                 error_type=LLMErrorType.AUTH,
             )
 
+        if self.hedge_after and len(available) > 1:
+            return self._hedged_chat(
+                available,
+                message,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+            )
+
         errors = []
+        skipped: List[str] = []
         for i, provider in enumerate(available):
+            breaker = _provider_breaker(provider)
+            if not breaker.allow():
+                logger.info(f"Skipping provider {provider.provider_name}: circuit open for {breaker.retry_in():.0f}s")
+                skipped.append(provider.provider_name)
+                continue
             try:
                 logger.debug(f"Trying provider: {provider.provider_name}")
                 response = provider.chat(
@@ -291,31 +402,95 @@ class MultiProviderClient(LLMClient):
                     )
                 except Exception:
                     logger.info(f"[LLM] provider={provider.provider_name}")
+                breaker.record_success()
                 self._current_index = i  # Remember successful provider
                 return response
 
             except LLMAuthError as e:
                 logger.warning(f"Provider {provider.provider_name} auth failed: {e}")
+                _record_provider_failure(breaker, e)
                 errors.append(e)
                 continue  # Try next provider
 
             except LLMRateLimitError as e:
                 logger.warning(f"Provider {provider.provider_name} rate limited: {e}")
+                _record_provider_failure(breaker, e)
                 errors.append(e)
                 continue  # Try next provider
 
             except LLMError as e:
                 logger.error(f"Provider {provider.provider_name} error: {e}")
+                _record_provider_failure(breaker, e)
                 errors.append(e)
                 if not e.retryable:
                     raise  # Fatal error, don't try other providers
 
+            except RunCancelledError:
+                breaker.release()
+                raise
+
+            except Exception:
+                breaker.record_failure()
+                raise
+
         # All providers failed
-        error_summary = "; ".join(str(e) for e in errors)
-        raise LLMError(
-            f"All LLM providers failed: {error_summary}",
-            error_type=LLMErrorType.FATAL,
-        )
+        raise _all_failed(errors, skipped)
+
+    def _hedged_chat(self, available: List[LLMClient], message: str, **kwargs) -> LLMResponse:
+        """Race providers: start the next one whenever the current leader is slow or fails."""
+        skipped = [p.provider_name for p in available if _provider_breaker(p).is_open]
+        available = [p for p in available if p.provider_name not in skipped]
+        if not available:
+            raise _all_failed([], skipped)
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-hedge")
+        pending: Dict[Future, int] = {}
+        errors: List[LLMError] = []
+        next_index = 0
+
+        def _launch() -> None:
+            nonlocal next_index
+            provider = available[next_index]
+            logger.debug(f"Trying provider: {provider.provider_name}")
+            # Copy the context so the run's cancellation token reaches the hedge thread.
+            call = contextvars.copy_context().run
+            pending[self._hedge_pool.submit(call, provider.chat, message, **kwargs)] = next_index
+            next_index += 1
+
+        _launch()
+        while pending:
+            done, _ = wait(list(pending), timeout=self.hedge_after, return_when=FIRST_COMPLETED)
+            if not done:
+                if next_index < len(available):
+                    self.hedge_stats["hedged"] += 1
+                    logger.info(
+                        f"[LLM] no answer after {self.hedge_after:.1f}s, hedging with "
+                        f"{available[next_index].provider_name}"
+                    )
+                    _launch()
+                continue
+            for future in done:
+                index = pending.pop(future)
+                breaker = _provider_breaker(available[index])
+                try:
+                    response = future.result()
+                except LLMError as e:
+                    logger.warning(f"Provider {available[index].provider_name} error: {e}")
+                    _record_provider_failure(breaker, e)
+                    errors.append(e)
+                    if not e.retryable and not isinstance(e, (LLMAuthError, LLMRateLimitError)):
+                        raise
+                    if not pending and next_index < len(available):
+                        _launch()
+                    continue
+                breaker.record_success()
+                if index > 0 and pending:
+                    self.hedge_stats["hedge_wins"] += 1
+                self._current_index = index
+                logger.info(f"[LLM] provider={response.provider} model={response.model}")
+                return response
+
+        raise _all_failed(errors, skipped)
 
     def chat_json(
         self,
@@ -334,7 +509,12 @@ class MultiProviderClient(LLMClient):
             )
 
         errors = []
+        skipped: List[str] = []
         for provider in available:
+            breaker = _provider_breaker(provider)
+            if not breaker.allow():
+                skipped.append(provider.provider_name)
+                continue
             try:
                 result = provider.chat_json(
                     message,
@@ -342,22 +522,56 @@ class MultiProviderClient(LLMClient):
                     schema=schema,
                     timeout=timeout,
                 )
+                breaker.record_success()
                 model = getattr(provider, "model", "unknown")
                 logger.info(f"[LLM] provider={provider.provider_name} model={model}")
                 return result
             except LLMAuthError as e:
+                _record_provider_failure(breaker, e)
                 errors.append(e)
                 continue
             except LLMError as e:
+                _record_provider_failure(breaker, e)
                 errors.append(e)
                 if not e.retryable:
                     raise
+            except RunCancelledError:
+                breaker.release()
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
 
-        error_summary = "; ".join(str(e) for e in errors)
-        raise LLMError(
-            f"All LLM providers failed: {error_summary}",
-            error_type=LLMErrorType.FATAL,
+        raise _all_failed(errors, skipped)
+
+
+def _provider_breaker(provider: LLMClient) -> CircuitBreaker:
+    return get_breaker(f"llm:{provider.provider_name}")
+
+
+def _record_provider_failure(breaker: CircuitBreaker, error: LLMError) -> None:
+    if error.error_type == LLMErrorType.INVALID_INPUT:
+        breaker.record_success()  # the request was bad, not the provider
+    elif isinstance(error, LLMRateLimitError):
+        breaker.record_failure(open_for=retry_after_hint(error))
+    else:
+        breaker.record_failure()
+
+
+def _all_failed(errors: List[LLMError], skipped: List[str]) -> LLMError:
+    if not errors:
+        return LLMError(
+            f"All LLM providers unavailable: circuit open for {', '.join(skipped)}",
+            error_type=LLMErrorType.TRANSIENT,
+            retryable=True,
         )
+    error_summary = "; ".join(str(e) for e in errors)
+    if skipped:
+        error_summary += f"; skipped (circuit open): {', '.join(skipped)}"
+    return LLMError(
+        f"All LLM providers failed: {error_summary}",
+        error_type=LLMErrorType.FATAL,
+    )
 
 
 # =============================================================================
@@ -392,6 +606,16 @@ def get_available_providers() -> List[str]:
     return available
 
 
+def _hedge_after_from_env() -> Optional[float]:
+    """Hedging threshold from AGENT_LLM_HEDGE_AFTER_SECONDS (unset or 0 disables)."""
+    raw = (os.environ.get("AGENT_LLM_HEDGE_AFTER_SECONDS") or "").strip()
+    try:
+        value = float(raw) if raw else 0.0
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
 def get_llm_client(
     preferred_provider: Optional[str] = None,
     fallback: bool = True,
@@ -402,6 +626,8 @@ def get_llm_client(
     Args:
         preferred_provider: Name of preferred provider (openrouter, openai, codex)
         fallback: If True, create multi-provider client with failover
+            (set AGENT_LLM_HEDGE_AFTER_SECONDS to race the next provider
+            when the first is slow)
 
     Returns:
         LLMClient instance
@@ -422,7 +648,7 @@ def get_llm_client(
                     if name != preferred_provider
                 ]
                 all_providers = [provider] + [p for p in others if p.is_available()]
-                return MultiProviderClient(all_providers)
+                return MultiProviderClient(all_providers, hedge_after=_hedge_after_from_env())
             return provider
 
     # Create multi-provider with default order
@@ -451,7 +677,7 @@ def get_llm_client(
     if len(providers) == 1:
         return providers[0]
 
-    return MultiProviderClient(providers)
+    return MultiProviderClient(providers, hedge_after=_hedge_after_from_env())
 
 
 def get_provider(name: str) -> Optional[LLMClient]:
@@ -6,6 +6,7 @@ OpenAI is an optional high-quality LLM provider.
 Environment Variables:
     OPENAI_API_KEY: Your OpenAI API key (optional)
     OPENAI_MODEL: Override default model (optional, default: gpt-4o-mini)
+    OPENAI_BASE_URL: Override the API base URL (optional, e.g. a local mock or proxy)
 """
 from __future__ import annotations
 
@@ -29,6 +30,8 @@ from .llm_client import (
     LLMErrorType,
     register_provider,
 )
+from .http_pool import get_http_pool
+from .request_layout import RequestLayout, build_layout, normalize_usage
 
 logger = logging.getLogger(__name__)
 
@@ -57,11 +60,16 @@ class OpenAIAdapter(LLMClient):
         api_key: Optional[str] = None,
         model: Optional[str] = None,
         organization: Optional[str] = None,
+        base_url: Optional[str] = None,
     ):
         self._api_key = api_key or os.environ.get("OPENAI_API_KEY")
         self._model = model or os.environ.get("OPENAI_MODEL", DEFAULT_MODEL)
         self._organization = organization or os.environ.get("OPENAI_ORGANIZATION")
-        self._session = requests.Session()
+        base_url = base_url or os.environ.get("OPENAI_BASE_URL")
+        if base_url:
+            self.API_BASE = base_url.rstrip("/")
+        self._session = get_http_pool()
+        self.last_usage: Dict[str, Any] = {}
 
     @property
     def provider_name(self) -> str:
@@ -89,6 +97,7 @@ class OpenAIAdapter(LLMClient):
         max_tokens: int = 2048,
         timeout: int = 60,
         response_format: Optional[Dict[str, str]] = None,
+        cache_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Make a request to OpenAI API."""
         url = f"{self.API_BASE}/chat/completions"
@@ -102,6 +111,9 @@ class OpenAIAdapter(LLMClient):
 
         if response_format:
             payload["response_format"] = response_format
+        if cache_key:
+            # Routes requests sharing a prefix to the same cache shard.
+            payload["prompt_cache_key"] = cache_key
 
         try:
             response = self._session.post(
@@ -143,7 +155,15 @@ class OpenAIAdapter(LLMClient):
                     provider=self.provider_name,
                 )
 
-            return response.json()
+            result = response.json()
+            result["usage"] = normalize_usage(result.get("usage"))
+            self.last_usage = result["usage"]
+            if self.last_usage["cached_tokens"]:
+                logger.debug(
+                    f"OpenAI prompt cache: {self.last_usage['cached_tokens']}/"
+                    f"{self.last_usage.get('prompt_tokens', 0)} tokens cached"
+                )
+            return result
 
         except requests.Timeout:
             raise LLMTimeoutError(
@@ -170,19 +190,15 @@ class OpenAIAdapter(LLMClient):
         model: Optional[str] = None,
     ) -> LLMResponse:
         """Send a chat message and get a response."""
-        messages = []
-
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        messages.append({"role": "user", "content": message})
+        layout = build_layout(message, system_prompt=system_prompt)
 
         result = self._make_request(
-            messages=messages,
+            messages=layout.messages(),
             model=model,
             temperature=temperature,
             max_tokens=max_tokens,
             timeout=timeout,
+            cache_key=self._cache_key(layout),
         )
 
         # Parse response
@@ -197,8 +213,13 @@ class OpenAIAdapter(LLMClient):
             usage=usage,
             finish_reason=choice.get("finish_reason"),
             raw_response=result,
+            prefix_hash=layout.prefix_hash,
         )
 
+    @staticmethod
+    def _cache_key(layout: RequestLayout) -> Optional[str]:
+        return f"prefix-{layout.prefix_hash}" if layout.prefix else None
+
     def chat_json(
         self,
         message: str,
@@ -208,26 +229,18 @@ class OpenAIAdapter(LLMClient):
         model: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Send a chat message and get a JSON response."""
-        # Build system prompt for JSON output
-        json_system = system_prompt or ""
-        if schema:
-            json_system += f"\n\nYou must respond with valid JSON matching this schema:\n{json.dumps(schema, indent=2)}"
-        else:
-            json_system += "\n\nYou must respond with valid JSON only. No other text."
-
-        messages = [
-            {"role": "system", "content": json_system},
-            {"role": "user", "content": message},
-        ]
+        # Format spec and system prompt form the cacheable prefix
+        layout = build_layout(message, system_prompt=system_prompt, schema=schema, json_mode=True)
 
         # Use JSON mode
         result = self._make_request(
-            messages=messages,
+            messages=layout.messages(),
             model=model,
             temperature=0.2,  # Lower temperature for JSON
             max_tokens=4096,
             timeout=timeout,
             response_format={"type": "json_object"},
+            cache_key=self._cache_key(layout),
         )
 
         # Parse response
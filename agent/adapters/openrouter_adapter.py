@@ -10,6 +10,7 @@ OpenRouter is the primary/default LLM provider because:
 Environment Variables:
     OPENROUTER_API_KEY: Your OpenRouter API key (required)
     OPENROUTER_MODEL: Override default model (optional)
+    OPENROUTER_BASE_URL: Override the API base URL (optional, e.g. a local mock or proxy)
 """
 from __future__ import annotations
 
@@ -33,6 +34,8 @@ from .llm_client import (
     LLMErrorType,
     register_provider,
 )
+from .http_pool import get_http_pool
+from .request_layout import build_layout, normalize_usage, supports_cache_control
 
 logger = logging.getLogger(__name__)
 
@@ -85,12 +88,17 @@ class OpenRouterAdapter(LLMClient):
         model: Optional[str] = None,
         site_url: str = "https://github.com/Treytucker05/DrCodePT-Swarm",
         site_name: str = "DrCodePT-Swarm Agent",
+        base_url: Optional[str] = None,
     ):
         self._api_key = api_key or os.environ.get("OPENROUTER_API_KEY")
         self._model = model or os.environ.get("OPENROUTER_MODEL", DEFAULT_MODELS["chat"])
         self._site_url = site_url
         self._site_name = site_name
-        self._session = requests.Session()
+        base_url = base_url or os.environ.get("OPENROUTER_BASE_URL")
+        if base_url:
+            self.API_BASE = base_url.rstrip("/")
+        self._session = get_http_pool()
+        self.last_usage: Dict[str, Any] = {}
 
     @property
     def provider_name(self) -> str:
@@ -171,7 +179,15 @@ class OpenRouterAdapter(LLMClient):
                     provider=self.provider_name,
                 )
 
-            return response.json()
+            result = response.json()
+            result["usage"] = normalize_usage(result.get("usage"))
+            self.last_usage = result["usage"]
+            if self.last_usage["cached_tokens"]:
+                logger.debug(
+                    f"OpenRouter prompt cache: {self.last_usage['cached_tokens']}/"
+                    f"{self.last_usage.get('prompt_tokens', 0)} tokens cached"
+                )
+            return result
 
         except requests.Timeout:
             raise LLMTimeoutError(
@@ -198,16 +214,12 @@ class OpenRouterAdapter(LLMClient):
         model: Optional[str] = None,
     ) -> LLMResponse:
         """Send a chat message and get a response."""
-        messages = []
-
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        messages.append({"role": "user", "content": message})
+        use_model = model or self._model
+        layout = build_layout(message, system_prompt=system_prompt)
 
         result = self._make_request(
-            messages=messages,
-            model=model,
+            messages=layout.messages(cache_control=supports_cache_control(use_model)),
+            model=use_model,
             temperature=temperature,
             max_tokens=max_tokens,
             timeout=timeout,
@@ -225,6 +237,7 @@ class OpenRouterAdapter(LLMClient):
             usage=usage,
             finish_reason=choice.get("finish_reason"),
             raw_response=result,
+            prefix_hash=layout.prefix_hash,
         )
 
     def chat_json(
@@ -236,20 +249,12 @@ class OpenRouterAdapter(LLMClient):
         model: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Send a chat message and get a JSON response."""
-        # Build system prompt for JSON output
-        json_system = system_prompt or ""
-        if schema:
-            json_system += f"\n\nYou must respond with valid JSON matching this schema:\n{json.dumps(schema, indent=2)}"
-        else:
-            json_system += "\n\nYou must respond with valid JSON only. No other text."
-
-        messages = [
-            {"role": "system", "content": json_system},
-            {"role": "user", "content": message},
-        ]
+        # Format spec and system prompt form the cacheable prefix
+        use_model = model or self._model
+        layout = build_layout(message, system_prompt=system_prompt, schema=schema, json_mode=True)
+        messages = layout.messages(cache_control=supports_cache_control(use_model))
 
         # Use JSON mode if model supports it
-        use_model = model or self._model
         response_format = None
         if any(m in use_model for m in JSON_CAPABLE_MODELS):
             response_format = {"type": "json_object"}
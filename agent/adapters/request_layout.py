@@ -0,0 +1,124 @@
+"""
+Cache-friendly request layout for OpenAI-compatible chat endpoints.
+
+Providers that cache prompts (OpenAI automatically, Anthropic and Gemini models
+on OpenRouter via ``cache_control`` breakpoints) reuse work for the longest
+byte-identical *prefix* of a request. Requests are therefore laid out as:
+
+  system message   output-format spec (the JSON schema), then the caller's
+                   system prompt -- the same bytes for every call from a
+                   given call site
+  user message     per-call content (goal, observations, timestamps, ...)
+
+Schemas are serialized with sorted keys, so a schema produces the same text no
+matter in which order its dict was built or loaded. Anything volatile passed
+as ``context`` goes into the user message, never into the prefix.
+
+Usage blocks from the responses are normalized so ``usage["cached_tokens"]``
+is always present (0 when the backend does not report it).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+JSON_SCHEMA_INSTRUCTION = "You must respond with valid JSON matching this schema:"
+JSON_ONLY_INSTRUCTION = "You must respond with valid JSON only. No other text."
+
+# Model families on OpenRouter that only cache with explicit breakpoints.
+_CACHE_CONTROL_PREFIXES = ("anthropic/", "google/gemini")
+
+
+def schema_text(schema: Dict[str, Any]) -> str:
+    """Deterministic rendering of ``schema`` for the prompt prefix."""
+    return json.dumps(schema, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+@dataclass(frozen=True)
+class RequestLayout:
+    """A request split into a static ``prefix`` and a per-call ``suffix``."""
+
+    prefix: str
+    suffix: str
+
+    @property
+    def prefix_hash(self) -> str:
+        return hashlib.sha256(self.prefix.encode("utf-8")).hexdigest()[:16]
+
+    def messages(self, *, cache_control: bool = False) -> List[Dict[str, Any]]:
+        messages: List[Dict[str, Any]] = []
+        if self.prefix:
+            if cache_control:
+                content: Any = [{"type": "text", "text": self.prefix, "cache_control": {"type": "ephemeral"}}]
+            else:
+                content = self.prefix
+            messages.append({"role": "system", "content": content})
+        messages.append({"role": "user", "content": self.suffix})
+        return messages
+
+
+def build_layout(
+    message: str,
+    *,
+    system_prompt: Optional[str] = None,
+    schema: Optional[Dict[str, Any]] = None,
+    json_mode: bool = False,
+    context: Optional[str] = None,
+) -> RequestLayout:
+    """Lay out one request: format spec and system prompt first, then the message.
+
+    ``context`` is volatile per-call material (clock, recent observations) that
+    callers used to prepend to the system prompt; it is placed ahead of the
+    message in the user turn instead.
+    """
+    blocks: List[str] = []
+    if schema:
+        blocks.append(f"{JSON_SCHEMA_INSTRUCTION}\n{schema_text(schema)}")
+    elif json_mode:
+        blocks.append(JSON_ONLY_INSTRUCTION)
+    if system_prompt and system_prompt.strip():
+        blocks.append(system_prompt.strip())
+    suffix = message if not context else f"{context.strip()}\n\n{message}"
+    return RequestLayout(prefix="\n\n".join(blocks), suffix=suffix)
+
+
+def supports_cache_control(model: str) -> bool:
+    """Whether ``model`` (an OpenRouter slug) needs explicit cache breakpoints."""
+    return str(model or "").startswith(_CACHE_CONTROL_PREFIXES)
+
+
+def cached_prompt_tokens(usage: Optional[Dict[str, Any]]) -> int:
+    """Prompt tokens served from the provider cache, as reported in ``usage``."""
+    if not isinstance(usage, dict):
+        return 0
+    details = usage.get("prompt_tokens_details")
+    candidates = (
+        details.get("cached_tokens") if isinstance(details, dict) else None,
+        usage.get("cache_read_input_tokens"),
+        usage.get("cached_tokens"),
+    )
+    for value in candidates:
+        if isinstance(value, (int, float)) and value > 0:
+            return int(value)
+    return 0
+
+
+def normalize_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of ``usage`` with ``cached_tokens`` filled in."""
+    data = dict(usage) if isinstance(usage, dict) else {}
+    data["cached_tokens"] = cached_prompt_tokens(data)
+    return data
+
+
+__all__ = [
+    "JSON_ONLY_INSTRUCTION",
+    "JSON_SCHEMA_INSTRUCTION",
+    "RequestLayout",
+    "build_layout",
+    "cached_prompt_tokens",
+    "normalize_usage",
+    "schema_text",
+    "supports_cache_control",
+]
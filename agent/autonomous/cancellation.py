@@ -0,0 +1,300 @@
+"""Cancellation tokens that stop in-flight work, not just the wait for it.
+
+A run owns one ``CancellationToken``. It fires when the run deadline
+(``RunnerConfig.timeout_seconds``) passes, when the kill switch trips (a
+``KillSwitchWatcher`` polls it in the background instead of between steps),
+or when ``AgentRunner.cancel()`` is called. The token is context-local like the
+retry deadline, so helper threads started with ``in_current_context`` see it.
+
+Blocking helpers register with the current token and terminate the work when
+it fires:
+
+- ``run_process`` kills the child's whole process group (``codex exec``,
+  ``shell_exec``, ``python_exec``)
+- ``wait_future`` cancels the future it waits on (browser-pool page calls)
+- ``HttpPool`` shuts down the socket of the request in flight
+
+Each then raises ``RunCancelledError``.
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from .exceptions import RunCancelledError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_CURRENT: ContextVar[Optional["CancellationToken"]] = ContextVar("cancellation_token", default=None)
+
+
+class CancellationToken:
+    """One-shot cancel signal with an optional deadline and cancel callbacks."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_key = 0
+        self.reason: Optional[str] = None
+        self.expires_at: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        if timeout is not None and timeout > 0:
+            self.expires_at = time.monotonic() + timeout
+            self._timer = threading.Timer(timeout, self.cancel, args=("deadline",))
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def clamp(self, timeout: Optional[float]) -> Optional[float]:
+        """``timeout`` shortened to end by the deadline (None stays None without a deadline)."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(float(timeout), remaining)
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Fire the token and run its callbacks; False if it had already fired."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+        logger.info("Cancelling in-flight work: %s (%d pending)", reason, len(callbacks))
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.debug("Cancel callback failed: %s", exc)
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` when the token fires (now, if it already has); returns an unregister function."""
+        with self._lock:
+            if not self._event.is_set():
+                key = self._next_key
+                self._next_key += 1
+                self._callbacks[key] = callback
+
+                def _unregister() -> None:
+                    with self._lock:
+                        self._callbacks.pop(key, None)
+
+                return _unregister
+        callback()
+        return lambda: None
+
+    @contextmanager
+    def registered(self, callback: Callable[[], None]) -> Iterator[None]:
+        unregister = self.on_cancel(callback)
+        try:
+            yield
+        finally:
+            unregister()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RunCancelledError(self.reason or "cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the token fires or ``timeout`` passes; True if it fired."""
+        return self._event.wait(timeout)
+
+    def close(self) -> None:
+        """Stop the deadline timer once the work it guards has finished."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+def current_token() -> Optional[CancellationToken]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def use_token(token: Optional[CancellationToken]) -> Iterator[Optional[CancellationToken]]:
+    """Make ``token`` the current one for this context (None detaches from any outer token)."""
+    reset = _CURRENT.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT.reset(reset)
+
+
+def raise_if_cancelled() -> None:
+    token = _CURRENT.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def is_cancelled() -> bool:
+    token = _CURRENT.get()
+    return token is not None and token.cancelled
+
+
+class KillSwitchWatcher:
+    """Poll ``check`` on a daemon thread and cancel ``token`` with reason ``kill_switch``."""
+
+    def __init__(self, token: CancellationToken, check: Callable[[], bool], interval: float = 0.5):
+        self.token = token
+        self.check = check
+        self.interval = max(0.05, float(interval))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "KillSwitchWatcher":
+        if self._poll():
+            return self
+        self._thread = threading.Thread(target=self._run, name="kill-switch", daemon=True)
+        self._thread.start()
+        return self
+
+    def _poll(self) -> bool:
+        try:
+            tripped = bool(self.check())
+        except Exception:
+            tripped = False
+        if tripped:
+            self.token.cancel("kill_switch")
+        return tripped
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.token.cancelled or self._poll():
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+
+# ---------------------------------------------------------------------------
+# Blocking helpers
+# ---------------------------------------------------------------------------
+
+
+def _new_process_group() -> Dict[str, Any]:
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(proc: "subprocess.Popen[Any]") -> None:
+    """Kill a process started by ``run_process`` together with everything it spawned."""
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                capture_output=True,
+                timeout=10,
+            )
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+def run_process(
+    args: Any,
+    *,
+    input: Optional[Any] = None,
+    timeout: Optional[float] = None,
+    capture_output: bool = False,
+    token: Optional[CancellationToken] = None,
+    **popen_kwargs: Any,
+) -> "subprocess.CompletedProcess[Any]":
+    """``subprocess.run`` that kills the whole process tree on timeout or cancellation.
+
+    Takes ``subprocess.run``'s arguments; ``token`` defaults to the current one
+    and also caps ``timeout`` at its deadline. Raises ``subprocess.TimeoutExpired``
+    like ``subprocess.run`` and ``RunCancelledError`` when the token fires.
+    """
+    token = token if token is not None else current_token()
+    if token is not None:
+        token.raise_if_cancelled()
+        timeout = token.clamp(timeout)
+    if capture_output:
+        popen_kwargs["stdout"] = subprocess.PIPE
+        popen_kwargs["stderr"] = subprocess.PIPE
+    if input is not None:
+        popen_kwargs["stdin"] = subprocess.PIPE
+    popen_kwargs.update(_new_process_group())
+
+    with subprocess.Popen(args, **popen_kwargs) as proc:
+        unregister = token.on_cancel(lambda: kill_process_tree(proc)) if token is not None else (lambda: None)
+        try:
+            stdout, stderr = proc.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(proc)
+            stdout, stderr = proc.communicate()
+            if token is not None and token.cancelled:
+                raise RunCancelledError(token.reason or "cancelled") from None
+            raise subprocess.TimeoutExpired(proc.args, timeout, output=stdout, stderr=stderr) from None
+        except BaseException:
+            kill_process_tree(proc)
+            raise
+        finally:
+            unregister()
+    if token is not None and token.cancelled and proc.returncode != 0:
+        raise RunCancelledError(token.reason or "cancelled")
+    return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+
+def wait_future(
+    future: "concurrent.futures.Future[T]",
+    timeout: Optional[float] = None,
+    *,
+    token: Optional[CancellationToken] = None,
+) -> T:
+    """``future.result(timeout)`` that cancels the future when the token fires."""
+    token = token if token is not None else current_token()
+    if token is None:
+        return future.result(timeout)
+    with token.registered(future.cancel):
+        try:
+            return future.result(token.clamp(timeout))
+        except concurrent.futures.CancelledError:
+            if token.cancelled:
+                raise RunCancelledError(token.reason or "cancelled") from None
+            raise
+
+
+__all__ = [
+    "CancellationToken",
+    "KillSwitchWatcher",
+    "current_token",
+    "is_cancelled",
+    "kill_process_tree",
+    "raise_if_cancelled",
+    "run_process",
+    "use_token",
+    "wait_future",
+]
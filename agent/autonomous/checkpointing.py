@@ -1,8 +1,13 @@
 import logging
 import json
+import os
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
+from uuid import uuid4
+
+from .pydantic_compat import model_dump
+from .state import AgentState
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +20,7 @@ class CheckpointManager:
     def save_checkpoint(self, step_num: int, state: Dict[str, Any]) -> Path:
         checkpoint_path = self.checkpoint_dir / f"checkpoint_{step_num:04d}.json"
         checkpoint_data = {"step": step_num, "timestamp": datetime.now(timezone.utc).isoformat(), "state": state}
-        checkpoint_path.write_text(json.dumps(checkpoint_data, indent=2))
+        checkpoint_path.write_text(json.dumps(checkpoint_data, ensure_ascii=False, separators=(",", ":"), default=str))
         return checkpoint_path
     
     def load_checkpoint(self, step_num: int) -> Optional[Dict[str, Any]]:
@@ -66,3 +71,167 @@ class CheckpointManager:
                 if self.delete_checkpoint(step):
                     deleted += 1
         return deleted
+
+
+def _compact_json(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class IncrementalCheckpointer:
+    """Run checkpoint as a compact snapshot plus an append-only delta log.
+
+    ``checkpoint.json`` holds a full snapshot tagged with a random ``snapshot_id``.
+    Each ``save()`` appends one line to ``checkpoint.log.jsonl`` containing only
+    what changed since the previous save: observations dropped from the front,
+    observations appended, and the small scalar fields. Every ``snapshot_every``
+    saves (or when the observation list was rewritten rather than extended) a new
+    snapshot is written atomically and the log is restarted. Deltas whose
+    ``base`` does not match the snapshot are ignored, so a crash between the two
+    writes cannot corrupt a resume.
+    """
+
+    SNAPSHOT_NAME = "checkpoint.json"
+    LOG_NAME = "checkpoint.log.jsonl"
+
+    def __init__(self, run_dir: Path, *, snapshot_every: int = 25):
+        self.run_dir = run_dir
+        self.snapshot_every = max(1, snapshot_every)
+        self._snapshot_id: Optional[str] = None
+        self._seq = 0
+        self._deltas_since_snapshot = 0
+        self._persisted: List[Any] = []
+        self._summary: Optional[str] = None
+        self._plan_json: Optional[str] = None
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.run_dir / self.SNAPSHOT_NAME
+
+    @property
+    def log_path(self) -> Path:
+        return self.run_dir / self.LOG_NAME
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def save(self, state: AgentState, meta: Dict[str, Any]) -> int:
+        """Persist ``state``; returns the sequence number of this save."""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        plan_json = _compact_json(model_dump(state.current_plan)) if state.current_plan else None
+        drop = self._common_offset(state.observations)
+        if (
+            self._snapshot_id is None
+            or drop is None
+            or self._deltas_since_snapshot >= self.snapshot_every
+        ):
+            self._write_snapshot(state, meta, plan_json)
+            return self._seq
+
+        self._seq += 1
+        kept = len(self._persisted) - drop
+        delta: Dict[str, Any] = {
+            "base": self._snapshot_id,
+            "seq": self._seq,
+            "meta": meta,
+            "drop": drop,
+            "append": [model_dump(o) for o in state.observations[kept:]],
+            "current_step_idx": state.current_step_idx,
+            "last_action_signature": state.last_action_signature,
+        }
+        if state.rolling_summary != self._summary:
+            delta["rolling_summary"] = state.rolling_summary
+        if plan_json != self._plan_json:
+            delta["current_plan"] = json.loads(plan_json) if plan_json else None
+        with self.log_path.open("a", encoding="utf-8") as f:
+            f.write(_compact_json(delta) + "\n")
+        self._deltas_since_snapshot += 1
+        self._remember(state, plan_json)
+        return self._seq
+
+    def _common_offset(self, observations: List[Any]) -> Optional[int]:
+        """How many persisted observations were dropped from the front, or None
+        if the current list is not "persisted tail + new items"."""
+        if not self._persisted:
+            return 0
+        if not observations:
+            return len(self._persisted)
+        for start, obs in enumerate(self._persisted):
+            if obs is observations[0]:
+                tail = self._persisted[start:]
+                if len(tail) <= len(observations) and all(a is b for a, b in zip(tail, observations)):
+                    return start
+                return None
+        # Nothing persisted survives: only valid if every current item is new.
+        persisted_ids = {id(o) for o in self._persisted}
+        if any(id(o) in persisted_ids for o in observations):
+            return None
+        return len(self._persisted)
+
+    def _remember(self, state: AgentState, plan_json: Optional[str]) -> None:
+        self._persisted = list(state.observations)
+        self._summary = state.rolling_summary
+        self._plan_json = plan_json
+
+    def _write_snapshot(self, state: AgentState, meta: Dict[str, Any], plan_json: Optional[str]) -> None:
+        self._snapshot_id = uuid4().hex
+        self._seq += 1
+        payload = {
+            **meta,
+            "format": "incremental",
+            "snapshot_id": self._snapshot_id,
+            "seq": self._seq,
+            "state": state.to_dict(),
+        }
+        tmp = self.snapshot_path.with_name(self.SNAPSHOT_NAME + ".tmp")
+        tmp.write_text(_compact_json(payload), encoding="utf-8")
+        os.replace(tmp, self.snapshot_path)
+        try:
+            self.log_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._deltas_since_snapshot = 0
+        self._remember(state, plan_json)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional[Dict[str, Any]]:
+        """Load a checkpoint (snapshot + replayed deltas, or a legacy full file)."""
+        if path.is_dir():
+            path = path / cls.SNAPSHOT_NAME
+        if not path.is_file():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8", errors="replace"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get("format") != "incremental":
+            return data
+        state = dict(data.get("state") or {})
+        observations = list(state.get("observations") or [])
+        seq = int(data.get("seq") or 0)
+        log_path = path.with_name(cls.LOG_NAME)
+        try:
+            lines = log_path.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            try:
+                delta = json.loads(line)
+            except ValueError:
+                break  # torn final write
+            if delta.get("base") != data.get("snapshot_id"):
+                continue
+            if int(delta.get("seq") or 0) != seq + 1:
+                break
+            seq += 1
+            observations = observations[int(delta.get("drop") or 0):] + list(delta.get("append") or [])
+            for key in ("rolling_summary", "current_plan", "current_step_idx", "last_action_signature"):
+                if key in delta:
+                    state[key] = delta[key]
+            data.update(delta.get("meta") or {})
+        state["observations"] = observations
+        data["state"] = state
+        data["seq"] = seq
+        return data
@@ -45,10 +45,23 @@ class RunnerConfig:
     tool_retry_backoff_seconds: float = 0.8
     llm_max_retries: int = 2
     llm_retry_backoff_seconds: float = 1.2
+    retry_budget_ratio: Optional[float] = 0.2
+    """Retries allowed per first attempt, shared by every LLM/tool retry layer in a run (None disables)."""
+    parallel_tool_workers: int = 4
+    """Max concurrent calls when a step batches independent read-only tools (1 disables batching)."""
+    speculative_planning: bool = False
+    """ReAct only: plan the next step while a slow side-effecting tool runs, assuming it succeeds."""
+    speculative_min_tool_seconds: float = 1.0
+    profiling: bool = False
+    """Record step spans and write profile.trace.json / profile.otlp.json into the run dir (or AGENT_PROFILING=1)."""
+    profile_sample_interval_ms: Optional[float] = None
+    """With profiling on, also sample Python stacks this often into profile.folded (flame graph input)."""
 
     def __post_init__(self) -> None:
         if self.max_steps <= 0:
             raise ConfigurationError("max_steps must be > 0")
+        if self.parallel_tool_workers <= 0:
+            raise ConfigurationError("parallel_tool_workers must be > 0")
         if self.timeout_seconds <= 0:
             raise ConfigurationError("timeout_seconds must be > 0")
         if self.llm_plan_timeout_seconds is not None and self.llm_plan_timeout_seconds <= 0:
@@ -57,6 +70,10 @@ class RunnerConfig:
             raise ConfigurationError("llm_plan_retry_timeout_seconds must be > 0")
         if self.llm_heartbeat_seconds is not None and self.llm_heartbeat_seconds < 0:
             raise ConfigurationError("llm_heartbeat_seconds must be >= 0")
+        if self.retry_budget_ratio is not None and self.retry_budget_ratio < 0:
+            raise ConfigurationError("retry_budget_ratio must be >= 0")
+        if self.profile_sample_interval_ms is not None and self.profile_sample_interval_ms <= 0:
+            raise ConfigurationError("profile_sample_interval_ms must be > 0")
 
 
 @dataclass(frozen=True)
@@ -66,6 +83,7 @@ class PlannerConfig:
     max_plan_steps: int = 6
     use_dppm: bool = True
     use_tot: bool = True
+    parallel_llm_calls: int = 1
 
 
 @dataclass(frozen=True)
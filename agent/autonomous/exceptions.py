@@ -54,6 +54,14 @@ class ReflectionError(AgentException):
     pass
 
 
+class RunCancelledError(AgentException):
+    """Raised when in-flight work is stopped by the run deadline, kill switch or an explicit cancel."""
+
+    def __init__(self, reason: str = "cancelled", context: Optional[Dict[str, Any]] = None):
+        super().__init__(f"run cancelled: {reason}", context)
+        self.reason = reason
+
+
 class InteractionRequiredError(AgentException):
     """Raised when human interaction is required."""
     
@@ -0,0 +1,464 @@
+"""Shared HTTP layer for the web tools.
+
+Provides pooled keep-alive sessions, streaming reads capped at ``max_bytes``,
+an on-disk cache that honors ``Cache-Control``/``ETag``/``Last-Modified``,
+and per-run dedupe of identical requests.
+
+Environment overrides:
+  TREYS_AGENT_HTTP_CACHE=0       disable the on-disk cache
+  TREYS_AGENT_HTTP_CACHE_DIR     cache directory (default: agent/memory/http_cache)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "DrCodePT-Agent/1.0"
+_CHUNK_SIZE = 64 * 1024
+_POOL_CONNECTIONS = 16
+_POOL_MAXSIZE = 32
+_MAX_CACHED_BODY_BYTES = 5_000_000
+_RUN_MEMO_MAX_ENTRIES = 128
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str] = None
+    truncated: bool = False
+    cache_status: str = "miss"
+    """One of: miss, hit, revalidated, run (per-run dedupe)."""
+
+    @property
+    def from_cache(self) -> bool:
+        return self.cache_status != "miss"
+
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding or "utf-8", errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+# ---------------------------------------------------------------------------
+# Pooled sessions
+# ---------------------------------------------------------------------------
+
+_thread_local = threading.local()
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=_POOL_CONNECTIONS, pool_maxsize=_POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = DEFAULT_USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return this thread's keep-alive session (requests.Session is not thread-safe)."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _new_session()
+        _thread_local.session = session
+    return session
+
+
+def _read_capped(resp: requests.Response, max_bytes: int) -> tuple[bytes, bool]:
+    """Stream the body and stop once ``max_bytes`` have been read."""
+    buf = bytearray()
+    truncated = False
+    try:
+        for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+            if not chunk:
+                continue
+            remaining = max_bytes - len(buf)
+            if len(chunk) >= remaining:
+                buf.extend(chunk[:remaining])
+                # Anything left in this chunk or on the wire means we cut the body short.
+                truncated = len(chunk) > remaining or _has_more(resp)
+                break
+            buf.extend(chunk)
+    finally:
+        resp.close()
+    return bytes(buf), truncated
+
+
+def _has_more(resp: requests.Response) -> bool:
+    try:
+        raw = resp.raw
+        return raw is not None and not raw.closed and bool(raw.read(1))
+    except Exception:
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Cache-Control helpers
+# ---------------------------------------------------------------------------
+
+_DIRECTIVE_RE = re.compile(r"([a-zA-Z\-]+)(?:=\"?([^\",]*)\"?)?")
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for name, arg in _DIRECTIVE_RE.findall(value or ""):
+        directives[name.lower()] = arg or None
+    return directives
+
+
+def _freshness_lifetime(headers: Dict[str, str], now: float) -> Optional[float]:
+    cc = _parse_cache_control(headers.get("cache-control", ""))
+    for key in ("s-maxage", "max-age"):
+        if cc.get(key):
+            try:
+                return max(0.0, float(cc[key]))  # type: ignore[arg-type]
+            except ValueError:
+                pass
+    expires = headers.get("expires")
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - now)
+        except Exception:
+            return 0.0
+    return None
+
+
+def _lower_headers(headers: Any) -> Dict[str, str]:
+    return {str(k).lower(): str(v) for k, v in dict(headers or {}).items()}
+
+
+# ---------------------------------------------------------------------------
+# On-disk cache
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class _CacheEntry:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    encoding: Optional[str]
+    truncated: bool
+    stored_at: float
+    expires_at: Optional[float]
+    must_revalidate: bool
+    body_path: Path
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        h = _lower_headers(self.headers)
+        out: Dict[str, str] = {}
+        if h.get("etag"):
+            out["If-None-Match"] = h["etag"]
+        if h.get("last-modified"):
+            out["If-Modified-Since"] = h["last-modified"]
+        return out
+
+    def is_fresh(self, now: float) -> bool:
+        if self.must_revalidate or self.expires_at is None:
+            return False
+        return now < self.expires_at
+
+
+class HttpCache:
+    """File-backed HTTP cache: one ``<key>.json`` metadata file plus ``<key>.body``."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        shard = self.root / key[:2]
+        return shard / f"{key}.json", shard / f"{key}.body"
+
+    def get(self, key: str) -> Optional[_CacheEntry]:
+        meta_path, body_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not body_path.is_file():
+            return None
+        return _CacheEntry(
+            url=meta.get("url", ""),
+            status_code=int(meta.get("status_code", 200)),
+            headers=dict(meta.get("headers") or {}),
+            encoding=meta.get("encoding"),
+            truncated=bool(meta.get("truncated")),
+            stored_at=float(meta.get("stored_at", 0.0)),
+            expires_at=meta.get("expires_at"),
+            must_revalidate=bool(meta.get("must_revalidate")),
+            body_path=body_path,
+            meta=meta,
+        )
+
+    def read_body(self, entry: _CacheEntry) -> Optional[bytes]:
+        try:
+            return entry.body_path.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, key: str, resp: HttpResponse, *, now: float) -> bool:
+        headers = _lower_headers(resp.headers)
+        cc = _parse_cache_control(headers.get("cache-control", ""))
+        if "no-store" in cc or "private" in cc:
+            return False
+        if resp.status_code != 200 or len(resp.content) > _MAX_CACHED_BODY_BYTES:
+            return False
+        lifetime = _freshness_lifetime(headers, now)
+        has_validators = bool(headers.get("etag") or headers.get("last-modified"))
+        if not has_validators and not lifetime:
+            # Nothing to revalidate with and no freshness window: caching is useless.
+            return False
+        meta = {
+            "url": resp.url,
+            "status_code": resp.status_code,
+            "headers": dict(resp.headers),
+            "encoding": resp.encoding,
+            "truncated": resp.truncated,
+            "stored_at": now,
+            "expires_at": (now + lifetime) if lifetime is not None else None,
+            "must_revalidate": "no-cache" in cc,
+        }
+        meta_path, body_path = self._paths(key)
+        try:
+            with self._lock:
+                meta_path.parent.mkdir(parents=True, exist_ok=True)
+                _atomic_write(body_path, resp.content)
+                _atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        except OSError as exc:
+            logger.debug("http cache write failed for %s: %s", resp.url, exc)
+            return False
+        return True
+
+    def touch(self, key: str, entry: _CacheEntry, headers: Dict[str, str], *, now: float) -> None:
+        """Refresh metadata after a 304 Not Modified."""
+        merged = dict(entry.headers)
+        merged.update(dict(headers or {}))
+        lifetime = _freshness_lifetime(_lower_headers(merged), now)
+        meta = dict(entry.meta)
+        meta.update(
+            {
+                "headers": merged,
+                "stored_at": now,
+                "expires_at": (now + lifetime) if lifetime is not None else None,
+            }
+        )
+        meta_path, _ = self._paths(key)
+        try:
+            with self._lock:
+                _atomic_write(meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        except OSError:
+            pass
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("TREYS_AGENT_HTTP_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _default_cache_dir() -> Path:
+    env_dir = os.getenv("TREYS_AGENT_HTTP_CACHE_DIR") or ""
+    if env_dir:
+        return Path(env_dir)
+    return Path(__file__).resolve().parents[1] / "memory" / "http_cache"
+
+
+_cache_lock = threading.Lock()
+_caches: Dict[Path, HttpCache] = {}
+
+
+def get_cache() -> Optional[HttpCache]:
+    if not _cache_enabled():
+        return None
+    root = _default_cache_dir()
+    with _cache_lock:
+        cache = _caches.get(root)
+        if cache is None:
+            cache = HttpCache(root)
+            _caches[root] = cache
+        return cache
+
+
+# ---------------------------------------------------------------------------
+# Per-run dedupe
+# ---------------------------------------------------------------------------
+
+_run_lock = threading.Lock()
+_run_memo: Dict[str, "OrderedDict[str, HttpResponse]"] = {}
+_inflight: Dict[tuple[str, str], threading.Event] = {}
+
+
+def _memo_get(run_id: str, key: str) -> Optional[HttpResponse]:
+    with _run_lock:
+        memo = _run_memo.get(run_id)
+        if not memo or key not in memo:
+            return None
+        memo.move_to_end(key)
+        return memo[key]
+
+
+def _memo_put(run_id: str, key: str, resp: HttpResponse) -> None:
+    with _run_lock:
+        memo = _run_memo.setdefault(run_id, OrderedDict())
+        memo[key] = resp
+        memo.move_to_end(key)
+        while len(memo) > _RUN_MEMO_MAX_ENTRIES:
+            memo.popitem(last=False)
+
+
+def clear_run(run_id: str) -> None:
+    """Drop the per-run dedupe table for ``run_id``."""
+    with _run_lock:
+        _run_memo.pop(run_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def _cache_key(url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> str:
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    hdrs = "\n".join(f"{k.lower()}:{v}" for k, v in sorted(headers.items()))
+    raw = f"GET {url}?{query}\n{hdrs}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _satisfies(resp: HttpResponse, max_bytes: int) -> bool:
+    """A stored body can answer a request if it was complete or is long enough."""
+    return not resp.truncated or len(resp.content) >= max_bytes
+
+
+def _cap(resp: HttpResponse, max_bytes: int, cache_status: str) -> HttpResponse:
+    truncated = resp.truncated or len(resp.content) > max_bytes
+    return replace(resp, content=resp.content[:max_bytes], truncated=truncated, cache_status=cache_status)
+
+
+def http_get(
+    url: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 15,
+    max_bytes: int = 1_000_000,
+    run_id: Optional[str] = None,
+    use_cache: bool = True,
+) -> HttpResponse:
+    """GET ``url`` through the pooled session, disk cache and per-run dedupe.
+
+    Raises ``requests.RequestException`` on transport errors, like ``requests.get``.
+    """
+    max_bytes = max(0, int(max_bytes))
+    req_headers = dict(headers or {})
+    key = _cache_key(url, params, req_headers)
+    cacheable = use_cache and not any(k.lower() == "authorization" for k in req_headers)
+
+    if run_id:
+        memo = _memo_get(run_id, key)
+        if memo is not None and _satisfies(memo, max_bytes):
+            return _cap(memo, max_bytes, "run")
+        # Coalesce concurrent identical requests within a run.
+        with _run_lock:
+            event = _inflight.get((run_id, key))
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                _inflight[(run_id, key)] = event
+        if not owner:
+            event.wait(timeout)
+            memo = _memo_get(run_id, key)
+            if memo is not None and _satisfies(memo, max_bytes):
+                return _cap(memo, max_bytes, "run")
+        try:
+            resp = _fetch(url, params, req_headers, timeout, max_bytes, key, cacheable)
+            if resp.status_code < 400:
+                _memo_put(run_id, key, resp)
+            return resp
+        finally:
+            if owner:
+                with _run_lock:
+                    _inflight.pop((run_id, key), None)
+                event.set()
+    return _fetch(url, params, req_headers, timeout, max_bytes, key, cacheable)
+
+
+def _fetch(
+    url: str,
+    params: Optional[Dict[str, Any]],
+    headers: Dict[str, str],
+    timeout: float,
+    max_bytes: int,
+    key: str,
+    cacheable: bool,
+) -> HttpResponse:
+    cache = get_cache() if cacheable else None
+    entry = cache.get(key) if cache else None
+    now = time.time()
+    cached: Optional[HttpResponse] = None
+    if entry is not None:
+        body = cache.read_body(entry) if cache else None
+        if body is not None:
+            cached = HttpResponse(
+                url=entry.url,
+                status_code=entry.status_code,
+                headers=entry.headers,
+                content=body,
+                encoding=entry.encoding,
+                truncated=entry.truncated,
+            )
+            if not _satisfies(cached, max_bytes):
+                cached = None
+    if cached is not None and entry is not None and entry.is_fresh(now):
+        return _cap(cached, max_bytes, "hit")
+
+    send_headers = dict(headers)
+    if cached is not None and entry is not None:
+        send_headers.update(entry.validators)
+
+    resp = get_session().get(url, params=params, headers=send_headers, timeout=timeout, stream=True)
+    if resp.status_code == 304 and cached is not None and entry is not None:
+        resp.close()
+        if cache:
+            cache.touch(key, entry, dict(resp.headers), now=now)
+        return _cap(cached, max_bytes, "revalidated")
+
+    content, truncated = _read_capped(resp, max_bytes)
+    result = HttpResponse(
+        url=resp.url,
+        status_code=resp.status_code,
+        headers=dict(resp.headers),
+        content=content,
+        encoding=resp.encoding,
+        truncated=truncated,
+    )
+    if cache:
+        cache.put(key, result, now=now)
+    return result
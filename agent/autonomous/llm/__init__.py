@@ -1,4 +1,3 @@
-from .stub import StubLLM
-
-__all__ = ["StubLLM"]
+from .stub import ScriptedLLM, StubLLM
 
+__all__ = ["ScriptedLLM", "StubLLM"]
@@ -45,3 +45,57 @@ class StubLLM:
             schema_path=schema_path,
             timeout_seconds=timeout_seconds,
         )
+
+
+@dataclass
+class ScriptedLLM:
+    """
+    Deterministic LLM for benchmarks and long-running loop tests.
+
+    Answers by schema instead of by call order: each planning call returns the
+    next step of ``steps`` (then an empty plan, which ends the run), reflections
+    report success and condition checks pass once every step was handed out.
+    Any other schema gets ``{}`` unless ``fixed`` supplies a response for its
+    file name.
+    """
+
+    steps: List[Dict[str, Any]]
+    goal: str = "scripted"
+    fixed: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    provider: str = "scripted"
+    model: str = "scripted"
+    calls: List[str] = field(default_factory=list)
+    _idx: int = 0
+
+    def complete_json(
+        self,
+        prompt: str,  # noqa: ARG002
+        *,
+        schema_path: Path,
+        timeout_seconds: Optional[int] = None,  # noqa: ARG002
+    ) -> Dict[str, Any]:
+        name = Path(schema_path).name
+        self.calls.append(name)
+        if name in self.fixed:
+            return dict(self.fixed[name])
+        if name.startswith("plan_next_step") or name.startswith("plan."):
+            if self._idx >= len(self.steps):
+                return {"goal": self.goal, "steps": []}
+            step = self.steps[self._idx]
+            self._idx += 1
+            return {"goal": self.goal, "steps": [step]}
+        if name.startswith("reflection"):
+            return {"status": "success", "explanation_short": "scripted", "next_hint": ""}
+        if name.startswith("condition_check"):
+            done = self._idx >= len(self.steps)
+            return {"ok": done, "failed": [] if done else ["scripted steps remain"]}
+        return {}
+
+    def reason_json(
+        self,
+        prompt: str,
+        *,
+        schema_path: Path,
+        timeout_seconds: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return self.complete_json(prompt, schema_path=schema_path, timeout_seconds=timeout_seconds)
@@ -1,4 +1,4 @@
+from .embeddings import EmbeddingService, get_embedding_service
 from .sqlite_store import SqliteMemoryStore
 
-__all__ = ["SqliteMemoryStore"]
-
+__all__ = ["EmbeddingService", "SqliteMemoryStore", "get_embedding_service"]
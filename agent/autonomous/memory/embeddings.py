@@ -0,0 +1,439 @@
+"""Process-wide embedding service.
+
+The memory store, the skill library and every swarm subagent thread share
+one ``EmbeddingService``. It owns a single model instance, so the weights are
+loaded once per process, and it serves requests as follows:
+
+* the model is loaded lazily on first use, behind a lock, and a failed load is
+  not retried (callers fall back to hash embeddings);
+* ``encode`` requests from concurrent threads are coalesced by a single
+  background worker: while one batch is running on the model, new requests
+  queue up and go out together as the next batch;
+* vectors are cached on disk in SQLite, keyed by model and SHA-256 of the
+  text, so re-embedding the same skill, memory row or query is a lookup.
+
+Environment overrides:
+  AGENT_MEMORY_EMBED_MODEL         sentence-transformers model (default: all-MiniLM-L6-v2)
+  AGENT_MEMORY_EMBED_BACKEND       "hash" to skip the model, "onnx" for ONNX Runtime inference
+  AGENT_MEMORY_EMBED_QUANTIZE=1    int8 inference (dynamic quantization, or a quantized ONNX file)
+  AGENT_MEMORY_EMBED_ONNX_FILE     ONNX file inside the model repo (e.g. onnx/model_qint8_avx512.onnx)
+  AGENT_MEMORY_EMBED_MAX_BATCH     largest batch handed to the model (default: 64)
+  AGENT_MEMORY_EMBED_CACHE=0       disable the disk cache
+  AGENT_MEMORY_EMBED_CACHE_PATH    cache database (default: agent/memory/embedding_cache.sqlite3)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import queue
+import re
+import sqlite3
+import threading
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_EMBED_DIM = 256
+DEFAULT_EMBED_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_MAX_BATCH = 64
+_QUANTIZED_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+_EMBED_ENV_VAR = "AGENT_MEMORY_EMBED_MODEL"
+_EMBED_BACKEND_ENV_VAR = "AGENT_MEMORY_EMBED_BACKEND"
+_QUANTIZE_ENV_VAR = "AGENT_MEMORY_EMBED_QUANTIZE"
+_ONNX_FILE_ENV_VAR = "AGENT_MEMORY_EMBED_ONNX_FILE"
+_MAX_BATCH_ENV_VAR = "AGENT_MEMORY_EMBED_MAX_BATCH"
+_CACHE_ENV_VAR = "AGENT_MEMORY_EMBED_CACHE"
+_CACHE_PATH_ENV_VAR = "AGENT_MEMORY_EMBED_CACHE_PATH"
+
+_HASH_BACKENDS = {"hash", "fallback", "simple"}
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+_FALSY = {"0", "false", "no", "n", "off"}
+
+
+@dataclass(frozen=True)
+class Embedding:
+    vector: List[float]
+    norm: float
+    model: str
+    dim: int
+
+    def as_tuple(self) -> Tuple[List[float], float, str, int]:
+        return self.vector, self.norm, self.model, self.dim
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def hash_embed(text: str, dim: int = FALLBACK_EMBED_DIM) -> Embedding:
+    """Bag-of-tokens hashing embedding used when no model is available."""
+    vec = [0.0] * dim
+    for tok in _tokenize(text):
+        h = int(hashlib.md5(tok.encode("utf-8", errors="replace")).hexdigest(), 16)
+        vec[h % dim] += 1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return Embedding(vec, norm, f"hash{dim}", dim)
+
+
+def _embedding(vec: Sequence[float], model: str) -> Embedding:
+    values = [float(v) for v in vec]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return Embedding(values, norm, model, len(values))
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+def _hash_backend_selected() -> bool:
+    return (os.getenv(_EMBED_BACKEND_ENV_VAR) or "").strip().lower() in _HASH_BACKENDS
+
+
+@dataclass
+class ModelHandle:
+    """A loaded model: ``encode`` maps a list of texts to one vector per text.
+
+    ``name`` is what gets recorded next to stored vectors; ``variant`` (runtime,
+    quantization) only separates cache entries.
+    """
+
+    name: str
+    encode: Callable[[List[str]], Sequence[Sequence[float]]]
+    variant: str = "torch"
+
+
+def load_sentence_transformer() -> Optional[ModelHandle]:
+    """Load the configured sentence-transformers model, or None if unavailable."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning(
+            "SentenceTransformer not installed; using hash-based embeddings. "
+            "Install with: pip install sentence-transformers"
+        )
+        return None
+    except Exception as exc:
+        logger.error(f"Unexpected error importing SentenceTransformer: {exc}", exc_info=True)
+        return None
+
+    model_name = (os.getenv(_EMBED_ENV_VAR) or DEFAULT_EMBED_MODEL).strip() or DEFAULT_EMBED_MODEL
+    backend = (os.getenv(_EMBED_BACKEND_ENV_VAR) or "").strip().lower()
+    quantize = (os.getenv(_QUANTIZE_ENV_VAR) or "").strip().lower() in _TRUTHY
+
+    model = None
+    variant = "torch"
+    if backend == "onnx":
+        onnx_file = (os.getenv(_ONNX_FILE_ENV_VAR) or "").strip() or (_QUANTIZED_ONNX_FILE if quantize else "")
+        kwargs: Dict[str, object] = {"backend": "onnx"}
+        if onnx_file:
+            kwargs["model_kwargs"] = {"file_name": onnx_file}
+        try:
+            model = SentenceTransformer(model_name, **kwargs)
+            variant = f"onnx:{onnx_file}" if onnx_file else "onnx"
+        except Exception as exc:  # pragma: no cover - needs optimum/onnxruntime
+            logger.warning("ONNX embedding backend unavailable for '%s' (%s); using torch", model_name, exc)
+    if model is None:
+        try:
+            model = SentenceTransformer(model_name)
+        except (OSError, RuntimeError, ValueError) as exc:  # pragma: no cover - model download/load failure
+            logger.warning("SentenceTransformer model load failed for '%s': %s", model_name, exc)
+            return None
+        except Exception as exc:  # pragma: no cover - unexpected failure
+            logger.error("SentenceTransformer model load failed unexpectedly for '%s': %s", model_name, exc)
+            return None
+        if quantize:
+            try:
+                import torch
+
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                variant = "torch:qint8"
+            except Exception as exc:  # pragma: no cover - torch build without quantization
+                logger.warning("Dynamic quantization unavailable (%s); using float weights", exc)
+
+    def encode(texts: List[str]) -> Sequence[Sequence[float]]:
+        return model.encode(
+            texts,
+            batch_size=max(1, len(texts)),
+            normalize_embeddings=False,
+            show_progress_bar=False,
+        )
+
+    return ModelHandle(model_name, encode, variant)
+
+
+class EmbeddingCache:
+    """SQLite store of float32 vectors keyed by (namespace, text hash)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+              namespace TEXT NOT NULL,
+              text_hash TEXT NOT NULL,
+              vector BLOB NOT NULL,
+              PRIMARY KEY (namespace, text_hash)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(keys)
+        out: Dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE namespace=? AND text_hash IN ({placeholders})",
+                    (namespace, *chunk),
+                ).fetchall()
+                for key, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    out[key] = vec.tolist()
+        return out
+
+    def put_many(self, namespace: str, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        rows = [(namespace, key, array("f", vec).tobytes()) for key, vec in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(namespace, text_hash, vector) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional[List[List[float]]] = None
+    error: Optional[BaseException] = None
+
+
+def _default_cache_path() -> Path:
+    env_path = os.getenv(_CACHE_PATH_ENV_VAR) or ""
+    if env_path:
+        return Path(env_path)
+    return Path(__file__).resolve().parents[2] / "memory" / "embedding_cache.sqlite3"
+
+
+class EmbeddingService:
+    """Shared model + micro-batching worker + disk cache. See module docstring."""
+
+    def __init__(
+        self,
+        *,
+        loader: Optional[Callable[[], Optional[ModelHandle]]] = None,
+        cache_path: Optional[Path] = None,
+        use_cache: Optional[bool] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self._loader = loader or load_sentence_transformer
+        if use_cache is None:
+            use_cache = (os.getenv(_CACHE_ENV_VAR) or "1").strip().lower() not in _FALSY
+        self._use_cache = use_cache
+        self._cache_path = cache_path
+        self._cache: Optional[EmbeddingCache] = None
+        if max_batch is None:
+            try:
+                max_batch = int(os.getenv(_MAX_BATCH_ENV_VAR) or DEFAULT_MAX_BATCH)
+            except ValueError:
+                max_batch = DEFAULT_MAX_BATCH
+        self.max_batch = max(1, max_batch)
+        self._lock = threading.Lock()
+        self._model: Optional[ModelHandle] = None
+        self._load_attempted = False
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {"texts": 0, "cache_hits": 0, "encoded": 0, "batches": 0}
+
+    # ------------------------------------------------------------------
+    # Model / cache
+    # ------------------------------------------------------------------
+
+    def model(self) -> Optional[ModelHandle]:
+        """The shared model, loading it on first call. None if it cannot load."""
+        if self._load_attempted:
+            return self._model
+        with self._lock:
+            if not self._load_attempted:
+                try:
+                    self._model = self._loader()
+                except Exception as exc:
+                    logger.error("Embedding model load failed: %s", exc, exc_info=True)
+                    self._model = None
+                self._load_attempted = True
+        return self._model
+
+    def _get_cache(self) -> Optional[EmbeddingCache]:
+        if not self._use_cache:
+            return None
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None and self._use_cache:
+                    try:
+                        self._cache = EmbeddingCache(self._cache_path or _default_cache_path())
+                    except (OSError, sqlite3.Error) as exc:
+                        logger.warning("Embedding cache unavailable: %s", exc)
+                        self._use_cache = False
+        return self._cache
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def embed(self, text: str) -> Embedding:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str]) -> List[Embedding]:
+        """Embed ``texts`` (order preserved). Safe to call from any thread."""
+        texts = list(texts)
+        if not texts:
+            return []
+        if _hash_backend_selected():
+            return [hash_embed(t) for t in texts]
+        model = self.model()
+        if model is None:
+            return [hash_embed(t) for t in texts]
+
+        namespace = f"{model.name}|{model.variant}"
+        keys = [_text_key(t) for t in texts]
+        cache = self._get_cache()
+        vectors: Dict[str, List[float]] = cache.get_many(namespace, set(keys)) if cache else {}
+        hits = sum(1 for k in keys if k in vectors)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = self._submit(list(missing.values()))
+            fresh = list(zip(missing.keys(), encoded))
+            vectors.update(fresh)
+            if cache is not None:
+                try:
+                    cache.put_many(namespace, fresh)
+                except sqlite3.Error as exc:
+                    logger.debug("Embedding cache write failed: %s", exc)
+        with self._lock:
+            self.stats["texts"] += len(texts)
+            self.stats["cache_hits"] += hits
+        return [_embedding(vectors[k], model.name) for k in keys]
+
+    def _submit(self, texts: List[str]) -> List[List[float]]:
+        request = _Request(texts)
+        self._ensure_worker()
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result or []
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                worker = threading.Thread(target=self._run_worker, name="embedding-batcher", daemon=True)
+                worker.start()
+                self._worker = worker
+
+    def _run_worker(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0].texts)
+            # Whatever queued up while the previous batch was on the model goes out together.
+            while count < self.max_batch:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(request)
+                count += len(request.texts)
+            try:
+                rows = self._encode([t for r in batch for t in r.texts])
+                pos = 0
+                for request in batch:
+                    request.result = rows[pos:pos + len(request.texts)]
+                    pos += len(request.texts)
+            except BaseException as exc:
+                for request in batch:
+                    request.error = exc
+            finally:
+                for request in batch:
+                    request.done.set()
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        model = self._model
+        if model is None:
+            raise RuntimeError("embedding model is not loaded")
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), self.max_batch):
+            out = model.encode(texts[start:start + self.max_batch])
+            rows.extend(out.tolist() if hasattr(out, "tolist") else [list(v) for v in out])
+        with self._lock:
+            self.stats["encoded"] += len(texts)
+            self.stats["batches"] += 1
+        return rows
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """The process-wide embedding service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EmbeddingService()
+    return _service
+
+
+def embed(text: str) -> Embedding:
+    """Embed one text with the shared service."""
+    return get_embedding_service().embed(text)
+
+
+def embed_many(texts: Sequence[str]) -> List[Embedding]:
+    """Embed several texts with the shared service (one batch where possible)."""
+    return get_embedding_service().embed_many(texts)
+
+
+__all__ = [
+    "DEFAULT_EMBED_MODEL",
+    "FALLBACK_EMBED_DIM",
+    "Embedding",
+    "EmbeddingCache",
+    "EmbeddingService",
+    "ModelHandle",
+    "embed",
+    "embed_many",
+    "get_embedding_service",
+    "hash_embed",
+    "load_sentence_transformer",
+]
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
 import os
+import sqlite3
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -9,6 +14,8 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
+logger = logging.getLogger(__name__)
+
 
 class ReflexionEntry(BaseModel):
     id: str
@@ -59,9 +66,7 @@ def _tokenize(text: str) -> List[str]:
     return [t for t in cleaned.split() if t]
 
 
-def _score_entry(
-    entry: ReflexionEntry, objective_tokens: List[str], error_tokens: List[str]
-) -> Tuple[float, float]:
+def _entry_tokens(entry: ReflexionEntry) -> set[str]:
     haystack = " ".join(
         [
             entry.objective or "",
@@ -71,7 +76,22 @@ def _score_entry(
             entry.outcome or "",
         ]
     )
-    hay_tokens = set(_tokenize(haystack))
+    return set(_tokenize(haystack))
+
+
+def _timestamp_epoch(value: str) -> Optional[float]:
+    # Mirrors the recency rule: only timezone-aware ISO timestamps count.
+    try:
+        ts = datetime.fromisoformat(value)
+        return (ts - datetime(1970, 1, 1, tzinfo=timezone.utc)).total_seconds()
+    except Exception:
+        return None
+
+
+def _score_entry(
+    entry: ReflexionEntry, objective_tokens: List[str], error_tokens: List[str]
+) -> Tuple[float, float]:
+    hay_tokens = _entry_tokens(entry)
     overlap = len(set(objective_tokens) & hay_tokens)
     if error_tokens:
         overlap += 2 * len(set(error_tokens) & hay_tokens)
@@ -86,21 +106,238 @@ def _score_entry(
     return float(overlap), recency
 
 
+def _entry_payload(entry: ReflexionEntry) -> Dict[str, Any]:
+    return entry.model_dump() if hasattr(entry, "model_dump") else entry.dict()
+
+
+class ReflexionIndex:
+    """SQLite store of reflexions with an inverted token index.
+
+    ``retrieve`` only touches the postings of the query tokens and loads the
+    top ``k`` payloads, so its cost follows the number of matching entries
+    rather than the size of the run history.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        self._init_schema()
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+    def _init_schema(self) -> None:
+        cur = self._conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reflexions (
+              rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+              entry_key TEXT NOT NULL UNIQUE,
+              id TEXT,
+              ts_epoch REAL,
+              payload_json TEXT NOT NULL
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reflexion_tokens (
+              token TEXT NOT NULL,
+              entry_rowid INTEGER NOT NULL,
+              PRIMARY KEY (token, entry_rowid)
+            ) WITHOUT ROWID;
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS imported_files (
+              path TEXT PRIMARY KEY,
+              offset INTEGER NOT NULL
+            );
+            """
+        )
+        cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);")
+        self._conn.commit()
+
+    def _insert(self, cur: sqlite3.Cursor, entry: ReflexionEntry) -> bool:
+        payload = json.dumps(_entry_payload(entry), ensure_ascii=False, sort_keys=True)
+        entry_key = hashlib.sha1(payload.encode("utf-8", errors="replace")).hexdigest()
+        cur.execute(
+            "INSERT OR IGNORE INTO reflexions(entry_key, id, ts_epoch, payload_json) VALUES (?, ?, ?, ?)",
+            (entry_key, entry.id, _timestamp_epoch(entry.timestamp), payload),
+        )
+        if cur.rowcount <= 0:
+            return False
+        rowid = cur.lastrowid
+        cur.executemany(
+            "INSERT OR IGNORE INTO reflexion_tokens(token, entry_rowid) VALUES (?, ?)",
+            ((tok, rowid) for tok in _entry_tokens(entry)),
+        )
+        return True
+
+    def add(self, entry: ReflexionEntry) -> bool:
+        with self._lock:
+            inserted = self._insert(self._conn.cursor(), entry)
+            self._conn.commit()
+            return inserted
+
+    def import_jsonl(self, paths: Iterable[Path]) -> int:
+        """Import JSONL reflexion files, resuming each from its last imported offset."""
+        added = 0
+        with self._lock:
+            cur = self._conn.cursor()
+            offsets = dict(cur.execute("SELECT path, offset FROM imported_files").fetchall())
+            for file_path in paths:
+                key = str(Path(file_path).resolve())
+                offset = int(offsets.get(key, 0))
+                try:
+                    with open(file_path, "rb") as handle:
+                        handle.seek(0, os.SEEK_END)
+                        size = handle.tell()
+                        if size < offset:
+                            offset = 0  # file was truncated/rewritten
+                        if size == offset:
+                            continue
+                        handle.seek(offset)
+                        data = handle.read()
+                except OSError:
+                    continue
+                # Only consume complete lines; a partial tail is picked up next time.
+                consumed = data.rfind(b"\n") + 1
+                for raw_line in data[:consumed].splitlines():
+                    if not raw_line.strip():
+                        continue
+                    try:
+                        entry = ReflexionEntry.model_validate(json.loads(raw_line))
+                    except Exception:
+                        continue
+                    if self._insert(cur, entry):
+                        added += 1
+                cur.execute(
+                    "INSERT OR REPLACE INTO imported_files(path, offset) VALUES (?, ?)",
+                    (key, offset + consumed),
+                )
+            self._conn.commit()
+        return added
+
+    def legacy_imported(self) -> bool:
+        row = self._conn.execute("SELECT value FROM meta WHERE key='legacy_imported'").fetchone()
+        return row is not None
+
+    def mark_legacy_imported(self) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('legacy_imported', ?)", (str(time.time()),))
+            self._conn.commit()
+
+    def retrieve(self, objective: str, error_signature: Optional[str], k: int = 5) -> List[ReflexionEntry]:
+        if k <= 0:
+            return []
+        weights: Dict[str, int] = {}
+        for tok in set(_tokenize(objective)):
+            weights[tok] = weights.get(tok, 0) + 1
+        for tok in set(_tokenize(error_signature or "")):
+            weights[tok] = weights.get(tok, 0) + 2
+        if not weights:
+            return []
+        values = ",".join("(?, ?)" for _ in weights)
+        params: List[Any] = []
+        for tok, weight in weights.items():
+            params.extend([tok, weight])
+        params.append(int(k))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                WITH q(token, weight) AS (VALUES {values}),
+                scored AS (
+                  SELECT t.entry_rowid AS rid, SUM(q.weight) AS overlap
+                  FROM reflexion_tokens t JOIN q ON q.token = t.token
+                  GROUP BY t.entry_rowid
+                )
+                SELECT r.payload_json FROM scored s JOIN reflexions r ON r.rowid = s.rid
+                ORDER BY s.overlap DESC, COALESCE(r.ts_epoch, -1e18) DESC
+                LIMIT ?
+                """,
+                params,
+            ).fetchall()
+        out: List[ReflexionEntry] = []
+        for (payload,) in rows:
+            try:
+                out.append(ReflexionEntry.model_validate(json.loads(payload)))
+            except Exception:
+                continue
+        return out
+
+
+_INDEX_PATH_ENV = "REFLEXION_INDEX_PATH"
+_IMPORT_LEGACY_ENV = "REFLEXION_IMPORT_LEGACY"
+_indexes_lock = threading.Lock()
+_indexes: Dict[Path, ReflexionIndex] = {}
+
+
+def _index_path() -> Path:
+    override = os.getenv(_INDEX_PATH_ENV, "").strip()
+    if override:
+        return Path(override)
+    return _runs_root() / "reflexion_index.sqlite3"
+
+
+def get_reflexion_index(*, create: bool = True) -> Optional[ReflexionIndex]:
+    """Shared index for the current runs root; imports legacy JSONL on first use.
+
+    With ``create=False`` (pure reads) a missing index is not created; None is
+    returned and the caller scans the JSONL instead.
+    """
+    path = _index_path()
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            if not create and not path.exists():
+                return None
+            try:
+                index = ReflexionIndex(path)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("Reflexion index unavailable at %s: %s", path, exc)
+                return None
+            _indexes[path] = index
+    if not index.legacy_imported():
+        if os.getenv(_IMPORT_LEGACY_ENV, "1").strip().lower() not in {"0", "false", "no"}:
+            import_legacy_reflexions(index)
+        index.mark_legacy_imported()
+    return index
+
+
+def import_legacy_reflexions(index: Optional[ReflexionIndex] = None) -> int:
+    """Import ``runs/**/reflexion.jsonl`` into the index (incremental per file)."""
+    index = index or get_reflexion_index()
+    if index is None:
+        return 0
+    return index.import_jsonl(list(_iter_reflexion_files()))
+
+
 def write_reflexion(entry: ReflexionEntry) -> Path:
     run_dir = _current_run_dir()
-    if run_dir.is_dir() and run_dir.name == "runs":
-        path = run_dir / "reflexion.jsonl"
-    else:
-        path = run_dir / "reflexion.jsonl"
+    path = run_dir / "reflexion.jsonl"
     path.parent.mkdir(parents=True, exist_ok=True)
-    line = entry.model_dump() if hasattr(entry, "model_dump") else entry.dict()
+    line = _entry_payload(entry)
     with path.open("a", encoding="utf-8", newline="\n") as handle:
         handle.write(json.dumps(line, ensure_ascii=False) + "\n")
+    index = get_reflexion_index()
+    if index is not None:
+        try:
+            index.add(entry)
+        except sqlite3.Error as exc:
+            logger.warning("Reflexion index write failed: %s", exc)
     return path
 
 
-def retrieve_reflexions(
-    objective: str, error_signature: str | None, k: int = 5
+def _scan_reflexions(
+    objective: str, error_signature: str | None, k: int
 ) -> List[ReflexionEntry]:
     objective_tokens = _tokenize(objective)
     error_tokens = _tokenize(error_signature or "")
@@ -126,3 +363,17 @@ def retrieve_reflexions(
 
     scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
     return [entry for _, _, entry in scored[: max(0, k)]]
+
+
+def retrieve_reflexions(
+    objective: str, error_signature: str | None, k: int = 5
+) -> List[ReflexionEntry]:
+    index = get_reflexion_index(create=False)
+    if index is None:
+        # No index yet, or unavailable (e.g. read-only runs dir): scan the JSONL.
+        return _scan_reflexions(objective, error_signature, k)
+    try:
+        return index.retrieve(objective, error_signature, k)
+    except sqlite3.Error as exc:
+        logger.warning("Reflexion index query failed, scanning JSONL: %s", exc)
+        return _scan_reflexions(objective, error_signature, k)
@@ -3,10 +3,9 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
-import math
 import os
-import re
 import sqlite3
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -14,111 +13,47 @@ from typing import Any, Dict, List, Literal, Optional
 
 from agent.autonomous.exceptions import DependencyError
 
+from .embeddings import get_embedding_service
+
 logger = logging.getLogger(__name__)
 
-_FAISS_AVAILABLE = False
+_FAISS_AVAILABLE: Optional[bool] = None  # unknown until the first store opens
 _FAISS_LOAD_ERROR = None
-
-try:
-    import faiss  # type: ignore
-    _FAISS_AVAILABLE = True
-    logger.info("FAISS loaded successfully for accelerated memory search")
-except ImportError as exc:  # pragma: no cover - optional dependency
-    logger.warning(
-        "FAISS not installed; using slower fallback embeddings. "
-        "Install with: pip install faiss-cpu"
-    )
-    _FAISS_LOAD_ERROR = f"ImportError: {exc}"
-except Exception as exc:  # pragma: no cover - optional dependency
-    logger.error(f"Unexpected error loading FAISS: {exc}", exc_info=True)
-    _FAISS_LOAD_ERROR = f"Unexpected error: {exc}"
-
-
-MemoryKind = Literal["experience", "procedure", "knowledge", "user_info"]
-
-_FALLBACK_EMBED_DIM = 256
-_DEFAULT_EMBED_MODEL = "all-MiniLM-L6-v2"
-_EMBED_ENV_VAR = "AGENT_MEMORY_EMBED_MODEL"
-_EMBED_BACKEND_ENV_VAR = "AGENT_MEMORY_EMBED_BACKEND"
-_FAISS_DISABLE_ENV_VAR = "AGENT_MEMORY_FAISS_DISABLE"
-
-_ST_MODEL = None
-_ST_MODEL_NAME = None
-_ST_MODEL_DIM = None
-_ST_LOAD_ERROR = None
+faiss: Any = None
 
 
-def _tokenize(text: str) -> List[str]:
-    return re.findall(r"[a-z0-9]+", (text or "").lower())
+def _load_faiss() -> bool:
+    """Import FAISS on first use; importing the store must stay cheap."""
+    global _FAISS_AVAILABLE, _FAISS_LOAD_ERROR, faiss
+    if _FAISS_AVAILABLE is not None:
+        return _FAISS_AVAILABLE
+    _FAISS_AVAILABLE = False
+    try:
+        import faiss as _faiss  # type: ignore
 
+        faiss = _faiss
+        _FAISS_AVAILABLE = True
+        logger.info("FAISS loaded successfully for accelerated memory search")
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        logger.warning(
+            "FAISS not installed; using slower fallback embeddings. "
+            "Install with: pip install faiss-cpu"
+        )
+        _FAISS_LOAD_ERROR = f"ImportError: {exc}"
+    except Exception as exc:  # pragma: no cover - optional dependency
+        logger.error(f"Unexpected error loading FAISS: {exc}", exc_info=True)
+        _FAISS_LOAD_ERROR = f"Unexpected error: {exc}"
+    return _FAISS_AVAILABLE
 
-def _hash_embed(text: str, dim: int = _FALLBACK_EMBED_DIM) -> tuple[List[float], float]:
-    vec = [0.0] * dim
-    for tok in _tokenize(text):
-        h = int(hashlib.md5(tok.encode("utf-8", errors="replace")).hexdigest(), 16)
-        idx = h % dim
-        vec[idx] += 1.0
-    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
-    return vec, norm
 
+MemoryKind = Literal["experience", "procedure", "knowledge", "user_info"]
 
-def _load_sentence_transformer():
-    global _ST_MODEL, _ST_MODEL_NAME, _ST_MODEL_DIM, _ST_LOAD_ERROR
-    if _ST_LOAD_ERROR is not None:
-        return None
-    if _ST_MODEL is not None:
-        return _ST_MODEL
-    try:
-        from sentence_transformers import SentenceTransformer
-    except ImportError as exc:
-        logger.warning(
-            "SentenceTransformer not installed; using hash-based embeddings. "
-            "Install with: pip install sentence-transformers"
-        )
-        _ST_LOAD_ERROR = f"ImportError: {exc}"
-        return None
-    except Exception as exc:
-        logger.error(f"Unexpected error importing SentenceTransformer: {exc}", exc_info=True)
-        _ST_LOAD_ERROR = f"Unexpected error: {exc}"
-        return None
-    model_name = (os.getenv(_EMBED_ENV_VAR) or _DEFAULT_EMBED_MODEL).strip()
-    if not model_name:
-        model_name = _DEFAULT_EMBED_MODEL
-    try:
-        _ST_MODEL = SentenceTransformer(model_name)
-        _ST_MODEL_NAME = model_name
-        try:
-            _ST_MODEL_DIM = int(_ST_MODEL.get_sentence_embedding_dimension())
-        except Exception:
-            _ST_MODEL_DIM = None
-    except (OSError, RuntimeError, ValueError) as exc:  # pragma: no cover - model download/load failure
-        logger.warning("SentenceTransformer model load failed for '%s': %s", model_name, exc)
-        _ST_LOAD_ERROR = exc
-        _ST_MODEL = None
-    except Exception as exc:  # pragma: no cover - unexpected failure
-        logger.error("SentenceTransformer model load failed unexpectedly for '%s': %s", model_name, exc)
-        _ST_LOAD_ERROR = exc
-        _ST_MODEL = None
-    return _ST_MODEL
+_FAISS_DISABLE_ENV_VAR = "AGENT_MEMORY_FAISS_DISABLE"
 
 
 def _embed(text: str) -> tuple[List[float], float, str, int]:
-    backend = (os.getenv(_EMBED_BACKEND_ENV_VAR) or "").strip().lower()
-    use_hash_only = backend in {"hash", "fallback", "simple"}
-    if not use_hash_only:
-        model = _load_sentence_transformer()
-        if model is not None:
-            vec = model.encode([text], normalize_embeddings=False)
-            try:
-                vec_list = vec[0].tolist()
-            except Exception:
-                vec_list = list(vec[0])
-            dim = len(vec_list)
-            norm = math.sqrt(sum(v * v for v in vec_list)) or 1.0
-            model_name = _ST_MODEL_NAME or _DEFAULT_EMBED_MODEL
-            return vec_list, norm, model_name, dim
-    vec, norm = _hash_embed(text)
-    return vec, norm, f"hash{_FALLBACK_EMBED_DIM}", _FALLBACK_EMBED_DIM
+    """(vector, norm, model, dim) from the process-wide embedding service."""
+    return get_embedding_service().embed(text).as_tuple()
 
 
 @dataclass(frozen=True)
@@ -137,10 +72,14 @@ def _sha256(text: str) -> str:
 
 
 class SqliteMemoryStore:
+    """SQLite-backed memory. One store may be shared by concurrent runs
+    (the resident daemon does this); ``upsert``/``search`` serialize on a lock."""
+
     def __init__(self, path: Path):
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(self.path))
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
         self._faiss_index = None
         self._faiss_dim: Optional[int] = None
@@ -149,10 +88,11 @@ class SqliteMemoryStore:
         self._init_faiss_index()
 
     def close(self) -> None:
-        try:
-            self._conn.close()
-        except Exception:
-            pass
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
 
     def _ensure_connection(self) -> None:
         """Ensure database connection is alive, reconnect if needed."""
@@ -160,7 +100,7 @@ class SqliteMemoryStore:
             self._conn.execute("SELECT 1")
         except (sqlite3.ProgrammingError, sqlite3.OperationalError):
             # Connection is closed or broken, reconnect
-            self._conn = sqlite3.connect(str(self.path))
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
             self._conn.row_factory = sqlite3.Row
 
     def _init_schema(self) -> None:
@@ -203,10 +143,10 @@ class SqliteMemoryStore:
         self._conn.commit()
 
     def _init_faiss_index(self) -> None:
-        if not _FAISS_AVAILABLE:
-            return
         if os.getenv(_FAISS_DISABLE_ENV_VAR, "").strip().lower() in {"1", "true", "yes", "y"}:
             return
+        if not _load_faiss():
+            return
         try:
             _, _, model_name, dim = _embed(" ")
         except Exception:
@@ -315,40 +255,41 @@ class SqliteMemoryStore:
         key: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
     ) -> int:
-        self._ensure_connection()
-        now = time.time()
-        meta_json = json.dumps(metadata or {}, ensure_ascii=False)
-        content_hash = _sha256(content.strip())
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO memory_records(kind, key, content, content_hash, metadata_json, created_at, updated_at)
-            VALUES(?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(kind, content_hash) DO UPDATE SET
-              key=excluded.key,
-              metadata_json=excluded.metadata_json,
-              updated_at=excluded.updated_at;
-            """,
-            (kind, key, content, content_hash, meta_json, now, now),
-        )
-        self._conn.commit()
-        rec_id = int(cur.lastrowid or 0)
-        if rec_id == 0:
-            try:
-                row = cur.execute(
-                    "SELECT id FROM memory_records WHERE kind=? AND content_hash=? LIMIT 1",
-                    (kind, content_hash),
-                ).fetchone()
-                if row is not None:
-                    rec_id = int(row["id"])
-            except Exception:
-                rec_id = 0
-        if rec_id:
-            try:
-                self._upsert_embedding(rec_id, content, now=now)
-            except Exception:
-                pass
-        return rec_id
+        with self._lock:
+            self._ensure_connection()
+            now = time.time()
+            meta_json = json.dumps(metadata or {}, ensure_ascii=False)
+            content_hash = _sha256(content.strip())
+            cur = self._conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO memory_records(kind, key, content, content_hash, metadata_json, created_at, updated_at)
+                VALUES(?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(kind, content_hash) DO UPDATE SET
+                  key=excluded.key,
+                  metadata_json=excluded.metadata_json,
+                  updated_at=excluded.updated_at;
+                """,
+                (kind, key, content, content_hash, meta_json, now, now),
+            )
+            self._conn.commit()
+            rec_id = int(cur.lastrowid or 0)
+            if rec_id == 0:
+                try:
+                    row = cur.execute(
+                        "SELECT id FROM memory_records WHERE kind=? AND content_hash=? LIMIT 1",
+                        (kind, content_hash),
+                    ).fetchone()
+                    if row is not None:
+                        rec_id = int(row["id"])
+                except Exception:
+                    rec_id = 0
+            if rec_id:
+                try:
+                    self._upsert_embedding(rec_id, content, now=now)
+                except Exception:
+                    pass
+            return rec_id
 
     def search(
         self,
@@ -357,128 +298,129 @@ class SqliteMemoryStore:
         kinds: Optional[List[MemoryKind]] = None,
         limit: int = 8,
     ) -> List[MemoryRecord]:
-        q = (query or "").strip()
-        if not q:
-            return []
-        kinds = kinds or ["experience", "procedure", "knowledge"]
-        placeholders = ",".join("?" for _ in kinds)
-        candidate_limit = max(limit * 25, 50)
-        params: List[Any] = [*kinds, candidate_limit]
-        cur = self._conn.cursor()
-        q_vec, q_norm, q_model, q_dim = _embed(q)
-        now = time.time()
-
-        if self._faiss_index is not None and q_dim == self._faiss_dim and q_model == self._faiss_model:
-            try:
-                import numpy as np
+        with self._lock:
+            q = (query or "").strip()
+            if not q:
+                return []
+            kinds = kinds or ["experience", "procedure", "knowledge"]
+            placeholders = ",".join("?" for _ in kinds)
+            candidate_limit = max(limit * 25, 50)
+            params: List[Any] = [*kinds, candidate_limit]
+            cur = self._conn.cursor()
+            q_vec, q_norm, q_model, q_dim = _embed(q)
+            now = time.time()
 
-                qv = [v / q_norm for v in q_vec] if q_norm else q_vec
-                k = max(limit * 5, limit)
-                sims, ids = self._faiss_index.search(np.array([qv], dtype="float32"), k)
-                id_list = [int(i) for i in ids[0] if int(i) >= 0]
-                if id_list:
-                    id_placeholders = ",".join("?" for _ in id_list)
-                    rows = cur.execute(
-                        f"""
-                        SELECT id, kind, key, content, metadata_json, created_at, updated_at
-                        FROM memory_records
-                        WHERE id IN ({id_placeholders})
-                        """,
-                        id_list,
-                    ).fetchall()
-                    row_map = {int(r["id"]): r for r in rows}
-                    scored: List[tuple[float, sqlite3.Row]] = []
-                    for rank, rec_id in enumerate(id_list):
-                        r = row_map.get(rec_id)
-                        if r is None:
-                            continue
-                        sim = float(sims[0][rank])
-                        age = max(0.0, now - float(r["updated_at"]))
-                        recency = 1.0 / (1.0 + (age / 86400.0))
-                        score = (0.85 * sim) + (0.15 * recency)
-                        scored.append((score, r))
-                    scored.sort(key=lambda x: x[0], reverse=True)
-                    out: List[MemoryRecord] = []
-                    for _, r in scored[: max(1, limit)]:
-                        out.append(
-                            MemoryRecord(
-                                kind=r["kind"],
-                                id=int(r["id"]),
-                                key=r["key"],
-                                content=r["content"],
-                                metadata=json.loads(r["metadata_json"] or "{}"),
-                                created_at=float(r["created_at"]),
-                                updated_at=float(r["updated_at"]),
+            if self._faiss_index is not None and q_dim == self._faiss_dim and q_model == self._faiss_model:
+                try:
+                    import numpy as np
+
+                    qv = [v / q_norm for v in q_vec] if q_norm else q_vec
+                    k = max(limit * 5, limit)
+                    sims, ids = self._faiss_index.search(np.array([qv], dtype="float32"), k)
+                    id_list = [int(i) for i in ids[0] if int(i) >= 0]
+                    if id_list:
+                        id_placeholders = ",".join("?" for _ in id_list)
+                        rows = cur.execute(
+                            f"""
+                            SELECT id, kind, key, content, metadata_json, created_at, updated_at
+                            FROM memory_records
+                            WHERE id IN ({id_placeholders})
+                            """,
+                            id_list,
+                        ).fetchall()
+                        row_map = {int(r["id"]): r for r in rows}
+                        scored: List[tuple[float, sqlite3.Row]] = []
+                        for rank, rec_id in enumerate(id_list):
+                            r = row_map.get(rec_id)
+                            if r is None:
+                                continue
+                            sim = float(sims[0][rank])
+                            age = max(0.0, now - float(r["updated_at"]))
+                            recency = 1.0 / (1.0 + (age / 86400.0))
+                            score = (0.85 * sim) + (0.15 * recency)
+                            scored.append((score, r))
+                        scored.sort(key=lambda x: x[0], reverse=True)
+                        out: List[MemoryRecord] = []
+                        for _, r in scored[: max(1, limit)]:
+                            out.append(
+                                MemoryRecord(
+                                    kind=r["kind"],
+                                    id=int(r["id"]),
+                                    key=r["key"],
+                                    content=r["content"],
+                                    metadata=json.loads(r["metadata_json"] or "{}"),
+                                    created_at=float(r["created_at"]),
+                                    updated_at=float(r["updated_at"]),
+                                )
                             )
-                        )
-                    return out
-            except Exception:
-                pass
+                        return out
+                except Exception:
+                    pass
 
-        cur.execute(
-            f"""
-            SELECT r.id, r.kind, r.key, r.content, r.metadata_json, r.created_at, r.updated_at,
-                   e.vector_json, e.norm, e.dim, e.model
-            FROM memory_records r
-            LEFT JOIN memory_embeddings e ON r.id = e.record_id
-            WHERE r.kind IN ({placeholders})
-            ORDER BY r.updated_at DESC
-            LIMIT ?;
-            """,
-            params,
-        )
-        rows = cur.fetchall()
-        scored: List[tuple[float, sqlite3.Row]] = []
-        for r in rows:
-            try:
-                vec = json.loads(r["vector_json"]) if r["vector_json"] else None
-                norm = float(r["norm"]) if r["norm"] else None
-            except Exception:
-                vec = None
-                norm = None
-            try:
-                row_dim = int(r["dim"]) if r["dim"] else 0
-            except Exception:
-                row_dim = 0
-            try:
-                row_model = r["model"] if "model" in r.keys() else None
-            except Exception:
-                row_model = None
-            dim_mismatch = row_dim and row_dim != q_dim
-            model_mismatch = (row_model is not None and row_model != q_model)
-            if not vec or not norm:
+            cur.execute(
+                f"""
+                SELECT r.id, r.kind, r.key, r.content, r.metadata_json, r.created_at, r.updated_at,
+                       e.vector_json, e.norm, e.dim, e.model
+                FROM memory_records r
+                LEFT JOIN memory_embeddings e ON r.id = e.record_id
+                WHERE r.kind IN ({placeholders})
+                ORDER BY r.updated_at DESC
+                LIMIT ?;
+                """,
+                params,
+            )
+            rows = cur.fetchall()
+            scored: List[tuple[float, sqlite3.Row]] = []
+            for r in rows:
                 try:
-                    vec, norm, row_model, row_dim = _embed(r["content"])
-                    self._upsert_embedding(int(r["id"]), r["content"], now=now)
+                    vec = json.loads(r["vector_json"]) if r["vector_json"] else None
+                    norm = float(r["norm"]) if r["norm"] else None
                 except Exception:
-                    vec, norm = None, None
-            elif dim_mismatch or model_mismatch:
+                    vec = None
+                    norm = None
                 try:
-                    vec, norm, row_model, row_dim = _embed(r["content"])
-                    self._upsert_embedding(int(r["id"]), r["content"], now=now)
+                    row_dim = int(r["dim"]) if r["dim"] else 0
                 except Exception:
-                    vec, norm = None, None
-            if vec and norm:
-                dot = sum((qv * rv for qv, rv in zip(q_vec, vec)))
-                cosine = dot / (q_norm * norm) if (q_norm and norm) else 0.0
-            else:
-                cosine = 0.0
-            age = max(0.0, now - float(r["updated_at"]))
-            recency = 1.0 / (1.0 + (age / 86400.0))
-            score = (0.85 * cosine) + (0.15 * recency)
-            scored.append((score, r))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        out: List[MemoryRecord] = []
-        for _, r in scored[: max(1, limit)]:
-            out.append(
-                MemoryRecord(
-                    kind=r["kind"],
-                    id=int(r["id"]),
-                    key=r["key"],
-                    content=r["content"],
-                    metadata=json.loads(r["metadata_json"] or "{}"),
-                    created_at=float(r["created_at"]),
-                    updated_at=float(r["updated_at"]),
+                    row_dim = 0
+                try:
+                    row_model = r["model"] if "model" in r.keys() else None
+                except Exception:
+                    row_model = None
+                dim_mismatch = row_dim and row_dim != q_dim
+                model_mismatch = (row_model is not None and row_model != q_model)
+                if not vec or not norm:
+                    try:
+                        vec, norm, row_model, row_dim = _embed(r["content"])
+                        self._upsert_embedding(int(r["id"]), r["content"], now=now)
+                    except Exception:
+                        vec, norm = None, None
+                elif dim_mismatch or model_mismatch:
+                    try:
+                        vec, norm, row_model, row_dim = _embed(r["content"])
+                        self._upsert_embedding(int(r["id"]), r["content"], now=now)
+                    except Exception:
+                        vec, norm = None, None
+                if vec and norm:
+                    dot = sum((qv * rv for qv, rv in zip(q_vec, vec)))
+                    cosine = dot / (q_norm * norm) if (q_norm and norm) else 0.0
+                else:
+                    cosine = 0.0
+                age = max(0.0, now - float(r["updated_at"]))
+                recency = 1.0 / (1.0 + (age / 86400.0))
+                score = (0.85 * cosine) + (0.15 * recency)
+                scored.append((score, r))
+            scored.sort(key=lambda x: x[0], reverse=True)
+            out: List[MemoryRecord] = []
+            for _, r in scored[: max(1, limit)]:
+                out.append(
+                    MemoryRecord(
+                        kind=r["kind"],
+                        id=int(r["id"]),
+                        key=r["key"],
+                        content=r["content"],
+                        metadata=json.loads(r["metadata_json"] or "{}"),
+                        created_at=float(r["created_at"]),
+                        updated_at=float(r["updated_at"]),
+                    )
                 )
-            )
-        return out
+            return out
@@ -38,20 +38,24 @@ class ResourceMonitor:
             import psutil
             self.psutil = psutil
             self.process = psutil.Process()
+            # Prime the counter: later non-blocking calls report usage since the previous call.
+            self.process.cpu_percent(interval=None)
             logger.info("[OK] psutil available for resource monitoring")
         except ImportError:
             logger.warning("[X] psutil not installed; resource monitoring disabled")
     
     def get_metrics(self) -> ResourceMetrics:
+        """Current usage; never blocks (CPU% is measured since the previous call)."""
         if not self.psutil or not self.process:
             return ResourceMetrics(0, 0, 0, 0)
         
         try:
-            mem_info = self.process.memory_info()
-            memory_mb = mem_info.rss / 1024 / 1024
-            cpu_percent = self.process.cpu_percent(interval=0.1)
-            open_files = len(self.process.open_files())
-            threads = self.process.num_threads()
+            with self.process.oneshot():
+                mem_info = self.process.memory_info()
+                memory_mb = mem_info.rss / 1024 / 1024
+                cpu_percent = self.process.cpu_percent(interval=None)
+                open_files = len(self.process.open_files())
+                threads = self.process.num_threads()
             return ResourceMetrics(memory_mb, cpu_percent, open_files, threads)
         except Exception as exc:
             logger.error(f"Error getting resource metrics: {exc}")
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
+import json
 import textwrap
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from agent.adapters.http_pool import bounded_map
 from agent.llm.base import LLMClient
 from agent.llm import schemas as llm_schemas
 
-from ..jsonio import dumps_compact
 from ..models import Observation, Plan, Reflection, Step, ToolResult
 from ..pydantic_compat import model_dump, model_validate
 from ..tools.registry import ToolRegistry
 from .base import Planner
+from .prompt_builder import PromptBuilder
 from .utils import coerce_plan_candidates_dict, coerce_plan_dict
 
 
@@ -25,6 +27,7 @@ class PlanFirstPlanner(Planner):
         max_steps: int = 6,
         use_dppm: bool = True,
         use_tot: bool = True,
+        max_parallel_calls: int = 1,
     ):
         self._llm = llm
         self._tools = tools
@@ -33,8 +36,11 @@ class PlanFirstPlanner(Planner):
         self._max_steps = max(1, max_steps)
         self._use_dppm = use_dppm
         self._use_tot = use_tot
+        # Independent LLM calls (DPPM subtask plans) in flight at once.
+        self._max_parallel_calls = max(1, max_parallel_calls)
         self._fallback_plan: Optional[Plan] = None
         self._tool_catalog_cache: Optional[List[dict]] = None
+        self._prompts = PromptBuilder()
 
     def _get_tool_catalog(self) -> List[dict]:
         if self._tool_catalog_cache is not None:
@@ -44,6 +50,7 @@ class PlanFirstPlanner(Planner):
                 "name": spec.name,
                 "description": spec.description,
                 "dangerous": spec.dangerous,
+                "read_only": spec.read_only,
                 "args_schema": self._tools.tool_args_schema(spec.name),
             }
             for spec in self._tools.list_tools()
@@ -51,15 +58,46 @@ class PlanFirstPlanner(Planner):
         self._tool_catalog_cache = catalog
         return catalog
 
+    def _prefix(self) -> str:
+        """Role and tool catalog shared by every plan-first prompt."""
+
+        def _render() -> str:
+            catalog = json.dumps(self._get_tool_catalog(), ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
+            return (
+                "You are an autonomous agent planner.\n"
+                f"unsafe_mode: {self._unsafe_mode}\n\n"
+                f"Available tools:\n{catalog}\n\n"
+                "The goal, instructions, retrieved memory and observations for this request follow."
+            )
+
+        return self._prompts.prefix("plan_first", _render)
+
+    def _prompt(
+        self,
+        task: str,
+        instructions: str,
+        memories: List[dict],
+        observations: List[Observation],
+        *,
+        closing: str,
+        extra: Sequence[Tuple[str, Any]] = (),
+    ) -> str:
+        return self._prompts.build(
+            self._prefix(),
+            sections=[("Goal", task), *extra, ("", textwrap.dedent(instructions).strip())],
+            memories=memories,
+            observations=observations,
+            max_observations=18,
+            closing=textwrap.dedent(closing).strip(),
+        )
+
     def plan(self, *, task: str, observations: List[Observation], memories: List[dict]) -> Plan:
-        tool_catalog = self._get_tool_catalog()
-        recent_obs = [model_dump(o) for o in observations[-18:]]
         dppm_plan = None
         if self._use_dppm:
-            dppm_plan = self._plan_via_dppm(task, tool_catalog, memories, recent_obs)
+            dppm_plan = self._plan_via_dppm(task, memories, observations)
 
         if self._use_tot:
-            candidates = self._plan_candidates(task, tool_catalog, memories, recent_obs)
+            candidates = self._plan_candidates(task, memories, observations)
             if dppm_plan is not None:
                 candidates.append(
                     {
@@ -80,7 +118,7 @@ class PlanFirstPlanner(Planner):
         if dppm_plan is not None:
             return dppm_plan
 
-        return self._plan_direct(task, tool_catalog, memories, recent_obs)
+        return self._plan_direct(task, memories, observations)
 
     def fallback_plan(self) -> Optional[Plan]:
         return self._fallback_plan
@@ -90,40 +128,35 @@ class PlanFirstPlanner(Planner):
         self._fallback_plan = None
         return plan
 
-    def _plan_direct(self, task: str, tool_catalog: List[dict], memories: List[dict], recent_obs: List[dict]) -> Plan:
-        prompt = textwrap.dedent(
-            f"""
-            Goal: {task}
-            unsafe_mode: {self._unsafe_mode}
+    def _plan_direct(self, task: str, memories: List[dict], observations: List[Observation]) -> Plan:
+        return self._plan_from_prompt(self._direct_prompt(task, memories, observations))
 
+    def _direct_prompt(self, task: str, memories: List[dict], observations: List[Observation]) -> str:
+        return self._prompt(
+            task,
+            f"""
             Create a concise multi-step plan (<= {self._max_steps} steps) and end with a finish step.
             - Include preconditions/postconditions when useful.
             - tool_args must be a list of {{"key":"...","value":"..."}} pairs (values as strings; encode JSON if needed).
-
-            Available tools:
-            {dumps_compact(tool_catalog)}
-
-            Retrieved long-term memory:
-            {dumps_compact(memories)}
-
-            Recent observations:
-            {dumps_compact(recent_obs)}
-
+            """,
+            memories,
+            observations,
+            closing="""
             Return STRICT JSON Plan only:
-              {{"goal":"...", "steps":[{{"id":"...","goal":"...","rationale_short":"...","tool_name":"...","tool_args":[{{"key":"arg_name","value":"arg_value"}}],"success_criteria":["..."],"preconditions":["..."],"postconditions":["..."]}}]}}
-            """
-        ).strip()
+              {"goal":"...", "steps":[{"id":"...","goal":"...","rationale_short":"...","tool_name":"...","tool_args":[{"key":"arg_name","value":"arg_value"}],"success_criteria":["..."],"preconditions":["..."],"postconditions":["..."]}]}
+            """,
+        )
+
+    def _plan_from_prompt(self, prompt: str) -> Plan:
         data = self._llm.reason_json(prompt, schema_path=llm_schemas.PLAN)
         data = coerce_plan_dict(data)
         return model_validate(Plan, data)
 
-    def _plan_candidates(self, task: str, tool_catalog: List[dict], memories: List[dict], recent_obs: List[dict]) -> List[dict]:
+    def _plan_candidates(self, task: str, memories: List[dict], observations: List[Observation]) -> List[dict]:
         count = max(3, self._num_candidates)
-        prompt = textwrap.dedent(
+        prompt = self._prompt(
+            task,
             f"""
-            Goal: {task}
-            unsafe_mode: {self._unsafe_mode}
-
             Generate {count} candidate plans.
             - Each plan should have <= {self._max_steps} steps and end with a finish step.
             - Include preconditions/postconditions when useful.
@@ -134,49 +167,43 @@ class PlanFirstPlanner(Planner):
             - tool_feasibility (higher = tools likely available/valid)
             - destructiveness (higher = more destructive; avoid)
             - length (higher = longer; avoid)
-
-            Available tools:
-            {dumps_compact(tool_catalog)}
-
-            Retrieved long-term memory:
-            {dumps_compact(memories)}
-
-            Recent observations:
-            {dumps_compact(recent_obs)}
-
+            """,
+            memories,
+            observations,
+            closing="""
             Return STRICT JSON:
-              {{
+              {
                 "plans": [
-                  {{
+                  {
                     "score": 1,
-                    "scores": {{
+                    "scores": {
                       "grounding_confidence": 1,
                       "tool_feasibility": 1,
                       "destructiveness": 1,
                       "length": 1
-                    }},
-                    "plan": {{
+                    },
+                    "plan": {
                       "goal": "...",
                       "steps": [
-                        {{
+                        {
                           "id":"...",
                           "goal":"...",
                           "rationale_short":"...",
                           "tool_name":"...",
-                          "tool_args":[{{"key":"arg_name","value":"arg_value"}}],
+                          "tool_args":[{"key":"arg_name","value":"arg_value"}],
                           "success_criteria":["..."],
                           "preconditions":["..."],
                           "postconditions":["..."]
-                        }}
+                        }
                       ]
-                    }},
+                    },
                     "notes": "..."
-                  }}
+                  }
                 ]
-              }}
+              }
             Return JSON only.
-            """
-        ).strip()
+            """,
+        )
         data = self._llm.reason_json(prompt, schema_path=llm_schemas.PLAN_CANDIDATES)
         data = coerce_plan_candidates_dict(data)
         plans = data.get("plans") if isinstance(data, dict) else None
@@ -184,28 +211,20 @@ class PlanFirstPlanner(Planner):
             return []
         return plans
 
-    def _plan_via_dppm(self, task: str, tool_catalog: List[dict], memories: List[dict], recent_obs: List[dict]) -> Optional[Plan]:
-        prompt = textwrap.dedent(
-            f"""
-            Goal: {task}
-            unsafe_mode: {self._unsafe_mode}
-
+    def _plan_via_dppm(self, task: str, memories: List[dict], observations: List[Observation]) -> Optional[Plan]:
+        prompt = self._prompt(
+            task,
+            """
             Decompose the task into 2-5 subtasks with dependencies (DPPM-lite).
             Each subtask should be short and verifiable.
-
-            Available tools:
-            {dumps_compact(tool_catalog)}
-
-            Retrieved long-term memory:
-            {dumps_compact(memories)}
-
-            Recent observations:
-            {dumps_compact(recent_obs)}
-
+            """,
+            memories,
+            observations,
+            closing="""
             Return STRICT JSON:
-              {{"subtasks":[{{"id":"t1","goal":"...","depends_on":["t0"],"notes":"..."}}]}}
-            """
-        ).strip()
+              {"subtasks":[{"id":"t1","goal":"...","depends_on":["t0"],"notes":"..."}]}
+            """,
+        )
         try:
             data = self._llm.reason_json(prompt, schema_path=llm_schemas.TASK_DECOMPOSITION)
         except Exception:
@@ -215,16 +234,16 @@ class PlanFirstPlanner(Planner):
             return None
 
         ordered = self._order_subtasks(subtasks)
-        subplans: List[Plan] = []
+        # Prompts are built here, in subtask order; the subtask plans
+        # themselves are independent calls and may run concurrently.
+        prompts: List[str] = []
         for st in ordered:
             goal = st.get("goal") if isinstance(st, dict) else None
             if not isinstance(goal, str) or not goal.strip():
                 continue
-            try:
-                subplan = self._plan_direct(goal.strip(), tool_catalog, memories, recent_obs)
-                subplans.append(subplan)
-            except Exception:
-                continue
+            prompts.append(self._direct_prompt(goal.strip(), memories, observations))
+        results = bounded_map(self._plan_from_prompt, prompts, max_concurrency=self._max_parallel_calls)
+        subplans = [r for r in results if isinstance(r, Plan)]
         if not subplans:
             return None
         return self._merge_subplans(task, subplans)
@@ -310,48 +329,28 @@ class PlanFirstPlanner(Planner):
         tool_result: ToolResult,
         reflection: Reflection,
     ) -> Plan | None:
-        tool_catalog = [
-            {
-                "name": spec.name,
-                "description": spec.description,
-                "dangerous": spec.dangerous,
-                "args_schema": self._tools.tool_args_schema(spec.name),
-            }
-            for spec in self._tools.list_tools()
-        ]
-        recent_obs = [model_dump(o) for o in observations[-18:]]
         failure = {
             "failed_step": model_dump(failed_step),
             "tool_result": model_dump(tool_result),
             "reflection": model_dump(reflection),
         }
-        prompt = textwrap.dedent(
-            f"""
-            Goal: {task}
-            unsafe_mode: {self._unsafe_mode}
-
+        prompt = self._prompt(
+            task,
+            """
             The plan step failed. Decide one:
             - retry same step with adjusted args
             - swap tool
             - regenerate this step
             - regenerate a new full plan
-
-            Failure context:
-            {dumps_compact(failure)}
-
-            Available tools:
-            {dumps_compact(tool_catalog)}
-
-            Retrieved long-term memory:
-            {dumps_compact(memories)}
-
-            Recent observations:
-            {dumps_compact(recent_obs)}
-
+            """,
+            memories,
+            observations,
+            extra=[("Failure context", failure)],
+            closing=f"""
             Return STRICT JSON Plan. Keep it <= {self._max_steps} steps and end with finish if appropriate.
             Include preconditions/postconditions when useful.
-            """
-        ).strip()
+            """,
+        )
         data = self._llm.reason_json(prompt, schema_path=llm_schemas.PLAN)
         data = coerce_plan_dict(data)
         try:
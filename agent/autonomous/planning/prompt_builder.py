@@ -0,0 +1,259 @@
+"""
+Token-budgeted prompt assembly for the planners.
+
+Planner prompts are laid out as a stable prefix followed by a variable tail:
+
+  prefix  instructions, tool catalog, output format -- identical on every call
+          of a planner instance, rendered once and reused byte-for-byte (which
+          is also what provider-side prompt caching keys on)
+  tail    goal, per-call context (failure details, ...), retrieved memories and
+          the observation history, oldest first, so consecutive prompts differ
+          only by what was appended at the end
+
+Each observation is rendered to compact JSON once and cached, so a planning
+call only serializes observations it has not seen before. Memories and
+observations are filled newest-first into their own token budgets instead
+of truncating one big JSON string (which used to cut off the *newest*
+observations and could leave invalid JSON mid-prompt). Those budgets do not
+depend on the size of the prefix, so a large tool catalog cannot crowd the
+history out, and the newest observation is always kept.
+
+One builder may serve concurrent planning calls (speculative planning runs on
+a helper thread), so ``prefix`` and ``build`` are serialized by a lock.
+
+Token counts are estimates (characters / 4), matching ``LLM_TOKENS_PER_CHAR``.
+
+Environment overrides:
+  AGENT_PROMPT_HISTORY_TOKENS          budget for the observation history (default: 8000)
+  AGENT_PROMPT_MEMORY_TOKENS           budget for retrieved memories (default: 1200)
+  AGENT_PROMPT_OBSERVATION_TOKENS      cap for a single observation (default: 800)
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..models import Observation
+from ..profiling import span
+from ..pydantic_compat import model_dump
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _compact(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + "…"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name) or default))
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    history_tokens: int = 8_000
+    memory_tokens: int = 1_200
+    observation_tokens: int = 800
+    section_tokens: int = 2_000
+
+    @classmethod
+    def from_env(cls) -> "PromptBudget":
+        return cls(
+            history_tokens=_env_int("AGENT_PROMPT_HISTORY_TOKENS", cls.history_tokens),
+            memory_tokens=_env_int("AGENT_PROMPT_MEMORY_TOKENS", cls.memory_tokens),
+            observation_tokens=_env_int("AGENT_PROMPT_OBSERVATION_TOKENS", cls.observation_tokens),
+        )
+
+
+class ObservationRenderCache:
+    """Compact JSON renderings of observations, computed once per observation.
+
+    Entries are keyed by object identity and hold a reference to the
+    observation, so an id cannot be reused while its entry is alive.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[Observation, str, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, obs: Observation, max_tokens: int) -> Tuple[str, int]:
+        """Rendering of ``obs`` and its estimated token count."""
+        key = (id(obs), max_tokens)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is obs:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        text = _clip(_compact(self._view(obs)), max_tokens)
+        tokens = estimate_tokens(text)
+        self._entries[key] = (obs, text, tokens)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return text, tokens
+
+    @staticmethod
+    def _view(obs: Observation) -> Dict[str, Any]:
+        data = model_dump(obs)
+        # The perceptor stores dict outputs as both raw and parsed; send them once.
+        if data.get("parsed") is not None and data.get("parsed") == data.get("raw"):
+            data.pop("parsed")
+        return {k: v for k, v in data.items() if v not in (None, [], {}, "")}
+
+
+class PromptBuilder:
+    """Assembles planner prompts from a cached prefix and a budgeted tail."""
+
+    def __init__(self, budget: Optional[PromptBudget] = None, *, cache: Optional[ObservationRenderCache] = None):
+        self.budget = budget or PromptBudget.from_env()
+        self.cache = cache or ObservationRenderCache()
+        self._prefixes: Dict[str, str] = {}
+        self.last_stats: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def prefix(self, key: str, render: Callable[[], str]) -> str:
+        """The stable prefix for ``key``; ``render`` runs only the first time."""
+        with self._lock:
+            text = self._prefixes.get(key)
+            if text is None:
+                text = render().strip()
+                self._prefixes[key] = text
+            return text
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._prefixes.clear()
+
+    def build(
+        self,
+        prefix: str,
+        *,
+        sections: Sequence[Tuple[str, Any]] = (),
+        memories: Optional[List[dict]] = None,
+        observations: Optional[List[Observation]] = None,
+        max_observations: int = 12,
+        closing: str = "",
+    ) -> str:
+        """Join ``prefix`` with the tail sections, keeping the tail within budget.
+
+        ``sections`` are ``(title, value)`` pairs rendered in order; strings are
+        used as-is, anything else as compact JSON, each clipped to the section
+        budget. Memories and observations come last, each within its own budget;
+        the newest observation is kept even if it alone exceeds it.
+        """
+        with span("prompt.build", cat="prompt"), self._lock:
+            return self._build(
+                prefix,
+                sections=sections,
+                memories=memories,
+                observations=observations,
+                max_observations=max_observations,
+                closing=closing,
+            )
+
+    def _build(
+        self,
+        prefix: str,
+        *,
+        sections: Sequence[Tuple[str, Any]],
+        memories: Optional[List[dict]],
+        observations: Optional[List[Observation]],
+        max_observations: int,
+        closing: str,
+    ) -> str:
+        t0 = time.perf_counter()
+        parts = [prefix]
+        for title, value in sections:
+            body = value if isinstance(value, str) else _compact(value)
+            parts.append(f"{title}:\n{_clip(body, self.budget.section_tokens)}" if title else body)
+
+        mem_count = 0
+        if memories is not None:
+            mem_text, mem_count, _ = self._fill(
+                [_compact(m) for m in memories],
+                self.budget.memory_tokens,
+                newest_last=False,
+            )
+            parts.append(f"Retrieved long-term memory:\n{mem_text}")
+
+        obs_count = omitted = 0
+        if observations is not None:
+            window = observations[-max_observations:] if max_observations > 0 else []
+            rendered = [self.cache.render(o, self.budget.observation_tokens) for o in window]
+            obs_text, obs_count, _ = self._fill(
+                [r[0] for r in rendered],
+                self.budget.history_tokens,
+                newest_last=True,
+                keep_first=True,
+            )
+            omitted = len(observations) - obs_count
+            header = "Recent observations (oldest first)"
+            if omitted:
+                header += f"; {omitted} earlier omitted"
+            parts.append(f"{header}:\n{obs_text}")
+
+        if closing:
+            parts.append(closing)
+        prompt = "\n\n".join(parts)
+        self.last_stats = {
+            "prefix_tokens": estimate_tokens(prefix),
+            "prompt_tokens": estimate_tokens(prompt),
+            "memories": mem_count,
+            "observations": obs_count,
+            "observations_omitted": omitted,
+            "render_cache_hits": self.cache.hits,
+            "build_ms": round((time.perf_counter() - t0) * 1000, 3),
+        }
+        return prompt
+
+    @staticmethod
+    def _fill(
+        items: List[str], budget_tokens: int, *, newest_last: bool, keep_first: bool = False
+    ) -> Tuple[str, int, int]:
+        """Take items until the budget is spent (from the end if ``newest_last``).
+
+        With ``keep_first`` the first item taken is kept even if it alone is
+        over budget.
+        """
+        order = reversed(items) if newest_last else iter(items)
+        kept: List[str] = []
+        used = 0
+        for text in order:
+            tokens = estimate_tokens(text) + 1
+            if used + tokens > budget_tokens and not (keep_first and not kept):
+                break
+            kept.append(text)
+            used += tokens
+        if newest_last:
+            kept.reverse()
+        if not kept:
+            return "[]", 0, 1
+        return "\n".join(kept), len(kept), used
+
+
+__all__ = [
+    "ObservationRenderCache",
+    "PromptBudget",
+    "PromptBuilder",
+    "estimate_tokens",
+]
@@ -8,15 +8,18 @@ from typing import Any, Dict, List, Optional
 from agent.llm.base import LLMClient
 from agent.llm import schemas as llm_schemas
 
-from ..jsonio import dumps_compact
 from ..models import Observation, Plan, Reflection, Step, ToolResult
 from ..pydantic_compat import model_dump, model_validate
 from ..tools.registry import ToolRegistry
 from .base import Planner
+from .prompt_builder import PromptBuilder
 from .utils import coerce_plan_dict
 
 logger = logging.getLogger(__name__)
 
+# Matches maxItems in plan_next_step.schema.json.
+MAX_BATCH_STEPS = 5
+
 _TOOL_ALIASES = {
     "functions.exec_command": "shell_exec",
     "exec_command": "shell_exec",
@@ -130,7 +133,8 @@ class ReActPlanner(Planner):
     This planner implements the ReAct pattern:
     1. Observe the current state
     2. Think about what to do next
-    3. Choose ONE action to execute
+    3. Choose ONE action to execute (or a batch of independent read-only
+       lookups, which the runner executes concurrently)
     4. Repeat
 
     It can optionally use a model router for LLM selection.
@@ -149,6 +153,7 @@ class ReActPlanner(Planner):
         self._unsafe_mode = unsafe_mode
         self._model_router = model_router
         self._tool_catalog_cache: Optional[List[Dict[str, Any]]] = None
+        self._prompts = PromptBuilder()
 
     def _get_planning_llm(self) -> LLMClient:
         """Get the LLM to use for planning. Uses router if available."""
@@ -167,15 +172,15 @@ class ReActPlanner(Planner):
 
         This is the core ReAct decision: given the current state, what ONE action should we take?
         """
-        tool_catalog = self._build_tool_catalog()
-        recent_obs = [model_dump(o) for o in observations[-12:]]
-
-        prompt = self._build_plan_prompt(
-            task=task,
-            tool_catalog=tool_catalog,
+        prompt = self._prompts.build(
+            self._plan_prefix(),
+            sections=[("Goal", task)],
             memories=memories,
-            recent_obs=recent_obs,
+            observations=observations,
+            max_observations=12,
+            closing="Return JSON only. No markdown, no prose.",
         )
+        logger.debug("ReAct plan prompt: %s", self._prompts.last_stats)
 
         # Use router-selected LLM if available
         llm = self._get_planning_llm()
@@ -195,6 +200,7 @@ class ReActPlanner(Planner):
                 "name": spec.name,
                 "description": spec.description,
                 "dangerous": spec.dangerous,
+                "read_only": spec.read_only,
                 "args_schema": self._tools.tool_args_schema(spec.name),
             }
             for spec in self._tools.list_tools()
@@ -202,23 +208,19 @@ class ReActPlanner(Planner):
         self._tool_catalog_cache = catalog
         return catalog
 
-    def _build_plan_prompt(
-        self,
-        *,
-        task: str,
-        tool_catalog: List[Dict[str, Any]],
-        memories: List[dict],
-        recent_obs: List[dict],
-    ) -> str:
-        """Build the planning prompt."""
+    def _plan_prefix(self) -> str:
+        """Instructions, tool catalog and output format: identical on every call."""
+        return self._prompts.prefix("plan", self._build_plan_prefix)
+
+    def _build_plan_prefix(self) -> str:
+        tool_catalog = self._build_tool_catalog()
         return textwrap.dedent(
             f"""
-            Goal: {task}
-            unsafe_mode: {self._unsafe_mode}
-
             You are an autonomous agent planner operating in a closed-loop.
+            unsafe_mode: {self._unsafe_mode}
 
             Choose EXACTLY ONE next step to execute using an available tool.
+            - Exception: if you need several independent lookups whose inputs are already known (e.g. reading 3 files, fetching 2 URLs), return up to {MAX_BATCH_STEPS} steps, ALL using tools with read_only=true and empty preconditions. They run concurrently and you will see all results next turn. Never batch a step that depends on another step's output.
             - If the goal is already satisfied, output a single step using tool_name="finish" with a short summary.
             - Prefer minimal, testable actions and specify success_criteria.
             - Add preconditions and postconditions when useful (short, checkable).
@@ -235,13 +237,7 @@ class ReActPlanner(Planner):
             - IMPORTANT: tool_name must match exactly one of the available tools listed below.
 
             Available tools (name/description/schema):
-            {dumps_compact(tool_catalog)}
-
-            Retrieved long-term memory (keyword+recency):
-            {dumps_compact(memories)}
-
-            Recent observations:
-            {dumps_compact(recent_obs)}
+            {json.dumps(tool_catalog, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))}
 
             Return STRICT JSON matching:
               {{
@@ -259,9 +255,9 @@ class ReActPlanner(Planner):
                   }}
                 ]
               }}
-            Return JSON only. No markdown, no prose.
+            The goal, retrieved memory and observations for this decision follow.
             """
-        ).strip()
+        )
 
     def _validate_plan(self, plan: Plan, task: str) -> Plan:
         """Validate the plan and handle edge cases."""
@@ -276,9 +272,10 @@ class ReActPlanner(Planner):
                 )]
             )
 
+        for step in plan.steps:
+            step.tool_name = _normalize_tool_name(step.tool_name)
+            step.tool_args = _normalize_tool_args(step.tool_name, step.tool_args)
         step = plan.steps[0]
-        step.tool_name = _normalize_tool_name(step.tool_name)
-        step.tool_args = _normalize_tool_args(step.tool_name, step.tool_args)
         if not self._tools.has_tool(step.tool_name):
             return Plan(
                 goal=task,
@@ -289,8 +286,22 @@ class ReActPlanner(Planner):
                 )]
             )
 
-        # Return only the first step (ReAct is single-step)
-        return Plan(goal=task, steps=[step])
+        # ReAct is single-step, except for a leading run of independent
+        # read-only lookups that the runner can execute as one batch.
+        steps = [step]
+        if self._batchable(step):
+            for extra in plan.steps[1:MAX_BATCH_STEPS]:
+                if not self._batchable(extra):
+                    break
+                steps.append(extra)
+        return Plan(goal=task, steps=steps)
+
+    def _batchable(self, step: Step) -> bool:
+        return (
+            self._tools.has_tool(step.tool_name)
+            and self._tools.is_read_only(step.tool_name)
+            and not step.preconditions
+        )
 
     def repair(
         self,
@@ -308,31 +319,23 @@ class ReActPlanner(Planner):
         In ReAct mode, repair is essentially replanning with extra context
         about what went wrong.
         """
-        recent_obs = [model_dump(o) for o in observations[-12:]]
         failure = {
             "failed_step": model_dump(failed_step),
             "tool_result": model_dump(tool_result),
             "reflection": model_dump(reflection),
         }
-        prompt = textwrap.dedent(
-            f"""
-            Goal: {task}
-            unsafe_mode: {self._unsafe_mode}
-
-            The last step failed or needs repair. Propose ONE next step.
-
-            Failure context:
-            {dumps_compact(failure)}
-
-            Retrieved long-term memory:
-            {dumps_compact(memories)}
-
-            Recent observations:
-            {dumps_compact(recent_obs)}
-
-            Return STRICT JSON Plan with exactly one step (or finish).
-            """
-        ).strip()
+        prompt = self._prompts.build(
+            self._plan_prefix(),
+            sections=[
+                ("Goal", task),
+                ("", "The last step failed or needs repair. Propose ONE next step (or finish)."),
+                ("Failure context", failure),
+            ],
+            memories=memories,
+            observations=observations,
+            max_observations=12,
+            closing="Return STRICT JSON Plan with exactly one step (or finish). JSON only.",
+        )
 
         # Use router-selected LLM if available
         llm = self._get_planning_llm()
@@ -0,0 +1,395 @@
+"""Step-level profiling for the agent runner.
+
+Spans are recorded with ``span("name")`` anywhere in the agent; they nest by
+context (``contextvars``), so a ``tool.*`` span opened inside a ``step`` span
+becomes its child. With no active profiler, ``span`` is a near-free no-op, so
+instrumented code pays nothing in normal runs.
+
+A run's profiler writes, next to ``trace.jsonl``:
+
+* ``profile.trace.json`` - Chrome trace-event JSON (chrome://tracing, Perfetto,
+  speedscope)
+* ``profile.otlp.json`` - OpenTelemetry OTLP/JSON spans (``otel-cli``, the
+  collector's ``otlpjsonfile`` receiver, Jaeger import)
+* ``profile.folded`` - collapsed stacks from the optional sampling profiler
+  (``flamegraph.pl``, speedscope, inferno), when sampling was enabled
+
+Enable per run with ``RunnerConfig(profiling=True)`` or ``AGENT_PROFILING=1``;
+add ``AGENT_PROFILING_SAMPLE_MS=5`` (or ``profile_sample_interval_ms``) to also
+sample Python stacks.
+"""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+_TRUTHY = {"1", "true", "yes", "y", "on"}
+
+_active_profiler: "contextvars.ContextVar[Optional[Profiler]]" = contextvars.ContextVar(
+    "agent_profiler", default=None
+)
+_current_span: "contextvars.ContextVar[Optional[int]]" = contextvars.ContextVar(
+    "agent_profiler_span", default=None
+)
+
+
+@dataclass
+class Span:
+    name: str
+    cat: str
+    span_id: int
+    parent_id: Optional[int]
+    start_ns: int
+    thread_id: int
+    thread_name: str
+    end_ns: Optional[int] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or self.start_ns) - self.start_ns
+
+
+class OpenSpan:
+    """Handle for a span that is not tied to a ``with`` block (see ``Profiler.start_span``)."""
+
+    def __init__(self, profiler: "Profiler", span: Span, token: "contextvars.Token") -> None:
+        self._profiler = profiler
+        self.span = span
+        self._token = token
+
+    def set(self, **attrs: Any) -> None:
+        self.span.attrs.update(attrs)
+
+    def end(self) -> None:
+        if self.span.end_ns is not None:
+            return
+        self._profiler._finish(self.span)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended from another context (e.g. a dangling span closed at run end).
+            pass
+
+
+class _NullSpan:
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Collects spans for one run and exports them."""
+
+    def __init__(self, *, sample_interval_ms: Optional[float] = None, service_name: str = "drcodept-agent") -> None:
+        self.service_name = service_name
+        self.trace_id = uuid4().hex
+        self.sample_interval_ms = sample_interval_ms
+        self.sampler: Optional[StackSampler] = None
+        self._spans: List[Span] = []
+        self._open: Dict[int, Span] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # perf_counter is monotonic; this offset turns it into wall-clock time for OTLP.
+        self._epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+        self._tokens: List[tuple] = []
+
+    # -- recording ---------------------------------------------------------
+
+    def start_span(self, name: str, cat: str = "agent", **attrs: Any) -> OpenSpan:
+        thread = threading.current_thread()
+        span = Span(
+            name=name,
+            cat=cat,
+            span_id=next(self._ids),
+            parent_id=_current_span.get(),
+            start_ns=time.perf_counter_ns(),
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            attrs=dict(attrs),
+        )
+        with self._lock:
+            self._open[span.span_id] = span
+        return OpenSpan(self, span, _current_span.set(span.span_id))
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.perf_counter_ns()
+        with self._lock:
+            self._open.pop(span.span_id, None)
+            self._spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "agent", **attrs: Any) -> Iterator[OpenSpan]:
+        handle = self.start_span(name, cat, **attrs)
+        try:
+            yield handle
+        except BaseException as exc:
+            handle.set(error=type(exc).__name__)
+            raise
+        finally:
+            handle.end()
+
+    def end_open_spans(self) -> None:
+        """Close spans a run left open (early returns out of a step, exceptions)."""
+        with self._lock:
+            dangling = list(self._open.values())
+        for span in dangling:
+            span.attrs.setdefault("unclosed", True)
+            self._finish(span)
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return sorted(self._spans, key=lambda s: s.start_ns)
+
+    # -- activation ----------------------------------------------------------
+
+    def activate(self) -> None:
+        """Make this the profiler ``span()`` records into for the current context."""
+        self._tokens.append((_active_profiler.set(self), _current_span.set(None)))
+        if self.sample_interval_ms and self.sampler is None:
+            self.sampler = StackSampler(interval_ms=self.sample_interval_ms)
+            self.sampler.start()
+
+    def deactivate(self) -> None:
+        if self.sampler is not None:
+            self.sampler.stop()
+        self.end_open_spans()
+        if self._tokens:
+            profiler_token, span_token = self._tokens.pop()
+            try:
+                _current_span.reset(span_token)
+                _active_profiler.reset(profiler_token)
+            except ValueError:
+                _current_span.set(None)
+                _active_profiler.set(None)
+
+    # -- export ----------------------------------------------------------------
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per span name: count, total and self time (total minus direct children) in ms."""
+        spans = self.spans
+        child_ns: Dict[int, int] = {}
+        for s in spans:
+            if s.parent_id is not None:
+                child_ns[s.parent_id] = child_ns.get(s.parent_id, 0) + s.duration_ns
+        out: Dict[str, Dict[str, float]] = {}
+        for s in spans:
+            row = out.setdefault(s.name, {"count": 0, "total_ms": 0.0, "self_ms": 0.0})
+            row["count"] += 1
+            row["total_ms"] += s.duration_ns / 1e6
+            row["self_ms"] += max(0, s.duration_ns - child_ns.get(s.span_id, 0)) / 1e6
+        for row in out.values():
+            row["total_ms"] = round(row["total_ms"], 3)
+            row["self_ms"] = round(row["self_ms"], 3)
+        return out
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        spans = self.spans
+        base_ns = spans[0].start_ns if spans else 0
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.service_name}}
+        ]
+        for tid, tname in sorted({(s.thread_id, s.thread_name) for s in spans}):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+        for s in spans:
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": s.cat,
+                    "ph": "X",
+                    "ts": (s.start_ns - base_ns) / 1000.0,
+                    "dur": s.duration_ns / 1000.0,
+                    "pid": pid,
+                    "tid": s.thread_id,
+                    "args": {**_jsonable(s.attrs), "span_id": s.span_id, "parent_id": s.parent_id},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace_id": self.trace_id}}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        otlp_spans = []
+        for s in self.spans:
+            item: Dict[str, Any] = {
+                "traceId": self.trace_id,
+                "spanId": f"{s.span_id:016x}",
+                "name": s.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(s.start_ns + self._epoch_offset_ns),
+                "endTimeUnixNano": str((s.end_ns or s.start_ns) + self._epoch_offset_ns),
+                "attributes": _otlp_attributes({"agent.category": s.cat, "thread.name": s.thread_name, **s.attrs}),
+                "status": {"code": 2 if "error" in s.attrs else 1},
+            }
+            if s.parent_id is not None:
+                item["parentSpanId"] = f"{s.parent_id:016x}"
+            otlp_spans.append(item)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": self.service_name, "process.pid": os.getpid()})},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+    def write(self, out_dir: Path) -> Dict[str, Path]:
+        """Write all exports into ``out_dir``; returns the paths written."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = {
+            "chrome": out_dir / "profile.trace.json",
+            "otlp": out_dir / "profile.otlp.json",
+        }
+        paths["chrome"].write_text(json.dumps(self.to_chrome_trace()), encoding="utf-8")
+        paths["otlp"].write_text(json.dumps(self.to_otlp()), encoding="utf-8")
+        if self.sampler is not None and self.sampler.samples:
+            paths["folded"] = out_dir / "profile.folded"
+            paths["folded"].write_text(self.sampler.folded(), encoding="utf-8")
+        return paths
+
+
+class StackSampler:
+    """Sampling profiler: a daemon thread snapshots every Python thread's stack.
+
+    Like py-spy's ``record --format raw`` it produces collapsed stacks
+    (``thread;module:func;...  count``) without tracing every call, so overhead
+    is bounded by the interval rather than by how much code runs.
+    """
+
+    def __init__(self, *, interval_ms: float = 5.0, max_depth: int = 64) -> None:
+        self.interval_s = max(0.001, float(interval_ms) / 1000.0)
+        self.max_depth = max_depth
+        self.samples: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="agent-stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                key = self._collapse(names.get(tid, str(tid)), frame)
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def _collapse(self, thread_name: str, frame: Any) -> str:
+        parts: List[str] = []
+        while frame is not None and len(parts) < self.max_depth:
+            code = frame.f_code
+            parts.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+            frame = frame.f_back
+        parts.append(thread_name.replace(";", "_"))
+        return ";".join(reversed(parts))
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+
+# -- module-level API ------------------------------------------------------------
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active_profiler.get()
+
+
+@contextmanager
+def span(name: str, cat: str = "agent", **attrs: Any) -> Iterator[Any]:
+    """Record ``name`` on the active profiler; a no-op when profiling is off."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield _NULL_SPAN
+        return
+    with profiler.span(name, cat, **attrs) as handle:
+        yield handle
+
+
+def start_span(name: str, cat: str = "agent", **attrs: Any) -> Any:
+    """Open a span to ``end()`` later (for code that can't be wrapped in ``with``)."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.start_span(name, cat, **attrs)
+
+
+def in_current_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Bind ``fn`` to the caller's context so spans opened on another thread nest correctly.
+
+    Each call runs in its own copy, so the wrapper is safe to hand to a thread pool.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+def profiler_from_env(enabled: bool = False, sample_interval_ms: Optional[float] = None) -> Optional[Profiler]:
+    """Profiler for a run, or None; ``AGENT_PROFILING`` / ``AGENT_PROFILING_SAMPLE_MS`` override the config."""
+    raw_sample = os.getenv("AGENT_PROFILING_SAMPLE_MS", "").strip()
+    if raw_sample:
+        try:
+            sample_interval_ms = float(raw_sample)
+        except ValueError:
+            logger.warning("Ignoring AGENT_PROFILING_SAMPLE_MS=%r (not a number)", raw_sample)
+    enabled = enabled or os.getenv("AGENT_PROFILING", "").strip().lower() in _TRUTHY or bool(raw_sample)
+    if not enabled:
+        return None
+    return Profiler(sample_interval_ms=sample_interval_ms or None)
+
+
+def _jsonable(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for k, v in attrs.items()}
+
+
+def _otlp_attributes(attrs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for key, value in attrs.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": "" if value is None else str(value)}
+        out.append({"key": key, "value": typed})
+    return out
+
+
+__all__ = [
+    "OpenSpan",
+    "Profiler",
+    "Span",
+    "StackSampler",
+    "active_profiler",
+    "in_current_context",
+    "profiler_from_env",
+    "span",
+    "start_span",
+]
@@ -1,13 +1,288 @@
-"""Retry utilities for handling transient failures."""
+"""Retry utilities for handling transient failures.
+
+Besides exponential backoff (jittered in the shared ``*_RETRY_CONFIG``s) this
+module holds the shared resilience pieces the runner and LLM clients use:
+
+- ``deadline()`` sets a run-wide time budget (context-local, so it follows the
+  work into ``in_current_context`` threads); retries stop when the next sleep
+  would not fit, and ``clamp_timeout`` shortens per-call timeouts to match.
+- ``CircuitBreaker`` / ``get_breaker(name)`` track consecutive failures per
+  backend (an LLM provider, or a remote host via ``host_breaker(url)``) and
+  fail fast with ``CircuitOpenError`` while it is known to be down, so
+  fallbacks run at once instead of after a full retry schedule. Breakers are
+  process-wide on purpose: a provider or host that is down is down for every
+  run. Local work (shell, files, python) has no backend and gets no breaker.
+- ``RetryBudget`` caps retries to a fraction of first attempts, so nested retry
+  layers cannot multiply load on a degraded backend.
+
+Retries also stop, and backoff sleeps wake, when the current cancellation
+token fires (see ``cancellation``); cancelled calls do not count against a
+breaker.
+"""
 
 import logging
+import math
+import os
+import random
+import threading
 import time
-from typing import Callable, TypeVar, Any, Optional, Type, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, TypeVar, Any, Optional, Type, Tuple
+from urllib.parse import urlparse
+
+from .cancellation import current_token
+from .exceptions import RunCancelledError
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("retry_deadline", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"circuit open for {name}; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_after = retry_in
+
+
+# ---------------------------------------------------------------------------
+# Deadlines
+# ---------------------------------------------------------------------------
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound retries in this context to ``seconds`` from now (nested deadlines only tighten)."""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    token = _DEADLINE.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none."""
+    expires = _DEADLINE.get()
+    if expires is None:
+        return None
+    return max(0.0, expires - time.monotonic())
+
+
+def clamp_timeout(timeout: Optional[float]) -> Optional[int]:
+    """Shorten a per-call timeout so it ends by the current deadline (never below 1s)."""
+    remaining = time_remaining()
+    if timeout is None or remaining is None:
+        return timeout  # type: ignore[return-value]
+    return max(1, int(math.ceil(min(float(timeout), remaining))))
+
+
+# ---------------------------------------------------------------------------
+# Backoff
+# ---------------------------------------------------------------------------
+
+
+def backoff_delay(delay: float, jitter: float = 0.0) -> float:
+    """Randomise ``delay`` downwards by up to ``jitter`` of itself (0 keeps it, 1.0 is full jitter)."""
+    if delay <= 0 or jitter <= 0:
+        return max(0.0, delay)
+    return delay * (1.0 - min(jitter, 1.0) * random.random())
+
+
+def retry_after_hint(exc: BaseException) -> Optional[float]:
+    """Seconds the backend asked us to wait, from ``retry_after`` or a Retry-After header."""
+    seen = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        value = getattr(current, "retry_after", None)
+        if value is None:
+            headers = getattr(getattr(current, "response", None), "headers", None)
+            if headers is not None:
+                try:
+                    value = headers.get("Retry-After")
+                except Exception:
+                    value = None
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                pass
+        current = getattr(current, "original_error", None) or current.__cause__
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Circuit breakers
+# ---------------------------------------------------------------------------
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._open_for = self.reset_timeout
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self._open_for:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._open_for - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; in half-open state only one probe is let in."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.OPEN or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without recording an outcome (the call was cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit %s closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self, open_for: Optional[float] = None) -> None:
+        """Count a failure; ``open_for`` (e.g. a Retry-After hint) opens the breaker at once."""
+        with self._lock:
+            self._failures += 1
+            probing, self._probing = self._probing, False
+            if open_for is None and not probing and self._failures < self.failure_threshold:
+                return
+            was_open = self._opened_at is not None and not probing
+            if was_open and open_for is None:
+                return  # stragglers finishing after the trip do not extend it
+            self._opened_at = time.monotonic()
+            self._open_for = max(self.reset_timeout if open_for is None else float(open_for), 0.0)
+            if not was_open:
+                logger.warning(
+                    "Circuit %s opened for %.1fs after %d failure(s)", self.name, self._open_for, self._failures
+                )
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for ``name`` (AGENT_BREAKER_FAILURES / AGENT_BREAKER_RESET_SECONDS)."""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("AGENT_BREAKER_FAILURES", "5")),
+                reset_timeout=float(os.getenv("AGENT_BREAKER_RESET_SECONDS", "30")),
+            )
+            _BREAKERS[name] = breaker
+        return breaker
+
+
+def host_breaker(url: Any) -> Optional[CircuitBreaker]:
+    """Breaker for the host ``url`` points at, or None when it has no network location."""
+    if not isinstance(url, str):
+        return None
+    try:
+        host = urlparse(url.strip()).netloc.lower()
+    except ValueError:
+        return None
+    return get_breaker(f"host:{host}") if host else None
+
+
+def reset_breakers() -> None:
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
+
+
+# ---------------------------------------------------------------------------
+# Retry budgets
+# ---------------------------------------------------------------------------
+
+
+class RetryBudget:
+    """Token bucket: every first attempt earns ``ratio`` tokens and every retry spends one.
+
+    Starting full at ``capacity`` allows a short burst; after that retries are
+    held to roughly ``ratio`` of calls, however many retry layers are stacked.
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10.0):
+        self.ratio = max(0.0, float(ratio))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._lock = threading.Lock()
+        self.spent = 0
+        self.denied = 0
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                self.denied += 1
+                return False
+            self._tokens -= 1.0
+            self.spent += 1
+            return True
+
+
+# ---------------------------------------------------------------------------
+# Retry loop
+# ---------------------------------------------------------------------------
+
 
 def retry_with_backoff(
     func: Callable[..., T],
@@ -17,51 +292,130 @@ def retry_with_backoff(
     backoff_factor: float = 2.0,
     transient_exceptions: Tuple[Type[Exception], ...] = (TimeoutError, ConnectionError, OSError),
     *args,
+    jitter: float = 0.0,
+    budget: Optional[RetryBudget] = None,
+    breaker: Optional[CircuitBreaker] = None,
     **kwargs
 ) -> T:
-    """Retry a function with exponential backoff."""
+    """Retry a function with exponential backoff.
+
+    ``jitter`` (0-1) randomises each sleep downwards by up to that fraction; it
+    is off by default here, the shared ``*_RETRY_CONFIG``s turn it on.
+
+    A ``retry_after`` hint on the exception raises the sleep to at least that
+    long. Retrying stops early, re-raising the last error, when the sleep would
+    overrun the current ``deadline()``, when ``budget`` is out of tokens, or when
+    ``breaker`` has opened. Only ``transient_exceptions`` count as failures for
+    ``breaker``; other errors are re-raised without touching it. An open breaker
+    raises ``CircuitOpenError`` without calling.
+    """
     last_exception: Optional[Exception] = None
     delay = initial_delay
-    
+    if budget is not None:
+        budget.record_request()
+
     for attempt in range(1, max_attempts + 1):
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
         try:
-            logger.debug(f"Attempt {attempt}/{max_attempts} for {func.__name__}")
-            return func(*args, **kwargs)
-        
+            logger.debug(f"Attempt {attempt}/{max_attempts} for {getattr(func, '__name__', func)}")
+            result = func(*args, **kwargs)
+
         except transient_exceptions as exc:
             last_exception = exc
-            
+            token = current_token()
+            if token is not None and token.cancelled:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            hint = retry_after_hint(exc)
+            if breaker is not None:
+                breaker.record_failure()
+
             if attempt >= max_attempts:
                 logger.error(f"Failed after {max_attempts} attempts: {exc}", exc_info=True)
                 raise
-            
-            logger.warning(f"Transient error on attempt {attempt}/{max_attempts}: {exc}. Retrying in {delay:.1f}s...")
-            time.sleep(delay)
+
+            sleep_for = backoff_delay(delay, jitter)
+            if hint is not None:
+                sleep_for = max(sleep_for, hint)
+            remaining = time_remaining()
+            if remaining is not None and sleep_for >= remaining:
+                logger.warning(f"Not retrying: {sleep_for:.1f}s backoff exceeds the {remaining:.1f}s left in the deadline ({exc})")
+                raise
+            if breaker is not None and breaker.is_open:
+                logger.warning(f"Not retrying: circuit {breaker.name} is open ({exc})")
+                raise
+            if budget is not None and not budget.try_spend():
+                logger.warning(f"Not retrying: retry budget exhausted ({exc})")
+                raise
+
+            logger.warning(f"Transient error on attempt {attempt}/{max_attempts}: {exc}. Retrying in {sleep_for:.1f}s...")
+            if token is None:
+                time.sleep(sleep_for)
+            elif token.wait(sleep_for):
+                raise
             delay = min(delay * backoff_factor, max_delay)
-        
+
+        except RunCancelledError:
+            if breaker is not None:
+                breaker.release()
+            raise
+
         except Exception as exc:
+            # Not a backend failure (bad output, a bug in ``func``): the backend
+            # answered, so the breaker neither counts it nor keeps the probe slot.
+            if breaker is not None:
+                breaker.release()
             logger.error(f"Non-transient error: {exc}", exc_info=True)
             raise
-    
+
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
     if last_exception:
         raise last_exception
 
 
 class RetryConfig:
     """Configuration for retry behavior."""
-    
-    def __init__(self, max_attempts: int = 3, initial_delay: float = 1.0, max_delay: float = 10.0, backoff_factor: float = 2.0, transient_exceptions: Tuple[Type[Exception], ...] = (TimeoutError, ConnectionError, OSError)):
+
+    def __init__(self, max_attempts: int = 3, initial_delay: float = 1.0, max_delay: float = 10.0, backoff_factor: float = 2.0, transient_exceptions: Tuple[Type[Exception], ...] = (TimeoutError, ConnectionError, OSError), jitter: float = 0.0):
         self.max_attempts = max_attempts
         self.initial_delay = initial_delay
         self.max_delay = max_delay
         self.backoff_factor = backoff_factor
         self.transient_exceptions = transient_exceptions
-    
-    def retry(self, func: Callable[..., T], *args, **kwargs) -> T:
+        self.jitter = jitter
+
+    def retry(
+        self,
+        func: Callable[..., T],
+        *args,
+        budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        **kwargs,
+    ) -> T:
         """Execute function with retry logic."""
-        return retry_with_backoff(func, self.max_attempts, self.initial_delay, self.max_delay, self.backoff_factor, self.transient_exceptions, *args, **kwargs)
+        return retry_with_backoff(
+            func,
+            self.max_attempts,
+            self.initial_delay,
+            self.max_delay,
+            self.backoff_factor,
+            self.transient_exceptions,
+            *args,
+            jitter=self.jitter,
+            budget=budget,
+            breaker=breaker,
+            **kwargs,
+        )
 
 
-LLM_RETRY_CONFIG = RetryConfig(max_attempts=3, initial_delay=2.0, max_delay=10.0, backoff_factor=2.0)
-TOOL_RETRY_CONFIG = RetryConfig(max_attempts=2, initial_delay=1.0, max_delay=5.0, backoff_factor=2.0)
-WEB_RETRY_CONFIG = RetryConfig(max_attempts=3, initial_delay=1.0, max_delay=10.0, backoff_factor=2.0)
+# Jittered so callers that failed together (one provider or host going down
+# under parallel steps or concurrent runs) do not all retry in lockstep.
+LLM_RETRY_CONFIG = RetryConfig(max_attempts=3, initial_delay=2.0, max_delay=10.0, backoff_factor=2.0, jitter=0.5)
+TOOL_RETRY_CONFIG = RetryConfig(max_attempts=2, initial_delay=1.0, max_delay=5.0, backoff_factor=2.0, jitter=0.5)
+WEB_RETRY_CONFIG = RetryConfig(max_attempts=3, initial_delay=1.0, max_delay=10.0, backoff_factor=2.0, jitter=0.5)
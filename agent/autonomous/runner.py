@@ -8,6 +8,8 @@ import threading
 import time
 import hashlib
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -16,15 +18,16 @@ from uuid import uuid4
 
 from agent.llm.base import LLMClient
 from agent.llm import schemas as llm_schemas
-from agent.llm.codex_cli_client import CodexCliAuthError
+from agent.llm import ledger as llm_ledger
+from agent.llm.codex_cli_client import CodexCliAuthError, reasoning_effort_override
 
 from .config import AgentConfig, PlannerConfig, RunContext, RunnerConfig
 from agent.config.profile import RunUsage
 from .jsonio import dumps_compact
 from .loop_detection import LoopDetector
-from .exceptions import AgentException, LLMError, ToolExecutionError
+from .exceptions import AgentException, LLMError, RunCancelledError, ToolExecutionError
 from .manifest import write_run_manifest
-from agent.autonomous.checkpointing import CheckpointManager
+from agent.autonomous.checkpointing import CheckpointManager, IncrementalCheckpointer
 from agent.autonomous.profiles import get_profile
 from agent.autonomous.qa.qa_agent import QAAgent
 from agent.autonomous.qa.artifact_validator import ArtifactValidator
@@ -34,14 +37,26 @@ from .perception import Perceptor
 from .planning.plan_first import PlanFirstPlanner
 from .planning.react import ReActPlanner
 from .reflection import Reflector
+from .speculation import Speculation, SpeculativePlanner
 from .logging_config import configure_logging
 from .state import AgentState, UnifiedAgentState, StopReason
 from .guards import ThrashGuard, GuardConfig, EscalationAction
-from .tools.builtins import build_default_tool_registry
+from .tools.builtins import build_default_tool_registry, release_run_resources
 from .tools.registry import ToolRegistry
 from .trace import JsonlTracer
-from agent.autonomous.retry_utils import LLM_RETRY_CONFIG, TOOL_RETRY_CONFIG, retry_with_backoff
+from agent.autonomous.retry_utils import (
+    LLM_RETRY_CONFIG,
+    TOOL_RETRY_CONFIG,
+    RetryBudget,
+    clamp_timeout,
+    deadline,
+    get_breaker,
+    host_breaker,
+    retry_with_backoff,
+)
+from agent.autonomous.cancellation import CancellationToken, KillSwitchWatcher, current_token, use_token
 from agent.autonomous.monitoring import ResourceMonitor
+from agent.autonomous.profiling import in_current_context, profiler_from_env, span, start_span
 from time import perf_counter
 
 logger = logging.getLogger(__name__)
@@ -256,6 +271,11 @@ def _write_loop_detected(
         return
 
 
+# Per-call LLM timeout set by ``AgentRunner._with_llm_timeout``; context-local
+# because the speculative planner calls the run's LLM from a helper thread.
+_LLM_TIMEOUT: ContextVar[Optional[int]] = ContextVar("llm_default_timeout", default=None)
+
+
 class TrackedLLM:
     def __init__(self, llm: LLMClient):
         self._llm = llm
@@ -265,10 +285,17 @@ class TrackedLLM:
         self._tokens_per_char = float(os.getenv("LLM_TOKENS_PER_CHAR", "0.25"))
         cost_per_1k = os.getenv("LLM_COST_PER_1K_TOKENS_USD")
         self._cost_per_1k = float(cost_per_1k) if cost_per_1k else None
-        self.default_timeout_seconds: Optional[int] = None
+        # Speculative planning and parallel tools may call the LLM off the main thread.
+        self._lock = threading.Lock()
 
         self.provider = getattr(llm, "provider", "unknown")
         self.model = getattr(llm, "model", "unknown")
+        self.breaker = get_breaker(f"llm:{self.provider}")
+        self.retry_budget: Optional[RetryBudget] = None
+
+    @property
+    def default_timeout_seconds(self) -> Optional[int]:
+        return _LLM_TIMEOUT.get()
 
     @property
     def cost_per_1k(self) -> Optional[float]:
@@ -277,24 +304,53 @@ class TrackedLLM:
     def complete_json(self, prompt: str, *, schema_path: Path, timeout_seconds: Optional[int] = None) -> Dict[str, Any]:
         if timeout_seconds is None and self.default_timeout_seconds is not None:
             timeout_seconds = self.default_timeout_seconds
+        timeout_seconds = clamp_timeout(timeout_seconds)
         def _attempt():
             return self._llm.complete_json(
                 prompt, schema_path=schema_path, timeout_seconds=timeout_seconds
             )
 
-        out = LLM_RETRY_CONFIG.retry(_attempt)
-        self.calls += 1
-        out_str = json.dumps(out, ensure_ascii=False, sort_keys=True, default=str)
-        chars = len(prompt) + len(out_str)
-        tokens = chars * self._tokens_per_char
-        self.estimated_tokens += tokens
-        if self._cost_per_1k is not None:
-            self.estimated_cost_usd += (tokens / 1000.0) * self._cost_per_1k
+        return self._tracked_call(prompt, schema_path, _attempt)
+
+    def _tracked_call(self, prompt: str, schema_path: Path, attempt) -> Dict[str, Any]:
+        with span("llm.wait", cat="llm", schema=schema_path.name, prompt_chars=len(prompt)), llm_ledger.track(
+            Path(schema_path).name.split(".")[0],
+            source="runner",
+            provider=self.provider,
+            model=self.model,
+            schema=Path(schema_path).name,
+            prompt_chars=len(prompt),
+        ) as call:
+            call.requested()
+
+            def _dispatch():
+                before = call.attempts
+                call.dispatched()
+                try:
+                    return attempt()
+                finally:
+                    # Backends that mark their own dispatch (CodexCliClient) count the attempt.
+                    if call.attempts > before + 1:
+                        call.attempts -= 1
+
+            out = LLM_RETRY_CONFIG.retry(_dispatch, budget=self.retry_budget, breaker=self.breaker)
+            call.response_chars = len(json.dumps(out, ensure_ascii=False, default=str))
+        self._account(prompt, out)
         return out
 
+    def _account(self, prompt: str, out: Any) -> None:
+        out_str = json.dumps(out, ensure_ascii=False, sort_keys=True, default=str)
+        tokens = (len(prompt) + len(out_str)) * self._tokens_per_char
+        with self._lock:
+            self.calls += 1
+            self.estimated_tokens += tokens
+            if self._cost_per_1k is not None:
+                self.estimated_cost_usd += (tokens / 1000.0) * self._cost_per_1k
+
     def reason_json(self, prompt: str, *, schema_path: Path, timeout_seconds: Optional[int] = None) -> Dict[str, Any]:
         if timeout_seconds is None and self.default_timeout_seconds is not None:
             timeout_seconds = self.default_timeout_seconds
+        timeout_seconds = clamp_timeout(timeout_seconds)
         def _attempt():
             # Prefer a dedicated reasoning method if available.
             if hasattr(self._llm, "reason_json"):
@@ -309,15 +365,7 @@ class TrackedLLM:
                 prompt, schema_path=schema_path, timeout_seconds=timeout_seconds
             )
 
-        out = LLM_RETRY_CONFIG.retry(_attempt)
-        self.calls += 1
-        out_str = json.dumps(out, ensure_ascii=False, sort_keys=True, default=str)
-        chars = len(prompt) + len(out_str)
-        tokens = chars * self._tokens_per_char
-        self.estimated_tokens += tokens
-        if self._cost_per_1k is not None:
-            self.estimated_cost_usd += (tokens / 1000.0) * self._cost_per_1k
-        return out
+        return self._tracked_call(prompt, schema_path, _attempt)
 
 
 @dataclass
@@ -347,6 +395,7 @@ class AgentRunner:
         agent_id: Optional[str] = None,
         model_router: Optional[Any] = None,
         use_thrash_guard: bool = True,
+        owns_memory_store: bool = True,
     ) -> None:
         self.cfg = cfg
         self.agent_cfg = agent_cfg
@@ -355,10 +404,13 @@ class AgentRunner:
         self.tools = tools
         self.run_dir = run_dir
         self.memory_store = memory_store
+        # False when the store is shared (REPL session, daemon) and outlives this runner.
+        self.owns_memory_store = owns_memory_store
         self.mode_name = mode_name
         self.agent_id = agent_id
         self.model_router = model_router
         self.resource_monitor = ResourceMonitor(memory_limit_mb=1024)
+        self._retry_budget = self._new_retry_budget()
         self._step_count = 0
         self._base_reasoning_effort = _normalize_effort(os.getenv("CODEX_REASONING_EFFORT"))
         self._current_reasoning_effort = self._base_reasoning_effort
@@ -374,6 +426,10 @@ class AgentRunner:
         else:
             self.thrash_guard = None
 
+    def _new_retry_budget(self) -> Optional[RetryBudget]:
+        ratio = getattr(self.cfg, "retry_budget_ratio", None)
+        return RetryBudget(ratio=ratio) if ratio is not None else None
+
     def _log_perf(self, category: str, metric: str, duration: float, metadata: Dict[str, Any] = None) -> None:
         """Log performance metric to performance.log."""
         if not self.run_dir:
@@ -798,14 +854,41 @@ class AgentRunner:
                 run_dir = Path(resume.get("run_dir")).resolve()
             except Exception:
                 pass
+        profiler = profiler_from_env(self.cfg.profiling, self.cfg.profile_sample_interval_ms)
+        self.profiler = profiler
+        self._retry_budget = self._new_retry_budget()
+        cancel_token = CancellationToken(self.cfg.timeout_seconds)
+        self._cancel_token = cancel_token
+        kill_watcher = KillSwitchWatcher(cancel_token, self._kill_switch_triggered).start()
         try:
-            result = self._run_impl(
-                task,
-                resume=resume,
-                run_id=run_id,
-                run_dir=run_dir,
-                repo_root=repo_root,
-            )
+            if profiler is not None:
+                profiler.activate()
+            try:
+                with llm_ledger.bind_run(run_id), deadline(self.cfg.timeout_seconds), use_token(cancel_token), span(
+                    "run", cat="run", run_id=run_id, profile=self.cfg.profile
+                ):
+                    result = self._run_impl(
+                        task,
+                        resume=resume,
+                        run_id=run_id,
+                        run_dir=run_dir,
+                        repo_root=repo_root,
+                    )
+            finally:
+                kill_watcher.stop()
+                cancel_token.close()
+                # Per-run state in process-wide tables (browser lease, HTTP memo,
+                # snapshot history); runs that stop without calling finish
+                # (timeout, max_steps, error, cancel) hold it too.
+                release_run_resources(run_id)
+                # Drain the buffered trace before QA/manifest readers look at it.
+                active_tracer = getattr(self, "_active_tracer", None)
+                if active_tracer is not None:
+                    active_tracer.close()
+                    self._active_tracer = None
+                if profiler is not None:
+                    profiler.deactivate()
+                    self._write_profile(profiler, run_dir)
             result_status = "success" if result.success else "failure"
             manifest_path = run_dir / "run_manifest.json"
             if manifest_path.exists():
@@ -861,6 +944,17 @@ class AgentRunner:
                 trace_path=str(Path(run_dir / "trace.jsonl")),
             )
 
+    def _write_profile(self, profiler: Any, run_dir: Path) -> None:
+        try:
+            paths = profiler.write(run_dir)
+        except Exception as exc:
+            logger.warning("Writing profile failed: %s", exc)
+            return
+        summary = profiler.summary()
+        for name, row in sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"]):
+            self._log_perf("span", name, row["total_ms"] / 1000.0, {"count": row["count"], "self_ms": row["self_ms"]})
+        logger.info("Profile written: %s", ", ".join(str(p) for p in paths.values()))
+
     def save_run_manifest(
         self,
         run_dir: Path,
@@ -905,7 +999,7 @@ class AgentRunner:
     def __del__(self):
         """Ensure resources are cleaned up."""
         try:
-            if hasattr(self, "memory_store") and self.memory_store:
+            if getattr(self, "memory_store", None) and getattr(self, "owns_memory_store", True):
                 logger.debug("Closing memory store")
                 self.memory_store.close()
         except Exception as exc:
@@ -982,6 +1076,8 @@ class AgentRunner:
 
         # trace.jsonl/result.json are the authoritative execution artifacts; stdout is for humans.
         tracer = JsonlTracer(run_dir / "trace.jsonl")
+        self._active_tracer = tracer
+        self._checkpointer = IncrementalCheckpointer(run_dir)
         perceptor = Perceptor()
         llm = self.llm
         try:
@@ -995,6 +1091,7 @@ class AgentRunner:
                 except (OSError, RuntimeError, ValueError) as exc:
                     logger.warning("CodexCliClient context setup failed: %s", exc)
         tracked_llm = TrackedLLM(llm)
+        tracked_llm.retry_budget = self._retry_budget
         reflector = Reflector(llm=tracked_llm, pre_mortem_enabled=self.agent_cfg.pre_mortem_enabled)
 
         if agent_profile and agent_profile.stage_checkpoints:
@@ -1044,6 +1141,11 @@ class AgentRunner:
             f"[CONFIG] plan_timeout={plan_timeout}s plan_retry_timeout={retry_timeout}s heartbeat={heartbeat_text}"
         )
         self._stats = {"tool_calls": 0, "retries": 0}
+        speculator: Optional[SpeculativePlanner] = None
+        if self.cfg.speculative_planning and self.planner_cfg.mode == "react":
+            speculator = SpeculativePlanner(min_tool_seconds=self.cfg.speculative_min_tool_seconds)
+        self._speculator = speculator
+        speculation: Optional[Speculation] = None
         started_at = datetime.now(timezone.utc).isoformat()
         start = time.monotonic()
 
@@ -1143,16 +1245,22 @@ class AgentRunner:
             last_plan_hash=last_plan_hash,
             exploration_nudge_next=exploration_nudge_next,
             exploration_reason=exploration_reason,
+            tracer=tracer,
         )
 
+        step_span = None
         try:
             while True:
-                if self._kill_switch_triggered():
+                if step_span is not None:
+                    step_span.end()
+                step_span = start_span("step", cat="step", index=steps_executed + 1)
+                stop_reason = self._cancel_reason()
+                if stop_reason:
                     return self._stop(
                         tracer=tracer,
                         memory_store=memory_store,
                         success=False,
-                        reason="kill_switch",
+                        reason=stop_reason,
                         steps=steps_executed,
                         run_id=run_id,
                         llm_stats=tracked_llm,
@@ -1232,20 +1340,30 @@ class AgentRunner:
                         mem = memories if not compact else memories[:3]
                         timeout = self.cfg.llm_plan_timeout_seconds if not compact else self.cfg.llm_plan_retry_timeout_seconds
                         return self._with_llm_timeout(
-                            tracked_llm,
                             timeout,
                             lambda: planner.plan(task=nudge_task, observations=obs, memories=mem),
                         )
 
                     plan_effort = self._current_reasoning_effort
-                    plan = self._call_llm_with_retry(
-                        tracer=tracer,
-                        where="plan",
-                        fn=lambda: self._with_reasoning_effort(plan_effort, lambda: _plan_call(False)),
-                        label=plan_label,
-                        max_retries=0,
-                        timeout_seconds=self.cfg.llm_plan_timeout_seconds,
-                    )
+                    plan = None
+                    if speculation is not None:
+                        plan, spec_event = speculator.resolve(
+                            speculation,
+                            usable=not exploration_nudge_next,
+                            reason="exploration_nudge",
+                            timeout=self.cfg.llm_plan_timeout_seconds,
+                        )
+                        speculation = None
+                        tracer.log(spec_event)
+                    if plan is None:
+                        plan = self._call_llm_with_retry(
+                            tracer=tracer,
+                            where="plan",
+                            fn=lambda: self._with_reasoning_effort(plan_effort, lambda: _plan_call(False)),
+                            label=plan_label,
+                            max_retries=0,
+                            timeout_seconds=self.cfg.llm_plan_timeout_seconds,
+                        )
                     if plan is None:
                         _status_print("[THINKING] Planning is taking too long; trying a simpler, faster plan.")
                         plan = self._call_llm_with_retry(
@@ -1296,7 +1414,6 @@ class AgentRunner:
                             mem = memories if not compact else memories[:3]
                             timeout = self.cfg.llm_plan_timeout_seconds if not compact else self.cfg.llm_plan_retry_timeout_seconds
                             return self._with_llm_timeout(
-                                tracked_llm,
                                 timeout,
                                 lambda: planner.plan(task=task, observations=obs, memories=mem),
                             )
@@ -1365,6 +1482,98 @@ class AgentRunner:
                 if self.cfg.llm_heartbeat_seconds:
                     _status_print(f"[PLAN] Next tool: {step.tool_name} - {step.goal}")
 
+                batch_start_idx = 0 if self.planner_cfg.mode == "react" else state.current_step_idx
+                batch = self._parallel_batch(plan, tools, start=batch_start_idx)
+                if batch:
+                    batch_results = self._run_tool_batch(tools, ctx, batch, tracer)
+                    batch_failed = False
+                    batch_loop: Optional[Dict[str, Any]] = None
+                    for b_step, b_result in zip(batch, batch_results):
+                        b_obs = perceptor.tool_result_to_observation(b_step.tool_name, b_result)
+                        state.add_observation(b_obs)
+                        batch_failed = batch_failed or not b_result.success
+                        tracer.log(
+                            {
+                                "type": "step",
+                                "step_index": steps_executed,
+                                "parallel_batch": True,
+                                "plan": self._dump(plan),
+                                "action": {"tool_name": b_step.tool_name, "tool_args": b_step.tool_args, "step": self._dump(b_step)},
+                                "result": self._dump(b_result),
+                                "observation": self._dump(b_obs),
+                                "reflection": {
+                                    "status": "success" if b_result.success else "replan",
+                                    "explanation_short": "parallel read-only batch; reflection deferred to the next plan",
+                                    "next_hint": b_result.error or "",
+                                },
+                            }
+                        )
+                        b_output = _summarize_output(b_result.output, limit=2000)
+                        is_loop, _message = loop_detector.check(b_step.tool_name, b_step.tool_args, b_output)
+                        if is_loop and batch_loop is None:
+                            batch_loop = {
+                                "signature": {
+                                    "tool_name": b_step.tool_name,
+                                    "args_hash": _hash_text(_json_dumps(b_step.tool_args)),
+                                    "output_hash": _hash_text(b_output),
+                                },
+                                "output_summary": _summarize_output(b_result.output),
+                            }
+                    if len(state.observations) > 1000:
+                        state.observations = state.observations[-1000:]
+                    steps_executed += 1
+                    _emit_progress(steps_executed, self.cfg.max_steps, time.monotonic() - start)
+                    self._save_checkpoint(
+                        run_dir,
+                        state=state,
+                        task=task,
+                        run_id=run_id,
+                        steps_executed=steps_executed,
+                        consecutive_no_progress=consecutive_no_progress,
+                        last_plan_hash=last_plan_hash,
+                        exploration_nudge_next=exploration_nudge_next,
+                        exploration_reason=exploration_reason,
+                        tracer=tracer,
+                    )
+                    if batch_loop is not None:
+                        if self.planner_cfg.mode == "react" and not loop_nudge_used:
+                            exploration_nudge_next = True
+                            exploration_reason = "loop_detected"
+                            loop_nudge_used = True
+                        else:
+                            _write_loop_detected(
+                                run_dir,
+                                signature=batch_loop["signature"],
+                                output_summary=batch_loop["output_summary"],
+                                window=self.cfg.loop_window,
+                                repeat_threshold=self.cfg.loop_repeat_threshold,
+                            )
+                            return self._stop(
+                                tracer=tracer,
+                                memory_store=memory_store,
+                                success=False,
+                                reason="loop_detected",
+                                steps=steps_executed,
+                                run_id=run_id,
+                                llm_stats=tracked_llm,
+                                task=task,
+                                state=state,
+                                run_dir=run_dir,
+                                started_at=started_at,
+                                started_monotonic=start,
+                                error_data=batch_loop,
+                            )
+                    if not batch_failed:
+                        consecutive_no_progress = 0
+                        if self.planner_cfg.mode == "plan_first":
+                            state.current_step_idx += len(batch)
+                    elif self.planner_cfg.mode == "plan_first":
+                        # The rest of the plan may depend on what failed to load.
+                        current_plan = None
+                        state.current_plan = None
+                        state.current_step_idx = 0
+                    continue
+
                 preempted_tool_result: Optional[ToolResult] = None
                 # Approval gate for tools that require explicit confirmation
                 if tools.requires_approval(step.tool_name):
@@ -1481,7 +1690,36 @@ class AgentRunner:
                             }
                         )
                     else:
+                        if speculator is not None and speculator.should_speculate(
+                            step, read_only=tools.is_read_only(step.tool_name)
+                        ):
+                            spec_memories = memories
+                            spec_effort = self._current_reasoning_effort
+
+                            def _speculative_plan(obs_view: List[Observation]) -> Optional[Plan]:
+                                # Same timeout, effort and retry deadline as a normal
+                                # planning call; the speculator supplies context and token.
+                                return self._call_llm_with_retry(
+                                    tracer=tracer,
+                                    where="plan_speculative",
+                                    fn=lambda: self._with_reasoning_effort(
+                                        spec_effort,
+                                        lambda: self._with_llm_timeout(
+                                            self.cfg.llm_plan_timeout_seconds,
+                                            lambda: planner.plan(task=task, observations=obs_view, memories=spec_memories),
+                                        ),
+                                    ),
+                                    allow_none=True,
+                                    max_retries=0,
+                                    timeout_seconds=self.cfg.llm_plan_timeout_seconds,
+                                )
+
+                            speculation = speculator.start(step, state.observations, _speculative_plan)
+                        tool_started = perf_counter()
                         tool_result = self._call_tool_with_retry(tools, ctx, step.tool_name, step.tool_args, tracer)
+                        tool_seconds = perf_counter() - tool_started
+                        if speculator is not None and speculation is None:
+                            speculator.record_duration(step.tool_name, tool_seconds)
 
                         # Postconditions check (if provided)
                         post_ok, post_report = self._check_conditions(
@@ -1591,6 +1829,8 @@ class AgentRunner:
                     }
 
                 obs = perceptor.tool_result_to_observation(step.tool_name, tool_result)
+                if speculation is not None and speculation.step is step:
+                    speculator.observe(speculation, tool_result, obs, tool_seconds)
                 state.add_observation(obs)
                 if len(state.observations) > 1000:
                     state.observations = state.observations[-1000:]
@@ -1604,6 +1844,7 @@ class AgentRunner:
                     last_plan_hash=last_plan_hash,
                     exploration_nudge_next=exploration_nudge_next,
                     exploration_reason=exploration_reason,
+                    tracer=tracer,
                 )
 
                 if tool_result.metadata.get("approval_required") and "suggested_reflection" not in tool_result.metadata:
@@ -1648,14 +1889,15 @@ class AgentRunner:
                             explanation_short="Fast profile: skipping reflection on success"
                         )
                     else:
-                        reflection = self._call_llm_with_retry(
-                            tracer=tracer,
-                            where="reflection",
-                            fn=lambda: self._with_reasoning_effort(
-                                self._current_reasoning_effort,
-                                lambda: reflector.reflect(task=task, step=step, tool_result=tool_result, observation=obs),
-                            ),
-                        )
+                        with span("reflection", cat="reflection", tool=step.tool_name):
+                            reflection = self._call_llm_with_retry(
+                                tracer=tracer,
+                                where="reflection",
+                                fn=lambda: self._with_reasoning_effort(
+                                    self._current_reasoning_effort,
+                                    lambda: reflector.reflect(task=task, step=step, tool_result=tool_result, observation=obs),
+                                ),
+                            )
                 except CodexCliAuthError as exc:
                      return self._stop(
                         tracer=tracer,
@@ -1690,6 +1932,8 @@ class AgentRunner:
 
                 if tool_result.metadata.get("suggested_reflection") in {"minor_repair", "replan"}:
                     reflection.status = tool_result.metadata["suggested_reflection"]
+                if speculation is not None and reflection.status != "success":
+                    speculation.matched, speculation.reason = False, f"reflection_{reflection.status}"
 
                 tracer.log(
                     {
@@ -1722,6 +1966,7 @@ class AgentRunner:
                     last_plan_hash=last_plan_hash,
                     exploration_nudge_next=exploration_nudge_next,
                     exploration_reason=exploration_reason,
+                    tracer=tracer,
                 )
 
                 # If we appear to be done, verify goal and finish early.
@@ -1805,16 +2050,18 @@ class AgentRunner:
                 # Save checkpoint periodically
                 step_count = steps_executed
                 if step_count % profile.checkpoint_interval == 0:
+                    # Full state lives in checkpoint.json + checkpoint.log.jsonl; this
+                    # per-step marker only records where that log stood.
+                    checkpointer = getattr(self, "_checkpointer", None)
                     checkpoint_state = {
                         "step": step_count,
-                        "observations": [
-                            obs.model_dump() if hasattr(obs, "model_dump") else obs.dict()
-                            for obs in state.observations
-                        ],
+                        "observation_count": len(state.observations),
+                        "checkpoint_seq": checkpointer.seq if checkpointer is not None else None,
                         "task": task,
                         "status": "in_progress",
                     }
-                    checkpoint_manager.save_checkpoint(step_count, checkpoint_state)
+                    with span("checkpoint.marker", cat="io"):
+                        checkpoint_manager.save_checkpoint(step_count, checkpoint_state)
 
                 args_hash = _hash_text(_json_dumps(step.tool_args))
                 output_text = _summarize_output(tool_result.output, limit=2000)
@@ -1943,7 +2190,26 @@ class AgentRunner:
                     state.current_plan = None
                     state.current_step_idx = 0
 
+        except RunCancelledError as exc:
+            return self._stop(
+                tracer=tracer,
+                memory_store=memory_store,
+                success=False,
+                reason=self._cancel_reason() or exc.reason,
+                steps=steps_executed,
+                run_id=run_id,
+                llm_stats=tracked_llm,
+                task=task,
+                state=state,
+                run_dir=run_dir,
+                started_at=started_at,
+                started_monotonic=start,
+            )
         finally:
+            if step_span is not None:
+                step_span.end()
+            if speculator is not None:
+                speculator.shutdown()
             try:
                 if self.memory_store is None and memory_store is not None:
                     memory_store.close()
@@ -1968,6 +2234,7 @@ class AgentRunner:
                 max_steps=self.planner_cfg.max_plan_steps,
                 use_dppm=self.planner_cfg.use_dppm,
                 use_tot=self.planner_cfg.use_tot,
+                max_parallel_calls=self.planner_cfg.parallel_llm_calls,
             )
         return ReActPlanner(llm=planner_llm, tools=tools, unsafe_mode=self.agent_cfg.unsafe_mode)
 
@@ -2022,6 +2289,20 @@ class AgentRunner:
         except Exception:
             return None
 
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Stop the current run, terminating its in-flight LLM calls and tools."""
+        token = getattr(self, "_cancel_token", None)
+        return token.cancel(reason) if token is not None else False
+
+    def _cancel_reason(self) -> Optional[str]:
+        """Stop reason once the run's token has fired (polls the kill switch when no token is bound)."""
+        token = current_token()
+        if token is None:
+            return "kill_switch" if self._kill_switch_triggered() else None
+        if not token.cancelled:
+            return None
+        return "timeout" if token.reason == "deadline" else token.reason
+
     def _kill_switch_triggered(self) -> bool:
         if os.getenv("AGENT_KILL_SWITCH", "").strip().lower() in {"1", "true", "yes", "y"}:
             return True
@@ -2047,6 +2328,11 @@ class AgentRunner:
     ) -> List[dict]:
         if store is None:
             return []
+        with span("memory.retrieve", cat="memory", queries=1 + len(extra_queries or [])):
+            return self._search_memories(store, task, extra_queries)
+
+    @staticmethod
+    def _search_memories(store: SqliteMemoryStore, task: str, extra_queries: Optional[List[str]]) -> List[dict]:
         try:
             queries = [task]
             if extra_queries:
@@ -2092,12 +2378,42 @@ class AgentRunner:
         last_plan_hash: Optional[str],
         exploration_nudge_next: bool,
         exploration_reason: str,
+        tracer: Optional[JsonlTracer] = None,
     ) -> None:
-        payload = {
+        with span("checkpoint", cat="io", step=steps_executed):
+            self._write_checkpoint(
+                run_dir,
+                state=state,
+                task=task,
+                run_id=run_id,
+                steps_executed=steps_executed,
+                consecutive_no_progress=consecutive_no_progress,
+                last_plan_hash=last_plan_hash,
+                exploration_nudge_next=exploration_nudge_next,
+                exploration_reason=exploration_reason,
+                tracer=tracer,
+            )
+
+    def _write_checkpoint(
+        self,
+        run_dir: Path,
+        *,
+        state: AgentState,
+        task: str,
+        run_id: str,
+        steps_executed: int,
+        consecutive_no_progress: int,
+        last_plan_hash: Optional[str],
+        exploration_nudge_next: bool,
+        exploration_reason: str,
+        tracer: Optional[JsonlTracer],
+    ) -> None:
+        if tracer is not None:
+            tracer.checkpoint()
+        meta = {
             "run_id": run_id,
             "run_dir": str(run_dir),
             "task": task,
-            "state": state.to_dict(),
             "steps_executed": steps_executed,
             "consecutive_no_progress": consecutive_no_progress,
             "last_plan_hash": last_plan_hash,
@@ -2106,9 +2422,12 @@ class AgentRunner:
             "planner_mode": self.planner_cfg.mode,
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
+        checkpointer = getattr(self, "_checkpointer", None)
+        if checkpointer is None or checkpointer.run_dir != run_dir:
+            checkpointer = IncrementalCheckpointer(run_dir)
+            self._checkpointer = checkpointer
         try:
-            path = self._checkpoint_path(run_dir)
-            path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+            checkpointer.save(state, meta)
         except Exception:
             pass
 
@@ -2117,13 +2436,7 @@ class AgentRunner:
         if path is None:
             return None
         try:
-            if path.is_dir():
-                path = path / "checkpoint.json"
-            if not path.is_file():
-                return None
-            raw = path.read_text(encoding="utf-8", errors="replace")
-            data = json.loads(raw)
-            return data if isinstance(data, dict) else None
+            return IncrementalCheckpointer.load(path)
         except Exception:
             return None
 
@@ -2180,7 +2493,9 @@ class AgentRunner:
             
             t0 = perf_counter()
             try:
-                result = tools.call(tool_name, tool_args, ctx)
+                with span(f"tool.{tool_name}", cat="tool", attempt=1 if last is None else 2) as tool_span:
+                    result = tools.call(tool_name, tool_args, ctx)
+                    tool_span.set(success=result.success)
             finally:
                 dur = perf_counter() - t0
                 self._log_perf("tool", tool_name, dur, {"success": result.success if 'result' in locals() else False})
@@ -2207,6 +2522,11 @@ class AgentRunner:
                 max_delay=max_delay,
                 backoff_factor=backoff_factor,
                 transient_exceptions=(ToolExecutionError,),
+                jitter=TOOL_RETRY_CONFIG.jitter,
+                budget=self._retry_budget,
+                # Keyed by the remote host, not the tool: one dead URL must not
+                # open web_fetch for every other host and every other run.
+                breaker=host_breaker(tool_args.get("url")) if isinstance(tool_args, dict) else None,
             )
         except ToolExecutionError:
             return last or ToolResult(success=False, error="tool_failed")
@@ -2214,6 +2534,71 @@ class AgentRunner:
             logger.error("Tool execution raised %s: %s", type(exc).__name__, exc)
             return last or ToolResult(success=False, error=str(exc))
 
+    def _parallel_batch(self, plan: Plan, tools: ToolRegistry, *, start: int = 0) -> List[Step]:
+        """Leading run of independent read-only steps that can execute concurrently.
+
+        Returns an empty list unless at least two steps qualify: a step must use a
+        read-only tool, need no approval, and carry no preconditions (those are
+        evaluated against the observation of the previous step).
+        """
+        if self.cfg.parallel_tool_workers <= 1:
+            return []
+        batch: List[Step] = []
+        seen = set()
+        for step in plan.steps[start:]:
+            if (
+                not tools.is_read_only(step.tool_name)
+                or not tools.has_tool(step.tool_name)
+                or tools.requires_approval(step.tool_name)
+                or step.preconditions
+            ):
+                break
+            key = (step.tool_name, _json_dumps(step.tool_args))
+            if key in seen:
+                break
+            seen.add(key)
+            batch.append(step)
+        return batch if len(batch) > 1 else []
+
+    def _run_tool_batch(
+        self,
+        tools: ToolRegistry,
+        ctx: RunContext,
+        steps: List[Step],
+        tracer: JsonlTracer,
+    ) -> List[ToolResult]:
+        """Run ``steps`` on a bounded thread pool; results keep the input order."""
+        durations: List[float] = [0.0] * len(steps)
+
+        def _one(i: int) -> ToolResult:
+            t0 = perf_counter()
+            try:
+                return self._call_tool_with_retry(tools, ctx, steps[i].tool_name, steps[i].tool_args, tracer)
+            except Exception as exc:  # a worker must never take the batch down
+                logger.error("Parallel tool %s raised %s: %s", steps[i].tool_name, type(exc).__name__, exc)
+                return ToolResult(success=False, error=str(exc))
+            finally:
+                durations[i] = perf_counter() - t0
+
+        workers = min(self.cfg.parallel_tool_workers, len(steps))
+        t0 = perf_counter()
+        with span("tool.batch", cat="tool", size=len(steps), workers=workers):
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool") as pool:
+                results = list(pool.map(in_current_context(_one), range(len(steps))))
+        wall = perf_counter() - t0
+        tracer.log(
+            {
+                "type": "parallel_batch",
+                "tools": [s.tool_name for s in steps],
+                "workers": workers,
+                "wall_ms": round(wall * 1000, 2),
+                "serial_ms": round(sum(durations) * 1000, 2),
+                "succeeded": sum(1 for r in results if r.success),
+            }
+        )
+        self._log_perf("tool_batch", ",".join(s.tool_name for s in steps), wall, {"serial_s": round(sum(durations), 4)})
+        return results
+
     def _check_conditions(
         self,
         *,
@@ -2448,15 +2833,9 @@ class AgentRunner:
     def _with_reasoning_effort(self, effort: str, fn):
         if not effort:
             return fn()
-        prev = os.environ.get("CODEX_REASONING_EFFORT")
-        os.environ["CODEX_REASONING_EFFORT"] = effort
-        try:
+        # Context-local, not os.environ: daemon runs share the process.
+        with reasoning_effort_override(effort):
             return fn()
-        finally:
-            if prev is None:
-                os.environ.pop("CODEX_REASONING_EFFORT", None)
-            else:
-                os.environ["CODEX_REASONING_EFFORT"] = prev
 
     def _should_attempt_finish(self, reflection: Reflection, elapsed: float) -> bool:
         if reflection.status != "success":
@@ -2522,18 +2901,21 @@ class AgentRunner:
         try:
             t0 = perf_counter()
             try:
-                return retry_with_backoff(
-                    _attempt,
-                    max_attempts=max_attempts,
-                    initial_delay=initial_delay,
-                    max_delay=max_delay,
-                    backoff_factor=backoff_factor,
-                )
+                with span(f"llm.{where}", cat="llm", label=label or where), llm_ledger.track(where, source="runner"):
+                    return retry_with_backoff(
+                        _attempt,
+                        max_attempts=max_attempts,
+                        initial_delay=initial_delay,
+                        max_delay=max_delay,
+                        backoff_factor=backoff_factor,
+                        jitter=LLM_RETRY_CONFIG.jitter,
+                        budget=self._retry_budget,
+                    )
             finally:
                 dur = perf_counter() - t0
                 self._log_perf("llm", where, dur, {"label": label})
         except Exception as exc:
-            if isinstance(exc, CodexCliAuthError):
+            if isinstance(exc, (CodexCliAuthError, RunCancelledError)):
                 raise exc
             last_exc = last_exc or LLMError(f"{where} failed: {exc}", original_exception=exc)
             if not allow_none:
@@ -2573,24 +2955,33 @@ class AgentRunner:
         _heartbeat_print(f"[THINKING] {label_msg}")
         if timeout_seconds:
             _heartbeat_print(f"[THINKING] Time limit: {timeout_seconds}s. If it takes longer, I will switch to a simpler approach.")
-        thread = threading.Thread(target=_target, daemon=True)
+        thread = threading.Thread(target=in_current_context(_target), daemon=True)
         thread.start()
         start = time.monotonic()
-        while not done.wait(timeout=heartbeat_seconds):
-            elapsed = time.monotonic() - start
-            _heartbeat_print(f"[THINKING] Still working on {label_msg}... elapsed={elapsed:.1f}s")
+        # Stop waiting as soon as the run is cancelled; the call itself is torn down by its token hooks.
+        token = current_token()
+        unregister = token.on_cancel(done.set) if token is not None else None
+        try:
+            while not done.wait(timeout=heartbeat_seconds):
+                elapsed = time.monotonic() - start
+                _heartbeat_print(f"[THINKING] Still working on {label_msg}... elapsed={elapsed:.1f}s")
+        finally:
+            if unregister is not None:
+                unregister()
         if error:
             raise error["exc"]
+        if "value" not in result and token is not None:
+            token.raise_if_cancelled()
         return result.get("value")
 
-    def _with_llm_timeout(self, llm: TrackedLLM, timeout_seconds: Optional[int], fn):
-        prev = llm.default_timeout_seconds
-        if timeout_seconds is not None:
-            llm.default_timeout_seconds = timeout_seconds
+    def _with_llm_timeout(self, timeout_seconds: Optional[int], fn):
+        if timeout_seconds is None:
+            return fn()
+        reset = _LLM_TIMEOUT.set(timeout_seconds)
         try:
             return fn()
         finally:
-            llm.default_timeout_seconds = prev
+            _LLM_TIMEOUT.reset(reset)
 
     def _memory_updates(
         self,
@@ -2707,6 +3098,7 @@ class AgentRunner:
         started_monotonic: Optional[float] = None,
         error_data: Optional[Dict[str, Any]] = None,
     ) -> AgentRunResult:
+        speculator = getattr(self, "_speculator", None)
         tracer.log(
             {
                 "type": "stop",
@@ -2720,8 +3112,10 @@ class AgentRunner:
                     "estimated_cost_usd": llm_stats.estimated_cost_usd,
                     "estimated_tokens": llm_stats.estimated_tokens,
                 },
+                **({"speculation": speculator.summary()} if speculator is not None else {}),
             }
         )
+        tracer.checkpoint()
 
         if memory_store is not None:
             try:
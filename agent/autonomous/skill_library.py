@@ -6,18 +6,40 @@ as executable playbooks indexed by description embeddings for fast retrieval.
 
 When the agent successfully completes a new task, it saves the procedure.
 Next time a similar task is requested, it retrieves and executes the saved skill.
+
+On-disk layout (under ``agent/memory/skills``):
+  skill_index.json       skill definitions (rewritten only on save/delete)
+  skill_outcomes.jsonl   append-only success/failure log, folded into the index on rewrite
+  skill_vectors.f32      unit-normalized float32 embeddings, one row per skill
+  skill_vectors.json     row order plus the embedding model/dimension the rows came from
+
+Embeddings come from the process-wide embedding service shared with the
+memory store, so the model is loaded once and repeated texts hit its cache.
+With numpy installed the matrix is memory-mapped and a search is one
+matrix-vector product; without it a pure-Python loop is used.
 """
 from __future__ import annotations
 
 import json
 import logging
+import math
+import os
+import threading
+from array import array
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
 
+from .memory.embeddings import get_embedding_service
+
+try:
+    import numpy as _np  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    _np = None
+
 logger = logging.getLogger(__name__)
 
 # Paths
@@ -25,6 +47,190 @@ REPO_ROOT = Path(__file__).resolve().parent.parent.parent
 SKILLS_DIR = REPO_ROOT / "agent" / "memory" / "skills"
 SKILLS_INDEX_PATH = SKILLS_DIR / "skill_index.json"
 
+_INDEX_NAME = "skill_index.json"
+_OUTCOMES_NAME = "skill_outcomes.jsonl"
+_VECTORS_NAME = "skill_vectors.f32"
+_VECTORS_META_NAME = "skill_vectors.json"
+# Model the pre-matrix index (version 1) stored its 384-dim vectors with.
+_LEGACY_MODEL = "all-MiniLM-L6-v2"
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _normalized(vec: Sequence[float]) -> array:
+    norm = math.sqrt(sum(float(v) * float(v) for v in vec)) or 1.0
+    return array("f", (float(v) / norm for v in vec))
+
+
+class SkillVectorIndex:
+    """Skill embeddings stored as one row-major float32 matrix file.
+
+    Rows are unit-normalized, so cosine similarity is a dot product. Adding a
+    skill appends a row; re-embedding overwrites its row in place; only
+    deletion rewrites the file. Each row also carries an in-memory ranking
+    weight (the success-rate boost) so scoring stays vectorized.
+    """
+
+    def __init__(self, matrix_path: Path, meta_path: Path):
+        self.matrix_path = matrix_path
+        self.meta_path = meta_path
+        self.model: Optional[str] = None
+        self.dim = 0
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix: Any = None
+        self._weights: Any = None
+
+    def __contains__(self, skill_id: object) -> bool:
+        return skill_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def load(self) -> bool:
+        """Load row metadata and map the matrix. False if missing or inconsistent."""
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            size = self.matrix_path.stat().st_size
+        except (OSError, ValueError):
+            return False
+        ids = [str(i) for i in meta.get("ids") or []]
+        dim = int(meta.get("dim") or 0)
+        if dim <= 0 or size != len(ids) * dim * 4 or len(set(ids)) != len(ids):
+            return False
+        self.model = meta.get("model")
+        self.dim = dim
+        self.ids = ids
+        self._rows = {sid: i for i, sid in enumerate(ids)}
+        self._remap()
+        self._weights = self._new_weights(len(ids))
+        return True
+
+    def reset(self, model: str, dim: int) -> None:
+        """Drop every row and start a matrix for ``model``."""
+        self._matrix = None
+        self.model, self.dim = model, int(dim)
+        self.ids, self._rows = [], {}
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        self.matrix_path.write_bytes(b"")
+        self._write_meta()
+        self._remap()
+        self._weights = self._new_weights(0)
+
+    def upsert_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        """Write embeddings for the given skills; returns the number written."""
+        appended: List[Tuple[str, array]] = []
+        overwritten: List[Tuple[int, array]] = []
+        for skill_id, vec in items:
+            if len(vec) != self.dim:
+                raise ValueError(f"embedding dim {len(vec)} != index dim {self.dim}")
+            row = _normalized(vec)
+            if skill_id in self._rows:
+                overwritten.append((self._rows[skill_id], row))
+            else:
+                appended.append((skill_id, row))
+        if not appended and not overwritten:
+            return 0
+        self._matrix = None  # release the mapping before writing (required on Windows)
+        if overwritten:
+            with self.matrix_path.open("r+b") as f:
+                for idx, row in overwritten:
+                    f.seek(idx * self.dim * 4)
+                    f.write(row.tobytes())
+        if appended:
+            with self.matrix_path.open("ab") as f:
+                for skill_id, row in appended:
+                    f.write(row.tobytes())
+                    self._rows[skill_id] = len(self.ids)
+                    self.ids.append(skill_id)
+            self._write_meta()
+            self._weights = self._extend_weights(len(appended))
+        self._remap()
+        return len(appended) + len(overwritten)
+
+    def remove_many(self, skill_ids: Iterable[str]) -> int:
+        drop = {sid for sid in skill_ids if sid in self._rows}
+        if not drop:
+            return 0
+        keep = [i for i, sid in enumerate(self.ids) if sid not in drop]
+        rows = self._read_rows(keep)
+        weights = self._weights[keep] if _np is not None else [self._weights[i] for i in keep]
+        self._matrix = None
+        self.ids = [self.ids[i] for i in keep]
+        self._rows = {sid: i for i, sid in enumerate(self.ids)}
+        tmp = self.matrix_path.with_name(self.matrix_path.name + ".tmp")
+        tmp.write_bytes(b"".join(r.tobytes() for r in rows))
+        os.replace(tmp, self.matrix_path)
+        self._write_meta()
+        self._remap()
+        self._weights = weights
+        return len(drop)
+
+    def set_weight(self, skill_id: str, weight: float) -> None:
+        idx = self._rows.get(skill_id)
+        if idx is not None:
+            self._weights[idx] = float(weight)
+
+    def top_k(self, query: Sequence[float], k: int, min_score: float) -> List[Tuple[str, float]]:
+        """Best ``k`` (skill_id, weighted cosine) pairs scoring at least ``min_score``."""
+        if not self.ids or k <= 0 or len(query) != self.dim:
+            return []
+        q = _normalized(query)
+        if _np is not None:
+            scores = (self._matrix @ _np.frombuffer(q, dtype=_np.float32)) * self._weights
+            idx = _np.flatnonzero(scores >= min_score)
+            if idx.size > k:
+                idx = idx[_np.argpartition(-scores[idx], k - 1)[:k]]
+            idx = idx[_np.argsort(-scores[idx], kind="stable")]
+            return [(self.ids[i], float(scores[i])) for i in idx]
+        scored = []
+        for i, row in enumerate(self._matrix):
+            score = sum(a * b for a, b in zip(row, q)) * self._weights[i]
+            if score >= min_score:
+                scored.append((score, i))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.ids[i], score) for score, i in scored[:k]]
+
+    # ------------------------------------------------------------------
+
+    def _write_meta(self) -> None:
+        _atomic_write_text(
+            self.meta_path,
+            json.dumps({"model": self.model, "dim": self.dim, "ids": self.ids}, separators=(",", ":")),
+        )
+
+    def _remap(self) -> None:
+        n = len(self.ids)
+        if _np is not None:
+            if n == 0:
+                self._matrix = _np.zeros((0, self.dim), dtype=_np.float32)
+            else:
+                self._matrix = _np.memmap(self.matrix_path, dtype=_np.float32, mode="r", shape=(n, self.dim))
+            return
+        flat = array("f")
+        if n:
+            flat.frombytes(self.matrix_path.read_bytes())
+        self._matrix = [flat[i * self.dim:(i + 1) * self.dim] for i in range(n)]
+
+    def _read_rows(self, indices: List[int]) -> List[array]:
+        if _np is not None:
+            return [array("f", self._matrix[i].tobytes()) for i in indices]
+        return [self._matrix[i] for i in indices]
+
+    def _new_weights(self, n: int) -> Any:
+        if _np is not None:
+            return _np.ones(n, dtype=_np.float32)
+        return [1.0] * n
+
+    def _extend_weights(self, extra: int) -> Any:
+        if _np is not None:
+            return _np.concatenate([self._weights, _np.ones(extra, dtype=_np.float32)])
+        return list(self._weights) + [1.0] * extra
+
 
 class SkillStep(BaseModel):
     """A single step in a skill procedure."""
@@ -80,77 +286,129 @@ class SkillLibrary:
         library.record_outcome(skill_id, success=True)
     """
 
-    def __init__(self):
+    def __init__(self, skills_dir: Optional[Path] = None):
+        self.skills_dir = Path(skills_dir) if skills_dir is not None else SKILLS_DIR
+        self.index_path = self.skills_dir / _INDEX_NAME
+        self.outcomes_path = self.skills_dir / _OUTCOMES_NAME
         self._skills: Dict[str, Skill] = {}
-        self._embeddings: Dict[str, List[float]] = {}
-        self._embedder = None
+        self._vectors = SkillVectorIndex(
+            self.skills_dir / _VECTORS_NAME,
+            self.skills_dir / _VECTORS_META_NAME,
+        )
+        self._stale: set[str] = set()
+        self._vectors_ready = False
+        self._generation = uuid4().hex
+        self._lock = threading.RLock()
         self._initialized = False
 
     def initialize(self) -> None:
-        """Load skills and initialize embedder."""
-        if self._initialized:
+        """Load skills, replay logged outcomes and map the embedding matrix."""
+        with self._lock:
+            if self._initialized:
+                return
+
+            self.skills_dir.mkdir(parents=True, exist_ok=True)
+
+            legacy_embeddings: Dict[str, List[float]] = {}
+            if self.index_path.exists():
+                try:
+                    data = json.loads(self.index_path.read_text(encoding="utf-8"))
+                    for skill_data in data.get("skills", []):
+                        skill = Skill.model_validate(skill_data)
+                        self._skills[skill.id] = skill
+                    self._generation = data.get("generation") or self._generation
+                    legacy_embeddings = data.get("embeddings") or {}
+                    logger.info(f"Loaded {len(self._skills)} skills from library")
+                except Exception as e:
+                    logger.error(f"Failed to load skill index: {e}")
+
+            self._replay_outcomes()
+            if not self._vectors.load() and legacy_embeddings:
+                self._import_legacy_embeddings(legacy_embeddings)
+            self._initialized = True
+
+    def _replay_outcomes(self) -> None:
+        try:
+            lines = self.outcomes_path.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
             return
-
-        SKILLS_DIR.mkdir(parents=True, exist_ok=True)
-
-        # Load skill index
-        if SKILLS_INDEX_PATH.exists():
+        for line in lines:
             try:
-                data = json.loads(SKILLS_INDEX_PATH.read_text(encoding="utf-8"))
-                for skill_data in data.get("skills", []):
-                    skill = Skill.model_validate(skill_data)
-                    self._skills[skill.id] = skill
-                self._embeddings = data.get("embeddings", {})
-                logger.info(f"Loaded {len(self._skills)} skills from library")
-            except Exception as e:
-                logger.error(f"Failed to load skill index: {e}")
-
-        # Initialize embedder
-        self._init_embedder()
-        self._initialized = True
-
-    def _init_embedder(self) -> None:
-        """Initialize the embedding model."""
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn final write
+            # Entries from before the last index rewrite are already folded in.
+            if entry.get("gen") != self._generation:
+                continue
+            skill = self._skills.get(entry.get("id"))
+            if skill is not None:
+                self._apply_outcome(skill, bool(entry.get("success")), entry.get("notes"), entry.get("ts"))
+
+    def _import_legacy_embeddings(self, embeddings: Dict[str, List[float]]) -> None:
+        """Move vectors from a version-1 ``skill_index.json`` into the matrix file."""
+        items = [(sid, vec) for sid, vec in embeddings.items() if sid in self._skills and vec]
+        if not items:
+            return
+        dim = len(items[0][1])
+        model = _LEGACY_MODEL if dim == 384 else f"legacy{dim}"
         try:
-            from sentence_transformers import SentenceTransformer
-            self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
-            logger.info("Initialized sentence-transformers embedder")
-        except ImportError:
-            logger.warning("sentence-transformers not available, using hash-based fallback")
-            self._embedder = None
-
-    def _embed(self, text: str) -> List[float]:
-        """Get embedding vector for text."""
-        if self._embedder is not None:
-            return self._embedder.encode(text).tolist()
-        else:
-            # Hash-based fallback
-            import hashlib
-            h = hashlib.sha256(text.lower().encode()).hexdigest()
-            return [int(h[i:i+2], 16) / 255.0 for i in range(0, 64, 2)]
-
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Compute cosine similarity between two vectors."""
-        import math
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(x * x for x in b))
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot / (norm_a * norm_b)
+            self._vectors.reset(model, dim)
+            self._vectors.upsert_many((sid, vec) for sid, vec in items if len(vec) == dim)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not import legacy skill embeddings: {e}")
+
+    @staticmethod
+    def _skill_text(skill: Skill) -> str:
+        return f"{skill.name} {skill.description} {' '.join(skill.tags)}"
+
+    @staticmethod
+    def _boost(skill: Skill) -> float:
+        """Ranking multiplier: up to 20% boost from the success rate."""
+        total = skill.success_count + skill.failure_count
+        if total <= 0:
+            return 1.0
+        return 0.8 + 0.2 * (skill.success_count / total)
+
+    def _embed(self, text: str) -> Tuple[List[float], str, int]:
+        """Embed ``text`` with the shared embedding service."""
+        emb = get_embedding_service().embed(text)
+        return emb.vector, emb.model, emb.dim
+
+    def _ensure_vectors(self, model: str, dim: int) -> None:
+        """Bring the matrix in line with the loaded skills for ``model``."""
+        index = self._vectors
+        if (index.model, index.dim) != (model, dim):
+            if index.model is not None:
+                logger.info(f"Skill embeddings were built with {index.model}; re-embedding for {model}")
+            index.reset(model, dim)
+            self._vectors_ready = False
+        if self._vectors_ready and not self._stale:
+            return
+        pending = [s for s in self._skills.values() if s.id not in index or s.id in self._stale]
+        if pending:
+            embedded = get_embedding_service().embed_many([self._skill_text(s) for s in pending])
+            index.upsert_many((s.id, emb.vector) for s, emb in zip(pending, embedded))
+        index.remove_many([sid for sid in index.ids if sid not in self._skills])
+        for sid in index.ids:
+            index.set_weight(sid, self._boost(self._skills[sid]))
+        self._stale.clear()
+        self._vectors_ready = True
 
     def _save_index(self) -> None:
-        """Persist the skill index to disk."""
+        """Persist skill definitions and start a fresh outcome log."""
+        self._generation = uuid4().hex
         data = {
-            "version": 1,
+            "version": 2,
+            "generation": self._generation,
             "updated_at": datetime.now(timezone.utc).isoformat(),
             "skills": [s.model_dump() for s in self._skills.values()],
-            "embeddings": self._embeddings,
         }
-        SKILLS_INDEX_PATH.write_text(
-            json.dumps(data, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
+        self.skills_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write_text(self.index_path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+        try:
+            self.outcomes_path.unlink()
+        except FileNotFoundError:
+            pass
 
     def search(self, query: str, k: int = 5, min_similarity: float = 0.3) -> List[Tuple[Skill, float]]:
         """
@@ -164,27 +422,11 @@ class SkillLibrary:
         if not self._skills:
             return []
 
-        query_embedding = self._embed(query)
-
-        scored = []
-        for skill_id, skill in self._skills.items():
-            # Get or compute embedding
-            if skill_id not in self._embeddings:
-                skill_text = f"{skill.name} {skill.description} {' '.join(skill.tags)}"
-                self._embeddings[skill_id] = self._embed(skill_text)
-
-            similarity = self._cosine_similarity(query_embedding, self._embeddings[skill_id])
-
-            # Boost by success rate
-            if skill.success_count + skill.failure_count > 0:
-                success_rate = skill.success_count / (skill.success_count + skill.failure_count)
-                similarity *= (0.8 + 0.2 * success_rate)  # Up to 20% boost
-
-            if similarity >= min_similarity:
-                scored.append((skill, similarity))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored[:k]
+        query_embedding, model, dim = self._embed(query)
+        with self._lock:
+            self._ensure_vectors(model, dim)
+            hits = self._vectors.top_k(query_embedding, k, min_similarity)
+            return [(self._skills[sid], score) for sid, score in hits if sid in self._skills]
 
     def get(self, skill_id: str) -> Optional[Skill]:
         """Get a skill by ID."""
@@ -197,49 +439,66 @@ class SkillLibrary:
         if not self._initialized:
             self.initialize()
 
-        skill.updated_at = datetime.now(timezone.utc).isoformat()
-        self._skills[skill.id] = skill
+        with self._lock:
+            skill.updated_at = datetime.now(timezone.utc).isoformat()
+            self._skills[skill.id] = skill
+            self._save_index()
 
-        # Compute embedding
-        skill_text = f"{skill.name} {skill.description} {' '.join(skill.tags)}"
-        self._embeddings[skill.id] = self._embed(skill_text)
+            # Compute embedding
+            vec, model, dim = self._embed(self._skill_text(skill))
+            if (self._vectors.model, self._vectors.dim) == (model, dim):
+                self._vectors.upsert_many([(skill.id, vec)])
+                self._vectors.set_weight(skill.id, self._boost(skill))
+            else:
+                self._ensure_vectors(model, dim)
 
-        self._save_index()
         logger.info(f"Saved skill: {skill.name} ({skill.id})")
         return skill.id
 
     def record_outcome(self, skill_id: str, success: bool, notes: Optional[str] = None) -> None:
-        """Record the outcome of executing a skill."""
+        """Record the outcome of executing a skill (appended to the outcome log)."""
         if not self._initialized:
             self.initialize()
 
-        skill = self._skills.get(skill_id)
-        if not skill:
-            return
-
+        with self._lock:
+            skill = self._skills.get(skill_id)
+            if not skill:
+                return
+
+            ts = datetime.now(timezone.utc).isoformat()
+            self._apply_outcome(skill, success, notes, ts)
+            self._vectors.set_weight(skill_id, self._boost(skill))
+            entry = {"gen": self._generation, "id": skill_id, "success": bool(success), "notes": notes, "ts": ts}
+            self.skills_dir.mkdir(parents=True, exist_ok=True)
+            with self.outcomes_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _apply_outcome(skill: Skill, success: bool, notes: Optional[str], ts: Optional[str]) -> None:
         if success:
             skill.success_count += 1
         else:
             skill.failure_count += 1
             if notes:
-                skill.refinement_notes.append(f"[{datetime.now().isoformat()}] {notes}")
+                skill.refinement_notes.append(f"[{ts}] {notes}")
 
-        skill.last_used = datetime.now(timezone.utc).isoformat()
-        skill.updated_at = skill.last_used
-        self._save_index()
+        skill.last_used = ts
+        skill.updated_at = ts
 
     def delete(self, skill_id: str) -> bool:
         """Delete a skill from the library."""
         if not self._initialized:
             self.initialize()
 
-        if skill_id in self._skills:
-            del self._skills[skill_id]
-            if skill_id in self._embeddings:
-                del self._embeddings[skill_id]
-            self._save_index()
-            return True
-        return False
+        with self._lock:
+            if skill_id in self._skills:
+                del self._skills[skill_id]
+                self._stale.discard(skill_id)
+                if skill_id in self._vectors:
+                    self._vectors.remove_many([skill_id])
+                self._save_index()
+                return True
+            return False
 
     def list_skills(self, tag: Optional[str] = None) -> List[Skill]:
         """List all skills, optionally filtered by tag."""
@@ -300,5 +559,6 @@ __all__ = [
     "Skill",
     "SkillStep",
     "SkillLibrary",
+    "SkillVectorIndex",
     "get_skill_library",
 ]
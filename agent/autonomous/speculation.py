@@ -0,0 +1,246 @@
+"""
+Speculative next-step planning.
+
+In ReAct mode the runner alternates strictly between executing a tool and
+asking the planner for the next step, and both can take seconds. With
+speculation enabled, the next ``planner.plan`` call is started on a worker
+thread as soon as a slow tool starts, using a *predicted* observation in place
+of the real one. The prediction is deliberately coarse: "the tool succeeded"
+(the salient facts the perceptor reports for a success, and nothing the real
+observation would not contain).
+
+When the tool returns, the real observation is compared with the prediction.
+If its salient facts are the ones predicted, it has no errors, its output has
+the same top-level fields as the last time the tool succeeded, and the step's
+reflection is a success, the speculative plan is committed and the planning
+round-trip is skipped. Otherwise the plan is discarded, the speculative call is
+cancelled if it is still running, and the runner plans normally.
+
+The speculative call runs in the caller's context (ledger run, retry deadline,
+profiler) under a child of the run's cancellation token, so cancelling the run
+also stops it.
+
+Only tools whose result is a status, not information, are speculated on:
+file writes/copies/moves, archive and calendar/task edits and the like, which
+matter only for *whether* they worked, which is exactly what the prediction
+covers. Anything whose output the next step may read (file reads, shell and
+Python runs, searches, snapshots, UI actions) is never speculated on: a plan
+made without that output would be a guess, and a speculative ``finish`` would
+summarise a result that does not exist yet.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cancellation import CancellationToken, current_token, use_token
+from .models import Observation, Plan, Step, ToolResult
+from .profiling import in_current_context
+
+logger = logging.getLogger(__name__)
+
+# Side-effecting tools whose observation carries no information beyond success.
+_STATUS_ONLY_TOOLS = frozenset(
+    {
+        "clipboard_set",
+        "complete_task",
+        "create_calendar_event",
+        "create_task",
+        "delete_calendar_event",
+        "delete_task",
+        "file_copy",
+        "file_delete",
+        "file_move",
+        "file_write",
+        "memory_store",
+        "update_calendar_event",
+        "update_task",
+        "zip_create",
+        "zip_extract",
+    }
+)
+
+# Smoothing factor for the per-tool duration estimate.
+_EMA_ALPHA = 0.3
+
+
+@dataclass
+class Speculation:
+    """One speculative plan, started while ``step`` executes."""
+
+    step: Step
+    predicted: Observation
+    future: Optional["Future[Plan]"] = None
+    token: CancellationToken = field(default_factory=CancellationToken)
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+    matched: Optional[bool] = None
+    reason: str = ""
+
+
+class SpeculativePlanner:
+    """Starts, checks and resolves speculative plans for a single run."""
+
+    def __init__(self, *, min_tool_seconds: float = 1.0):
+        self.min_tool_seconds = max(0.0, float(min_tool_seconds))
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-speculate")
+        self._durations: Dict[str, float] = {}
+        self._shapes: Dict[str, Tuple[str, ...]] = {}
+        self._last: Optional[Speculation] = None
+        self.attempts = 0
+        self.hits = 0
+        self.saved_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Decisions
+    # ------------------------------------------------------------------
+
+    def should_speculate(self, step: Step, *, read_only: bool) -> bool:
+        if read_only or step.tool_name not in _STATUS_ONLY_TOOLS:
+            return False
+        expected = self._durations.get(step.tool_name)
+        # Unknown tools get the benefit of the doubt once; after that only
+        # tools that are slow enough to hide a planning call qualify.
+        return expected is None or expected >= self.min_tool_seconds
+
+    def predict(self, step: Step) -> Observation:
+        return Observation(source=f"tool:{step.tool_name}", salient_facts=[f"{step.tool_name} succeeded"])
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(
+        self,
+        step: Step,
+        observations: List[Observation],
+        plan_fn: Callable[[List[Observation]], Plan],
+    ) -> Speculation:
+        """Run ``plan_fn`` on the predicted history in the background.
+
+        ``plan_fn`` runs in the caller's context with ``spec.token`` as the
+        current token; that token also fires when the caller's token does.
+        """
+        predicted = self.predict(step)
+        view = list(observations) + [predicted]
+        self.attempts += 1
+
+        spec = Speculation(step=step, predicted=predicted)
+        parent = current_token()
+        unlink = (
+            parent.on_cancel(lambda: spec.token.cancel(parent.reason or "cancelled"))
+            if parent is not None
+            else (lambda: None)
+        )
+
+        def _run() -> Plan:
+            try:
+                with use_token(spec.token):
+                    return plan_fn(view)
+            finally:
+                unlink()
+                spec.finished = time.monotonic()
+
+        spec.future = self._executor.submit(in_current_context(_run))
+        self._last = spec
+        return spec
+
+    def observe(self, spec: Speculation, result: ToolResult, obs: Observation, seconds: float) -> bool:
+        """Compare the real outcome with the prediction; also updates tool stats."""
+        name = spec.step.tool_name
+        self.record_duration(name, seconds)
+        shape = tuple(sorted(obs.parsed)) if isinstance(obs.parsed, dict) else ()
+        expected = self._shapes.get(name)
+        if not result.success or obs.errors:
+            spec.matched, spec.reason = False, "tool_failed"
+        elif obs.salient_facts != spec.predicted.salient_facts:
+            spec.matched, spec.reason = False, "observation_differs"
+        elif expected is not None and shape != expected:
+            spec.matched, spec.reason = False, "output_shape_changed"
+        else:
+            spec.matched, spec.reason = True, "matched"
+        if result.success:
+            self._shapes[name] = shape
+        return bool(spec.matched)
+
+    def record_duration(self, tool_name: str, seconds: float) -> None:
+        prev = self._durations.get(tool_name)
+        self._durations[tool_name] = seconds if prev is None else (1 - _EMA_ALPHA) * prev + _EMA_ALPHA * seconds
+
+    def resolve(
+        self,
+        spec: Speculation,
+        *,
+        usable: bool,
+        reason: str = "",
+        timeout: Optional[float] = None,
+    ) -> Tuple[Optional[Plan], Dict[str, Any]]:
+        """Commit or discard ``spec``. Returns the plan (hits only) and a trace event.
+
+        A discarded plan that is still being made is cancelled through
+        ``spec.token``, which kills its ``codex exec`` child.
+        """
+        needed_at = time.monotonic()
+        plan: Optional[Plan] = None
+        outcome = "miss"
+        if not spec.matched:
+            reason = spec.reason or reason or "not_observed"
+        if usable and spec.matched:
+            try:
+                plan = spec.future.result(timeout=timeout)
+            except FutureTimeout:
+                reason = "plan_timeout"
+            except Exception as exc:
+                reason = f"plan_error: {type(exc).__name__}"
+            else:
+                if plan is not None and plan.steps:
+                    outcome = "hit"
+                    reason = "matched"
+                else:
+                    plan = None
+                    reason = "empty_plan"
+        if outcome != "hit":
+            # A call that has not started never runs; one in flight is torn down by its token.
+            cancelled = spec.future.cancel()
+            if not cancelled and not spec.future.done():
+                cancelled = spec.token.cancel("speculation_miss")
+            if cancelled:
+                reason = f"{reason} (cancelled)"
+        finished = spec.finished or time.monotonic()
+        plan_seconds = max(0.0, finished - spec.started)
+        waited = max(0.0, finished - needed_at)
+        saved = max(0.0, plan_seconds - waited) if outcome == "hit" else 0.0
+        if outcome == "hit":
+            self.hits += 1
+            self.saved_seconds += saved
+        event = {
+            "type": "speculation",
+            "step_id": spec.step.id,
+            "tool_name": spec.step.tool_name,
+            "outcome": outcome,
+            "reason": reason,
+            "plan_ms": round(plan_seconds * 1000, 2),
+            "saved_ms": round(saved * 1000, 2),
+            **self.summary(),
+        }
+        return plan, event
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.attempts, 3) if self.attempts else 0.0,
+            "saved_ms_total": round(self.saved_seconds * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        if self._last is not None and not self._last.future.done():
+            self._last.token.cancel("shutdown")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["Speculation", "SpeculativePlanner"]
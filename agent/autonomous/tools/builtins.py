@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import html as html_lib
 import logging
 import json
@@ -15,25 +14,41 @@ import shlex
 import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import uuid4
 from urllib.parse import parse_qs, unquote, urlparse
 
 import requests
 from pydantic import BaseModel, Field
 
+from ..cancellation import run_process
 from ..config import AgentConfig, RunContext
+from ..exceptions import RunCancelledError
+from ..http_client import clear_run as clear_http_run, http_get
 from agent.config.profile import ProfileConfig, RunUsage
 from ..memory.sqlite_store import MemoryKind, SqliteMemoryStore
 from ..models import ToolResult
 from ..retry_utils import WEB_RETRY_CONFIG, retry_with_backoff
+from .content_search import SearchOptions, search_files
 from .registry import ToolRegistry, ToolSpec, register_calendar_tasks_tools
+from .trigram_index import get_index as get_trigram_index
+from .web_snapshot import (
+    SnapshotHistory,
+    block_resources,
+    blocked_resource_types,
+    describe_matches,
+    render_snapshot,
+    take_snapshot,
+)
 
 logger = logging.getLogger(__name__)
 
-# Lightweight in-memory sessions for GUI tools (keyed by run_id).
+# Lightweight in-memory sessions for GUI tools (keyed by run_id). Each holds a
+# context leased from the shared browser pool (agent.tools.browser_pool).
 _WEB_SESSIONS: Dict[str, Dict[str, Any]] = {}
 _DESKTOP_SOM_STATE: Dict[str, Dict[str, Any]] = {}
+# Previous element tables per run/url, so repeat snapshots send only a diff.
+_WEB_SNAPSHOTS = SnapshotHistory()
 
 _SAFE_SHELL_COMMANDS = {"rg", "git", "python", "py", "pytest"}
 _BLOCKED_SHELL_TOKENS = {"rm", "del", "erase", "format", "mkfs", "shutdown", "reboot"}
@@ -151,17 +166,14 @@ def web_fetch(ctx: RunContext, args: WebFetchArgs) -> ToolResult:
             retryable=False,
         )
     try:
-        resp = requests.get(
+        resp = http_get(
             args.url,
-            headers={"User-Agent": "DrCodePT-Agent/1.0", **(args.headers or {})},
+            headers=dict(args.headers or {}),
             timeout=args.timeout_seconds,
+            max_bytes=args.max_bytes,
+            run_id=ctx.run_id,
         )
-        content = resp.content[: args.max_bytes]
-        text = None
-        try:
-            text = content.decode(resp.encoding or "utf-8", errors="replace")
-        except Exception:
-            text = content.decode("utf-8", errors="replace")
+        text = resp.text()
         if args.strip_html:
             text = _strip_html(text)
         if usage:
@@ -173,9 +185,10 @@ def web_fetch(ctx: RunContext, args: WebFetchArgs) -> ToolResult:
                 "status_code": resp.status_code,
                 "headers": dict(resp.headers),
                 "text": text,
+                "truncated": resp.truncated,
                 "untrusted": True,
             },
-            metadata={"untrusted": True},
+            metadata={"untrusted": True, "cache": resp.cache_status},
         )
     except requests.RequestException as exc:
         return ToolResult(success=False, error=str(exc), retryable=True, metadata={"untrusted": True})
@@ -315,14 +328,14 @@ def web_search(ctx: RunContext, args: WebSearchArgs) -> ToolResult:
     text = ""
 
     def _fetch() -> str:
-        resp = requests.get(
+        resp = http_get(
             url,
             params={"q": query, "kl": args.region},
-            headers={"User-Agent": "DrCodePT-Agent/1.0"},
             timeout=args.timeout_seconds,
+            max_bytes=args.max_bytes,
+            run_id=ctx.run_id,
         )
-        content = resp.content[: args.max_bytes]
-        return content.decode(resp.encoding or "utf-8", errors="replace")
+        return resp.text()
 
     try:
         text = retry_with_backoff(
@@ -332,6 +345,7 @@ def web_search(ctx: RunContext, args: WebSearchArgs) -> ToolResult:
             max_delay=WEB_RETRY_CONFIG.max_delay,
             backoff_factor=WEB_RETRY_CONFIG.backoff_factor,
             transient_exceptions=(requests.RequestException,),
+            jitter=WEB_RETRY_CONFIG.jitter,
         )
     except requests.RequestException as exc:
         last_error = str(exc)
@@ -535,26 +549,29 @@ def file_read_factory(agent_cfg: AgentConfig):
             )
         if not path.exists():
             return ToolResult(success=False, error=f"File not found: {path}")
+        read_cap = args.max_bytes
         if profile and usage:
-            if not usage.can_read_file(profile.max_files_to_read):
-                return ToolResult(
-                    success=False,
-                    error="file_read_limit_reached",
-                    metadata={"limit": profile.max_files_to_read},
-                )
-            remaining = usage.remaining_bytes(profile.max_total_bytes_to_read)
-            if remaining <= 0:
+            try:
+                size = path.stat().st_size
+            except OSError as exc:
+                return ToolResult(success=False, error=str(exc))
+            granted = usage.try_reserve(
+                min(size, args.max_bytes), profile.max_files_to_read, profile.max_total_bytes_to_read
+            )
+            if granted is None:
+                if not usage.can_read_file(profile.max_files_to_read):
+                    return ToolResult(
+                        success=False,
+                        error="file_read_limit_reached",
+                        metadata={"limit": profile.max_files_to_read},
+                    )
                 return ToolResult(
                     success=False,
                     error="file_read_bytes_limit_reached",
                     metadata={"limit": profile.max_total_bytes_to_read},
                 )
-            read_cap = min(args.max_bytes, remaining)
-        else:
-            read_cap = args.max_bytes
+            read_cap = granted
         data = path.read_bytes()[:read_cap]
-        if profile and usage:
-            usage.consume_file(len(data))
         return ToolResult(success=True, output={"path": str(path), "content": data.decode("utf-8", errors="replace")})
 
     return file_read
@@ -693,6 +710,9 @@ class FileSearchArgs(BaseModel):
     root: str = "."
     query: str
     case_sensitive: bool = False
+    regex: bool = False
+    context_lines: int = 2
+    paths_only: bool = False
     max_results: int = 50
     max_bytes: int = 1_000_000
 
@@ -716,95 +736,50 @@ def file_search_factory(agent_cfg: AgentConfig):
             )
         if not root.exists():
             return ToolResult(success=False, error=f"Root not found: {root}")
-        needle = args.query if args.case_sensitive else args.query.lower()
+        opts = SearchOptions(
+            query=args.query,
+            case_sensitive=args.case_sensitive,
+            regex=args.regex,
+            context_lines=max(0, min(args.context_lines, 10)),
+            max_file_bytes=args.max_bytes,
+            paths_only=args.paths_only,
+        )
+
+        def _reserve(size: int) -> Optional[int]:
+            # Budgets are charged up front, atomically, so parallel reads cannot overshoot them.
+            if not (profile and usage):
+                return args.max_bytes
+            return usage.try_reserve(
+                min(size, args.max_bytes), profile.max_files_to_read, profile.max_total_bytes_to_read
+            )
+
+        candidates = None
+        index_status = "off"
+        if not args.regex:
+            index_root = ctx.workspace_dir if _is_within(root, ctx.workspace_dir) else root
+            index = get_trigram_index(index_root)
+            if index is not None:
+                candidates = index.candidates(args.query, under=root, profile=profile, max_file_bytes=args.max_bytes)
+                index_status = "hit" if candidates is not None else "cold"
+
         hits: List[Dict[str, Any]] = []
-        scanned = 0
-        max_scan = profile.max_glob_results if profile else None
-        skip_dirs = {
-            "__pycache__",
-            ".git",
-            "node_modules",
-            ".venv",
-            "venv",
-            "dist",
-            "build",
-        }
-        binary_exts = {
-            ".pyc",
-            ".pyo",
-            ".so",
-            ".dll",
-            ".exe",
-            ".bin",
-            ".png",
-            ".jpg",
-            ".jpeg",
-            ".gif",
-            ".pdf",
-            ".zip",
-            ".tar",
-            ".gz",
-            ".7z",
-            ".mp3",
-            ".mp4",
-            ".mov",
-            ".avi",
-            ".wav",
-            ".flac",
-            ".woff",
-            ".woff2",
-            ".ttf",
-            ".otf",
-            ".ico",
-        }
-        stop_scan = False
-        for current_root, dirnames, filenames in os.walk(root):
-            dirnames[:] = [d for d in dirnames if d not in skip_dirs]
-            for filename in filenames:
-                if max_scan is not None and scanned >= max_scan:
-                    stop_scan = True
-                    break
-                path = Path(current_root) / filename
-                if path.suffix.lower() in binary_exts:
-                    continue
-                try:
-                    if path.stat().st_size > args.max_bytes:
-                        continue
-                    if profile and usage:
-                        if not usage.can_read_file(profile.max_files_to_read):
-                            stop_scan = True
-                            break
-                        remaining = usage.remaining_bytes(profile.max_total_bytes_to_read)
-                        if remaining <= 0:
-                            stop_scan = True
-                            break
-                        read_cap = min(args.max_bytes, remaining)
-                    else:
-                        read_cap = args.max_bytes
-                    data_bytes = path.read_bytes()[:read_cap]
-                    if b"\x00" in data_bytes:
-                        continue
-                    try:
-                        data = data_bytes.decode("utf-8")
-                    except UnicodeDecodeError:
-                        try:
-                            data = data_bytes.decode("latin-1")
-                        except Exception:
-                            continue
-                    if profile and usage:
-                        usage.consume_file(len(data_bytes))
-                except Exception:
-                    continue
-                hay = data if args.case_sensitive else data.lower()
-                if needle in hay:
-                    hits.append({"path": str(path), "preview": data[:300]})
-                    if len(hits) >= max(1, args.max_results):
-                        stop_scan = True
-                        break
-                scanned += 1
-            if stop_scan:
-                break
-        return ToolResult(success=True, output={"root": str(root), "query": args.query, "matches": hits})
+        try:
+            for match in search_files(
+                root,
+                opts,
+                reserve=_reserve,
+                max_files_scanned=profile.max_glob_results if profile else None,
+                files=candidates,
+                max_matches=max(1, args.max_results),
+            ):
+                hits.append(match.to_dict())
+        except re.error as exc:
+            return ToolResult(success=False, error=f"invalid regex: {exc}", retryable=False)
+        return ToolResult(
+            success=True,
+            output={"root": str(root), "query": args.query, "matches": hits},
+            metadata={"index": index_status},
+        )
 
     return file_search
 
@@ -1074,7 +1049,7 @@ def python_exec_factory(agent_cfg: AgentConfig):
         tmp = ctx.workspace_dir / f"python_exec_{int(time.time()*1000)}.py"
         tmp.write_text(args.code, encoding="utf-8")
         try:
-            proc = subprocess.run(
+            proc = run_process(
                 [sys.executable, str(tmp)],
                 cwd=str(ctx.workspace_dir),
                 capture_output=True,
@@ -1119,7 +1094,7 @@ class FinishArgs(BaseModel):
 
 
 def finish(ctx: RunContext, args: FinishArgs) -> ToolResult:
-    _close_web_session(ctx)
+    release_run_resources(ctx.run_id)
     return ToolResult(success=True, output={"summary": args.summary})
 
 
@@ -1262,7 +1237,7 @@ class McpCallArgs(BaseModel):
 def mcp_list_factory():
     def mcp_list(ctx: RunContext, args: McpListArgs) -> ToolResult:
         try:
-            from agent.mcp.client import MCPClient
+            from agent.mcp.client import get_mcp_client
             from agent.mcp.registry import get_server
             from agent.mcp.state import get_active_server
         except Exception as exc:
@@ -1274,10 +1249,11 @@ def mcp_list_factory():
         server = get_server(name)
         if server is None:
             return ToolResult(success=False, error=f"mcp: unknown server {name}")
-        resp = MCPClient(server).list_tools()
-        if resp.error:
-            return ToolResult(success=False, error=str(resp.error))
-        return ToolResult(success=True, output=resp.result or {})
+        try:
+            tools = get_mcp_client().list_tools_sync(name)
+        except Exception as exc:
+            return ToolResult(success=False, error=f"mcp: {exc}", retryable=True)
+        return ToolResult(success=True, output={"server": name, "tools": tools})
 
     return mcp_list
 
@@ -1285,7 +1261,7 @@ def mcp_list_factory():
 def mcp_call_factory():
     def mcp_call(ctx: RunContext, args: McpCallArgs) -> ToolResult:
         try:
-            from agent.mcp.client import MCPClient
+            from agent.mcp.client import get_mcp_client
             from agent.mcp.registry import get_server
             from agent.mcp.state import get_active_server
         except Exception as exc:
@@ -1297,10 +1273,13 @@ def mcp_call_factory():
         server = get_server(name)
         if server is None:
             return ToolResult(success=False, error=f"mcp: unknown server {name}")
-        resp = MCPClient(server).call_tool(args.tool, args.args or {})
-        if resp.error:
-            return ToolResult(success=False, error=str(resp.error))
-        return ToolResult(success=True, output=resp.result or {})
+        try:
+            resp = get_mcp_client().call_tool_sync(f"{name}.{args.tool}", args.args or {})
+        except Exception as exc:
+            return ToolResult(success=False, error=f"mcp: {exc}", retryable=True)
+        if not resp.get("success"):
+            return ToolResult(success=False, error=str(resp.get("error") or "mcp tool failed"), output=resp.get("result"))
+        return ToolResult(success=True, output=resp.get("result"))
 
     return mcp_call
 
@@ -1339,7 +1318,7 @@ def shell_exec_factory(agent_cfg: AgentConfig):
                         error=f"shell_exec blocked outside allowed roots: {cwd_input}",
                         metadata={"unsafe_blocked": True, "cwd": cwd_input},
                     )
-            proc = subprocess.run(
+            proc = run_process(
                 args.command,
                 cwd=str(cwd_path),
                 capture_output=True,
@@ -1363,6 +1342,13 @@ class WebGuiSnapshotArgs(BaseModel):
     timeout_ms: int = 15_000
     max_text_chars: int = 8_000
     include_screenshot: bool = False
+    # "full": text, element table, a11y tree and HTML preview; "lite" skips the
+    # a11y tree and HTML. diff=True sends only element changes since the previous
+    # snapshot of the same url; block_resources=True aborts images/media/fonts.
+    mode: Literal["lite", "full"] = "full"
+    max_elements: int = 150
+    diff: bool = False
+    block_resources: bool = False
 
 
 def web_gui_snapshot(ctx: RunContext, args: WebGuiSnapshotArgs) -> ToolResult:  
@@ -1372,53 +1358,73 @@ def web_gui_snapshot(ctx: RunContext, args: WebGuiSnapshotArgs) -> ToolResult:
         return ToolResult(success=False, error=f"Playwright unavailable: {exc}")
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(args.url, timeout=args.timeout_ms, wait_until="domcontentloaded")
-            page.wait_for_timeout(250)
-
-            url = page.url
-            title = page.title()
-            try:
-                visible_text = page.inner_text("body")[: args.max_text_chars]
-            except Exception:
-                visible_text = ""
-            try:
-                a11y = page.accessibility.snapshot()
-            except Exception:
-                a11y = None
-            try:
-                html = page.content()
-            except Exception:
-                html = ""
+        from agent.tools.browser_pool import LoopBound, get_browser_pool, pool_enabled
 
-            screenshot_path = None
-            if args.include_screenshot:
-                screenshot_path = str(ctx.run_dir / "web_gui_snapshot.png")
-                try:
-                    page.screenshot(path=screenshot_path, full_page=True)
-                except Exception:
-                    screenshot_path = None
-
-            browser.close()
-        return ToolResult(
-            success=True,
-            output={
-                "url": url,
-                "title": title,
-                "visible_text": visible_text,
-                "accessibility_tree": a11y,
-                "html_preview": html[:4000],
-                "screenshot": screenshot_path,
-                "untrusted": True,
-            },
-            metadata={"untrusted": True},
-        )
+        if pool_enabled():
+            # Warm shared browser; the context is fresh and closed afterwards.
+            pool = get_browser_pool(headless=True)
+            lease = pool.run(pool.acquire())
+            try:
+                output = _web_snapshot_output(ctx, args, LoopBound(lease.page, pool))
+            finally:
+                pool.run(pool.release(lease, reusable=False))
+        else:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                page = browser.new_page()
+                output = _web_snapshot_output(ctx, args, page)
+                browser.close()
+        return ToolResult(success=True, output=output, metadata={"untrusted": True})
+    except RunCancelledError:
+        raise
     except Exception as exc:
         return ToolResult(success=False, error=str(exc), retryable=True, metadata={"untrusted": True})
 
 
+def _web_snapshot_output(ctx: RunContext, args: WebGuiSnapshotArgs, page: Any) -> Dict[str, Any]:
+    started = time.perf_counter()
+    blocked = False
+    if args.block_resources:
+        try:
+            blocked = block_resources(page)
+        except Exception as exc:
+            logger.debug(f"web_gui_snapshot: resource blocking unavailable: {exc}")
+    page.goto(args.url, timeout=args.timeout_ms, wait_until="domcontentloaded")
+    page.wait_for_timeout(250)
+
+    data = take_snapshot(page, max_elements=args.max_elements, max_text_chars=args.max_text_chars)
+    previous = _WEB_SNAPSHOTS.swap(ctx.run_id, data.get("url") or args.url, data.get("elements") or [])
+    output, stats = render_snapshot(data, previous if args.diff else None)
+
+    if args.mode == "full":
+        try:
+            output["accessibility_tree"] = page.accessibility.snapshot()
+        except Exception:
+            output["accessibility_tree"] = None
+        try:
+            output["html_preview"] = page.content()[:4000]
+        except Exception:
+            output["html_preview"] = ""
+
+    screenshot_path = None
+    if args.include_screenshot:
+        screenshot_path = str(ctx.run_dir / "web_gui_snapshot.png")
+        try:
+            page.screenshot(path=screenshot_path, full_page=True)
+        except Exception:
+            screenshot_path = None
+
+    output["screenshot"] = screenshot_path
+    output["snapshot_stats"] = {
+        **stats,
+        "mode": args.mode,
+        "resources_blocked": blocked,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    output["untrusted"] = True
+    return output
+
+
 def _get_web_session(ctx: RunContext, *, headless: Optional[bool] = None) -> Dict[str, Any]:
     session = _WEB_SESSIONS.get(ctx.run_id)
     if session:
@@ -1428,49 +1434,58 @@ def _get_web_session(ctx: RunContext, *, headless: Optional[bool] = None) -> Dic
     except Exception as exc:  # pragma: no cover
         raise RuntimeError(f"Playwright unavailable: {exc}") from exc
 
-    pw = sync_playwright().start()
-    launch_kwargs = {"headless": bool(headless) if headless is not None else True}
-    browser = pw.chromium.launch(**launch_kwargs)
-    context = browser.new_context()
-    page = context.new_page()
-    session = {"playwright": pw, "browser": browser, "context": context, "page": page, "elements": {}}
+    from agent.tools.browser_pool import LoopBound, get_browser_pool, pool_enabled
+
+    if pool_enabled():
+        # The browser process is shared and warm; the context is this run's own.
+        pool = get_browser_pool(headless=bool(headless) if headless is not None else True)
+        lease = pool.run(pool.acquire())
+        session = {
+            "pool": pool,
+            "lease": lease,
+            "context": LoopBound(lease.context, pool),
+            "page": LoopBound(lease.page, pool),
+            "elements": {},
+        }
+    else:
+        pw = sync_playwright().start()
+        launch_kwargs = {"headless": bool(headless) if headless is not None else True}
+        browser = pw.chromium.launch(**launch_kwargs)
+        context = browser.new_context()
+        page = context.new_page()
+        session = {"playwright": pw, "browser": browser, "context": context, "page": page, "elements": {}}
+    try:
+        # Only when AGENT_WEB_BLOCK_RESOURCES is set: blocking changes screenshots.
+        block_resources(session["context"], blocked_resource_types(default=frozenset()))
+    except Exception as exc:
+        logger.debug(f"web session: resource blocking unavailable: {exc}")
     _WEB_SESSIONS[ctx.run_id] = session
     return session
 
 
-def _web_css_path_js() -> str:
-    return """
-    (el) => {
-      if (!el || !el.tagName) return '';
-      if (el.id) return '#' + el.id;
-      const parts = [];
-      while (el && el.nodeType === 1 && el.tagName.toLowerCase() !== 'html') {
-        let selector = el.tagName.toLowerCase();
-        if (el.className) {
-          const cls = String(el.className).trim().split(/\\s+/).slice(0,2);
-          if (cls.length) selector += '.' + cls.join('.');
-        }
-        const parent = el.parentNode;
-        if (parent) {
-          const siblings = Array.from(parent.children).filter(s => s.tagName === el.tagName);
-          if (siblings.length > 1) {
-            const index = siblings.indexOf(el) + 1;
-            selector += `:nth-of-type(${index})`;
-          }
-        }
-        parts.unshift(selector);
-        el = parent;
-      }
-      parts.unshift('html');
-      return parts.join(' > ');
-    }
+def release_run_resources(run_id: str) -> None:
+    """Free the per-run tool state kept in module tables.
+
+    Closes the run's web session (returning a pooled browser lease) and drops
+    its snapshot history, desktop labels and HTTP dedupe memo. Called by
+    ``finish`` and by the runner when a run ends any other way.
     """
+    _close_web_session(run_id)
+    _DESKTOP_SOM_STATE.pop(run_id, None)
+    clear_http_run(run_id)
 
 
-def _close_web_session(ctx: RunContext) -> None:
-    session = _WEB_SESSIONS.pop(ctx.run_id, None)
+def _close_web_session(run_id: str) -> None:
+    _WEB_SNAPSHOTS.clear(run_id)
+    session = _WEB_SESSIONS.pop(run_id, None)
     if not session:
         return
+    if session.get("lease") is not None:
+        try:
+            session["pool"].run(session["pool"].release(session["lease"], reusable=False), timeout=30)
+        except Exception:
+            pass
+        return
     try:
         session.get("context") and session["context"].close()
     except Exception:
@@ -1515,55 +1530,34 @@ def web_find_elements(ctx: RunContext, args: WebFindElementsArgs) -> ToolResult:
 
         elements: List[Dict[str, Any]] = []
         element_map: Dict[str, Dict[str, Any]] = session["elements"]
-        idx = 0
+        limit = max(1, args.limit)
         for locator in locators:
-            count = locator.count()
-            for i in range(min(count, max(1, args.limit))):
-                handle = locator.nth(i)
-                try:
-                    selector = handle.evaluate(_web_css_path_js())
-                except Exception:
-                    selector = ""
-                try:
-                    role = handle.get_attribute("role") or handle.evaluate("el => el.tagName.toLowerCase()")
-                except Exception:
-                    role = ""
-                try:
-                    name = handle.get_attribute("aria-label") or ""
-                except Exception:
-                    name = ""
-                try:
-                    text = handle.inner_text() or ""
-                except Exception:
-                    text = ""
-                try:
-                    box = handle.bounding_box() or {}
-                except Exception:
-                    box = {}
-                element_id = f"el_{idx}"
-                idx += 1
+            # One evaluate_all per locator describes every match at once.
+            for row in describe_matches(locator, limit=limit - len(elements)):
+                element_id = f"el_{len(elements)}"
+                selector = row.get("selector") or ""
                 if selector:
                     element_map[element_id] = {"selector": selector}
                 elements.append(
                     {
                         "element_id": element_id,
-                        "role": role,
-                        "name": name,
-                        "text": text[:200],
+                        "role": row.get("role", ""),
+                        "name": row.get("name", ""),
+                        "text": row.get("text", ""),
                         "selector": selector,
                         "a11y_path": selector,
-                        "bbox": box,
+                        "bbox": row.get("bbox") or {},
                     }
                 )
-                if len(elements) >= max(1, args.limit):
-                    break
-            if len(elements) >= max(1, args.limit):
+            if len(elements) >= limit:
                 break
 
         return ToolResult(
             success=True,
             output={"url": page.url, "title": page.title(), "elements": elements},
         )
+    except RunCancelledError:
+        raise
     except Exception as exc:
         return ToolResult(success=False, error=str(exc), retryable=True)
 
@@ -1593,6 +1587,8 @@ def web_click(ctx: RunContext, args: WebClickArgs) -> ToolResult:
         except Exception:
             shot_path = ""
         return ToolResult(success=True, output={"clicked": selector, "screenshot": shot_path})
+    except RunCancelledError:
+        raise
     except Exception as exc:
         return ToolResult(success=False, error=str(exc), retryable=True)
 
@@ -1623,6 +1619,8 @@ def web_type(ctx: RunContext, args: WebTypeArgs) -> ToolResult:
         except Exception:
             shot_path = ""
         return ToolResult(success=True, output={"typed": selector, "screenshot": shot_path})
+    except RunCancelledError:
+        raise
     except Exception as exc:
         return ToolResult(success=False, error=str(exc), retryable=True)
 
@@ -1646,6 +1644,8 @@ def web_scroll(ctx: RunContext, args: WebScrollArgs) -> ToolResult:
         except Exception:
             shot_path = ""
         return ToolResult(success=True, output={"scrolled": args.delta_y, "screenshot": shot_path})
+    except RunCancelledError:
+        raise
     except Exception as exc:
         return ToolResult(success=False, error=str(exc), retryable=True)
 
@@ -1690,6 +1690,8 @@ def web_close_modal(ctx: RunContext, args: WebCloseModalArgs) -> ToolResult:
         except Exception:
             shot_path = ""
         return ToolResult(success=True, output={"closed": closed, "screenshot": shot_path})
+    except RunCancelledError:
+        raise
     except Exception as exc:
         return ToolResult(success=False, error=str(exc), retryable=True)
 
@@ -1928,9 +1930,9 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
     workspace_dir.mkdir(parents=True, exist_ok=True)
 
     reg = ToolRegistry(agent_cfg=cfg, allow_interactive_tools=cfg.allow_interactive_tools)
-    reg.register(ToolSpec(name="web_fetch", args_model=WebFetchArgs, fn=web_fetch, description="HTTP GET (with timeouts, optional HTML stripping)"))
-    reg.register(ToolSpec(name="web_search", args_model=WebSearchArgs, fn=web_search, description="Search the web (DuckDuckGo HTML)"))
-    reg.register(ToolSpec(name="file_read", args_model=FileReadArgs, fn=file_read_factory(cfg), description="Read a file"))
+    reg.register(ToolSpec(name="web_fetch", args_model=WebFetchArgs, fn=web_fetch, description="HTTP GET (with timeouts, optional HTML stripping)", read_only=True))
+    reg.register(ToolSpec(name="web_search", args_model=WebSearchArgs, fn=web_search, description="Search the web (DuckDuckGo HTML)", read_only=True))
+    reg.register(ToolSpec(name="file_read", args_model=FileReadArgs, fn=file_read_factory(cfg), description="Read a file", read_only=True))
     reg.register(
         ToolSpec(
             name="file_write",
@@ -1939,9 +1941,9 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
             description="Write a file",
         )
     )
-    reg.register(ToolSpec(name="list_dir", args_model=ListDirArgs, fn=list_dir_factory(cfg), description="List directory entries"))
-    reg.register(ToolSpec(name="glob_paths", args_model=GlobArgs, fn=glob_paths_factory(cfg), description="Find paths by glob pattern"))
-    reg.register(ToolSpec(name="file_search", args_model=FileSearchArgs, fn=file_search_factory(cfg), description="Search text in files"))
+    reg.register(ToolSpec(name="list_dir", args_model=ListDirArgs, fn=list_dir_factory(cfg), description="List directory entries", read_only=True))
+    reg.register(ToolSpec(name="glob_paths", args_model=GlobArgs, fn=glob_paths_factory(cfg), description="Find paths by glob pattern", read_only=True))
+    reg.register(ToolSpec(name="file_search", args_model=FileSearchArgs, fn=file_search_factory(cfg), description="Search text in files; returns matching lines with line numbers and context (regex optional)", read_only=True))
     reg.register(
         ToolSpec(
             name="file_copy",
@@ -1984,7 +1986,7 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
     )
     reg.register(ToolSpec(name="clipboard_get", args_model=ClipboardGetArgs, fn=clipboard_get, description="Read clipboard"))
     reg.register(ToolSpec(name="clipboard_set", args_model=ClipboardSetArgs, fn=clipboard_set, description="Write clipboard"))
-    reg.register(ToolSpec(name="system_info", args_model=SystemInfoArgs, fn=system_info, description="Basic system info"))
+    reg.register(ToolSpec(name="system_info", args_model=SystemInfoArgs, fn=system_info, description="Basic system info", read_only=True))
     reg.register(
         ToolSpec(
             name="python_exec",
@@ -2008,6 +2010,7 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
             args_model=RepoScanArgs,
             fn=scan_repo_tool,
             description="Scan repository structure and identify key files",
+            read_only=True,
         )
     )
     reg.register(
@@ -2060,6 +2063,7 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
             args_model=McpListArgs,
             fn=mcp_list_factory(),
             description="List tools from active MCP server",
+            read_only=True,
         )
     )
     reg.register(
@@ -2147,13 +2151,9 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
     integration_manager = get_integration_manager()
     if not os.getenv("TREYS_AGENT_DISABLE_MCP") and integration_manager.should_load_mcp():
         try:
-            from agent.mcp.client import MCPClient
-            mcp_client = MCPClient()
-            # Initialize other MCP servers if needed, but not calendar/tasks (we have direct tools)
-            try:
-                asyncio.run(mcp_client.initialize([]))
-            except RuntimeError:
-                pass
+            from agent.mcp.client import get_mcp_client
+            # Load server configs only; servers start on first call (calendar/tasks have direct tools)
+            get_mcp_client()
         except Exception as exc:
             logger.debug(f"[DEBUG] MCP client initialization skipped: {exc}")
 
@@ -2163,7 +2163,7 @@ def build_default_tool_registry(cfg: AgentConfig, run_dir: Path, *, memory_store
                 name="web_gui_snapshot",
                 args_model=WebGuiSnapshotArgs,
                 fn=web_gui_snapshot,
-                description="Capture url + visible text + a11y tree (Playwright)",
+                description="Capture url + visible text + a11y tree + interactive element table (Playwright); mode=lite, diff and block_resources trim the output",
             )
         )
         reg.register(
@@ -3,16 +3,20 @@ Tool wrappers for Google Calendar and Tasks integration.
 These tools are registered with the agent's tool registry.
 """
 
+from __future__ import annotations
+
 import asyncio
 import threading
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from pydantic import BaseModel
 
 from agent.autonomous.config import RunContext
 from agent.autonomous.models import ToolResult
-from agent.integrations.calendar_helper import CalendarHelper
-from agent.integrations.tasks_helper import TasksHelper
+
+if TYPE_CHECKING:  # the Google client libraries are slow to import
+    from agent.integrations.calendar_helper import CalendarHelper
+    from agent.integrations.tasks_helper import TasksHelper
 
 
 def _run_async(coro):
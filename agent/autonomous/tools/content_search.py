@@ -0,0 +1,374 @@
+"""Parallel content search used by the ``file_search`` tool.
+
+Files are visited in sorted path order and scanned on a small thread pool
+(large files via ``mmap``), and matching happens on raw bytes whenever the
+query is ASCII so no per-file decode/lowercase copy is made. Results are
+streamed back in that same order, so a search that stops at ``max_matches``
+or at the caller's budget returns the same files every time.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+SKIP_DIRS = frozenset(
+    {
+        "__pycache__",
+        ".git",
+        "node_modules",
+        ".venv",
+        "venv",
+        "dist",
+        "build",
+    }
+)
+
+BINARY_EXTS = frozenset(
+    {
+        ".pyc",
+        ".pyo",
+        ".so",
+        ".dll",
+        ".exe",
+        ".bin",
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".pdf",
+        ".zip",
+        ".tar",
+        ".gz",
+        ".7z",
+        ".mp3",
+        ".mp4",
+        ".mov",
+        ".avi",
+        ".wav",
+        ".flac",
+        ".woff",
+        ".woff2",
+        ".ttf",
+        ".otf",
+        ".ico",
+    }
+)
+
+_MMAP_THRESHOLD = 256 * 1024
+_BINARY_SNIFF_BYTES = 8192
+_MAX_LINE_CHARS = 300
+
+Buffer = Union[bytes, str, mmap.mmap]
+
+
+def default_workers() -> int:
+    return max(2, min(8, os.cpu_count() or 2))
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    query: str
+    case_sensitive: bool = False
+    regex: bool = False
+    context_lines: int = 2
+    max_matches_per_file: int = 20
+    max_file_bytes: int = 1_000_000
+    paths_only: bool = False
+    workers: int = field(default_factory=default_workers)
+
+
+@dataclass
+class LineMatch:
+    line: int
+    text: str
+    before: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"line": self.line, "text": self.text}
+        if self.before:
+            out["before"] = self.before
+        if self.after:
+            out["after"] = self.after
+        return out
+
+
+@dataclass
+class FileMatch:
+    path: str
+    bytes_scanned: int
+    lines: List[LineMatch] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"path": self.path, "matches": [m.to_dict() for m in self.lines]}
+        if self.lines:
+            out["preview"] = self.lines[0].text
+        return out
+
+
+class _Matcher:
+    """Finds match spans in a buffer; bytes-level when the query is ASCII."""
+
+    def __init__(self, opts: SearchOptions) -> None:
+        self.text_mode = not opts.query.isascii()
+        flags = 0 if opts.case_sensitive else re.IGNORECASE
+        pattern: Union[str, bytes] = opts.query if self.text_mode else opts.query.encode("ascii")
+        if not opts.regex:
+            pattern = re.escape(pattern)  # type: ignore[type-var]
+        # Raises re.error for bad regexes; the caller reports it.
+        self._regex = re.compile(pattern, flags | re.MULTILINE)
+        self._literal: Optional[bytes] = None
+        if not opts.regex and opts.case_sensitive and not self.text_mode:
+            self._literal = opts.query.encode("ascii")
+
+    def first(self, buf: Buffer, end: int) -> Optional[int]:
+        if self._literal is not None:
+            pos = buf.find(self._literal, 0, end)  # type: ignore[arg-type]
+            return None if pos < 0 else pos
+        m = self._regex.search(buf, 0, end)  # type: ignore[arg-type]
+        return None if m is None else m.start()
+
+    def iter_starts(self, buf: Buffer, end: int) -> Iterator[int]:
+        if self._literal is not None:
+            pos = buf.find(self._literal, 0, end)  # type: ignore[arg-type]
+            step = max(1, len(self._literal))
+            while 0 <= pos:
+                yield pos
+                pos = buf.find(self._literal, pos + step, end)  # type: ignore[arg-type]
+            return
+        for m in self._regex.finditer(buf, 0, end):  # type: ignore[arg-type]
+            yield m.start()
+
+
+def _decode(raw: Union[bytes, str]) -> str:
+    if isinstance(raw, str):
+        return raw
+    return raw.decode("utf-8", errors="replace")
+
+
+def _count(buf: Buffer, sub: Union[bytes, str], start: int, end: int) -> int:
+    if isinstance(buf, mmap.mmap):
+        # mmap has no count(); slices are only taken between successive hits.
+        return buf[start:end].count(sub)  # type: ignore[arg-type]
+    return buf.count(sub, start, end)  # type: ignore[arg-type]
+
+
+def _line_bounds(buf: Buffer, pos: int, end: int, nl: Union[bytes, str]) -> Tuple[int, int]:
+    start = buf.rfind(nl, 0, pos) + 1  # type: ignore[arg-type]
+    stop = buf.find(nl, pos, end)  # type: ignore[arg-type]
+    return start, (end if stop < 0 else stop)
+
+
+def _clip(text: str) -> str:
+    text = text.rstrip("\r")
+    return text if len(text) <= _MAX_LINE_CHARS else text[:_MAX_LINE_CHARS] + "..."
+
+
+def _collect_lines(buf: Buffer, end: int, matcher: _Matcher, opts: SearchOptions) -> List[LineMatch]:
+    nl: Union[bytes, str] = "\n" if isinstance(buf, str) else b"\n"
+    out: List[LineMatch] = []
+    line_no = 1
+    counted_to = 0
+    last_line_start = -1
+    for pos in matcher.iter_starts(buf, end):
+        start, stop = _line_bounds(buf, pos, end, nl)
+        if start == last_line_start:
+            continue
+        line_no += _count(buf, nl, counted_to, start)
+        counted_to = start
+        last_line_start = start
+        before: List[str] = []
+        cursor = start
+        for _ in range(max(0, opts.context_lines)):
+            if cursor <= 0:
+                break
+            prev_start = buf.rfind(nl, 0, cursor - 1) + 1  # type: ignore[arg-type]
+            before.insert(0, _clip(_decode(buf[prev_start : cursor - 1])))
+            cursor = prev_start
+        after: List[str] = []
+        cursor = stop
+        for _ in range(max(0, opts.context_lines)):
+            if cursor + 1 >= end:
+                break
+            nxt = buf.find(nl, cursor + 1, end)  # type: ignore[arg-type]
+            nxt = end if nxt < 0 else nxt
+            after.append(_clip(_decode(buf[cursor + 1 : nxt])))
+            cursor = nxt
+        out.append(LineMatch(line=line_no, text=_clip(_decode(buf[start:stop])), before=before, after=after))
+        if len(out) >= max(1, opts.max_matches_per_file):
+            break
+    return out
+
+
+def scan_file(path: str, size: int, read_cap: int, matcher: _Matcher, opts: SearchOptions) -> Optional[FileMatch]:
+    """Scan one file; returns None when it is binary, unreadable or has no match."""
+    end = min(size, read_cap)
+    if end <= 0:
+        return None
+    mapped: Optional[mmap.mmap] = None
+    try:
+        with open(path, "rb") as fh:
+            if size >= _MMAP_THRESHOLD:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                buf: Buffer = mapped
+                end = min(end, len(mapped))
+            else:
+                buf = fh.read(end)
+                end = len(buf)
+    except (OSError, ValueError):
+        return None
+    try:
+        if buf.find(b"\x00", 0, min(end, _BINARY_SNIFF_BYTES)) >= 0:  # type: ignore[arg-type]
+            return None
+        if matcher.text_mode:
+            buf = _decode(buf[:end])
+            end = len(buf)
+        if opts.paths_only:
+            if matcher.first(buf, end) is None:
+                return None
+            return FileMatch(path=path, bytes_scanned=end)
+        lines = _collect_lines(buf, end, matcher, opts)
+        if not lines:
+            return None
+        return FileMatch(path=path, bytes_scanned=end, lines=lines)
+    finally:
+        if mapped is not None:
+            mapped.close()
+
+
+class FileStat(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def _list_dir(path: str, skip_dirs: frozenset) -> Tuple[List[FileStat], List[str]]:
+    files: List[FileStat] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dirs:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files.append(FileStat(entry.path, st.st_size, st.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    files.sort()
+    subdirs.sort()
+    return files, subdirs
+
+
+def walk_files(
+    root: Path,
+    *,
+    skip_dirs: Iterable[str] = SKIP_DIRS,
+    workers: Optional[int] = None,
+) -> Iterator[FileStat]:
+    """Yield a ``FileStat`` for every file under ``root``, listing directories in parallel."""
+    skip = frozenset(skip_dirs)
+    pool = ThreadPoolExecutor(max_workers=workers or default_workers(), thread_name_prefix="fs-walk")
+    try:
+        pending = {pool.submit(_list_dir, str(root), skip)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                files, subdirs = fut.result()
+                for sub in subdirs:
+                    pending.add(pool.submit(_list_dir, sub, skip))
+                yield from files
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def walk_files_sorted(root: Path, *, skip_dirs: Iterable[str] = SKIP_DIRS) -> Iterator[FileStat]:
+    """Yield a ``FileStat`` for every file under ``root`` in sorted path order."""
+    skip = frozenset(skip_dirs)
+    files, subdirs = _list_dir(str(root), skip)
+    # A directory sorts as "name/" so the order matches sorting full path strings.
+    entries: List[Tuple[str, Union[FileStat, str]]] = [(f.path, f) for f in files]
+    entries.extend((d + os.sep, d) for d in subdirs)
+    entries.sort(key=lambda entry: entry[0])
+    for _, item in entries:
+        if isinstance(item, str):
+            yield from walk_files_sorted(Path(item), skip_dirs=skip)
+        else:
+            yield item
+
+
+def search_files(
+    root: Path,
+    opts: SearchOptions,
+    *,
+    reserve: Optional[Callable[[int], Optional[int]]] = None,
+    max_files_scanned: Optional[int] = None,
+    binary_exts: Iterable[str] = BINARY_EXTS,
+    files: Optional[Iterable[FileStat]] = None,
+    max_matches: Optional[int] = None,
+) -> Iterator[FileMatch]:
+    """Stream matches under ``root`` in path order, stopping after ``max_matches``.
+
+    ``files`` restricts the scan to a precomputed candidate list (e.g. from the
+    trigram index, already sorted) instead of walking ``root``.
+
+    ``reserve(size)`` is called on the calling thread, in path order, right
+    before a file is read; it returns the byte cap to read, or ``None`` to stop
+    the search (budget hit). At most ``opts.workers`` files are in flight, so
+    every reserved file is actually scanned and a search that stops early has
+    reserved at most ``opts.workers - 1`` files past its last match.
+    Raises ``re.error`` if ``opts.regex`` is set and the pattern is invalid.
+    """
+    matcher = _Matcher(opts)
+    exts = frozenset(binary_exts)
+    workers = max(1, opts.workers)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fs-search")
+    inflight: Deque[Future] = deque()
+    scanned = 0
+    found = 0
+    limit = max(1, max_matches) if max_matches is not None else None
+
+    def _drain_head() -> Optional[FileMatch]:
+        return inflight.popleft().result()
+
+    try:
+        source = files if files is not None else walk_files_sorted(root)
+        for path, size, _ in source:
+            if max_files_scanned is not None and scanned >= max_files_scanned:
+                break
+            if os.path.splitext(path)[1].lower() in exts or size > opts.max_file_bytes:
+                continue
+            # Results come back in submission order; wait for the oldest scan
+            # before reserving more than ``workers`` files.
+            while inflight and (len(inflight) >= workers or inflight[0].done()):
+                result = _drain_head()
+                if result is not None:
+                    found += 1
+                    yield result
+                    if limit is not None and found >= limit:
+                        return
+            cap = reserve(size) if reserve else opts.max_file_bytes
+            if cap is None:
+                break
+            scanned += 1
+            inflight.append(pool.submit(scan_file, path, size, cap, matcher, opts))
+        while inflight:
+            result = _drain_head()
+            if result is not None:
+                found += 1
+                yield result
+                if limit is not None and found >= limit:
+                    return
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
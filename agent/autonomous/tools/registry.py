@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Type
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Type
 
 from .calendar_tasks_tools import (
     CalendarTasksTools,
@@ -22,14 +22,17 @@ from .calendar_tasks_tools import (
     UpdateCalendarEventArgs,
     UpdateTaskArgs,
 )
-from agent.integrations.calendar_helper import CalendarHelper
-from agent.integrations.tasks_helper import TasksHelper
+
+if TYPE_CHECKING:
+    from agent.integrations.calendar_helper import CalendarHelper
+    from agent.integrations.tasks_helper import TasksHelper
 
 from pydantic import BaseModel, ValidationError
 
 from ..config import AgentConfig, RunContext
-from ..exceptions import InteractionRequiredError, ToolExecutionError
+from ..exceptions import InteractionRequiredError, RunCancelledError, ToolExecutionError
 from ..models import ToolResult
+from .trigram_index import mark_all_stale
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +66,8 @@ class ToolSpec:
     description: str = ""
     dangerous: bool = False
     approval_required: bool = False
+    read_only: bool = False
+    """No side effects: safe to run concurrently with other read-only calls."""
 
 
 class ToolRegistry:
@@ -219,7 +224,11 @@ class ToolRegistry:
                     "Interactive tools are disabled for this run.",
                     questions=questions,
                 )
-            return spec.fn(ctx, parsed)
+            try:
+                return spec.fn(ctx, parsed)
+            finally:
+                if not spec.read_only:
+                    mark_all_stale()
         except InteractionRequiredError as exc:
             questions = getattr(exc, "questions", None) or []
             return ToolResult(
@@ -236,6 +245,12 @@ class ToolRegistry:
                     "message": str(exc),
                 },
             )
+        except RunCancelledError as exc:
+            return ToolResult(
+                success=False,
+                error=str(exc),
+                metadata={"cancelled": True, "reason": exc.reason, "tool_name": name},
+            )
         except Exception as exc:
             err = ToolExecutionError(
                 f"Tool execution failed: {name}",
@@ -258,6 +273,10 @@ class ToolRegistry:
     def requires_approval(self, name: str) -> bool:
         return False
 
+    def is_read_only(self, name: str) -> bool:
+        spec = self._tools.get(name)
+        return bool(spec is not None and spec.read_only)
+
 
 def register_calendar_tasks_tools(
     registry: ToolRegistry,
@@ -286,6 +305,7 @@ def register_calendar_tasks_tools(
             args_model=GetFreeTimeArgs,
             fn=_lazy("get_free_time"),
             description="Find free time slots in your calendar for scheduling",
+            read_only=True,
         )
     )
     registry.register(
@@ -294,6 +314,7 @@ def register_calendar_tasks_tools(
             args_model=CheckConflictsArgs,
             fn=_lazy("check_calendar_conflicts"),
             description="Check if a proposed event conflicts with existing calendar events",
+            read_only=True,
         )
     )
     registry.register(
@@ -310,6 +331,7 @@ def register_calendar_tasks_tools(
             args_model=ListCalendarEventsArgs,
             fn=_lazy("list_calendar_events"),
             description="List calendar events in a time range",
+            read_only=True,
         )
     )
     registry.register(
@@ -334,6 +356,7 @@ def register_calendar_tasks_tools(
             args_model=ListTaskListsArgs,
             fn=_lazy("list_task_lists"),
             description="List all Google Tasks task lists",
+            read_only=True,
         )
     )
     registry.register(
@@ -342,6 +365,7 @@ def register_calendar_tasks_tools(
             args_model=ListAllTasksArgs,
             fn=_lazy("list_all_tasks"),
             description="List tasks across all task lists (or a specific list)",
+            read_only=True,
         )
     )
     registry.register(
@@ -366,6 +390,7 @@ def register_calendar_tasks_tools(
             args_model=SearchTasksArgs,
             fn=_lazy("search_tasks"),
             description="Search for tasks by title or notes",
+            read_only=True,
         )
     )
     registry.register(
@@ -390,5 +415,6 @@ def register_calendar_tasks_tools(
             args_model=GetTaskDetailsArgs,
             fn=_lazy("get_task_details"),
             description="Get details for a specific task",
+            read_only=True,
         )
     )
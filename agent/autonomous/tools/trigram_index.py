@@ -0,0 +1,366 @@
+"""Persistent trigram index that narrows ``file_search`` candidates.
+
+One SQLite database per workspace root records every text file's size/mtime
+and the set of (ASCII-lowercased) byte trigrams it contains. A substring query
+is answered by intersecting the postings of its trigrams; the surviving files
+are then verified by the normal scanner, so the index only has to be a
+superset of the true matches.
+
+The first query against a root finds the index cold: it returns ``None`` (the
+caller scans as usual) and builds the index on a background thread. A query
+made more than ``refresh_interval`` seconds after the last sync re-stats the
+tree and re-indexes only files whose mtime/size changed; queries inside that
+window use the index as is. Tools that can write files (anything not
+registered ``read_only``) mark every index stale, so the agent's own edits are
+picked up by the next query.
+
+Each sync reads file contents within the caller's read limits (the run
+profile's ``max_files_to_read`` / ``max_total_bytes_to_read`` and the per-file
+``max_bytes``, as ``file_search`` enforces them). Files left unread are stored
+unindexed, which keeps them in every candidate list, and are indexed by a later
+sync that has budget to spare.
+
+Environment overrides:
+  TREYS_AGENT_SEARCH_INDEX=0       disable the index
+  TREYS_AGENT_SEARCH_INDEX_DIR     storage directory (default: agent/memory/search_index)
+  TREYS_AGENT_SEARCH_INDEX_TTL     seconds between tree re-stats (default: 10)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from agent.config.profile import ProfileConfig
+
+from .content_search import BINARY_EXTS, SKIP_DIRS, FileStat, walk_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_INDEX_BYTES = 1_000_000
+DEFAULT_REFRESH_SECONDS = 10.0
+_SCHEMA_VERSION = "1"
+
+
+def _trigrams(data: bytes) -> Set[int]:
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def query_trigrams(query: str) -> Optional[Set[int]]:
+    """Trigrams for a literal query, or None if the index cannot help with it."""
+    if not query or not query.isascii() or len(query) < 3:
+        return None
+    return _trigrams(query.encode("ascii"))
+
+
+class TrigramIndex:
+    def __init__(
+        self,
+        root: Path,
+        db_path: Path,
+        *,
+        max_index_bytes: int = DEFAULT_MAX_INDEX_BYTES,
+        refresh_interval: float = DEFAULT_REFRESH_SECONDS,
+    ):
+        self.root = Path(root)
+        self.db_path = Path(db_path)
+        self.max_index_bytes = max_index_bytes
+        self.refresh_interval = max(0.0, float(refresh_interval))
+        # Monotonic time of the last full sync; None forces one on the next query.
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._build_thread: Optional[threading.Thread] = None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._init_schema()
+        self._warm = self._meta("built_at") is not None and self._meta("schema") == _SCHEMA_VERSION
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+    def _init_schema(self) -> None:
+        cur = self._conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL;")
+        cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              path TEXT NOT NULL UNIQUE,
+              size INTEGER NOT NULL,
+              mtime_ns INTEGER NOT NULL,
+              indexed INTEGER NOT NULL
+            );
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS postings (
+              tri INTEGER NOT NULL,
+              file_id INTEGER NOT NULL,
+              PRIMARY KEY (tri, file_id)
+            ) WITHOUT ROWID;
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_postings_file ON postings(file_id);")
+        self._conn.commit()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    # ------------------------------------------------------------------
+    # Building / refreshing
+    # ------------------------------------------------------------------
+
+    def _index_file(
+        self, cur: sqlite3.Cursor, stat: FileStat, file_id: Optional[int], budget: "_ReadBudget"
+    ) -> None:
+        tris: Optional[Set[int]] = None
+        if stat.size <= budget.max_file_bytes and budget.take(stat.size):
+            try:
+                with open(stat.path, "rb") as fh:
+                    tris = _trigrams(fh.read(budget.max_file_bytes))
+            except OSError:
+                tris = None
+        indexed = 1 if tris is not None else 0
+        if file_id is None:
+            cur.execute(
+                "INSERT INTO files(path, size, mtime_ns, indexed) VALUES (?, ?, ?, ?)",
+                (stat.path, stat.size, stat.mtime_ns, indexed),
+            )
+            file_id = int(cur.lastrowid)
+        else:
+            cur.execute("DELETE FROM postings WHERE file_id=?", (file_id,))
+            cur.execute(
+                "UPDATE files SET size=?, mtime_ns=?, indexed=? WHERE id=?",
+                (stat.size, stat.mtime_ns, indexed, file_id),
+            )
+        if tris:
+            cur.executemany(
+                "INSERT OR IGNORE INTO postings(tri, file_id) VALUES (?, ?)",
+                ((tri, file_id) for tri in tris),
+            )
+
+    def _sync(self, profile: Optional[ProfileConfig] = None, max_file_bytes: Optional[int] = None) -> Dict[str, int]:
+        """Bring the index in line with the tree. Caller holds ``self._lock``."""
+        budget = _ReadBudget(self.max_index_bytes, profile, max_file_bytes)
+        known: Dict[str, Tuple[int, int, int, int]] = {
+            path: (fid, size, mtime, indexed)
+            for fid, path, size, mtime, indexed in self._conn.execute(
+                "SELECT id, path, size, mtime_ns, indexed FROM files"
+            )
+        }
+        seen: Set[str] = set()
+        added = updated = 0
+        cur = self._conn.cursor()
+        for stat in walk_files(self.root, skip_dirs=SKIP_DIRS):
+            if os.path.splitext(stat.path)[1].lower() in BINARY_EXTS:
+                continue
+            seen.add(stat.path)
+            prev = known.get(stat.path)
+            if prev is None:
+                self._index_file(cur, stat, None, budget)
+                added += 1
+            elif prev[1] != stat.size or prev[2] != stat.mtime_ns:
+                self._index_file(cur, stat, prev[0], budget)
+                updated += 1
+            elif not prev[3] and budget.has_room():
+                # Left unread by an earlier sync that ran out of budget.
+                self._index_file(cur, stat, prev[0], budget)
+                updated += 1
+        removed_ids = [(fid,) for path, (fid, _, _, _) in known.items() if path not in seen]
+        if removed_ids:
+            cur.executemany("DELETE FROM postings WHERE file_id=?", removed_ids)
+            cur.executemany("DELETE FROM files WHERE id=?", removed_ids)
+        self._set_meta("schema", _SCHEMA_VERSION)
+        self._set_meta("built_at", str(time.time()))
+        self._conn.commit()
+        self._synced_at = time.monotonic()
+        return {"added": added, "updated": updated, "removed": len(removed_ids)}
+
+    def build(self, profile: Optional[ProfileConfig] = None, max_file_bytes: Optional[int] = None) -> Dict[str, int]:
+        with self._lock:
+            stats = self._sync(profile, max_file_bytes)
+            self._warm = True
+            return stats
+
+    def build_async(self, profile: Optional[ProfileConfig] = None, max_file_bytes: Optional[int] = None) -> None:
+        """Start a background build unless one is already running."""
+        with self._thread_lock:
+            if self._build_thread is not None and self._build_thread.is_alive():
+                return
+
+            def _run() -> None:
+                try:
+                    stats = self.build(profile, max_file_bytes)
+                    logger.debug("trigram index built for %s: %s", self.root, stats)
+                except Exception as exc:
+                    logger.warning("trigram index build failed for %s: %s", self.root, exc)
+
+            self._build_thread = threading.Thread(target=_run, name="trigram-index", daemon=True)
+            self._build_thread.start()
+
+    def mark_stale(self) -> None:
+        """Re-stat the tree on the next query instead of waiting for the TTL."""
+        self._synced_at = None
+
+    def _needs_sync(self) -> bool:
+        synced_at = self._synced_at
+        return synced_at is None or time.monotonic() - synced_at >= self.refresh_interval
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        thread = self._build_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._warm
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def candidates(
+        self,
+        query: str,
+        *,
+        under: Optional[Path] = None,
+        profile: Optional[ProfileConfig] = None,
+        max_file_bytes: Optional[int] = None,
+    ) -> Optional[List[FileStat]]:
+        """Files that may contain ``query``, or None when the caller should scan.
+
+        A cold index schedules a background build and returns None. The tree is
+        re-scanned only when the last sync is older than ``refresh_interval``.
+        A build or refresh reads no more than ``profile`` and ``max_file_bytes``
+        allow.
+        """
+        tris = query_trigrams(query)
+        if tris is None:
+            return None
+        if not self._warm:
+            self.build_async(profile, max_file_bytes)
+            return None
+        if not self._lock.acquire(blocking=False):
+            # A build or refresh is already in progress; do not stall the tool.
+            return None
+        try:
+            if self._needs_sync():
+                self._sync(profile, max_file_bytes)
+            tri_list = sorted(tris)
+            placeholders = ",".join("?" for _ in tri_list)
+            rows = self._conn.execute(
+                f"""
+                SELECT f.path, f.size, f.mtime_ns FROM files f
+                JOIN (
+                  SELECT file_id FROM postings WHERE tri IN ({placeholders})
+                  GROUP BY file_id HAVING COUNT(*) = ?
+                ) p ON p.file_id = f.id
+                UNION ALL
+                SELECT path, size, mtime_ns FROM files WHERE indexed = 0
+                """,
+                (*tri_list, len(tri_list)),
+            ).fetchall()
+        finally:
+            self._lock.release()
+        out = [FileStat(path, size, mtime) for path, size, mtime in rows]
+        if under is not None:
+            prefix = str(Path(under).resolve()).rstrip(os.sep) + os.sep
+            out = [fs for fs in out if fs.path.startswith(prefix)]
+        out.sort()
+        return out
+
+
+class _ReadBudget:
+    """File and byte allowance for one sync (unbounded without a profile)."""
+
+    def __init__(self, max_index_bytes: int, profile: Optional[ProfileConfig], max_file_bytes: Optional[int]):
+        self.max_file_bytes = min(max_index_bytes, max_file_bytes) if max_file_bytes else max_index_bytes
+        self.files_left = profile.max_files_to_read if profile else None
+        self.bytes_left = profile.max_total_bytes_to_read if profile else None
+
+    def has_room(self) -> bool:
+        return (self.files_left is None or self.files_left > 0) and (self.bytes_left is None or self.bytes_left > 0)
+
+    def take(self, size: int) -> bool:
+        """Charge one file of ``size`` bytes; False (and nothing charged) if it does not fit."""
+        if self.files_left is not None and self.files_left <= 0:
+            return False
+        if self.bytes_left is not None and size > self.bytes_left:
+            return False
+        if self.files_left is not None:
+            self.files_left -= 1
+        if self.bytes_left is not None:
+            self.bytes_left -= size
+        return True
+
+
+def _enabled() -> bool:
+    return os.getenv("TREYS_AGENT_SEARCH_INDEX", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _refresh_interval() -> float:
+    raw = os.getenv("TREYS_AGENT_SEARCH_INDEX_TTL", "").strip()
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            logger.warning("Ignoring TREYS_AGENT_SEARCH_INDEX_TTL=%r (not a number)", raw)
+    return DEFAULT_REFRESH_SECONDS
+
+
+def _index_dir() -> Path:
+    env_dir = os.getenv("TREYS_AGENT_SEARCH_INDEX_DIR") or ""
+    if env_dir:
+        return Path(env_dir)
+    return Path(__file__).resolve().parents[2] / "memory" / "search_index"
+
+
+_registry_lock = threading.Lock()
+_registry: Dict[Tuple[Path, Path], TrigramIndex] = {}
+
+
+def get_index(root: Path) -> Optional[TrigramIndex]:
+    """Shared index for ``root`` (one per process), or None if disabled."""
+    if not _enabled():
+        return None
+    root = Path(root).resolve()
+    db_dir = _index_dir()
+    digest = hashlib.sha1(str(root).encode("utf-8", errors="replace")).hexdigest()[:16]
+    key = (root, db_dir)
+    with _registry_lock:
+        index = _registry.get(key)
+        if index is None:
+            try:
+                index = TrigramIndex(root, db_dir / f"{digest}.sqlite3", refresh_interval=_refresh_interval())
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("trigram index unavailable for %s: %s", root, exc)
+                return None
+            _registry[key] = index
+        return index
+
+
+def mark_all_stale() -> None:
+    """Force every open index to re-stat its tree on its next query."""
+    with _registry_lock:
+        indexes = list(_registry.values())
+    for index in indexes:
+        index.mark_stale()
@@ -0,0 +1,214 @@
+"""Lightweight DOM snapshots for the ``web_*`` tools.
+
+The element table (selector, role, name, text, bbox) is always extracted in
+one ``evaluate`` / ``evaluate_all`` call instead of five round trips per
+element. Two further savings are opt-in because they change what callers see:
+
+- Heavy resources (images, media, fonts by default) can be aborted through
+  request routing before the page loads. Layout, text and interactive elements
+  are unaffected and pages settle sooner, but screenshots lose their images.
+- Successive snapshots of the same URL in a run can be diffed, so the planner
+  sees only added, changed and removed elements after the first one.
+
+Environment overrides:
+  AGENT_WEB_BLOCK_RESOURCES   comma-separated resource types to abort. Setting
+                              it also blocks them for the whole web session
+                              (web_click/web_type pages); unset, only snapshots
+                              with block_resources=True block image,media,font.
+                              "none" disables blocking everywhere.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+DEFAULT_BLOCKED_RESOURCES = frozenset({"image", "media", "font"})
+
+# Shared element describer: CSS path (same scheme the tools always used),
+# role, accessible-ish name, text and rounded bounding box.
+_DESCRIBE_JS = """
+(el, maxText) => {
+  const cssPath = (node) => {
+    if (!node || !node.tagName) return '';
+    if (node.id) return '#' + node.id;
+    const parts = [];
+    while (node && node.nodeType === 1 && node.tagName.toLowerCase() !== 'html') {
+      let selector = node.tagName.toLowerCase();
+      if (node.className && typeof node.className === 'string') {
+        const cls = node.className.trim().split(/\\s+/).filter(Boolean).slice(0, 2);
+        if (cls.length) selector += '.' + cls.join('.');
+      }
+      const parent = node.parentNode;
+      if (parent && parent.children) {
+        const siblings = Array.from(parent.children).filter(s => s.tagName === node.tagName);
+        if (siblings.length > 1) selector += `:nth-of-type(${siblings.indexOf(node) + 1})`;
+      }
+      parts.unshift(selector);
+      node = parent;
+    }
+    parts.unshift('html');
+    return parts.join(' > ');
+  };
+  const r = el.getBoundingClientRect();
+  const tag = el.tagName.toLowerCase();
+  const name = el.getAttribute('aria-label') || el.getAttribute('title') ||
+    el.getAttribute('placeholder') || el.getAttribute('alt') || '';
+  let text = (el.innerText || '').trim();
+  if (!text && 'value' in el && el.type !== 'password') text = String(el.value || '');
+  const item = {
+    selector: cssPath(el),
+    role: el.getAttribute('role') || tag,
+    name: name.slice(0, maxText),
+    text: text.replace(/\\s+/g, ' ').slice(0, maxText),
+    bbox: {x: Math.round(r.x), y: Math.round(r.y), width: Math.round(r.width), height: Math.round(r.height)},
+  };
+  if (el.disabled) item.disabled = true;
+  if (el.type && tag === 'input') item.type = el.type;
+  return item;
+}
+"""
+
+_INTERACTIVE = (
+    "a[href],button,input:not([type=hidden]),select,textarea,summary,label,"
+    "[role],[onclick],[tabindex]:not([tabindex='-1']),[contenteditable=''],[contenteditable='true'],h1,h2,h3"
+)
+
+SNAPSHOT_JS = (
+    "(opts) => {\n"
+    "  const describe = " + _DESCRIBE_JS.strip() + ";\n"
+    "  const elements = [];\n"
+    "  for (const el of document.querySelectorAll(" + repr(_INTERACTIVE) + ")) {\n"
+    "    if (elements.length >= opts.maxElements) break;\n"
+    "    const r = el.getBoundingClientRect();\n"
+    "    if (!(r.width > 0 && r.height > 0)) continue;\n"
+    "    elements.push(describe(el, opts.maxText));\n"
+    "  }\n"
+    "  const body = document.body ? document.body.innerText || '' : '';\n"
+    "  return {url: location.href, title: document.title, visible_text: body.slice(0, opts.maxTextChars), elements};\n"
+    "}"
+)
+
+FIND_JS = (
+    "(els, opts) => {\n"
+    "  const describe = " + _DESCRIBE_JS.strip() + ";\n"
+    "  return els.slice(0, opts.limit).map(el => describe(el, opts.maxText));\n"
+    "}"
+)
+
+
+def blocked_resource_types(default: FrozenSet[str] = DEFAULT_BLOCKED_RESOURCES) -> FrozenSet[str]:
+    """Resource types from ``AGENT_WEB_BLOCK_RESOURCES``, or ``default`` when it is unset."""
+    raw = os.getenv("AGENT_WEB_BLOCK_RESOURCES")
+    if raw is None:
+        return default
+    raw = raw.strip().lower()
+    if raw in {"", "0", "none", "off", "false"}:
+        return frozenset()
+    return frozenset(part.strip() for part in raw.split(",") if part.strip())
+
+
+def block_resources(target: Any, types: Optional[FrozenSet[str]] = None) -> bool:
+    """Abort requests of the given resource types on a page or context.
+
+    Works with the sync API and with pool-leased (async) objects: the handler
+    returns the abort/continue call, which the async API awaits.
+    """
+    types = blocked_resource_types() if types is None else types
+    if not types:
+        return False
+    target.route(
+        "**/*",
+        lambda route: route.abort() if route.request.resource_type in types else route.continue_(),
+    )
+    return True
+
+
+def take_snapshot(page: Any, *, max_elements: int = 150, max_text: int = 120, max_text_chars: int = 8_000) -> Dict[str, Any]:
+    """URL, title, visible text and the interactive element table, in one call."""
+    return page.evaluate(
+        SNAPSHOT_JS,
+        {"maxElements": max(1, max_elements), "maxText": max_text, "maxTextChars": max_text_chars},
+    )
+
+
+def describe_matches(locator: Any, *, limit: int, max_text: int = 200) -> List[Dict[str, Any]]:
+    """Element rows for every match of ``locator`` (up to ``limit``), in one call."""
+    return locator.evaluate_all(FIND_JS, {"limit": max(0, limit), "maxText": max_text})
+
+
+def diff_elements(previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Elements added/changed since ``previous`` (keyed by selector) and selectors removed."""
+    before = {e.get("selector"): e for e in previous}
+    seen = set()
+    added: List[Dict[str, Any]] = []
+    changed: List[Dict[str, Any]] = []
+    for element in current:
+        key = element.get("selector")
+        seen.add(key)
+        old = before.get(key)
+        if old is None:
+            added.append(element)
+        elif old != element:
+            changed.append(element)
+    removed = [key for key in before if key not in seen]
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "unchanged": len(current) - len(added) - len(changed),
+    }
+
+
+class SnapshotHistory:
+    """Last element table per (run, url), for diffing successive snapshots."""
+
+    def __init__(self, max_urls_per_run: int = 8):
+        self.max_urls_per_run = max(1, max_urls_per_run)
+        self._runs: Dict[str, "OrderedDict[str, List[Dict[str, Any]]]"] = {}
+        self._lock = threading.Lock()
+
+    def swap(self, run_id: str, url: str, elements: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Store ``elements`` for ``url`` and return the previous table, if any."""
+        with self._lock:
+            tables = self._runs.setdefault(run_id, OrderedDict())
+            previous = tables.pop(url, None)
+            tables[url] = elements
+            while len(tables) > self.max_urls_per_run:
+                tables.popitem(last=False)
+            return previous
+
+    def clear(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+def render_snapshot(data: Dict[str, Any], previous: Optional[List[Dict[str, Any]]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Tool output for a snapshot (full table or a diff) plus size stats."""
+    elements = data.get("elements") or []
+    output = {k: v for k, v in data.items() if k != "elements"}
+    if previous is None:
+        output["elements"] = elements
+        stats = {"elements": len(elements), "sent": len(elements), "diff": False}
+    else:
+        delta = diff_elements(previous, elements)
+        output["elements_diff"] = delta
+        sent = len(delta["added"]) + len(delta["changed"])
+        stats = {"elements": len(elements), "sent": sent, "diff": True}
+    return output, stats
+
+
+__all__ = [
+    "DEFAULT_BLOCKED_RESOURCES",
+    "FIND_JS",
+    "SNAPSHOT_JS",
+    "SnapshotHistory",
+    "block_resources",
+    "blocked_resource_types",
+    "describe_matches",
+    "diff_elements",
+    "render_snapshot",
+    "take_snapshot",
+]
@@ -1,20 +1,219 @@
 from __future__ import annotations
 
+import atexit
 import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from .profiling import span
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_FLUSH_INTERVAL_S = 0.2
+_DEFAULT_MAX_BATCH_BYTES = 256 * 1024
+_DEFAULT_QUEUE_SIZE = 10_000
+
+_open_tracers: "weakref.WeakSet[JsonlTracer]" = weakref.WeakSet()
+
+
+def _close_all_tracers() -> None:
+    for tracer in list(_open_tracers):
+        try:
+            tracer.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_all_tracers)
+
+
+class _Barrier:
+    """Queue marker: the writer flushes (and optionally fsyncs) then sets ``done``."""
+
+    def __init__(self, fsync: bool) -> None:
+        self.fsync = fsync
+        self.done = threading.Event()
+
+
+_STOP = object()
 
 
 class JsonlTracer:
-    def __init__(self, path: Path):
+    """Append-only JSONL trace writer.
+
+    Events are serialized on the caller's thread (so later mutation of the
+    event dict cannot change what was logged) and handed to a background writer
+    through a bounded queue. The writer keeps the file open, writes in batches
+    and flushes to the OS every ``flush_interval`` seconds or ``max_batch_bytes``
+    bytes, so an exception or crash in the agent process loses at most the last
+    interval. ``checkpoint()`` and ``close()`` additionally fsync.
+
+    With ``rotate_bytes`` set, a full file is renamed to ``<name>.<n>.jsonl``
+    (``.zst``-compressed when the optional ``zstandard`` package is installed)
+    and a fresh file is started.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        buffered: bool = True,
+        flush_interval: float = _DEFAULT_FLUSH_INTERVAL_S,
+        max_batch_bytes: int = _DEFAULT_MAX_BATCH_BYTES,
+        queue_size: int = _DEFAULT_QUEUE_SIZE,
+        rotate_bytes: Optional[int] = None,
+    ):
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.buffered = buffered and os.getenv("AGENT_TRACE_SYNC", "").strip().lower() not in {"1", "true", "yes"}
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.max_batch_bytes = max(1, int(max_batch_bytes))
+        self.rotate_bytes = rotate_bytes
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._handle = None
+        self._closed = False
+        self._rotations = 0
 
     def log(self, event: Dict[str, Any]) -> None:
-        with self.path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self.buffered and not self._closed:
+                self._ensure_writer()
+                # Blocks when the queue is full: back-pressure instead of dropping events.
+                self._queue.put(line)
+                return
+            # Unbuffered mode, or a straggler after close(): append directly.
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+
+    def flush(self, *, fsync: bool = False, timeout: Optional[float] = 10.0) -> None:
+        """Wait until every event logged so far has reached the file."""
+        if not self.buffered or self._thread is None or not self._thread.is_alive():
+            return
+        barrier = _Barrier(fsync)
+        with span("trace.flush", cat="io", fsync=fsync):
+            self._queue.put(barrier)
+            barrier.done.wait(timeout)
+
+    def checkpoint(self) -> None:
+        """Durability point: flush and fsync."""
+        self.flush(fsync=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(30)
+        _open_tracers.discard(self)
 
     @property
     def trace_path(self) -> str:
         return str(self.path)
 
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self) -> None:
+        """Start the writer thread on first use. Caller holds ``self._lock``."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._writer, name=f"trace-writer:{self.path.name}", daemon=True)
+        self._thread.start()
+        _open_tracers.add(self)
+
+    def _open(self):
+        if self._handle is None:
+            self._handle = self.path.open("a", encoding="utf-8")
+        return self._handle
+
+    def _write_batch(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        handle = self._open()
+        handle.write("".join(lines))
+        handle.flush()
+        if self.rotate_bytes and handle.tell() >= self.rotate_bytes:
+            self._rotate()
+
+    def _fsync(self) -> None:
+        if self._handle is None:
+            return
+        try:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+        except OSError as exc:
+            logger.debug("trace fsync failed for %s: %s", self.path, exc)
+
+    def _rotate(self) -> None:
+        self._fsync()
+        self._handle.close()
+        self._handle = None
+        while True:
+            self._rotations += 1
+            rotated = self.path.with_name(f"{self.path.stem}.{self._rotations}{self.path.suffix}")
+            if not rotated.exists() and not rotated.with_name(rotated.name + ".zst").exists():
+                break
+        os.replace(self.path, rotated)
+        try:
+            import zstandard  # type: ignore
+        except ImportError:
+            return
+        try:
+            target = rotated.with_name(rotated.name + ".zst")
+            with rotated.open("rb") as src, target.open("wb") as dst:
+                zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+            rotated.unlink()
+        except Exception as exc:  # pragma: no cover - optional dependency failure
+            logger.warning("trace rotation compression failed for %s: %s", rotated, exc)
+
+    def _writer(self) -> None:
+        pending: List[str] = []
+        pending_bytes = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            try:
+                if isinstance(item, str):
+                    pending.append(item)
+                    pending_bytes += len(item)
+                    if pending_bytes < self.max_batch_bytes and time.monotonic() < deadline:
+                        continue
+                elif isinstance(item, _Barrier):
+                    self._write_batch(pending)
+                    pending, pending_bytes = [], 0
+                    if item.fsync:
+                        self._fsync()
+                    item.done.set()
+                    continue
+                elif item is _STOP:
+                    self._write_batch(pending)
+                    self._fsync()
+                    if self._handle is not None:
+                        self._handle.close()
+                        self._handle = None
+                    return
+                self._write_batch(pending)
+                pending, pending_bytes = [], 0
+                deadline = time.monotonic() + self.flush_interval
+            except Exception as exc:
+                logger.warning("trace writer error for %s: %s", self.path, exc)
+                pending, pending_bytes = [], 0
+                if isinstance(item, _Barrier):
+                    item.done.set()
@@ -15,14 +15,13 @@ import re
 import time
 import json
 from dataclasses import dataclass
-from typing import Optional, Tuple, List, Any, Dict
+from typing import TYPE_CHECKING, Optional, Tuple, List, Any, Dict
 from datetime import datetime, timedelta
 
-from agent.autonomous.runner import AgentRunner
-from agent.autonomous.config import RunnerConfig, AgentConfig, PlannerConfig
-from agent.autonomous.memory.sqlite_store import SqliteMemoryStore
-from agent.config.profile import ProfileName
-from agent.llm.base import LLMClient
+# The runner pulls in the planner, tool registry and pydantic models; it is
+# imported where a task actually runs so `--help` and the prompt come up fast.
+if TYPE_CHECKING:
+    from agent.config.profile import ProfileName
 
 # Ensure agent package is importable
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -626,6 +625,10 @@ def interactive_loop(backend: str = "codex_cli") -> int:
     This replaces the old treys_agent.py routing logic.
     Uses persistent memory across all tasks so the agent learns and remembers.
     """
+    from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+    from agent.autonomous.memory.sqlite_store import SqliteMemoryStore
+    from agent.autonomous.runner import AgentRunner
+
     _setup_logging(verbose=False)
 
     print("\n" + "=" * 50)
@@ -849,6 +852,7 @@ Examples:
             llm=llm,
             tools=tool_registry,
             memory_store=memory_store,  # Share memory across all tasks
+            owns_memory_store=False,
         )
 
         print(f"\n[TASK] {user_input}")
@@ -1073,6 +1077,12 @@ def main() -> None:
         help="LLM backend to use (default: codex_cli)",
     )
 
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run the task on the resident agent daemon (started on first use)",
+    )
+
     parser.add_argument(
         "--list-tools",
         action="store_true",
@@ -1098,6 +1108,19 @@ def main() -> None:
         os.environ["LLM_BACKEND"] = args.llm_backend
         sys.exit(interactive_loop(backend=args.llm_backend))
 
+    # Single task on the warm daemon
+    if args.daemon and args.task and not args.resume:
+        from agent.daemon.__main__ import run_remote
+
+        sys.exit(
+            run_remote(
+                args.task,
+                profile=args.profile,
+                max_steps=args.max_steps,
+                timeout_seconds=args.timeout,
+            )
+        )
+
     # Single task mode
     if args.task:
         resume_path = Path(args.resume) if args.resume else None
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Literal, Optional
 import os
+import threading
 
 from agent.autonomous.exceptions import ConfigurationError
 
@@ -49,6 +50,8 @@ class RunUsage:
     bytes_read: int = 0
     glob_results: int = 0
     web_sources: int = 0
+    # Parallel tool batches charge the same usage from several threads.
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     def remaining_bytes(self, limit: int) -> int:
         return max(0, limit - self.bytes_read)
@@ -56,15 +59,33 @@ class RunUsage:
     def can_read_file(self, max_files: int) -> bool:
         return self.files_read < max_files
 
+    def try_reserve(self, size: int, max_files: int, max_bytes: int) -> Optional[int]:
+        """Charge one file read of up to ``size`` bytes if both budgets allow it.
+
+        Returns the bytes granted (``size`` cut to what is left), or None when
+        the file or byte budget is spent. Check and charge are one atomic step.
+        """
+        with self._lock:
+            remaining = max_bytes - self.bytes_read
+            if self.files_read >= max_files or remaining <= 0:
+                return None
+            granted = min(max(0, int(size)), remaining)
+            self.files_read += 1
+            self.bytes_read += granted
+            return granted
+
     def consume_file(self, bytes_read: int) -> None:
-        self.files_read += 1
-        self.bytes_read += max(0, int(bytes_read))
+        with self._lock:
+            self.files_read += 1
+            self.bytes_read += max(0, int(bytes_read))
 
     def consume_glob(self, count: int) -> None:
-        self.glob_results += max(0, int(count))
+        with self._lock:
+            self.glob_results += max(0, int(count))
 
     def consume_web(self) -> None:
-        self.web_sources += 1
+        with self._lock:
+            self.web_sources += 1
 
 
 _PROFILE_DEFAULTS: dict[ProfileName, ProfileConfig] = {
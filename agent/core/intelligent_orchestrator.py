@@ -14,11 +14,14 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+
+from .intent_router import IntentRouter, RouteDecision, router_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +122,12 @@ class Strategy(BaseModel):
         description="Extracted entities (dates, names, etc.)"
     )
 
+    # Provenance (not part of the LLM schema)
+    source: str = Field(
+        default="llm",
+        description="Stage that produced this strategy (quick_match, router, llm, fallback)"
+    )
+
 
 # Strategy JSON schema for LLM
 STRATEGY_SCHEMA = {
@@ -201,14 +210,28 @@ class IntelligentOrchestrator:
     This replaces keyword-based routing with true semantic understanding.
     """
 
-    def __init__(self, llm_client=None):
+    def __init__(self, llm_client=None, router: Optional[IntentRouter] = None):
         """
         Initialize the orchestrator.
 
         Args:
             llm_client: LLM client to use. If None, will get from adapters.
+            router: Learned intent router. If None, the default one is used
+                unless AGENT_INTENT_ROUTER=0.
         """
         self._llm = llm_client
+        if router is None and router_enabled():
+            router = IntentRouter()
+        self._router = router
+        self._metrics: Dict[str, float] = {
+            "requests": 0,
+            "quick_match": 0,
+            "router_hits": 0,
+            "router_misses": 0,
+            "llm_calls": 0,
+            "router_seconds": 0.0,
+            "llm_seconds": 0.0,
+        }
         self._available_skills = [
             "calendar",      # Google Calendar operations
             "browser",       # Web browsing and automation
@@ -245,14 +268,90 @@ class IntelligentOrchestrator:
         Returns:
             Strategy object with the recommended approach
         """
+        self._metrics["requests"] += 1
+
         # First try quick pattern matching for very common cases
         quick_strategy = self._quick_match(request)
         if quick_strategy:
             logger.debug(f"Quick match: {quick_strategy.intent}")
+            self._metrics["quick_match"] += 1
             return quick_strategy
 
+        # Then the learned router: past requests with confirmed strategies
+        routed = self._route(request)
+        if routed:
+            logger.debug(f"Router match: {routed.intent} ({routed.confidence:.2f})")
+            return routed
+
         # Use LLM for semantic analysis
-        return self._llm_analyze(request, context, available_tools)
+        start = time.perf_counter()
+        try:
+            return self._llm_analyze(request, context, available_tools)
+        finally:
+            self._metrics["llm_calls"] += 1
+            self._metrics["llm_seconds"] += time.perf_counter() - start
+
+    def _route(self, request: str) -> Optional[Strategy]:
+        """Ask the learned router; None if it is disabled or not confident."""
+        if self._router is None:
+            return None
+        start = time.perf_counter()
+        try:
+            decision = self._router.route(request)
+        except Exception as e:
+            logger.debug(f"Intent router failed: {e}")
+            decision = None
+        self._metrics["router_seconds"] += time.perf_counter() - start
+        strategy = self._strategy_from_route(request, decision) if decision is not None else None
+        if strategy is None:
+            self._metrics["router_misses"] += 1
+            return None
+        self._metrics["router_hits"] += 1
+        return strategy
+
+    def _strategy_from_route(self, request: str, decision: RouteDecision) -> Optional[Strategy]:
+        """Build a Strategy from stored fields; None (use the LLM) if they no longer validate."""
+        # Stored routes keep every label field, including ones the LLM left null.
+        fields = {k: v for k, v in decision.strategy.items() if v is not None}
+        try:
+            return Strategy(
+                **fields,
+                confidence=round(decision.confidence, 3),
+                reasoning=f"Matched {decision.support} similar past requests",
+                entities=self._extract_time_range(request.lower()),
+                source="router",
+            )
+        except (ValidationError, TypeError) as e:
+            logger.debug(f"Ignoring invalid routed strategy: {e}")
+            return None
+
+    def record_outcome(self, request: str, strategy: Strategy, success: bool, confirmed: bool = False) -> None:
+        """
+        Feed a run outcome back to the learned router.
+
+        Only LLM strategies are learned by default. Router decisions are fed
+        back only when ``confirmed`` (e.g. the user approved the strategy), so
+        the router does not train on its own guesses; quick matches are
+        already free and keyword fallbacks are guesses.
+        """
+        if self._router is None:
+            return
+        if strategy.source != "llm" and not (confirmed and strategy.source == "router"):
+            return
+        try:
+            self._router.observe(request, strategy.model_dump(mode="json"), success)
+        except Exception as e:
+            logger.debug(f"Could not record routing outcome: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Routing counters plus router hit rate and mean latencies (ms)."""
+        m = dict(self._metrics)
+        routed = m["router_hits"] + m["router_misses"]
+        m["router_hit_rate"] = (m["router_hits"] / routed) if routed else 0.0
+        m["router_latency_ms"] = (m["router_seconds"] * 1000 / routed) if routed else 0.0
+        m["llm_latency_ms"] = (m["llm_seconds"] * 1000 / m["llm_calls"]) if m["llm_calls"] else 0.0
+        m["router_examples"] = len(self._router) if self._router is not None else 0
+        return m
 
     def _quick_match(self, request: str) -> Optional[Strategy]:
         """
@@ -285,6 +384,7 @@ class IntelligentOrchestrator:
                 reasoning="User wants to check calendar events",
                 confidence=0.95,
                 entities=self._extract_time_range(lower),
+                source="quick_match",
             )
 
         # File listing
@@ -306,6 +406,7 @@ class IntelligentOrchestrator:
                 intent="list_files",
                 reasoning="User wants to list files",
                 confidence=0.9,
+                source="quick_match",
             )
 
         # Help/info requests - no tools needed
@@ -324,6 +425,7 @@ class IntelligentOrchestrator:
                 intent="help_request",
                 reasoning="User is asking for help or information",
                 confidence=0.85,
+                source="quick_match",
             )
 
         # No quick match - need LLM analysis
@@ -470,6 +572,7 @@ Respond with a JSON object matching the schema."""
             reasoning="Fallback analysis based on keywords",
             intent="unknown",
             confidence=0.5,
+            source="fallback",
         )
 
     def requires_approval(self, strategy: Strategy) -> bool:
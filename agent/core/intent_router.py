@@ -0,0 +1,271 @@
+"""
+Intent Router - nearest-neighbour strategy selection from past requests.
+
+Sits between the orchestrator's hard-coded quick matches and the LLM
+analysis. Every request whose strategy was confirmed by a run outcome is
+stored as a labelled example (request embedding -> strategy). A new request
+is embedded with the shared embedding service and compared against all
+examples; if its nearest neighbours agree on a strategy strongly enough, that
+strategy is returned without an LLM call.
+
+Only strategies that do not depend on request-specific details are learned:
+strategies with clarification questions or entities other than a time range
+(which the orchestrator re-extracts) always go to the LLM.
+
+History is an append-only JSONL file, so training is incremental and survives
+restarts. Embeddings of stored requests come from the embedding cache on load.
+
+Environment overrides:
+  AGENT_INTENT_ROUTER=0                disable the router
+  AGENT_INTENT_ROUTER_PATH             history file (default: agent/memory/intent_router.jsonl)
+  AGENT_INTENT_ROUTER_THRESHOLD        minimum confidence to skip the LLM (default: 0.75)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as _np  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    _np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_K = 5
+DEFAULT_MIN_SUPPORT = 2
+DEFAULT_MAX_EXAMPLES = 5000
+
+# Fields that describe *how* to handle a request; two strategies with the same
+# values here are the same routing decision.
+_LABEL_FIELDS = (
+    "needs_tools",
+    "needs_web",
+    "needs_ui_automation",
+    "needs_deep_planning",
+    "needs_memory",
+    "risk_level",
+    "complexity",
+    "preferred_skill",
+    "preferred_tool",
+    "intent",
+)
+_LEARNABLE_ENTITY_KEYS = {"time_range"}
+
+
+def _default_path() -> Path:
+    env_path = os.getenv("AGENT_INTENT_ROUTER_PATH") or ""
+    if env_path:
+        return Path(env_path)
+    return Path(__file__).resolve().parents[1] / "memory" / "intent_router.jsonl"
+
+
+def router_enabled() -> bool:
+    return (os.getenv("AGENT_INTENT_ROUTER") or "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _threshold_from_env() -> float:
+    try:
+        return float(os.getenv("AGENT_INTENT_ROUTER_THRESHOLD") or DEFAULT_THRESHOLD)
+    except ValueError:
+        return DEFAULT_THRESHOLD
+
+
+def strategy_label(strategy: Dict[str, Any]) -> str:
+    """Canonical key for the routing decision in a strategy dict."""
+    return json.dumps({k: strategy.get(k) for k in _LABEL_FIELDS}, sort_keys=True, default=str)
+
+
+def is_learnable(strategy: Dict[str, Any]) -> bool:
+    if strategy.get("clarification_questions"):
+        return False
+    entities = strategy.get("entities") or {}
+    return set(entities) <= _LEARNABLE_ENTITY_KEYS
+
+
+def _unit(vec: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+@dataclass
+class RouteDecision:
+    """Router output: the strategy fields to use and how sure the router is."""
+
+    strategy: Dict[str, Any]
+    confidence: float
+    support: int
+    neighbours: int
+
+
+class IntentRouter:
+    """k-nearest-neighbour router over embeddings of confirmed past requests."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        *,
+        threshold: Optional[float] = None,
+        k: int = DEFAULT_K,
+        min_support: int = DEFAULT_MIN_SUPPORT,
+        max_examples: int = DEFAULT_MAX_EXAMPLES,
+    ):
+        self.path = Path(path) if path is not None else _default_path()
+        self.threshold = _threshold_from_env() if threshold is None else threshold
+        self.k = max(1, k)
+        self.min_support = max(1, min_support)
+        self.max_examples = max(1, max_examples)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._model: Optional[Tuple[str, int]] = None
+        self._vectors: List[List[float]] = []
+        self._labels: List[str] = []
+        self._weights: List[float] = []
+        self._matrix: Any = None  # numpy copy of _vectors, rebuilt after changes
+        self._strategies: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Training data
+    # ------------------------------------------------------------------
+
+    def _embed(self, texts: List[str]) -> List[Tuple[List[float], str, int]]:
+        from agent.autonomous.memory.embeddings import get_embedding_service
+
+        return [(e.vector, e.model, e.dim) for e in get_embedding_service().embed_many(texts)]
+
+    def _load(self) -> None:
+        """Read the history file and embed its requests. Caller holds the lock."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            lines = self.path.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            return
+        entries = []
+        for line in lines[-self.max_examples:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get("request") and isinstance(entry.get("strategy"), dict):
+                entries.append(entry)
+        if not entries:
+            return
+        embedded = self._embed([e["request"] for e in entries])
+        for entry, (vec, model, dim) in zip(entries, embedded):
+            self._add(vec, model, dim, entry["strategy"], bool(entry.get("success")))
+        logger.debug("Intent router loaded %d examples from %s", len(self._labels), self.path)
+
+    def _add(self, vec: List[float], model: str, dim: int, strategy: Dict[str, Any], success: bool) -> None:
+        if self._model != (model, dim):
+            if self._model is not None:
+                # Embedding model changed underneath us: old vectors are not comparable.
+                self._vectors, self._labels, self._weights = [], [], []
+            self._model = (model, dim)
+        label = strategy_label(strategy)
+        self._matrix = None
+        self._vectors.append(_unit(vec))
+        self._labels.append(label)
+        self._weights.append(1.0 if success else -1.0)
+        if success:
+            self._strategies[label] = {k: strategy.get(k) for k in _LABEL_FIELDS}
+        if len(self._labels) > self.max_examples:
+            drop = len(self._labels) - self.max_examples
+            del self._vectors[:drop], self._labels[:drop], self._weights[:drop]
+
+    def observe(self, request: str, strategy: Dict[str, Any], success: bool) -> bool:
+        """Record a confirmed outcome. Returns False if the strategy is not learnable."""
+        if not request.strip() or not is_learnable(strategy):
+            return False
+        (vec, model, dim), = self._embed([request])
+        entry = {
+            "ts": time.time(),
+            "request": request,
+            "strategy": {k: strategy.get(k) for k in _LABEL_FIELDS},
+            "success": bool(success),
+        }
+        with self._lock:
+            self._load()
+            self._add(vec, model, dim, entry["strategy"], bool(success))
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            except OSError as exc:
+                logger.debug("Intent router history write failed: %s", exc)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def predict(self, request: str) -> Optional[RouteDecision]:
+        """Best-supported strategy for ``request``, or None if nothing is close."""
+        with self._lock:
+            self._load()
+            if not self._labels:
+                return None
+        (vec, model, dim), = self._embed([request])
+        with self._lock:
+            if self._model != (model, dim) or not self._labels:
+                return None
+            query = _unit(vec)
+            if _np is not None:
+                if self._matrix is None:
+                    self._matrix = _np.asarray(self._vectors, dtype=_np.float32)
+                scores = self._matrix @ _np.asarray(query, dtype=_np.float32)
+                k = min(self.k, len(scores))
+                top_idx = _np.argpartition(-scores, k - 1)[:k]
+                top = [int(i) for i in top_idx[_np.argsort(-scores[top_idx], kind="stable")]]
+                sims = {i: float(scores[i]) for i in top}
+            else:
+                all_sims = [sum(a * b for a, b in zip(row, query)) for row in self._vectors]
+                top = sorted(range(len(all_sims)), key=lambda i: all_sims[i], reverse=True)[: self.k]
+                sims = {i: all_sims[i] for i in top}
+            votes: Dict[str, float] = {}
+            support: Dict[str, int] = {}
+            total = 0.0
+            for i in top:
+                sim = max(0.0, sims[i])
+                total += sim
+                votes[self._labels[i]] = votes.get(self._labels[i], 0.0) + sim * self._weights[i]
+                if self._weights[i] > 0:
+                    support[self._labels[i]] = support.get(self._labels[i], 0) + 1
+            if total <= 0.0 or not votes:
+                return None
+            label, score = max(votes.items(), key=lambda kv: kv[1])
+            strategy = self._strategies.get(label)
+            if strategy is None or score <= 0.0:
+                return None
+            best_sim = max(sims[i] for i in top if self._labels[i] == label)
+            # Agreement among the neighbours, scaled by how close the closest one is.
+            confidence = max(0.0, min(1.0, (score / total) * best_sim))
+            return RouteDecision(dict(strategy), confidence, support.get(label, 0), len(top))
+
+    def route(self, request: str) -> Optional[RouteDecision]:
+        """``predict`` filtered by the confidence threshold and minimum support."""
+        decision = self.predict(request)
+        if decision is None or decision.support < self.min_support or decision.confidence < self.threshold:
+            return None
+        return decision
+
+
+__all__ = [
+    "IntentRouter",
+    "RouteDecision",
+    "is_learnable",
+    "router_enabled",
+    "strategy_label",
+]
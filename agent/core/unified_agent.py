@@ -904,6 +904,8 @@ class UnifiedAgent:
         result: AgentResult,
     ) -> None:
         """Store execution results and lessons in memory."""
+        self._orchestrator.record_outcome(request, strategy, result.success)
+
         memory = self._get_memory()
         if not memory:
             return
@@ -0,0 +1,9 @@
+"""Resident agent daemon and its thin client.
+
+Only the client is imported here; ``agent.daemon.server`` pulls in the agent
+stack and is loaded by ``python -m agent.daemon serve``.
+"""
+
+from agent.daemon.client import DaemonClient, DaemonError, DaemonInfo, connect, format_event
+
+__all__ = ["DaemonClient", "DaemonError", "DaemonInfo", "connect", "format_event"]
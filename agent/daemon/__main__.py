@@ -0,0 +1,99 @@
+"""
+Agent daemon entrypoint.
+
+Usage:
+    python -m agent.daemon serve [--port 8765] [--workers 2]
+    python -m agent.daemon run "your task here" [--profile fast]
+    python -m agent.daemon status
+    python -m agent.daemon stop
+
+``run`` starts the daemon in the background when none is running, so the
+first command pays the warm-up once and later ones skip it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from agent.daemon.client import DaemonError, connect, format_event
+
+
+def run_remote(
+    task: str,
+    *,
+    profile: str = "fast",
+    max_steps: int = 30,
+    timeout_seconds: int = 600,
+    autostart: bool = True,
+) -> int:
+    """Run ``task`` on the daemon, printing progress; returns an exit code."""
+    try:
+        client = connect(autostart=autostart)
+        outcome = None
+        for event in client.run(task, profile=profile, max_steps=max_steps, timeout_seconds=timeout_seconds):
+            line = format_event(event)
+            if line:
+                print(line, flush=True)
+            if event.get("event") in {"result", "error"}:
+                outcome = event
+    except DaemonError as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        return 2
+    return 0 if outcome and outcome.get("success") else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="agent.daemon", description="Resident agent daemon")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_p = sub.add_parser("serve", help="run the daemon in the foreground")
+    serve_p.add_argument("--port", type=int, default=None)
+    serve_p.add_argument("--workers", type=int, default=None)
+    serve_p.add_argument("--llm-backend", choices=["codex_cli", "server"], default="codex_cli")
+
+    run_p = sub.add_parser("run", help="run a task on the daemon")
+    run_p.add_argument("task")
+    run_p.add_argument("-p", "--profile", default="fast", choices=["fast", "deep", "audit"])
+    run_p.add_argument("--max-steps", type=int, default=30)
+    run_p.add_argument("--timeout", type=int, default=600)
+    run_p.add_argument("--no-autostart", action="store_true")
+
+    sub.add_parser("status", help="print daemon health")
+    sub.add_parser("stop", help="stop the daemon")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        import logging
+
+        from agent.daemon.server import serve
+
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+        return serve(port=args.port, workers=args.workers, backend=args.llm_backend)
+
+    if args.command == "run":
+        return run_remote(
+            args.task,
+            profile=args.profile,
+            max_steps=args.max_steps,
+            timeout_seconds=args.timeout,
+            autostart=not args.no_autostart,
+        )
+
+    try:
+        client = connect(autostart=False)
+        if args.command == "status":
+            print(json.dumps(client.health(), indent=2))
+        else:
+            client.shutdown()
+            print("[DAEMON] stopping")
+    except DaemonError as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
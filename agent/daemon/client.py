@@ -0,0 +1,228 @@
+"""
+Thin client for the resident agent daemon.
+
+Only the standard library is imported here so that ``python -m agent.daemon
+run "..."`` starts in a few tens of milliseconds; everything heavy lives in the
+daemon process (see ``agent.daemon.server``).
+
+The daemon advertises itself in ``<AGENT_DAEMON_HOME>/daemon.json`` (host,
+port, pid and a per-start bearer token, readable only by the owner). Requests
+without that token are rejected.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class DaemonError(RuntimeError):
+    """The daemon is unreachable, rejected the request, or failed to start."""
+
+
+def daemon_home() -> Path:
+    raw = os.getenv("AGENT_DAEMON_HOME", "").strip()
+    return Path(raw) if raw else Path.home() / ".drcodept_swarm" / "daemon"
+
+
+def state_path() -> Path:
+    return daemon_home() / "daemon.json"
+
+
+@dataclass(frozen=True)
+class DaemonInfo:
+    host: str
+    port: int
+    token: str
+    pid: int
+    started_at: float = 0.0
+
+    def write(self, path: Optional[Path] = None) -> Path:
+        path = path or state_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(self)), encoding="utf-8")
+        try:
+            os.chmod(tmp, 0o600)
+        except OSError:
+            pass
+        os.replace(tmp, path)
+        return path
+
+
+def read_state(path: Optional[Path] = None) -> Optional[DaemonInfo]:
+    path = path or state_path()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return DaemonInfo(
+            host=str(data["host"]),
+            port=int(data["port"]),
+            token=str(data["token"]),
+            pid=int(data["pid"]),
+            started_at=float(data.get("started_at") or 0.0),
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class DaemonClient:
+    def __init__(self, info: DaemonInfo, *, timeout: float = 5.0):
+        self.info = info
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None, *, timeout: Optional[float] = None):
+        conn = http.client.HTTPConnection(self.info.host, self.info.port, timeout=timeout or self.timeout)
+        headers = {"Authorization": f"Bearer {self.info.token}"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+        except OSError as exc:
+            conn.close()
+            raise DaemonError(f"daemon at {self.info.host}:{self.info.port} unreachable: {exc}") from exc
+        if resp.status != 200:
+            detail = resp.read().decode("utf-8", errors="replace")
+            conn.close()
+            raise DaemonError(f"daemon returned HTTP {resp.status}: {detail[:500]}")
+        return conn, resp
+
+    def _json(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        conn, resp = self._request(method, path, body)
+        try:
+            return json.loads(resp.read() or b"{}")
+        finally:
+            conn.close()
+
+    def health(self) -> Dict[str, Any]:
+        return self._json("GET", "/health")
+
+    def shutdown(self) -> None:
+        self._json("POST", "/shutdown", {})
+
+    def run(self, task: str, *, idle_timeout: float = 900.0, **options: Any) -> Iterator[Dict[str, Any]]:
+        """Submit ``task`` and yield progress events until its ``result``/``error``.
+
+        ``options`` are passed through (profile, max_steps, timeout_seconds,
+        mode). ``idle_timeout`` bounds the wait between two events.
+        """
+        conn, resp = self._request("POST", "/tasks", {"task": task, **options}, timeout=idle_timeout)
+        try:
+            while True:
+                line = resp.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        except OSError as exc:
+            raise DaemonError(f"lost connection to daemon: {exc}") from exc
+        finally:
+            conn.close()
+
+
+def _ping(info: Optional[DaemonInfo]) -> bool:
+    if info is None:
+        return False
+    try:
+        DaemonClient(info, timeout=1.0).health()
+        return True
+    except DaemonError:
+        return False
+
+
+def start_daemon(*, extra_args: Optional[list] = None) -> subprocess.Popen:
+    """Spawn ``python -m agent.daemon serve`` detached from this console."""
+    home = daemon_home()
+    home.mkdir(parents=True, exist_ok=True)
+    log = open(home / "daemon.log", "ab")
+    kwargs: Dict[str, Any] = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        return subprocess.Popen(
+            [sys.executable, "-m", "agent.daemon", "serve", *(extra_args or [])],
+            cwd=str(REPO_ROOT),
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            **kwargs,
+        )
+    finally:
+        log.close()
+
+
+def connect(*, autostart: bool = True, wait_s: float = 30.0) -> DaemonClient:
+    """Client for the running daemon, starting one first if allowed."""
+    info = read_state()
+    if _ping(info):
+        return DaemonClient(info)  # type: ignore[arg-type]
+    if not autostart:
+        raise DaemonError(f"no agent daemon running (state file: {state_path()})")
+
+    proc = start_daemon()
+    deadline = time.monotonic() + wait_s
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise DaemonError(f"daemon exited with code {proc.returncode}; see {daemon_home() / 'daemon.log'}")
+        info = read_state()
+        if info is not None and info.pid == proc.pid and _ping(info):
+            return DaemonClient(info)
+        time.sleep(0.1)
+    raise DaemonError(f"daemon did not come up within {wait_s:.0f}s; see {daemon_home() / 'daemon.log'}")
+
+
+def format_event(event: Dict[str, Any]) -> Optional[str]:
+    """One console line for a streamed event (None for events not worth showing)."""
+    kind = event.get("event")
+    if kind == "accepted":
+        queued = " (queued)" if event.get("queued") else ""
+        return f"[DAEMON] task {event.get('task_id')} accepted{queued}"
+    if kind == "trace":
+        if event.get("type") == "step":
+            status = "ok" if event.get("ok") else "failed"
+            line = f"[STEP {event.get('step')}] {event.get('tool')} {status}"
+            if event.get("error"):
+                line += f": {event['error']}"
+            return line
+        if event.get("type") in {"recovery", "recovery_failed", "approval", "compaction"}:
+            return f"[{str(event['type']).upper()}] {event.get('name') or event.get('error') or ''}".rstrip()
+        return None
+    if kind == "result":
+        lines = []
+        if event.get("answer"):
+            lines.append(f"[ANSWER] {event['answer']}")
+        status = "SUCCESS" if event.get("success") else "FAILED"
+        lines.append(f"[{status}] {event.get('stop_reason')} (steps: {event.get('steps_executed')}, run: {event.get('run_id')})")
+        return "\n".join(lines)
+    if kind == "error":
+        return f"[ERROR] {event.get('message')}"
+    return None
+
+
+__all__ = [
+    "DaemonClient",
+    "DaemonError",
+    "DaemonInfo",
+    "connect",
+    "daemon_home",
+    "format_event",
+    "read_state",
+    "start_daemon",
+    "state_path",
+]
@@ -0,0 +1,483 @@
+"""
+Resident agent daemon.
+
+A cold ``python -m agent`` re-imports the stack, reopens the memory store,
+rebuilds the FAISS index, loads the embedding model and re-resolves the Codex
+binary before the first step. The daemon does that once and keeps it warm:
+
+  - one LLM client, memory store and tool registry shared by every task
+  - tasks run concurrently on a small worker pool, each in its own run dir
+  - progress streams back as NDJSON while the task runs (read from the run's
+    ``trace.jsonl``), ending with a ``result`` or ``error`` event
+
+The server listens on 127.0.0.1 only and requires the bearer token written to
+``daemon.json`` (see ``agent.daemon.client``). Tasks run without a console, so
+``human_ask`` and other interactive tools are disabled.
+
+Endpoints:
+  GET  /health     warm-up state, pid, uptime and task counters
+  POST /tasks      {"task", "profile", "max_steps", "timeout_seconds", "mode"}
+  POST /shutdown   stop accepting work and exit once the response is sent
+
+Environment overrides:
+  AGENT_DAEMON_PORT      TCP port (default: 8765; 0 picks a free port)
+  AGENT_DAEMON_WORKERS   tasks run concurrently (default: 2)
+  AGENT_DAEMON_HOME      directory for daemon.json and daemon.log
+"""
+from __future__ import annotations
+
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from agent.daemon.client import DEFAULT_HOST, DEFAULT_PORT, DaemonInfo, read_state, state_path
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+_PROFILES = {"fast", "deep", "audit"}
+
+
+@dataclass
+class TaskRequest:
+    task: str
+    profile: str = "fast"
+    max_steps: int = 30
+    timeout_seconds: int = 600
+    mode: str = "react"
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "TaskRequest":
+        task = payload.get("task")
+        if not isinstance(task, str) or not task.strip():
+            raise ValueError("'task' must be a non-empty string")
+        profile = str(payload.get("profile") or "fast")
+        if profile not in _PROFILES:
+            raise ValueError(f"'profile' must be one of {sorted(_PROFILES)}")
+        try:
+            max_steps = int(payload.get("max_steps") or 30)
+            timeout_seconds = int(payload.get("timeout_seconds") or 600)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"invalid limits: {exc}") from exc
+        if max_steps <= 0 or timeout_seconds <= 0:
+            raise ValueError("'max_steps' and 'timeout_seconds' must be > 0")
+        return cls(
+            task=task.strip(),
+            profile=profile,
+            max_steps=max_steps,
+            timeout_seconds=timeout_seconds,
+            mode=str(payload.get("mode") or "react"),
+        )
+
+
+@dataclass
+class DaemonTask:
+    id: str
+    request: TaskRequest
+    run_dir: Path
+    future: "Future[Dict[str, Any]]" = field(repr=False)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+# (daemon, request, run_dir) -> object with ``run(task) -> AgentRunResult``
+RunnerFactory = Callable[["AgentDaemon", TaskRequest, Path], Any]
+
+
+def summarize_trace_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a trace event worth streaming (step dumps can be large)."""
+    kind = event.get("type")
+    out: Dict[str, Any] = {"type": kind}
+    if kind == "step":
+        action = event.get("action") or {}
+        result = event.get("result") or {}
+        out["step"] = event.get("step_index")
+        out["tool"] = action.get("tool_name")
+        out["ok"] = bool(result.get("success"))
+        if result.get("error"):
+            out["error"] = str(result["error"])[:200]
+    else:
+        for key in ("name", "error"):
+            if event.get(key):
+                out[key] = str(event[key])[:200]
+    return out
+
+
+def _read_new_events(path: Path, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+    """Complete JSONL records appended to ``path`` since ``offset``."""
+    try:
+        with path.open("rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+    except OSError:
+        return offset, []
+    end = chunk.rfind(b"\n")
+    if end < 0:
+        return offset, []
+    events = []
+    for line in chunk[: end + 1].splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return offset + end + 1, events
+
+
+def _task_id() -> str:
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}_{uuid4().hex[:8]}"
+
+
+class AgentDaemon:
+    """Warm shared state plus a worker pool that runs agent tasks."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        backend: str = "codex_cli",
+        run_root: Optional[Path] = None,
+        runner_factory: Optional[RunnerFactory] = None,
+    ):
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.run_root = run_root or (REPO_ROOT / "runs" / "daemon")
+        self._runner_factory = runner_factory or _default_runner
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="agent-daemon")
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self._warm_done = threading.Event()
+        self._warm_error: Optional[str] = None
+        self.started_at = time.time()
+        self.warm_ms: Dict[str, float] = {}
+        self.llm: Any = None
+        self.memory_store: Any = None
+        self.tools: Any = None
+        self.agent_cfg: Any = None
+        self._tasks: Dict[str, DaemonTask] = {}
+        self.counters: Dict[str, int] = {"submitted": 0, "completed": 0, "failed": 0}
+
+    # ------------------------------------------------------------------
+    # Warm-up
+    # ------------------------------------------------------------------
+
+    def warm(self) -> None:
+        """Load everything a task needs; idempotent and safe to call concurrently."""
+        with self._warm_lock:
+            if self._warm_done.is_set():
+                return
+            try:
+                if self._runner_factory is _default_runner:
+                    self._warm_defaults()
+            except Exception as exc:
+                self._warm_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Daemon warm-up failed")
+            finally:
+                self._warm_done.set()
+
+    def _timed(self, label: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.warm_ms[label] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _warm_defaults(self) -> None:
+        from agent.autonomous.config import AgentConfig
+        from agent.autonomous.memory.sqlite_store import SqliteMemoryStore
+        from agent.autonomous.tools.builtins import build_default_tool_registry
+        from agent.cli import _get_llm_client, _parse_fs_policy
+
+        self._timed("imports", lambda: __import__("agent.autonomous.runner"))
+        self.llm = self._timed("llm", lambda: _get_llm_client(backend=self.backend))
+
+        memory_path = REPO_ROOT / "agent" / "memory" / "autonomous_memory.sqlite3"
+        try:
+            self.memory_store = self._timed("memory_store", lambda: SqliteMemoryStore(path=memory_path))
+        except Exception as exc:
+            logger.warning("Daemon memory store unavailable: %s", exc)
+        try:
+            from agent.autonomous.memory.embeddings import get_embedding_service
+
+            self._timed("embeddings", lambda: get_embedding_service().embed("warm up"))
+        except Exception as exc:
+            logger.debug("Embedding warm-up skipped: %s", exc)
+
+        fs_anywhere, allowed_roots = _parse_fs_policy(REPO_ROOT)
+        self.agent_cfg = AgentConfig(
+            allow_human_ask=False,  # no console attached to the daemon
+            allow_interactive_tools=False,
+            memory_db_path=memory_path if self.memory_store is not None else None,
+            allow_fs_anywhere=fs_anywhere,
+            fs_allowed_roots=allowed_roots,
+        )
+        session_dir = self.run_root / "daemon_session"
+        session_dir.mkdir(parents=True, exist_ok=True)
+        self.tools = self._timed(
+            "tools",
+            lambda: build_default_tool_registry(self.agent_cfg, session_dir, memory_store=self.memory_store),
+        )
+
+    # ------------------------------------------------------------------
+    # Tasks
+    # ------------------------------------------------------------------
+
+    def submit(self, request: TaskRequest) -> DaemonTask:
+        task_id = _task_id()
+        run_dir = self.run_root / task_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        future = self._executor.submit(self._run, request, run_dir)
+        task = DaemonTask(id=task_id, request=request, run_dir=run_dir, future=future)
+        with self._lock:
+            self._tasks[task_id] = task
+            self.counters["submitted"] += 1
+        future.add_done_callback(lambda f: self._finished(task_id, f))
+        return task
+
+    def _finished(self, task_id: str, future: Future) -> None:
+        with self._lock:
+            self._tasks.pop(task_id, None)
+            failed = future.exception() is not None or not (future.result() or {}).get("success")
+            self.counters["failed" if failed else "completed"] += 1
+
+    def _run(self, request: TaskRequest, run_dir: Path) -> Dict[str, Any]:
+        self.warm()
+        if self._warm_error:
+            raise RuntimeError(f"daemon warm-up failed: {self._warm_error}")
+        runner = self._runner_factory(self, request, run_dir)
+        result = runner.run(request.task)
+        answer = None
+        try:
+            from agent.cli import _extract_answer
+
+            answer = _extract_answer(result)
+        except Exception:
+            pass
+        return {
+            "success": bool(result.success),
+            "stop_reason": result.stop_reason,
+            "steps_executed": result.steps_executed,
+            "run_id": result.run_id,
+            "trace_path": result.trace_path,
+            "answer": answer,
+        }
+
+    def follow(self, task: DaemonTask, *, poll_s: float = 0.2) -> Iterator[Dict[str, Any]]:
+        """Stream a task's trace as summarized events, then its outcome."""
+        trace_path = task.run_dir / "trace.jsonl"
+        offset = 0
+        while True:
+            done = task.future.done()
+            offset, events = _read_new_events(trace_path, offset)
+            for event in events:
+                yield {"event": "trace", **summarize_trace_event(event)}
+            if done:
+                break
+            try:
+                task.future.result(timeout=poll_s)
+            except FutureTimeout:
+                pass
+            except Exception:
+                pass  # reported below
+        exc = task.future.exception()
+        if exc is not None:
+            yield {"event": "error", "task_id": task.id, "message": f"{type(exc).__name__}: {exc}"}
+        else:
+            yield {"event": "result", "task_id": task.id, **task.future.result()}
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            active = [t for t in self._tasks.values() if not t.future.done()]
+            running = sum(1 for t in active if t.future.running())
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "backend": self.backend,
+                "workers": self.workers,
+                "warm": self._warm_done.is_set(),
+                "warm_error": self._warm_error,
+                "warm_ms": dict(self.warm_ms),
+                "running": running,
+                "queued": len(active) - running,
+                **self.counters,
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.memory_store is not None:
+            try:
+                self.memory_store.close()
+            except Exception:
+                pass
+
+
+def _default_runner(daemon: AgentDaemon, request: TaskRequest, run_dir: Path) -> Any:
+    from agent.autonomous.config import PlannerConfig, RunnerConfig
+    from agent.autonomous.runner import AgentRunner
+
+    return AgentRunner(
+        cfg=RunnerConfig(
+            max_steps=request.max_steps,
+            timeout_seconds=request.timeout_seconds,
+            profile=request.profile,
+        ),
+        agent_cfg=daemon.agent_cfg,
+        planner_cfg=PlannerConfig(mode=request.mode),
+        llm=daemon.llm,
+        tools=daemon.tools,
+        run_dir=run_dir,
+        memory_store=daemon.memory_store,
+        owns_memory_store=False,
+    )
+
+
+# ----------------------------------------------------------------------
+# HTTP front end
+# ----------------------------------------------------------------------
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "DaemonServer"
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logger.debug("daemon %s - " + fmt, self.address_string(), *args)
+
+    def _authorized(self) -> bool:
+        header = self.headers.get("Authorization", "")
+        supplied = header[7:] if header.startswith("Bearer ") else ""
+        if hmac.compare_digest(supplied.encode("utf-8"), self.server.token.encode("utf-8")):
+            return True
+        self._send_json(401, {"error": "missing or invalid token"})
+        return False
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return {}
+        payload = json.loads(self.rfile.read(length))
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        return payload
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if not self._authorized():
+            return
+        if self.path == "/health":
+            self._send_json(200, self.server.daemon.health())
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        if not self._authorized():
+            return
+        if self.path == "/shutdown":
+            self._send_json(200, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != "/tasks":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            request = TaskRequest.from_payload(self._read_json())
+        except ValueError as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+
+        daemon = self.server.daemon
+        queued = daemon.health()["running"] >= daemon.workers
+        task = daemon.submit(request)
+        # HTTP/1.0 response without Content-Length: the stream ends when we close.
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            self._emit({"event": "accepted", "task_id": task.id, "run_dir": str(task.run_dir), "queued": queued})
+            for event in daemon.follow(task):
+                self._emit(event)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client went away; task %s keeps running", task.id)
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(event, default=str).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, daemon: AgentDaemon, *, port: int = DEFAULT_PORT, token: Optional[str] = None):
+        super().__init__((DEFAULT_HOST, port), _Handler)
+        self.daemon = daemon
+        self.token = token or secrets.token_urlsafe(32)
+
+    @property
+    def info(self) -> DaemonInfo:
+        host, port = self.server_address[:2]
+        return DaemonInfo(host=str(host), port=int(port), token=self.token, pid=os.getpid(), started_at=self.daemon.started_at)
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def serve(
+    *,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+    backend: str = "codex_cli",
+    daemon: Optional[AgentDaemon] = None,
+) -> int:
+    """Run the daemon in the foreground until ``/shutdown`` or Ctrl+C."""
+    port = _int_env("AGENT_DAEMON_PORT", DEFAULT_PORT) if port is None else port
+    workers = _int_env("AGENT_DAEMON_WORKERS", 2) if workers is None else workers
+    daemon = daemon or AgentDaemon(workers=workers, backend=backend)
+    server = DaemonServer(daemon, port=port)
+    path = server.info.write(state_path())
+    logger.info("Agent daemon pid=%s listening on %s:%s", os.getpid(), *server.server_address[:2])
+    threading.Thread(target=daemon.warm, name="agent-daemon-warm", daemon=True).start()
+    try:
+        server.serve_forever(poll_interval=0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+        current = read_state(path)
+        if current is not None and current.pid == os.getpid():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    return 0
+
+
+__all__ = [
+    "AgentDaemon",
+    "DaemonServer",
+    "DaemonTask",
+    "TaskRequest",
+    "serve",
+    "summarize_trace_event",
+]
@@ -1,6 +1,21 @@
-"""Integrations package."""
+"""Integrations package.
 
-from . import yahoo_mail
-from . import google_apis
+Submodules are imported on first attribute access: ``google_apis`` pulls in
+the Google client libraries (and exits if they are missing), which entry
+points that never touch Google should not pay for.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any
 
 __all__ = ["yahoo_mail", "google_apis"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
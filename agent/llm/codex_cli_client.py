@@ -7,13 +7,19 @@ import shutil
 import subprocess
 import tempfile
 import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 from uuid import uuid4
 from time import perf_counter
 
+from agent.autonomous.cancellation import run_process
+from agent.autonomous.exceptions import RunCancelledError
+
+from . import ledger as llm_ledger
 from .backend import RunConfig, RunResult
 from .base import LLMClient
 from .errors import (
@@ -36,6 +42,28 @@ def _debug_print(*args, **kwargs) -> None:
         print(*args, **kwargs)
 
 
+_REASONING_EFFORT: ContextVar[str] = ContextVar("codex_reasoning_effort", default="")
+
+
+@contextmanager
+def reasoning_effort_override(effort: str) -> Iterator[None]:
+    """Use ``effort`` for codex calls made in this context when the client has none of its own.
+
+    Context-local (unlike ``CODEX_REASONING_EFFORT``), so concurrent runs in one
+    process (the daemon) do not see each other's setting.
+    """
+    reset = _REASONING_EFFORT.set((effort or "").strip())
+    try:
+        yield
+    finally:
+        _REASONING_EFFORT.reset(reset)
+
+
+def resolve_reasoning_effort(configured: str = "") -> str:
+    """The effort a call uses: the client's own, then the context override, then the env."""
+    return (configured or _REASONING_EFFORT.get() or os.getenv("CODEX_REASONING_EFFORT") or "").strip()
+
+
 PROFILE_MAP = {
     "Fingerprint": "reason",
     "Static": "reason",
@@ -220,9 +248,39 @@ def call_codex(
     _debug_print(f"[DEBUG] Profile: {resolved_profile}")
     _debug_print(f"[DEBUG] Working dir: {cwd}")
     _debug_print(f"[DEBUG] Timeout: {timeout_seconds}s")
+    with llm_ledger.track(
+        agent,
+        source="codex_cli",
+        provider="codex_cli",
+        schema=Path(schema_path).name if schema_path else "",
+        prompt_chars=len(prompt),
+    ) as call:
+        call.requested()
+        out = _call_codex_subprocess(cmd, prompt=prompt, agent=agent, schema_path=schema_path, timeout=timeout, cwd=cwd, call=call)
+        if isinstance(out, dict) and "error" in out:
+            call.status = "rate_limited" if out["error"] == "rate_limit" else str(out["error"])
+        elif isinstance(out, dict) and "result" in out:
+            call.response_chars = len(out["result"])
+        else:
+            call.response_chars = len(json.dumps(out, ensure_ascii=False))
+        return out
+
+
+def _call_codex_subprocess(
+    cmd: list[str],
+    *,
+    prompt: str,
+    agent: str,
+    schema_path: Optional[str],
+    timeout: int,
+    cwd: str,
+    call: llm_ledger.LedgerCall,
+) -> Dict[str, Any]:
+    timeout_seconds = timeout
     try:
         t0 = perf_counter()
-        result = subprocess.run(
+        call.dispatched()
+        result = run_process(
             cmd,
             input=prompt,
             text=True,
@@ -261,6 +319,8 @@ def call_codex(
     except subprocess.TimeoutExpired:
         logging.error("[%s] Timeout after %ss", agent, timeout)
         return {"error": "timeout", "timeout_seconds": timeout}
+    except RunCancelledError:
+        raise
     except Exception as exc:
         logging.error("[%s] Unexpected error: %s", agent, exc)
         return {"error": "unknown", "exception": str(exc)}
@@ -445,6 +505,33 @@ class CodexCliClient(LLMClient):
         schema_path: Path,
         timeout_seconds: Optional[int],
         profile: str,
+    ) -> Dict[str, Any]:
+        agent_name = (os.getenv("CODEX_AGENT_NAME") or "").strip()
+        with llm_ledger.track(
+            agent_name or profile,
+            source="codex_cli",
+            provider=self.provider,
+            model=self.model,
+            schema=Path(schema_path).name,
+            prompt_chars=len(prompt),
+        ) as call:
+            call.requested()
+            return self._exec_codex(
+                prompt=prompt,
+                schema_path=schema_path,
+                timeout_seconds=timeout_seconds,
+                profile=profile,
+                call=call,
+            )
+
+    def _exec_codex(
+        self,
+        *,
+        prompt: str,
+        schema_path: Path,
+        timeout_seconds: Optional[int],
+        profile: str,
+        call: llm_ledger.LedgerCall,
     ) -> Dict[str, Any]:
         codex = self._resolve_bin()
         schema_path = schema_path.resolve()
@@ -472,10 +559,7 @@ class CodexCliClient(LLMClient):
             exec_index = len(cmd)
         if "mcp.enabled=false" not in cmd:
             cmd[exec_index:exec_index] = ["-c", "mcp.enabled=false", "-c", "features.mcp=false"]
-        reasoning_effort = (
-            self.reasoning_effort
-            or (os.getenv("CODEX_REASONING_EFFORT") or "")
-        ).strip()
+        reasoning_effort = resolve_reasoning_effort(self.reasoning_effort)
         if reasoning_effort:
             try:
                 exec_index = cmd.index("exec")
@@ -483,6 +567,7 @@ class CodexCliClient(LLMClient):
                 exec_index = len(cmd)
             cmd[exec_index:exec_index] = ["-c", f'model_reasoning_effort="{reasoning_effort}"']
         # build_codex_command includes schema/out paths and model if provided
+        call.fill(effort=reasoning_effort, prompt_chars=len(prompt))
 
         env = os.environ.copy()
         if not env.get("USERPROFILE"):
@@ -516,7 +601,8 @@ class CodexCliClient(LLMClient):
                     _debug_print(f"[DEBUG] Working dir: {os.getcwd()}", file=sys.stderr)
                     _debug_print(f"[DEBUG] Env CODEX_HOME: {env.get('CODEX_HOME', 'NOT SET')}", file=sys.stderr)
                     sys.stderr.flush()
-                    result = subprocess.run(
+                    call.dispatched()
+                    result = run_process(
                         cmd_args,
                         input=prompt,
                         capture_output=True,
@@ -573,6 +659,7 @@ class CodexCliClient(LLMClient):
 
         stdout = proc.stdout or ""
         stderr = proc.stderr or ""
+        call.meta["exit"] = proc.returncode
 
         if self.log_dir:
             ts = datetime.now(timezone.utc).isoformat()
@@ -643,6 +730,7 @@ class CodexCliClient(LLMClient):
             except Exception:
                 pass
 
+        call.response_chars = len(raw)
         try:
             return json.loads(raw)
         except json.JSONDecodeError as exc:
@@ -853,7 +941,7 @@ Now respond with ONLY the JSON object:"""
         env["PYTHONIOENCODING"] = "utf-8"
 
         try:
-            result = subprocess.run(
+            result = run_process(
                 cmd,
                 input=prompt,
                 capture_output=True,
@@ -884,6 +972,8 @@ Now respond with ONLY the JSON object:"""
         except subprocess.TimeoutExpired:
             _debug_print(f"[DEBUG] Chat timeout after {timeout_seconds}s")
             return None
+        except RunCancelledError:
+            raise
         except Exception as e:
             _debug_print(f"[DEBUG] Chat error: {e}")
             return None
@@ -943,7 +1033,7 @@ Now respond with ONLY the JSON object:"""
             print(f"[DEBUG CHAT_SIMPLE] Command: {' '.join(cmd[:8])}...")
             print(f"[DEBUG CHAT_SIMPLE] Schema: {schema_path}")
             print(f"[DEBUG CHAT_SIMPLE] Timeout: {timeout_seconds}s")
-            result = subprocess.run(
+            result = run_process(
                 cmd,
                 input=full_prompt,
                 capture_output=True,
@@ -977,6 +1067,8 @@ Now respond with ONLY the JSON object:"""
             except Exception:
                 pass
             return None
+        except RunCancelledError:
+            raise
         except Exception as exc:
             print(f"[DEBUG CHAT_SIMPLE] Unexpected error: {exc}")
             return None
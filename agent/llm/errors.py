@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Optional
+
 
 class LLMError(RuntimeError):
     pass
@@ -14,7 +16,9 @@ class LLMRetryableError(LLMError):
 
 
 class LLMRateLimitError(LLMRetryableError):
-    pass
+    def __init__(self, *args: object, retry_after: Optional[float] = None) -> None:
+        super().__init__(*args)
+        self.retry_after = retry_after
 
 
 class LLMProviderError(LLMError):
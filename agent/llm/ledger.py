@@ -0,0 +1,381 @@
+"""
+LLM call ledger: one row per logical LLM call, appended to SQLite.
+
+Every layer that talks to a model opens ``track(...)``. The outermost layer
+owns the row; inner layers (``TrackedLLM`` -> ``CodexCliClient`` -> the
+``codex`` subprocess) fill in what only they know - model, reasoning effort,
+dispatch time, attempts - and the row is written once when the outermost
+block exits. So a runner planning call retried twice by the Codex client is
+one row with ``attempts=3``, not three.
+
+Columns: run id, source, agent/call-site label, provider, model, effort,
+schema, prompt/response chars, tokens (reported or estimated), queue wait
+(prompt handed to a client -> first request sent), wall time, cache hit,
+attempts, status, cost.
+
+The ledger lives in ``runs/llm_ledger.sqlite3`` (``AGENT_LLM_LEDGER`` sets
+another path; ``0``/``off`` disables it). Writes never raise into the caller.
+
+Aggregate reports: ``python scripts/llm_report.py --by agent --since 7d``.
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_LEDGER_PATH = REPO_ROOT / "runs" / "llm_ledger.sqlite3"
+_DISABLED = {"0", "false", "no", "off", "none"}
+GROUP_COLUMNS = ("agent", "model", "source", "run_id", "schema", "provider", "effort")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    run_id TEXT,
+    source TEXT,
+    agent TEXT,
+    provider TEXT,
+    model TEXT,
+    effort TEXT,
+    schema TEXT,
+    prompt_chars INTEGER,
+    response_chars INTEGER,
+    tokens REAL,
+    tokens_estimated INTEGER,
+    queue_wait_ms REAL,
+    wall_ms REAL,
+    cached INTEGER,
+    attempts INTEGER,
+    status TEXT,
+    error TEXT,
+    cost_usd REAL,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_run ON llm_calls(run_id);
+"""
+
+_current_call: "contextvars.ContextVar[Optional[LedgerCall]]" = contextvars.ContextVar("llm_ledger_call", default=None)
+_current_run: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("llm_ledger_run", default=None)
+
+
+@dataclass
+class LedgerCall:
+    """A call in flight. Inner layers update it through ``track``/``current_call``."""
+
+    agent: str = ""
+    source: str = ""
+    run_id: Optional[str] = None
+    provider: str = ""
+    model: str = ""
+    effort: str = ""
+    schema: str = ""
+    prompt_chars: int = 0
+    response_chars: int = 0
+    tokens: Optional[float] = None
+    cached: bool = False
+    attempts: int = 0
+    status: str = "ok"
+    error: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.perf_counter)
+    requested_at: Optional[float] = None
+    dispatched_at: Optional[float] = None
+    wall_ms: float = 0.0
+
+    def requested(self) -> None:
+        """Mark the prompt reaching an LLM client (first one starts the queue wait)."""
+        if self.requested_at is None:
+            self.requested_at = time.perf_counter()
+
+    def dispatched(self) -> None:
+        """Mark one request going out to the backend (first one ends the queue wait)."""
+        self.attempts += 1
+        if self.dispatched_at is None:
+            self.dispatched_at = time.perf_counter()
+
+    def fill(self, **fields: Any) -> None:
+        """Set fields that carry a value; inner layers know the model/effort best."""
+        for key, value in fields.items():
+            if value not in (None, ""):
+                setattr(self, key, value)
+
+    @property
+    def queue_wait_ms(self) -> float:
+        if self.dispatched_at is None:
+            return 0.0
+        return max(0.0, (self.dispatched_at - (self.requested_at or self.started_at)) * 1000.0)
+
+    def to_row(self) -> Dict[str, Any]:
+        tokens = self.tokens
+        estimated = tokens is None
+        if estimated:
+            per_char = _float_env("LLM_TOKENS_PER_CHAR", 0.25)
+            tokens = (self.prompt_chars + self.response_chars) * per_char
+        price = _float_env("LLM_COST_PER_1K_TOKENS_USD", None)
+        cost = None if price is None or self.cached else round(tokens / 1000.0 * price, 6)
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "run_id": self.run_id,
+            "source": self.source,
+            "agent": self.agent,
+            "provider": self.provider,
+            "model": self.model,
+            "effort": self.effort,
+            "schema": self.schema,
+            "prompt_chars": int(self.prompt_chars),
+            "response_chars": int(self.response_chars),
+            "tokens": round(float(tokens), 1),
+            "tokens_estimated": int(estimated),
+            "queue_wait_ms": round(self.queue_wait_ms, 2),
+            "wall_ms": round(self.wall_ms, 2),
+            "cached": int(self.cached),
+            "attempts": int(self.attempts),
+            "status": self.status,
+            "error": (self.error or None) and str(self.error)[:500],
+            "cost_usd": cost,
+            "meta": json.dumps(self.meta, default=str) if self.meta else None,
+        }
+
+
+class LlmLedger:
+    """Append-only SQLite table of LLM calls; safe to share across threads and processes."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=10.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def append(self, row: Dict[str, Any]) -> None:
+        cols = ", ".join(row)
+        marks = ", ".join("?" for _ in row)
+        with self._lock:
+            self._conn.execute(f"INSERT INTO llm_calls ({cols}) VALUES ({marks})", list(row.values()))
+            self._conn.commit()
+
+    def rows(
+        self,
+        *,
+        since: Optional[datetime] = None,
+        run_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since.astimezone(timezone.utc).isoformat())
+        if run_id:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            cur = self._conn.execute(f"SELECT * FROM llm_calls{where} ORDER BY id", params)
+            return [dict(r) for r in cur.fetchall()]
+
+    def report(self, *, by: str = "agent", **filters: Any) -> List[Dict[str, Any]]:
+        """Aggregate calls per ``by`` column, slowest total wall time first."""
+        return aggregate(self.rows(**filters), by=by)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def aggregate(rows: List[Dict[str, Any]], *, by: str = "agent") -> List[Dict[str, Any]]:
+    if by not in GROUP_COLUMNS:
+        raise ValueError(f"Unknown group column {by!r}; expected one of {', '.join(GROUP_COLUMNS)}")
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(row.get(by) or "-", []).append(row)
+    total_wall = sum(float(r["wall_ms"] or 0.0) for r in rows) or 1.0
+    out = []
+    for key, items in groups.items():
+        walls = sorted(float(r["wall_ms"] or 0.0) for r in items)
+        costs = [r["cost_usd"] for r in items if r["cost_usd"] is not None]
+        out.append(
+            {
+                by: key,
+                "calls": len(items),
+                "wall_s": round(sum(walls) / 1000.0, 3),
+                "wall_share": round(sum(walls) / total_wall, 4),
+                "p50_ms": round(_percentile(walls, 50), 1),
+                "p95_ms": round(_percentile(walls, 95), 1),
+                "queue_wait_s": round(sum(float(r["queue_wait_ms"] or 0.0) for r in items) / 1000.0, 3),
+                "retries": sum(max(0, int(r["attempts"] or 0) - 1) for r in items),
+                "cache_hits": sum(int(r["cached"] or 0) for r in items),
+                "errors": sum(1 for r in items if r["status"] not in ("ok", "cached")),
+                "prompt_chars": sum(int(r["prompt_chars"] or 0) for r in items),
+                "response_chars": sum(int(r["response_chars"] or 0) for r in items),
+                "tokens": round(sum(float(r["tokens"] or 0.0) for r in items)),
+                "cost_usd": round(sum(costs), 4) if costs else None,
+            }
+        )
+    out.sort(key=lambda g: -g["wall_s"])
+    return out
+
+
+# -- process-wide ledger -------------------------------------------------------
+
+_ledgers: Dict[Path, LlmLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def ledger_path() -> Optional[Path]:
+    raw = (os.getenv("AGENT_LLM_LEDGER") or "").strip()
+    if raw.lower() in _DISABLED:
+        return None
+    return Path(raw) if raw else DEFAULT_LEDGER_PATH
+
+
+def get_ledger() -> Optional[LlmLedger]:
+    """The ledger for ``AGENT_LLM_LEDGER`` (opened once per path), or None when disabled."""
+    path = ledger_path()
+    if path is None:
+        return None
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            try:
+                ledger = LlmLedger(path)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("LLM ledger unavailable at %s: %s", path, exc)
+                return None
+            _ledgers[path] = ledger
+        return ledger
+
+
+def current_call() -> Optional[LedgerCall]:
+    return _current_call.get()
+
+
+@contextmanager
+def bind_run(run_id: Optional[str]) -> Iterator[None]:
+    """Attribute calls made in this context to ``run_id``."""
+    token = _current_run.set(run_id)
+    try:
+        yield
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def track(agent: str = "", *, source: str = "", **fields: Any) -> Iterator[LedgerCall]:
+    """Record an LLM call, or enrich the one an outer layer is already recording."""
+    outer = _current_call.get()
+    if outer is not None:
+        outer.fill(**fields)
+        if not outer.agent:
+            outer.agent = agent
+        yield outer
+        return
+
+    call = LedgerCall(agent=agent, source=source, run_id=_current_run.get())
+    call.fill(**fields)
+    token = _current_call.set(call)
+    try:
+        yield call
+    except BaseException as exc:
+        call.status = _status_for(exc)
+        call.error = call.error or f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current_call.reset(token)
+        call.wall_ms = (time.perf_counter() - call.started_at) * 1000.0
+        if call.cached and call.status == "ok":
+            call.status = "cached"
+        _append(call)
+
+
+def record(agent: str, *, source: str = "", **fields: Any) -> None:
+    """Append a call that was not made through ``track`` (e.g. an answer served from cache)."""
+    call = LedgerCall(agent=agent, source=source, run_id=_current_run.get())
+    call.fill(**fields)
+    if call.cached and call.status == "ok":
+        call.status = "cached"
+    _append(call)
+
+
+def _append(call: LedgerCall) -> None:
+    ledger = get_ledger()
+    if ledger is None:
+        return
+    try:
+        ledger.append(call.to_row())
+    except Exception as exc:
+        logger.debug("LLM ledger write failed: %s", exc)
+
+
+def _status_for(exc: BaseException) -> str:
+    name = type(exc).__name__.lower()
+    if "timeout" in name or "timed out" in str(exc).lower():
+        return "timeout"
+    if "ratelimit" in name or "rate_limit" in name:
+        return "rate_limited"
+    return "error"
+
+
+def _float_env(name: str, default: Optional[float]) -> Optional[float]:
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def parse_since(value: Optional[str]) -> Optional[datetime]:
+    """``"24h"``, ``"7d"``, ``"30m"`` or an ISO timestamp."""
+    if not value:
+        return None
+    units = {"m": "minutes", "h": "hours", "d": "days"}
+    if value[-1:] in units and value[:-1].isdigit():
+        return datetime.now(timezone.utc) - timedelta(**{units[value[-1]]: int(value[:-1])})
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+__all__ = [
+    "LedgerCall",
+    "LlmLedger",
+    "aggregate",
+    "bind_run",
+    "current_call",
+    "get_ledger",
+    "ledger_path",
+    "parse_since",
+    "record",
+    "track",
+]
@@ -15,12 +15,16 @@ from __future__ import annotations
 import json
 import logging
 import os
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 import requests
 
+from agent.adapters.http_pool import bounded_map, get_http_pool
+from agent.adapters.request_layout import build_layout, normalize_usage, supports_cache_control
+
 from .base import LLMClient
 
 logger = logging.getLogger(__name__)
@@ -73,9 +77,15 @@ class OpenRouterClient(LLMClient):
     temperature: float = 0.7
     site_url: str = "https://drcodept.local"
     app_name: str = "DrCodePT-Agent"
+    api_url: str = OPENROUTER_API_URL
 
     provider: str = "openrouter"
 
+    # Usage of the most recent response and running prompt-cache totals.
+    last_usage: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    cache_stats: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    _stats_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
     @staticmethod
     def from_env() -> "OpenRouterClient":
         """Create client from environment variables."""
@@ -89,15 +99,45 @@ class OpenRouterClient(LLMClient):
         default_model = os.getenv("OPENROUTER_MODEL", "").strip()
         if not default_model:
             default_model = "qwen/qwen3-coder:free"  # Fast free model for routine tasks
-        
+
+        base_url = os.getenv("OPENROUTER_BASE_URL", "").strip().rstrip("/")
+        api_url = f"{base_url}/chat/completions" if base_url else OPENROUTER_API_URL
+
         return OpenRouterClient(
             api_key=api_key,
             model=default_model,
             timeout_seconds=int(os.getenv("OPENROUTER_TIMEOUT", "60").strip()),
             max_tokens=int(os.getenv("OPENROUTER_MAX_TOKENS", "4096").strip()),
             temperature=float(os.getenv("OPENROUTER_TEMPERATURE", "0.7").strip()),
+            api_url=api_url,
         )
 
+    def _messages(
+        self,
+        prompt: str,
+        *,
+        system: Optional[str],
+        model: Optional[str],
+        schema: Optional[Dict[str, Any]] = None,
+        json_mode: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Static system prefix first, the per-call prompt last (see request_layout)."""
+        layout = build_layout(prompt, system_prompt=system, schema=schema, json_mode=json_mode)
+        return layout.messages(cache_control=supports_cache_control(model or self.model))
+
+    def _record_usage(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        usage = normalize_usage(data.get("usage"))
+        data["usage"] = usage
+        with self._stats_lock:
+            self.last_usage = usage
+            for key, value in (
+                ("requests", 1),
+                ("prompt_tokens", int(usage.get("prompt_tokens") or 0)),
+                ("cached_tokens", usage["cached_tokens"]),
+            ):
+                self.cache_stats[key] = self.cache_stats.get(key, 0) + value
+        return data
+
     def _make_request(
         self,
         messages: List[Dict[str, str]],
@@ -132,14 +172,14 @@ class OpenRouterClient(LLMClient):
             payload["response_format"] = response_format
 
         try:
-            response = requests.post(
-                OPENROUTER_API_URL,
+            response = get_http_pool().post(
+                self.api_url,
                 headers=headers,
                 json=payload,
                 timeout=self.timeout_seconds,
             )
             response.raise_for_status()
-            return response.json()
+            return self._record_usage(response.json())
 
         except requests.exceptions.HTTPError as e:
             # Try fallback model on 429 (rate limit), 500 (server error), 404 (model not found)
@@ -160,14 +200,14 @@ class OpenRouterClient(LLMClient):
                     logger.warning(f"Model {requested_model} failed ({e.response.status_code}), trying fallback: {fallback}")
                     payload["model"] = fallback
                     try:
-                        response = requests.post(
-                            OPENROUTER_API_URL,
+                        response = get_http_pool().post(
+                            self.api_url,
                             headers=headers,
                             json=payload,
                             timeout=self.timeout_seconds,
                         )
                         response.raise_for_status()
-                        return response.json()
+                        return self._record_usage(response.json())
                     except Exception as fallback_error:
                         logger.error(f"Fallback model also failed: {fallback_error}")
             raise
@@ -187,10 +227,7 @@ class OpenRouterClient(LLMClient):
         model: Optional[str] = None,
     ) -> str:
         """Generate text response."""
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
-        messages.append({"role": "user", "content": prompt})
+        messages = self._messages(prompt, system=system, model=model)
 
         response = self._make_request(messages, model=model)
         return response["choices"][0]["message"]["content"]
@@ -215,17 +252,8 @@ class OpenRouterClient(LLMClient):
         Returns:
             Parsed JSON dict
         """
-        # Build system message that enforces JSON output
-        json_system = system or ""
-        if schema:
-            json_system += f"\n\nRespond with ONLY valid JSON matching this schema:\n{json.dumps(schema, indent=2)}"
-        else:
-            json_system += "\n\nRespond with ONLY valid JSON. No markdown, no explanation."
-
-        messages = [
-            {"role": "system", "content": json_system.strip()},
-            {"role": "user", "content": prompt},
-        ]
+        # JSON format spec and system message form the cacheable prefix
+        messages = self._messages(prompt, system=system, model=model, schema=schema, json_mode=True)
 
         response = self._make_request(
             messages,
@@ -357,6 +385,26 @@ Rules:
             model=DEFAULT_MODELS.get("chat", self.model),
         )
 
+    def batch_chat(
+        self,
+        messages: Sequence[str],
+        *,
+        system: Optional[str] = None,
+        model: Optional[str] = None,
+        max_concurrency: int = 4,
+    ) -> List[Union[str, Exception]]:
+        """
+        Generate responses for independent prompts concurrently.
+
+        Requests share pooled connections and the same system prefix; results
+        keep the input order, with the exception in place of a failed prompt.
+        """
+        return bounded_map(
+            lambda message: self.generate_text(message, system=system, model=model),
+            messages,
+            max_concurrency=max_concurrency,
+        )
+
 
 # Convenience function
 def get_openrouter_client() -> OpenRouterClient:
@@ -4,11 +4,11 @@ import requests
 import json
 from pathlib import Path
 from typing import Dict, Any, Optional
+from agent.adapters.http_pool import get_http_pool
 from agent.llm.base import LLMClient
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
-_SESSION = requests.Session()
 
 @dataclass(frozen=True)
 class ServerClient(LLMClient):
@@ -72,7 +72,7 @@ class ServerClient(LLMClient):
         }
         
         try:
-            resp = _SESSION.post(url, json=payload, timeout=(timeout or self.timeout_seconds) + 5)
+            resp = get_http_pool().post(url, json=payload, timeout=(timeout or self.timeout_seconds) + 5)
             resp.raise_for_status()
             data = resp.json()
             if "error" in data:
@@ -99,7 +99,7 @@ class ServerClient(LLMClient):
         }
         
         try:
-            resp = _SESSION.post(url, json=payload, timeout=(timeout or self.timeout_seconds) + 5)
+            resp = get_http_pool().post(url, json=payload, timeout=(timeout or self.timeout_seconds) + 5)
             resp.raise_for_status()
             data = resp.json()
             if "error" in data:
@@ -1,16 +1,28 @@
 """
 Enhanced MCP Client with multi-server support for Calendar, Tasks, and Memory.
+
+Each configured server is spawned once (on first use) and kept alive; calls
+are JSON-RPC requests over its stdio pipes (see ``agent.mcp.transport``).
+Everything runs on a shared background event loop, so the client can be used
+from async code on any loop and, through the ``*_sync`` methods, from plain
+threads.
 """
 
 import asyncio
 import json
 import logging
-import subprocess
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .transport import McpError, StdioTransport, get_background_loop, register_shutdown
+
 logger = logging.getLogger(__name__)
 
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {"name": "treys-agent", "version": "1.0"}
+DEFAULT_REQUEST_TIMEOUT = 60.0
+
 
 class MCPServerConfig:
     """Configuration for a single MCP server."""
@@ -22,30 +34,54 @@ class MCPServerConfig:
         self.env = env
 
 
+class _ServerSession:
+    """A running server: its transport plus the tool list it advertised."""
+
+    def __init__(self, transport: StdioTransport, info: Dict[str, Any]):
+        self.transport = transport
+        self.info = info
+        self.tools: Dict[str, Dict[str, Any]] = {}
+        self.tools_stale = True
+
+
 class MCPClient:
     """
     Multi-server MCP client supporting Calendar, Tasks, Memory, and Filesystem.
 
     Features:
-    - Lazy initialization (servers start on first use)
-    - Tool discovery and registration
+    - Lazy initialization (servers start on first use and stay running)
+    - Tool discovery via ``tools/list`` (cached until the server reports a change)
     - Namespaced tool calls (e.g., "google-calendar.list_events")
-    - Error handling and recovery
-    - Structured logging
+    - Concurrent calls multiplexed over one pipe per server
+    - Automatic restart if a server process dies
     """
 
-    def __init__(self, config_path: Path = None):
+    def __init__(
+        self,
+        config_path: Path = None,
+        *,
+        servers: Optional[Dict[str, MCPServerConfig]] = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ):
         """
         Initialize MCP client.
 
         Args:
             config_path: Path to servers.json config file
+            servers: Server configs to use instead of reading ``config_path``
+            request_timeout: Default per-request timeout in seconds
         """
         self.config_path = config_path or Path(__file__).parent / "servers.json"
         self.servers: Dict[str, MCPServerConfig] = {}
-        self.sessions: Dict[str, Any] = {}  # Active server sessions
+        self.sessions: Dict[str, _ServerSession] = {}  # Active server sessions
         self.available_tools: Dict[str, Dict[str, Any]] = {}  # Namespaced tools
-        self._load_config()
+        self.request_timeout = request_timeout
+        self._start_locks: Dict[str, asyncio.Lock] = {}
+        self._loop = get_background_loop()
+        if servers is not None:
+            self.servers = dict(servers)
+        else:
+            self._load_config()
 
     def _load_config(self):
         """Load server configuration from JSON file."""
@@ -70,147 +106,159 @@ class MCPClient:
         except Exception as e:
             logger.error(f"Failed to load MCP config: {e}")
 
+    # ------------------------------------------------------------------
+    # Async API (safe to await from any event loop)
+    # ------------------------------------------------------------------
+
     async def initialize(self, servers: Optional[List[str]] = None):
         """
         Initialize specified MCP servers (or all if not specified).
 
         Args:
-            servers: List of server names to initialize (e.g., ["google-calendar", "google-tasks"])
+            servers: List of server names to initialize (e.g., ["google-calendar", "google-tasks"]).
+                An empty list starts nothing.
         """
-        servers_to_init = servers or list(self.servers.keys())
+        servers_to_init = list(self.servers.keys()) if servers is None else servers
+        await self._loop.run_async(self._initialize(servers_to_init))
 
-        for server_name in servers_to_init:
+    async def _initialize(self, servers_to_init: List[str]) -> None:
+        async def _one(server_name: str) -> None:
             if server_name not in self.servers:
                 logger.warning(f"Server {server_name} not found in config")
-                continue
-
+                return
             try:
                 await self._start_server(server_name)
             except Exception as e:
                 logger.error(f"Failed to initialize {server_name}: {e}")
 
-    async def _start_server(self, server_name: str):
-        """Start a single MCP server and discover its tools."""
-        if server_name in self.sessions:
-            logger.debug(f"Server {server_name} already running")
-            return
-
-        config = self.servers[server_name]
-        logger.info(f"Starting MCP server: {server_name}")
-
-        try:
-            # For now, we'll use a simple approach: store config for later use
-            # In production, you'd use stdio transport to communicate with the server
-            self.sessions[server_name] = {"config": config, "status": "initialized"}
-
-            # Discover tools (this would normally call the server)
-            # For now, we'll register known tools
-            await self._discover_tools(server_name)
+        await asyncio.gather(*(_one(name) for name in servers_to_init))
+
+    async def _start_server(self, server_name: str) -> _ServerSession:
+        """Start a single MCP server (if not running) and discover its tools."""
+        session = self.sessions.get(server_name)
+        if session is not None and session.transport.is_alive:
+            return session
+
+        lock = self._start_locks.setdefault(server_name, asyncio.Lock())
+        async with lock:
+            session = self.sessions.get(server_name)
+            if session is not None and session.transport.is_alive:
+                return session
+            if session is not None:
+                logger.warning(f"MCP server {server_name} exited; restarting")
+                await session.transport.close()
+
+            config = self.servers.get(server_name)
+            if config is None or not config.command:
+                raise ValueError(f"MCP server {server_name} not found in config")
+            logger.info(f"Starting MCP server: {server_name}")
+
+            def _on_notification(method: str, params: Dict[str, Any], name: str = server_name) -> None:
+                if method == "notifications/tools/list_changed" and name in self.sessions:
+                    self.sessions[name].tools_stale = True
+
+            transport = StdioTransport(
+                config.command,
+                config.args,
+                config.env,
+                name=server_name,
+                on_notification=_on_notification,
+            )
+            await transport.start()
+            try:
+                info = await transport.request(
+                    "initialize",
+                    {"protocolVersion": PROTOCOL_VERSION, "capabilities": {}, "clientInfo": CLIENT_INFO},
+                    timeout=self.request_timeout,
+                )
+                await transport.notify("notifications/initialized")
+                session = _ServerSession(transport, info or {})
+                self.sessions[server_name] = session
+                await self._discover_tools(server_name)
+            except Exception:
+                self.sessions.pop(server_name, None)
+                await transport.close()
+                raise
 
             logger.info(f"Server {server_name} initialized successfully")
-
-        except Exception as e:
-            logger.error(f"Error starting server {server_name}: {e}")
-            raise
+            return session
 
     async def _discover_tools(self, server_name: str):
-        """Discover available tools from a server."""
-        # This is a placeholder - in production, you'd call the server's list_tools
-        # For now, we'll register known tools based on server type
-
-        known_tools = {
-            "google-calendar": [
-                "list_calendars",
-                "list_events",
-                "create_event",
-                "update_event",
-                "delete_event",
-                "find_free_slots",
-                "check_conflicts",
-                "get_event_details",
-            ],
-            "google-tasks": [
-                "list_task_lists",
-                "list_tasks",
-                "create_task",
-                "update_task",
-                "delete_task",
-                "complete_task",
-                "search_tasks",
-                "get_task_details",
-            ],
-            "memory": [
-                "create_entity",
-                "search_nodes",
-                "create_relation",
-                "get_entity",
-                "delete_entity",
-            ],
-            "obsidian": [
-                "read_note",
-                "write_note",
-                "list_notes",
-                "search_notes",
-                "create_note",
-                "update_note",
-                "delete_note",
-            ],
-            "filesystem": [
-                "read_file",
-                "write_file",
-                "list_directory",
-                "delete_file",
-                "create_directory",
-            ],
-        }
-
-        tools = known_tools.get(server_name, [])
-        for tool_name in tools:
+        """Fetch (all pages of) the server's tool list and cache it."""
+        session = self.sessions[server_name]
+        tools: Dict[str, Dict[str, Any]] = {}
+        cursor: Optional[str] = None
+        while True:
+            params = {"cursor": cursor} if cursor else {}
+            result = await session.transport.request("tools/list", params, timeout=self.request_timeout) or {}
+            for tool in result.get("tools") or []:
+                name = tool.get("name")
+                if name:
+                    tools[name] = tool
+            cursor = result.get("nextCursor")
+            if not cursor:
+                break
+
+        for full_name in [n for n, t in self.available_tools.items() if t.get("server") == server_name]:
+            del self.available_tools[full_name]
+        for tool_name, tool in tools.items():
             full_name = f"{server_name}.{tool_name}"
             self.available_tools[full_name] = {
                 "server": server_name,
                 "tool_name": tool_name,
-                "description": f"{tool_name} from {server_name}",
+                "description": tool.get("description") or f"{tool_name} from {server_name}",
+                "input_schema": tool.get("inputSchema") or {},
             }
+        session.tools = tools
+        session.tools_stale = False
 
         logger.info(f"Discovered {len(tools)} tools from {server_name}")
 
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], *, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Call a tool from any MCP server.
 
         Args:
             tool_name: Full tool name (e.g., "google-calendar.list_events")
             arguments: Tool arguments
+            timeout: Request timeout in seconds (default: ``request_timeout``)
 
         Returns:
-            Tool result
+            Dict with ``success``, ``tool``, ``arguments``, ``result`` and (on failure) ``error``
         """
+        return await self._loop.run_async(self._call_tool(tool_name, arguments, timeout))
+
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
         # Extract server name from tool name (e.g., "google-calendar.list_events" -> "google-calendar")
-        server_name = tool_name.split(".", 1)[0]
-        
+        server_name, _, short_name = tool_name.partition(".")
+
         # Initialize server if needed (this will discover tools)
-        if server_name not in self.sessions:
-            await self._start_server(server_name)
-        
+        session = await self._start_server(server_name)
+        if session.tools_stale:
+            await self._discover_tools(server_name)
+
         # Now check if tool exists after server initialization
         if tool_name not in self.available_tools:
             raise ValueError(
-                f"Tool {tool_name} not found. Available tools: {list(self.available_tools.keys())}"
+                f"Tool {tool_name} not found. Available tools: {self.list_tools(server_name)}"
             )
 
-        tool_info = self.available_tools[tool_name]
-
         logger.info(f"Calling tool: {tool_name} with args: {arguments}")
 
-        # In production, this would use stdio transport to communicate with the server
-        # For now, return a placeholder
-        return {
-            "success": True,
-            "tool": tool_name,
-            "arguments": arguments,
-            "result": "Tool execution placeholder",
-        }
+        try:
+            result = await session.transport.request(
+                "tools/call",
+                {"name": short_name, "arguments": arguments or {}},
+                timeout=timeout or self.request_timeout,
+            ) or {}
+        except McpError as e:
+            return {"success": False, "tool": tool_name, "arguments": arguments, "result": None, "error": str(e)}
+
+        content = _content_value(result)
+        if result.get("isError"):
+            error = content if isinstance(content, str) else json.dumps(content, default=str)
+            return {"success": False, "tool": tool_name, "arguments": arguments, "result": content, "error": error}
+        return {"success": True, "tool": tool_name, "arguments": arguments, "result": content}
 
     def list_tools(self, server: Optional[str] = None) -> List[str]:
         """
@@ -232,9 +280,65 @@ class MCPClient:
 
     async def shutdown(self):
         """Shutdown all active server sessions."""
+        await self._loop.run_async(self._shutdown())
+
+    async def _shutdown(self) -> None:
         for server_name in list(self.sessions.keys()):
             logger.info(f"Shutting down server: {server_name}")
-            self.sessions.pop(server_name, None)
+            session = self.sessions.pop(server_name, None)
+            if session is not None:
+                await session.transport.close()
+
+    # ------------------------------------------------------------------
+    # Sync API (for tool functions running on worker threads)
+    # ------------------------------------------------------------------
+
+    def initialize_sync(self, servers: Optional[List[str]] = None, timeout: Optional[float] = None) -> None:
+        servers_to_init = list(self.servers.keys()) if servers is None else servers
+        self._loop.run(self._initialize(servers_to_init), timeout)
+
+    def list_tools_sync(self, server: str, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Start ``server`` if needed and return its tool descriptors."""
+        async def _list() -> List[Dict[str, Any]]:
+            session = await self._start_server(server)
+            if session.tools_stale:
+                await self._discover_tools(server)
+            return list(session.tools.values())
+
+        return self._loop.run(_list(), timeout or self.request_timeout)
+
+    def call_tool_sync(self, tool_name: str, arguments: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        timeout = timeout or self.request_timeout
+        # Allow for a cold server start on top of the request itself.
+        return self._loop.run(self._call_tool(tool_name, arguments, timeout), timeout * 2)
+
+    def shutdown_sync(self, timeout: float = 10.0) -> None:
+        self._loop.run(self._shutdown(), timeout)
+
+
+def _content_value(result: Dict[str, Any]) -> Any:
+    """Collapse a ``tools/call`` result into the most useful Python value."""
+    if result.get("structuredContent") is not None:
+        return result["structuredContent"]
+    content = result.get("content") or []
+    if content and all(isinstance(c, dict) and c.get("type") == "text" for c in content):
+        return "\n".join(str(c.get("text", "")) for c in content)
+    return content
+
+
+_shared_client: Optional[MCPClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_mcp_client() -> MCPClient:
+    """Process-wide client, so each configured server runs at most once."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = MCPClient()
+                register_shutdown(_shared_client._shutdown)
+    return _shared_client
 
 
 # Convenience functions for common operations
@@ -0,0 +1,324 @@
+"""
+MCP stdio transport.
+
+An MCP server is a child process speaking newline-delimited JSON-RPC 2.0 on
+stdin/stdout. ``StdioTransport`` owns one such process: a single reader task
+dispatches responses to the waiting request by ``id``, so any number of
+requests can be in flight over the same pipe. Server-initiated requests are
+answered with "method not found"; notifications go to an optional callback.
+
+All transports live on one long-lived background event loop
+(``get_background_loop()``), so synchronous callers never create or tear down
+event loops per call and subprocess handles always stay with the loop that
+created them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import itertools
+import json
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Tool results can be large; asyncio's default 64 KiB line limit is too small.
+_STREAM_LIMIT = 32 * 1024 * 1024
+
+
+class McpError(Exception):
+    """Error response from an MCP server, or a transport failure."""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class McpTransportClosed(McpError):
+    """The server process exited or the transport was closed."""
+
+
+# =============================================================================
+# Background event loop
+# =============================================================================
+
+class BackgroundLoop:
+    """An asyncio loop running forever on a daemon thread."""
+
+    def __init__(self, name: str = "mcp-loop"):
+        self._ready = threading.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def is_current(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the background loop and block for its result."""
+        if self.is_current():
+            raise RuntimeError("BackgroundLoop.run() called from the loop thread; await the coroutine instead")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(self, coro: Awaitable[T]) -> T:
+        """Await ``coro`` on the background loop from any other event loop."""
+        if self.is_current():
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+
+_background: Optional[BackgroundLoop] = None
+_background_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    global _background
+    if _background is None:
+        with _background_lock:
+            if _background is None:
+                _background = BackgroundLoop()
+    return _background
+
+
+# =============================================================================
+# Stdio transport
+# =============================================================================
+
+class StdioTransport:
+    """One MCP server process with multiplexed JSON-RPC over its stdio pipes."""
+
+    def __init__(
+        self,
+        command: str,
+        args: List[str],
+        env: Optional[Dict[str, str]] = None,
+        *,
+        name: str = "mcp",
+        on_notification: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ):
+        self.command = command
+        self.args = list(args)
+        self.env = dict(env or {})
+        self.name = name
+        self.on_notification = on_notification
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._stderr: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc is not None else None
+
+    @property
+    def is_alive(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None and not self._closed
+
+    async def start(self) -> None:
+        env = {**os.environ, **self.env}
+        self._proc = await asyncio.create_subprocess_exec(
+            self.command,
+            *self.args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            limit=_STREAM_LIMIT,
+        )
+        self._write_lock = asyncio.Lock()
+        self._reader = asyncio.create_task(self._read_loop(), name=f"mcp-reader:{self.name}")
+        self._stderr = asyncio.create_task(self._drain_stderr(), name=f"mcp-stderr:{self.name}")
+        logger.info(f"Started MCP server {self.name} (pid {self._proc.pid})")
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if not self.is_alive or self._proc.stdin is None:
+            raise McpTransportClosed(f"MCP server {self.name} is not running")
+        data = (json.dumps(message, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        async with self._write_lock:
+            try:
+                self._proc.stdin.write(data)
+                await self._proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as exc:
+                raise McpTransportClosed(f"MCP server {self.name} pipe closed: {exc}") from exc
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None, *, timeout: Optional[float] = 60.0) -> Any:
+        """Send a request and wait for its result (raises ``McpError`` on error responses)."""
+        request_id = next(self._ids)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        try:
+            await self._send(message)
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # Let the server know we gave up (best effort).
+            try:
+                await self.notify("notifications/cancelled", {"requestId": request_id, "reason": "timeout"})
+            except McpError:
+                pass
+            raise McpError(f"MCP request {method} to {self.name} timed out after {timeout}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+
+    async def _read_loop(self) -> None:
+        assert self._proc is not None and self._proc.stdout is not None
+        try:
+            while True:
+                try:
+                    line = await self._proc.stdout.readline()
+                except (asyncio.LimitOverrunError, ValueError) as exc:
+                    logger.warning(f"MCP server {self.name} sent an oversized message: {exc}")
+                    continue
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.debug(f"[{self.name}] non-JSON output: {line[:200]!r}")
+                    continue
+                if isinstance(message, dict):
+                    await self._dispatch(message)
+        finally:
+            self._fail_pending(McpTransportClosed(f"MCP server {self.name} exited"))
+
+    async def _dispatch(self, message: Dict[str, Any]) -> None:
+        if "method" in message:
+            if "id" in message:
+                # Server-to-client request (sampling, roots, ...): not supported.
+                await self._send({
+                    "jsonrpc": "2.0",
+                    "id": message["id"],
+                    "error": {"code": -32601, "message": f"Method not found: {message['method']}"},
+                })
+            elif self.on_notification is not None:
+                try:
+                    self.on_notification(message["method"], message.get("params") or {})
+                except Exception as exc:
+                    logger.debug(f"[{self.name}] notification handler failed: {exc}")
+            return
+        future = self._pending.get(message.get("id"))
+        if future is None or future.done():
+            return
+        if "error" in message:
+            err = message.get("error") or {}
+            future.set_exception(McpError(str(err.get("message", "MCP error")), err.get("code"), err.get("data")))
+        else:
+            future.set_result(message.get("result"))
+
+    async def _drain_stderr(self) -> None:
+        assert self._proc is not None and self._proc.stderr is not None
+        while True:
+            try:
+                line = await self._proc.stderr.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                continue
+            if not line:
+                return
+            logger.debug(f"[{self.name} stderr] {line.decode('utf-8', errors='replace').rstrip()}")
+
+    def _fail_pending(self, exc: Exception) -> None:
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(exc)
+        self._pending.clear()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Close stdin, then terminate and finally kill the process if it lingers."""
+        if self._closed:
+            return
+        self._closed = True
+        proc = self._proc
+        if proc is None:
+            return
+        if proc.returncode is None:
+            try:
+                if proc.stdin is not None:
+                    proc.stdin.close()
+                await asyncio.wait_for(proc.wait(), timeout / 2)
+            except (asyncio.TimeoutError, OSError):
+                try:
+                    proc.terminate()
+                    await asyncio.wait_for(proc.wait(), timeout / 2)
+                except (asyncio.TimeoutError, ProcessLookupError):
+                    try:
+                        proc.kill()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+        for task in (self._reader, self._stderr):
+            if task is not None and not task.done():
+                task.cancel()
+        self._fail_pending(McpTransportClosed(f"MCP server {self.name} closed"))
+        logger.info(f"Stopped MCP server {self.name}")
+
+
+def _shutdown_background() -> None:
+    loop = _background
+    if loop is None or loop.loop is None or not loop.loop.is_running():
+        return
+    for hook in list(_shutdown_hooks):
+        try:
+            loop.run(hook(), timeout=10)
+        except Exception:
+            pass
+
+
+_shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
+
+def register_shutdown(hook: Callable[[], Awaitable[None]]) -> None:
+    """Run ``hook()`` on the background loop at interpreter exit."""
+    _shutdown_hooks.append(hook)
+
+
+atexit.register(_shutdown_background)
+
+
+__all__ = [
+    "BackgroundLoop",
+    "McpError",
+    "McpTransportClosed",
+    "StdioTransport",
+    "get_background_loop",
+    "register_shutdown",
+]
@@ -140,11 +140,13 @@ def mode_autonomous(task: str, *, unsafe_mode: bool = False) -> None:
         llm_heartbeat_seconds=_int_env("AUTO_LLM_HEARTBEAT_SECONDS", profile.heartbeat_s),
         llm_plan_timeout_seconds=_int_env("AUTO_LLM_PLAN_TIMEOUT_SECONDS", profile.plan_timeout_s),
         llm_plan_retry_timeout_seconds=_int_env("AUTO_LLM_PLAN_RETRY_TIMEOUT_SECONDS", profile.plan_retry_timeout_s),
+        speculative_planning=_bool_env("AUTO_SPECULATIVE_PLANNING", False),
     )
     planner_cfg = PlannerConfig(
         mode=planner_mode,  # type: ignore[arg-type]
         num_candidates=_int_env("AUTO_NUM_CANDIDATES", 1),
         max_plan_steps=_int_env("AUTO_MAX_PLAN_STEPS", 6),
+        parallel_llm_calls=_int_env("AUTO_PARALLEL_LLM_CALLS", 1),
     )
 
     llm = None
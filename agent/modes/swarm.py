@@ -42,9 +42,11 @@ from agent.autonomous.repo_scan import RepoScanner, is_repo_review_task
 from agent.config.profile import resolve_profile
 from agent.autonomous.runner import AgentRunner
 from agent.autonomous.task_orchestrator import TaskOrchestrator
+from agent.autonomous.trace import JsonlTracer
 from agent.llm import CodexCliAuthError, CodexCliClient, CodexCliNotFoundError  
 from agent.llm.codex_cli_client import PROFILE_MAP as CODEX_PROFILE_MAP
 from agent.llm.codex_cli_client import call_codex
+from agent.llm import ledger as llm_ledger
 from agent.llm import schemas as llm_schemas
 
 logger = logging.getLogger(__name__)
@@ -134,6 +136,12 @@ def _current_model_effort(agent_label: str | None = None) -> tuple[str, str]:
     return _resolve_model_effort_for(label)
 
 
+def _track_llm(agent_label: str, **fields: Any):
+    """Ledger entry for a swarm agent's LLM call (see ``agent.llm.ledger``)."""
+    model, effort = _current_model_effort(agent_label)
+    return llm_ledger.track(agent_label, source="swarm", model=model, effort=effort, **fields)
+
+
 def _agent_log_dir(repo_root: Path) -> Path:
     return repo_root / "agent" / "logs"
 
@@ -1516,7 +1524,7 @@ Your reasoning must stay strictly within your Phase 1 model.
         started = time.monotonic()
         with _temporary_env_var("CODEX_AGENT_NAME", f"{agent_name}-Model"), _temporary_env_var(
             "CODEX_ENABLE_WEB_SEARCH", None
-        ):
+        ), _track_llm(f"{agent_name}-Model", run_id=run_root.name):
             _debug_agent_banner(f"{agent_name}-Model")
             model_output = call_codex(
                 prompt=phase1_prompt,
@@ -1554,7 +1562,7 @@ Your reasoning must stay strictly within your Phase 1 model.
         started = time.monotonic()
         with _temporary_env_var("CODEX_AGENT_NAME", f"{agent_name}-Reasoning"), _temporary_env_var(
             "CODEX_ENABLE_WEB_SEARCH", "1" if enable_search else None
-        ):
+        ), _track_llm(f"{agent_name}-Reasoning", run_id=run_root.name):
             _debug_agent_banner(f"{agent_name}-Reasoning")
             findings = call_codex(
                 prompt=phase2_prompt,
@@ -1619,6 +1627,17 @@ Your reasoning must stay strictly within your Phase 1 model.
         if cached_output is not None:
             duration = time.monotonic() - started
             model, effort_used = _current_model_effort(label)
+            llm_ledger.record(
+                label,
+                source="swarm",
+                run_id=run_root.name,
+                model=model,
+                effort=effort_used,
+                prompt_chars=len(compressed),
+                response_chars=len(cached_output),
+                cached=True,
+                meta=cache_meta or {},
+            )
             _write_agent_log(
                 repo_root,
                 label,
@@ -1639,10 +1658,13 @@ Your reasoning must stay strictly within your Phase 1 model.
             return cached_output
         with _temporary_reasoning_effort(effort), _temporary_env_var(
             "CODEX_ENABLE_WEB_SEARCH", "1" if enable_search else None
-        ), _temporary_env_var("CODEX_AGENT_NAME", label):
+        ), _temporary_env_var("CODEX_AGENT_NAME", label), _track_llm(label, run_id=run_root.name) as call:
             _debug_agent_banner(label)
             llm = CodexCliClient.from_env(workdir=repo_root, log_dir=run_root / log_name)
             data = llm.reason_json(compressed, schema_path=llm_schemas.CHAT_RESPONSE, timeout_seconds=timeout)
+            usage = data.get("usage") if isinstance(data, dict) else None
+            if isinstance(usage, dict) and usage.get("total_tokens"):
+                call.tokens = float(usage["total_tokens"])
         response = (data.get("response") or "").strip()
         duration = time.monotonic() - started
         model, effort_used = _current_model_effort(label)
@@ -1940,6 +1962,16 @@ Your reasoning must stay strictly within your Phase 1 model.
             except Exception:
                 cached_bundle = {"model": {"raw_model": static_cached}, "findings": static_cached}
             agent_models["Static"] = cached_bundle.get("model", {})
+            llm_ledger.record(
+                "Static",
+                source="swarm",
+                run_id=run_root.name,
+                model=_current_model_effort("Static")[0],
+                effort=_current_model_effort("Static")[1],
+                prompt_chars=len(prompt),
+                response_chars=len(static_cached),
+                cached=True,
+            )
             _write_agent_log(
                 repo_root,
                 "Static",
@@ -2658,6 +2690,14 @@ class Subtask:
     notes: str
 
 
+def _ready_wave(remaining: Dict[str, Subtask], completed: set[str]) -> List[Subtask]:
+    """Next batch to run: subtasks whose deps are done (all remaining ones on a cycle)."""
+    ready = [s for s in remaining.values() if all(d in completed for d in s.depends_on)]
+    if not ready:
+        ready = list(remaining.values())
+    return sorted(ready, key=lambda s: s.id)
+
+
 def _decompose(
     llm: CodexCliClient,
     objective: str,
@@ -2919,11 +2959,9 @@ def _write_result(run_dir: Path, payload: Dict[str, Any]) -> None:
 
 
 def _append_trace_event(run_dir: Path, event: Dict[str, Any]) -> None:
+    # One-off events on error paths: write through without starting a writer thread.
     try:
-        run_dir.mkdir(parents=True, exist_ok=True)
-        path = run_dir / "trace.jsonl"
-        with path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(event, ensure_ascii=False) + "\n")
+        JsonlTracer(run_dir / "trace.jsonl", buffered=False).log(event)
     except Exception:
         pass
 
@@ -3159,10 +3197,7 @@ def mode_swarm(
     orchestrator = TaskOrchestrator()
 
     while remaining:
-        ready = [s for s in remaining.values() if all(d in completed for d in s.depends_on)]
-        if not ready:
-            ready = list(remaining.values())
-        ready = sorted(ready, key=lambda s: s.id)
+        ready = _ready_wave(remaining, completed)
 
         with ThreadPoolExecutor(max_workers=workers) as executor:
             future_map: Dict[Any, tuple[Subtask, Path]] = {}
@@ -5,6 +5,7 @@ Deterministic Playwright step executor (no LLM, no OpenAI).
 """
 
 import asyncio
+import concurrent.futures
 import os
 import time
 from pathlib import Path
@@ -12,6 +13,12 @@ from typing import Any, Dict, List, Optional
 
 from .base import ToolAdapter, ToolResult
 from agent.memory.credentials import CredentialError, build_login_steps
+from agent.autonomous.cancellation import wait_future
+from agent.tools.browser_pool import _find_chromium_executable, get_browser_pool, pool_enabled
+
+# Upper bound for one pooled browser task (inputs["timeout_seconds"] overrides);
+# generous because steps can wait for a manual login.
+DEFAULT_TASK_TIMEOUT_SECONDS = 900.0
 
 
 def _safe_env(value: str) -> str:
@@ -30,12 +37,12 @@ def _mk_evidence(run_path: Optional[str]) -> Path:
     return evidence_dir
 
 
-def _find_chromium_executable() -> Optional[str]:
-    base = Path(os.getenv("USERPROFILE", "")) / "AppData" / "Local" / "ms-playwright"
-    if base.is_dir():
-        for candidate in base.rglob("chrome.exe"):
-            return str(candidate)
-    return None
+def _resolve_headless(headless_override: Any) -> bool:
+    if isinstance(headless_override, str):
+        return headless_override.strip().lower() not in {"false", "0", "no", "off"}
+    if isinstance(headless_override, bool):
+        return headless_override
+    return os.getenv("BROWSER_HEADLESS", "true").lower() != "false"
 
 
 class BrowserTool(ToolAdapter):
@@ -312,6 +319,45 @@ class BrowserTool(ToolAdapter):
         except ImportError as exc:
             return ToolResult(False, error=f"Playwright not installed: {exc}")
 
+        headless = _resolve_headless(headless_override)
+
+        if pool_enabled():
+            pool = get_browser_pool(headless=headless)
+            # Contexts are reused per saved session (or login site), so a warm,
+            # already-authenticated context can skip the login flow.
+            key = str(session_state_path) if session_state_path else (f"login:{login_site}" if login_site else None)
+
+            async def pooled_runner() -> ToolResult:
+                lease = await pool.acquire(key, storage_state=session_state_path)
+                result = ToolResult(False, error="browser task did not run")
+                try:
+                    if lease.reused and login_steps and user_steps:
+                        resume = ([{"action": "goto", "url": start_url}] if start_url else []) + list(user_steps)
+                        result = await self._run_steps(lease.context, lease.page, resume, run_path, session_state_path)
+                        result.metadata = {**(result.metadata or {}), "login_skipped": True}
+                        if not result.success:
+                            # Earlier steps may already have clicked or submitted; running
+                            # login + steps again would repeat them. The failed context is
+                            # dropped below, so a retry logs in on a fresh one.
+                            result.error = f"{result.error or 'browser steps failed'} (reused session; steps not re-run)"
+                        return result
+                    result = await self._run_steps(lease.context, lease.page, steps, run_path, session_state_path)
+                    return result
+                finally:
+                    # Only a context that just completed its task cleanly is kept warm.
+                    await pool.release(lease, reusable=result.success)
+
+            timeout = float(inputs.get("timeout_seconds") or DEFAULT_TASK_TIMEOUT_SECONDS)
+            future = pool.loop.submit(pooled_runner())
+            try:
+                return wait_future(future, timeout)
+            except concurrent.futures.TimeoutError:
+                # Cancelling the task runs pooled_runner's finally, which releases the lease.
+                future.cancel()
+                return ToolResult(False, error=f"browser task timed out after {timeout:.0f}s")
+            except Exception as exc:
+                return ToolResult(False, error=str(exc))
+
         try:
             loop = asyncio.get_event_loop()
         except RuntimeError:
@@ -320,18 +366,6 @@ class BrowserTool(ToolAdapter):
 
         async def runner():
             async with async_playwright() as p:
-                if isinstance(headless_override, str):
-                    headless_override_bool = headless_override.strip().lower() not in {"false", "0", "no", "off"}
-                elif isinstance(headless_override, bool):
-                    headless_override_bool = headless_override
-                else:
-                    headless_override_bool = None
-
-                headless = (
-                    headless_override_bool
-                    if headless_override_bool is not None
-                    else os.getenv("BROWSER_HEADLESS", "true").lower() != "false"
-                )
                 launch_kwargs = {"headless": headless}
                 if not headless:
                     launch_kwargs["slow_mo"] = 100
@@ -340,8 +374,8 @@ class BrowserTool(ToolAdapter):
                     launch_kwargs["executable_path"] = exe
                 browser = await p.chromium.launch(**launch_kwargs)
                 context_kwargs = {"accept_downloads": True}
-                if session_state_path and Path(session_state_path).is_file():   
-                    context_kwargs["storage_state"] = str(session_state_path)   
+                if session_state_path and Path(session_state_path).is_file():
+                    context_kwargs["storage_state"] = str(session_state_path)
                 context = await browser.new_context(**context_kwargs)
                 page = await context.new_page()
                 result = await self._run_steps(context, page, steps, run_path, session_state_path)
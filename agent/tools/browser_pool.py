@@ -0,0 +1,396 @@
+"""
+Warm Playwright browser pool.
+
+Launching Chromium takes seconds, and so does logging in again. The pool keeps
+up to ``size`` browser processes running on a dedicated background event loop
+and hands out isolated browser contexts:
+
+  - ``acquire()`` without a key gives a fresh context, closed on release
+  - ``acquire(key=...)`` (a ``session_state_path`` or login site) reuses the
+    idle context last released under that key, cookies and all; a new keyed
+    context is seeded from ``storage_state`` when that file exists
+
+Browsers are recycled (drained, then closed) after ``max_browser_age_s`` or
+``max_browser_uses`` contexts; idle contexts are dropped after
+``max_context_age_s`` or when their JS heap exceeds ``max_context_heap_mb``.
+
+The API is async and must run on the pool's loop: from synchronous code use
+``pool.run(coro)``, and ``LoopBound`` to drive a leased page through the
+familiar sync-style calls (``page.goto(...)``, ``page.locator(...).count()``).
+``LoopBound`` calls are cancelled on the loop when the run's cancellation token
+fires, so an abandoned ``goto`` or wait stops instead of holding the lease.
+
+Environment overrides:
+  AGENT_BROWSER_POOL          0 disables pooling in the web tools (default: 1)
+  AGENT_BROWSER_POOL_SIZE     warm browser processes per mode (default: 2)
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from agent.autonomous.cancellation import wait_future
+from agent.mcp.transport import BackgroundLoop
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BrowserFactory = Callable[[bool], Awaitable[Any]]
+
+_HEAP_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+
+def _find_chromium_executable() -> Optional[str]:
+    base = Path(os.getenv("USERPROFILE", "")) / "AppData" / "Local" / "ms-playwright"
+    if base.is_dir():
+        for candidate in base.rglob("chrome.exe"):
+            return str(candidate)
+    return None
+
+
+def pool_enabled() -> bool:
+    return os.getenv("AGENT_BROWSER_POOL", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+@dataclass
+class _BrowserSlot:
+    browser: Any
+    launched_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    open_contexts: int = 0  # leased plus idle; the browser closes at zero once draining
+    leased: int = 0
+    draining: bool = False
+
+
+@dataclass
+class PooledContext:
+    """A leased browser context and its first page."""
+
+    context: Any
+    page: Any
+    key: Optional[str]
+    slot: _BrowserSlot = field(repr=False)
+    created_at: float = field(default_factory=time.monotonic)
+    reused: bool = False
+    uses: int = 1
+
+
+class BrowserPool:
+    """Warm browsers with per-task contexts, reused by key."""
+
+    def __init__(
+        self,
+        *,
+        size: int = 2,
+        headless: bool = True,
+        max_browser_age_s: float = 1800.0,
+        max_browser_uses: int = 100,
+        max_context_age_s: float = 900.0,
+        max_context_heap_mb: float = 512.0,
+        max_idle_contexts: int = 8,
+        browser_factory: Optional[BrowserFactory] = None,
+    ):
+        self.size = max(1, size)
+        self.headless = headless
+        self.max_browser_age_s = max_browser_age_s
+        self.max_browser_uses = max(1, max_browser_uses)
+        self.max_context_age_s = max_context_age_s
+        self.max_context_heap_mb = max_context_heap_mb
+        self.max_idle_contexts = max(0, max_idle_contexts)
+        self._factory = browser_factory
+        self._playwright: Any = None
+        self._slots: List[_BrowserSlot] = []
+        self._idle: "OrderedDict[str, PooledContext]" = OrderedDict()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[BackgroundLoop] = None
+        self._loop_guard = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "launches": 0,
+            "contexts_created": 0,
+            "contexts_reused": 0,
+            "contexts_recycled": 0,
+            "browsers_recycled": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Sync bridge
+    # ------------------------------------------------------------------
+
+    @property
+    def loop(self) -> BackgroundLoop:
+        if self._loop is None:
+            with self._loop_guard:
+                if self._loop is None:
+                    self._loop = BackgroundLoop(name="browser-pool")
+        return self._loop
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the pool's loop and wait for it (sync callers)."""
+        return self.loop.run(coro, timeout)
+
+    # ------------------------------------------------------------------
+    # Browsers
+    # ------------------------------------------------------------------
+
+    async def _launch(self) -> _BrowserSlot:
+        if self._factory is not None:
+            browser = await self._factory(self.headless)
+        else:
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+            launch_kwargs: Dict[str, Any] = {"headless": self.headless}
+            if not self.headless:
+                launch_kwargs["slow_mo"] = 100
+            exe = _find_chromium_executable()
+            if exe:
+                launch_kwargs["executable_path"] = exe
+            browser = await self._playwright.chromium.launch(**launch_kwargs)
+        self.stats["launches"] += 1
+        slot = _BrowserSlot(browser=browser)
+        self._slots.append(slot)
+        return slot
+
+    def _expired(self, slot: _BrowserSlot) -> bool:
+        if slot.draining:
+            return True
+        too_old = time.monotonic() - slot.launched_at > self.max_browser_age_s
+        connected = getattr(slot.browser, "is_connected", None)
+        if too_old or slot.uses >= self.max_browser_uses or (callable(connected) and not connected()):
+            slot.draining = True
+        return slot.draining
+
+    async def _pick_slot(self) -> _BrowserSlot:
+        live = [s for s in self._slots if not self._expired(s)]
+        if not live or (len(live) < self.size and min(s.leased for s in live) > 0):
+            return await self._launch()
+        return min(live, key=lambda s: s.leased)
+
+    async def _reap(self) -> None:
+        for slot in list(self._slots):
+            if slot.draining and slot.open_contexts <= 0:
+                self._slots.remove(slot)
+                self.stats["browsers_recycled"] += 1
+                try:
+                    await slot.browser.close()
+                except Exception:
+                    pass
+
+    async def warm(self, count: Optional[int] = None) -> None:
+        """Launch browsers up front so the first task does not pay for it."""
+        async with self._guard():
+            target = min(self.size, count or self.size)
+            while len([s for s in self._slots if not self._expired(s)]) < target:
+                await self._launch()
+
+    # ------------------------------------------------------------------
+    # Contexts
+    # ------------------------------------------------------------------
+
+    def _guard(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def acquire(self, key: Optional[str] = None, *, storage_state: Optional[str] = None) -> PooledContext:
+        async with self._guard():
+            if key and key in self._idle:
+                pooled = self._idle.pop(key)
+                if self._context_fresh(pooled) and not self._expired(pooled.slot):
+                    page_closed = getattr(pooled.page, "is_closed", None)
+                    if callable(page_closed) and page_closed():
+                        pooled.page = await pooled.context.new_page()
+                    pooled.reused = True
+                    pooled.uses += 1
+                    pooled.slot.leased += 1
+                    self.stats["contexts_reused"] += 1
+                    return pooled
+                await self._discard(pooled)
+
+            slot = await self._pick_slot()
+            kwargs: Dict[str, Any] = {"accept_downloads": True}
+            if storage_state and Path(storage_state).is_file():
+                kwargs["storage_state"] = str(storage_state)
+            context = await slot.browser.new_context(**kwargs)
+            slot.uses += 1
+            slot.open_contexts += 1
+            slot.leased += 1
+            try:
+                page = await context.new_page()
+            except Exception:
+                slot.open_contexts -= 1
+                slot.leased -= 1
+                await context.close()
+                raise
+            self.stats["contexts_created"] += 1
+            return PooledContext(context=context, page=page, key=key, slot=slot)
+
+    async def release(self, pooled: PooledContext, *, reusable: bool = True) -> None:
+        keep = bool(reusable and pooled.key and self.max_idle_contexts and self._context_fresh(pooled))
+        if keep:
+            keep = await self._heap_ok(pooled)
+        async with self._guard():
+            pooled.slot.leased -= 1
+            if keep and not self._expired(pooled.slot):
+                previous = self._idle.pop(pooled.key, None)
+                if previous is not None and previous is not pooled:
+                    await self._discard(previous)
+                self._idle[pooled.key] = pooled
+                while len(self._idle) > self.max_idle_contexts:
+                    _, oldest = self._idle.popitem(last=False)
+                    await self._discard(oldest)
+            else:
+                await self._discard(pooled)
+            await self._reap()
+
+    @asynccontextmanager
+    async def lease(self, key: Optional[str] = None, *, storage_state: Optional[str] = None) -> AsyncIterator[PooledContext]:
+        pooled = await self.acquire(key, storage_state=storage_state)
+        ok = False
+        try:
+            yield pooled
+            ok = True
+        finally:
+            await self.release(pooled, reusable=ok)
+
+    def _context_fresh(self, pooled: PooledContext) -> bool:
+        return time.monotonic() - pooled.created_at <= self.max_context_age_s
+
+    async def _heap_ok(self, pooled: PooledContext) -> bool:
+        try:
+            heap = await pooled.page.evaluate(_HEAP_JS)
+        except Exception:
+            return True
+        return float(heap or 0) / (1024 * 1024) <= self.max_context_heap_mb
+
+    async def _discard(self, pooled: PooledContext) -> None:
+        pooled.slot.open_contexts -= 1
+        self.stats["contexts_recycled"] += 1
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Shutdown
+    # ------------------------------------------------------------------
+
+    async def close(self) -> None:
+        async with self._guard():
+            while self._idle:
+                _, pooled = self._idle.popitem(last=False)
+                await self._discard(pooled)
+            for slot in self._slots:
+                try:
+                    await slot.browser.close()
+                except Exception:
+                    pass
+            self._slots.clear()
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "browsers": len(self._slots),
+            "idle_contexts": len(self._idle),
+            "open_contexts": sum(s.open_contexts for s in self._slots),
+            "leased_contexts": sum(s.leased for s in self._slots),
+        }
+
+
+class LoopBound:
+    """Blocking proxy for a Playwright async object owned by the pool's loop.
+
+    Method calls run on the loop and are awaited there; Playwright objects in
+    results or attributes (locators, ``page.mouse``) come back wrapped too. A
+    call in flight is cancelled when the current cancellation token fires.
+    """
+
+    __slots__ = ("_target", "_pool")
+
+    def __init__(self, target: Any, pool: BrowserPool):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_pool", pool)
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._target, name)
+        if not callable(value):
+            return self._wrap(value)
+
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            async def _invoke() -> Any:
+                result = value(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+
+            return self._wrap(wait_future(self._pool.loop.submit(_invoke())))
+
+        return _call
+
+    def _wrap(self, value: Any) -> Any:
+        if type(value).__module__.startswith("playwright."):
+            return LoopBound(value, self._pool)
+        return value
+
+    def __repr__(self) -> str:
+        return f"LoopBound({self._target!r})"
+
+
+_pools: Dict[bool, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """The shared pool for ``headless`` (headed and headless browsers never mix)."""
+    pool = _pools.get(headless)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(headless)
+            if pool is None:
+                try:
+                    size = int(os.getenv("AGENT_BROWSER_POOL_SIZE") or 2)
+                except ValueError:
+                    size = 2
+                pool = BrowserPool(size=size, headless=headless)
+                _pools[headless] = pool
+    return pool
+
+
+def _shutdown_pools() -> None:
+    for pool in list(_pools.values()):
+        if pool._loop is None:
+            continue
+        try:
+            pool.run(pool.close(), timeout=10)
+        except Exception:
+            pass
+
+
+atexit.register(_shutdown_pools)
+
+
+__all__ = [
+    "BrowserPool",
+    "LoopBound",
+    "PooledContext",
+    "get_browser_pool",
+    "pool_enabled",
+]
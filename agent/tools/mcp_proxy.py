@@ -5,10 +5,12 @@ This module provides a thin wrapper around agent/mcp/client.py that:
 1. Discovers available MCP tools at initialization
 2. Exposes them as ToolSpec objects
 3. Executes MCP tool calls and returns ToolResult objects
+
+Calls go through the shared MCP client, whose servers run as persistent
+processes driven from one background event loop.
 """
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import Any, Dict, List, Optional
 
@@ -330,8 +332,8 @@ class McpProxy:
     3. Routes tool calls to the appropriate MCP server
     """
 
-    def __init__(self):
-        self._client = None
+    def __init__(self, client=None):
+        self._client = client
         self._tools: Dict[str, McpToolSpec] = {}
         self._initialized = False
 
@@ -357,13 +359,14 @@ class McpProxy:
         self._load_tool_specs()
 
         # Try to import and initialize MCP client
-        try:
-            from agent.mcp.client import MCPClient
-            self._client = MCPClient()
-            logger.info(f"MCP client loaded with {len(self._client.servers)} server configs")
-        except Exception as e:
-            logger.warning(f"Could not initialize MCP client: {e}")
-            self._client = None
+        if self._client is None:
+            try:
+                from agent.mcp.client import get_mcp_client
+                self._client = get_mcp_client()
+                logger.info(f"MCP client loaded with {len(self._client.servers)} server configs")
+            except Exception as e:
+                logger.warning(f"Could not initialize MCP client: {e}")
+                self._client = None
 
         self._initialized = True
         logger.info(f"MCP proxy initialized with {len(self._tools)} tool specs")
@@ -375,19 +378,29 @@ class McpProxy:
         if self._client:
             try:
                 await self._client.initialize(servers)
-                # Update tool list from actual server discovery
-                for tool_name, tool_info in self._client.available_tools.items():
-                    if tool_name not in self._tools:
-                        server = tool_info.get("server", "unknown")
-                        self._tools[tool_name] = McpToolSpec(
-                            name=tool_info.get("tool_name", tool_name),
-                            description=tool_info.get("description", ""),
-                            input_schema={},
-                            server_name=server,
-                        )
+                self._merge_discovered_tools()
             except Exception as e:
                 logger.error(f"Failed to initialize MCP servers: {e}")
 
+    def _merge_discovered_tools(self) -> None:
+        """Replace static definitions with what the running servers advertise."""
+        for tool_name, tool_info in self._client.available_tools.items():
+            server = tool_info.get("server", "unknown")
+            self._tools[tool_name] = McpToolSpec(
+                name=tool_info.get("tool_name", tool_name),
+                description=tool_info.get("description", ""),
+                input_schema=tool_info.get("input_schema") or {},
+                server_name=server,
+            )
+
+    def _is_known(self, tool_name: str) -> bool:
+        """Known statically, discovered, or on a configured server not started yet."""
+        return (
+            tool_name in self._tools
+            or tool_name in self._client.available_tools
+            or tool_name.partition(".")[0] in self._client.servers
+        )
+
     def get_tool_specs(self) -> List[ToolSpec]:
         """Get all available MCP tools as ToolSpec objects."""
         if not self._initialized:
@@ -430,28 +443,16 @@ class McpProxy:
         if not self._initialized:
             self.initialize()
 
-        if tool_name not in self._tools:
-            return ToolResult.failure(f"MCP tool not found: {tool_name}")
-
         if self._client is None:
             return ToolResult.failure("MCP client not available")
 
+        if not self._is_known(tool_name):
+            return ToolResult.failure(f"MCP tool not found: {tool_name}")
+
         try:
-            # Run async call in event loop
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # We're already in an async context
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as pool:
-                    future = pool.submit(
-                        asyncio.run,
-                        self._client.call_tool(tool_name, args)
-                    )
-                    result = future.result(timeout=60)
-            else:
-                result = loop.run_until_complete(
-                    self._client.call_tool(tool_name, args)
-                )
+            # Blocks this thread only; the call runs on the client's background loop.
+            result = self._client.call_tool_sync(tool_name, args)
+            self._merge_discovered_tools()
 
             if isinstance(result, dict):
                 success = result.get("success", False)
@@ -481,14 +482,15 @@ class McpProxy:
         if not self._initialized:
             self.initialize()
 
-        if tool_name not in self._tools:
-            return ToolResult.failure(f"MCP tool not found: {tool_name}")
-
         if self._client is None:
             return ToolResult.failure("MCP client not available")
 
+        if not self._is_known(tool_name):
+            return ToolResult.failure(f"MCP tool not found: {tool_name}")
+
         try:
             result = await self._client.call_tool(tool_name, args)
+            self._merge_discovered_tools()
 
             if isinstance(result, dict):
                 success = result.get("success", False)
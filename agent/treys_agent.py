@@ -15,7 +15,7 @@ import sys
 import threading
 import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
 try:
     from colorama import Fore, Style, init as color_init
@@ -37,10 +37,12 @@ REPO_ROOT = BASE_DIR.parent
 # Ensure imports resolve to the repo-root `agent` package when run from `...\\agent`.
 sys.path.insert(0, str(REPO_ROOT))
 
-from agent.modes.execute import load_playbooks
-from agent.mcp.client import MCPClient
-from agent.integrations.calendar_helper import CalendarHelper
-from agent.integrations.tasks_helper import TasksHelper
+# MCP and the Google helpers are imported by _lazy_init_mcp(); the playbook
+# loader by the functions that use it. None of them are needed for the prompt.
+if TYPE_CHECKING:
+    from agent.integrations.calendar_helper import CalendarHelper
+    from agent.integrations.tasks_helper import TasksHelper
+    from agent.mcp.client import MCPClient
 
 logger = logging.getLogger(__name__)
 
@@ -1397,7 +1399,11 @@ async def _lazy_init_mcp() -> None:
     global _mcp_client, _calendar_helper, _tasks_helper
     if _mcp_client is not None:
         return  # Already initialized
-    
+
+    from agent.integrations.calendar_helper import CalendarHelper
+    from agent.integrations.tasks_helper import TasksHelper
+    from agent.mcp.client import MCPClient
+
     _mcp_client = MCPClient()
     # Initialize MCP servers lazily (on first use) instead of at startup
     # This improves boot time - servers will initialize when first accessed
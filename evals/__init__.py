@@ -12,6 +12,11 @@ Usage:
 
     # Run all evals
     results = run_all_evals()
+
+    # Run the security evals in 4 isolated processes, 60s per scenario
+    results = run_all_evals(categories=["security"], workers=4, timeout=60)
+
+From the shell: ``python -m evals -j 4 --shard 1/2`` (see ``evals/__main__.py``).
 """
 
 from .runner import EvalRunner, EvalResult, run_eval, run_all_evals
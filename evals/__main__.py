@@ -0,0 +1,58 @@
+"""
+Run the eval suite.
+
+Usage:
+    python -m evals                          # all scenarios, serially
+    python -m evals -j 4 --timeout 60        # 4 isolated workers
+    python -m evals -c security -c memory    # only these categories
+    python -m evals --shard 2/4              # second quarter of the suite (CI)
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from .runner import DEFAULT_TIMEOUT_SECONDS, EvalRunner, EvalStatus
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="evals", description="Run agent eval scenarios")
+    parser.add_argument("-c", "--category", action="append", dest="categories", help="only run this category (repeatable)")
+    parser.add_argument("-k", "--scenario", action="append", dest="scenario_ids", help="only run this scenario id (repeatable)")
+    parser.add_argument("--shard", default=None, help="run slice i of n, e.g. 1/4")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="scenarios to run in parallel (isolated processes)")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help=f"per-scenario timeout in seconds (default {DEFAULT_TIMEOUT_SECONDS:.0f} with -j > 1)",
+    )
+    parser.add_argument("--list", action="store_true", help="print the selected scenarios and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    runner = EvalRunner()
+    if args.list:
+        scenarios = runner.load_scenarios()
+        for sid in runner.select(categories=args.categories, scenario_ids=args.scenario_ids, shard=args.shard):
+            print(f"{scenarios[sid].category:12} {sid}")
+        return 0
+
+    timeout = args.timeout
+    if timeout is None and args.workers > 1:
+        timeout = DEFAULT_TIMEOUT_SECONDS
+    results = runner.run_all(
+        categories=args.categories,
+        scenario_ids=args.scenario_ids,
+        shard=args.shard,
+        workers=args.workers,
+        timeout=timeout,
+    )
+    runner.print_summary(results)
+    return 1 if any(r.status in (EvalStatus.FAILED, EvalStatus.ERROR) for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,23 +3,75 @@ Eval Runner - Execute and validate agent scenarios.
 
 This module runs predefined scenarios to test agent behavior.
 Results are stored for regression tracking.
+
+Scenarios run in-process one after another by default. With ``workers > 1``
+or a ``timeout``, each scenario runs in its own child process with a private
+temp dir and memory DB, and a scenario that overruns its timeout is killed
+and reported as an error instead of blocking the rest of the suite.
 """
 from __future__ import annotations
 
 import json
 import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from multiprocessing.connection import wait as wait_connections
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 EVALS_DIR = Path(__file__).parent
 SCENARIOS_DIR = EVALS_DIR / "scenarios"
 RESULTS_DIR = EVALS_DIR / "results"
+REPO_ROOT = EVALS_DIR.parent
+
+DEFAULT_TIMEOUT_SECONDS = 120.0
+
+
+def scenario_category(scenario_id: str) -> str:
+    """Category of a scenario id: its prefix before the first underscore."""
+    return scenario_id.split("_", 1)[0] if "_" in scenario_id else "general"
+
+
+def parse_shard(spec: Union[str, Tuple[int, int], None]) -> Optional[Tuple[int, int]]:
+    """Parse ``"i/n"`` (1-based, e.g. ``"2/4"``) into ``(i, n)``."""
+    if spec is None or spec == "":
+        return None
+    if isinstance(spec, tuple):
+        index, count = spec
+    else:
+        try:
+            index_s, count_s = str(spec).split("/", 1)
+            index, count = int(index_s), int(count_s)
+        except ValueError as exc:
+            raise ValueError(f"Invalid shard {spec!r}; expected 'i/n', e.g. '1/4'") from exc
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {index}/{count}; need 1 <= i <= n")
+    return index, count
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        proc = subprocess.run(
+            ["git", "-C", str(REPO_ROOT), "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if proc.returncode == 0:
+            return (proc.stdout or "").strip() or None
+    except Exception:
+        pass
+    return None
 
 
 class EvalStatus(str, Enum):
@@ -42,12 +94,22 @@ class EvalResult:
     error: Optional[str] = None
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
     trace: List[Dict[str, Any]] = field(default_factory=list)
+    category: str = ""
+    # Seconds per phase ("setup", "run", plus "llm"/"tools" where a scenario
+    # marks them). Phases nest, so "llm" and "tools" are included in "run".
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.category:
+            self.category = scenario_category(self.scenario_id)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "scenario_id": self.scenario_id,
+            "category": self.category,
             "status": self.status.value,
             "duration_seconds": self.duration_seconds,
+            "timings": dict(self.timings),
             "message": self.message,
             "expected": self.expected,
             "actual": self.actual,
@@ -55,6 +117,21 @@ class EvalResult:
             "timestamp": self.timestamp,
         }
 
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "EvalResult":
+        return EvalResult(
+            scenario_id=data["scenario_id"],
+            status=EvalStatus(data["status"]),
+            duration_seconds=float(data.get("duration_seconds") or 0.0),
+            message=data.get("message") or "",
+            expected=data.get("expected"),
+            actual=data.get("actual"),
+            error=data.get("error"),
+            timestamp=data.get("timestamp") or datetime.now().isoformat(),
+            category=data.get("category") or "",
+            timings=dict(data.get("timings") or {}),
+        )
+
 
 @dataclass
 class EvalScenario:
@@ -68,6 +145,11 @@ class EvalScenario:
     expected_outcome: Optional[str] = None  # "success" or "failure"
     requires: List[str] = field(default_factory=list)  # Required capabilities
     skip_reason: Optional[str] = None
+    category: str = ""  # Defaults to the id prefix, e.g. "security"
+
+    def __post_init__(self) -> None:
+        if not self.category:
+            self.category = scenario_category(self.id)
 
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "EvalScenario":
@@ -81,6 +163,7 @@ class EvalScenario:
             expected_outcome=data.get("expected_outcome"),
             requires=data.get("requires", []),
             skip_reason=data.get("skip_reason"),
+            category=data.get("category", ""),
         )
 
 
@@ -100,6 +183,7 @@ class EvalRunner:
         self.results_dir = results_dir or RESULTS_DIR
         self.results_dir.mkdir(parents=True, exist_ok=True)
         self._scenarios: Dict[str, EvalScenario] = {}
+        self._timings: Dict[str, float] = {}
 
     def load_scenarios(self) -> Dict[str, EvalScenario]:
         """Load all scenario definitions."""
@@ -127,6 +211,41 @@ class EvalRunner:
 
         return self._scenarios
 
+    def select(
+        self,
+        categories: Optional[Sequence[str]] = None,
+        scenario_ids: Optional[Sequence[str]] = None,
+        shard: Union[str, Tuple[int, int], None] = None,
+    ) -> List[str]:
+        """
+        Pick scenario ids to run.
+
+        Args:
+            categories: Keep only these categories (None = all)
+            scenario_ids: Keep only these ids (None = all)
+            shard: ``"i/n"`` - keep the i-th of n disjoint slices. Slices are
+                taken over the sorted ids, so every shard of the same tree
+                gets the same scenarios on every machine.
+
+        Returns:
+            Selected ids in load order
+        """
+        scenarios = self.load_scenarios()
+        wanted_categories = set(categories) if categories else None
+        wanted_ids = set(scenario_ids) if scenario_ids else None
+        selected = [
+            sid
+            for sid, scenario in scenarios.items()
+            if (wanted_categories is None or scenario.category in wanted_categories)
+            and (wanted_ids is None or sid in wanted_ids)
+        ]
+        parsed = parse_shard(shard)
+        if parsed is not None:
+            index, count = parsed
+            in_shard = set(sorted(selected)[index - 1::count])
+            selected = [sid for sid in selected if sid in in_shard]
+        return selected
+
     def _get_builtin_scenarios(self) -> List[EvalScenario]:
         """Get built-in eval scenarios."""
         return [
@@ -257,50 +376,70 @@ class EvalRunner:
             scenario_id: ID of the scenario to run
 
         Returns:
-            EvalResult with the outcome
+            EvalResult with the outcome and per-phase timings
         """
-        scenarios = self.load_scenarios()
+        self._timings = {}
+        start_time = time.time()
+        result = self._run_scenario(scenario_id)
+        result.duration_seconds = time.time() - start_time
+        result.timings = {name: round(seconds, 6) for name, seconds in self._timings.items()}
+        return result
 
-        if scenario_id not in scenarios:
-            return EvalResult(
-                scenario_id=scenario_id,
-                status=EvalStatus.ERROR,
-                error=f"Scenario not found: {scenario_id}",
-            )
+    def _run_scenario(self, scenario_id: str) -> EvalResult:
+        with self.phase("setup"):
+            scenarios = self.load_scenarios()
+
+            if scenario_id not in scenarios:
+                return EvalResult(
+                    scenario_id=scenario_id,
+                    status=EvalStatus.ERROR,
+                    error=f"Scenario not found: {scenario_id}",
+                )
 
-        scenario = scenarios[scenario_id]
+            scenario = scenarios[scenario_id]
 
-        # Check if should skip
-        if scenario.skip_reason:
-            return EvalResult(
-                scenario_id=scenario_id,
-                status=EvalStatus.SKIPPED,
-                message=scenario.skip_reason,
-            )
+            # Check if should skip
+            if scenario.skip_reason:
+                return EvalResult(
+                    scenario_id=scenario_id,
+                    status=EvalStatus.SKIPPED,
+                    message=scenario.skip_reason,
+                    category=scenario.category,
+                )
 
-        # Check requirements
-        missing = self._check_requirements(scenario.requires)
-        if missing:
-            return EvalResult(
-                scenario_id=scenario_id,
-                status=EvalStatus.SKIPPED,
-                message=f"Missing requirements: {', '.join(missing)}",
-            )
+            # Check requirements
+            missing = self._check_requirements(scenario.requires)
+            if missing:
+                return EvalResult(
+                    scenario_id=scenario_id,
+                    status=EvalStatus.SKIPPED,
+                    message=f"Missing requirements: {', '.join(missing)}",
+                    category=scenario.category,
+                )
 
         # Run the eval
-        start_time = time.time()
         try:
-            result = self._execute_scenario(scenario)
-            result.duration_seconds = time.time() - start_time
+            with self.phase("run"):
+                result = self._execute_scenario(scenario)
+            result.category = scenario.category
             return result
         except Exception as e:
             return EvalResult(
                 scenario_id=scenario_id,
                 status=EvalStatus.ERROR,
                 error=str(e),
-                duration_seconds=time.time() - start_time,
+                category=scenario.category,
             )
 
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall time of the ``with`` block to the current scenario's ``name`` phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timings[name] = self._timings.get(name, 0.0) + (time.perf_counter() - start)
+
     def _check_requirements(self, requires: List[str]) -> List[str]:
         """Check which requirements are missing."""
         missing = []
@@ -444,7 +583,8 @@ class EvalRunner:
             import os
             from agent.adapters import get_available_providers
 
-            providers = get_available_providers()
+            with self.phase("llm"):
+                providers = get_available_providers()
             if providers:
                 return EvalResult(
                     scenario_id=scenario.id,
@@ -477,8 +617,9 @@ class EvalRunner:
         """Test tool components."""
         if scenario.id == "tools_registry":
             try:
-                from agent.tools.registry import list_tools
-                tools = list_tools()
+                with self.phase("tools"):
+                    from agent.tools.registry import list_tools
+                    tools = list_tools()
                 return EvalResult(
                     scenario_id=scenario.id,
                     status=EvalStatus.PASSED,
@@ -766,39 +907,165 @@ class EvalRunner:
             message="Unknown robustness test",
         )
 
-    def run_all(self) -> List[EvalResult]:
-        """Run all eval scenarios."""
-        scenarios = self.load_scenarios()
-        results = []
+    def run_all(
+        self,
+        categories: Optional[Sequence[str]] = None,
+        scenario_ids: Optional[Sequence[str]] = None,
+        shard: Union[str, Tuple[int, int], None] = None,
+        workers: int = 1,
+        timeout: Optional[float] = None,
+    ) -> List[EvalResult]:
+        """
+        Run all (or the selected) eval scenarios.
+
+        Args:
+            categories, scenario_ids, shard: Selection, see ``select``
+            workers: Scenarios to run at once. Above 1, or with a timeout,
+                each scenario gets its own process, temp dir and memory DB.
+            timeout: Per-scenario limit in seconds; overrunning scenarios are
+                killed and reported as errors (isolated runs only)
+
+        Returns:
+            Results in selection order
+        """
+        selected = self.select(categories=categories, scenario_ids=scenario_ids, shard=shard)
+        workers = max(1, int(workers or 1))
+        started = time.time()
 
-        for scenario_id in scenarios:
-            logger.info(f"Running eval: {scenario_id}")
-            result = self.run(scenario_id)
-            results.append(result)
-            logger.info(f"  {result.status.value}: {result.message or result.error or 'OK'}")
+        if workers > 1 or timeout:
+            results = self._run_isolated_all(selected, workers, timeout)
+        else:
+            results = []
+            for scenario_id in selected:
+                logger.info(f"Running eval: {scenario_id}")
+                result = self.run(scenario_id)
+                results.append(result)
+                logger.info(f"  {result.status.value}: {result.message or result.error or 'OK'}")
 
         # Save results
-        self._save_results(results)
+        self._save_results(
+            results,
+            run_info={
+                "categories": sorted(categories) if categories else None,
+                "shard": "/".join(map(str, parse_shard(shard))) if shard else None,
+                "workers": workers,
+                "timeout_seconds": timeout,
+                "wall_seconds": round(time.time() - started, 3),
+            },
+        )
 
         return results
 
-    def _save_results(self, results: List[EvalResult]) -> None:
+    def _run_isolated_all(
+        self,
+        scenario_ids: Sequence[str],
+        workers: int,
+        timeout: Optional[float],
+    ) -> List[EvalResult]:
+        """Run each scenario in a child process, at most ``workers`` at a time."""
+        ctx = multiprocessing.get_context()
+        pending = list(scenario_ids)
+        pending.reverse()
+        running: Dict[Any, Tuple[str, Any, float, Path]] = {}
+        results: Dict[str, EvalResult] = {}
+
+        def finish(conn: Any, result: EvalResult) -> None:
+            scenario_id, proc, _, workdir = running.pop(conn)
+            proc.join(timeout=5)
+            conn.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+            results[scenario_id] = result
+            logger.info(f"  {scenario_id} {result.status.value}: {result.message or result.error or 'OK'}")
+
+        try:
+            while pending or running:
+                while pending and len(running) < workers:
+                    scenario_id = pending.pop()
+                    workdir = Path(tempfile.mkdtemp(prefix=f"eval_{scenario_id}_"))
+                    parent_conn, child_conn = ctx.Pipe(duplex=False)
+                    proc = ctx.Process(
+                        target=_isolated_worker,
+                        args=(self, scenario_id, str(workdir), child_conn),
+                        name=f"eval-{scenario_id}",
+                        daemon=True,
+                    )
+                    logger.info(f"Running eval: {scenario_id} (isolated)")
+                    proc.start()
+                    child_conn.close()
+                    running[parent_conn] = (scenario_id, proc, time.time(), workdir)
+
+                for conn in wait_connections(list(running), timeout=0.05):
+                    scenario_id, proc, begun, _ = running[conn]
+                    try:
+                        result = EvalResult.from_dict(conn.recv())
+                    except (EOFError, OSError):
+                        proc.join(timeout=5)
+                        result = EvalResult(
+                            scenario_id=scenario_id,
+                            status=EvalStatus.ERROR,
+                            error=f"Eval worker exited with code {proc.exitcode}",
+                            duration_seconds=time.time() - begun,
+                        )
+                    finish(conn, result)
+
+                if timeout:
+                    now = time.time()
+                    for conn, (scenario_id, proc, begun, _) in list(running.items()):
+                        if now - begun < timeout:
+                            continue
+                        proc.kill()
+                        finish(
+                            conn,
+                            EvalResult(
+                                scenario_id=scenario_id,
+                                status=EvalStatus.ERROR,
+                                error=f"Timed out after {timeout:.1f}s",
+                                duration_seconds=now - begun,
+                            ),
+                        )
+        finally:
+            for conn, (_, proc, _, workdir) in list(running.items()):
+                proc.kill()
+                proc.join(timeout=5)
+                conn.close()
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        return [results[sid] for sid in scenario_ids if sid in results]
+
+    def _save_results(self, results: List[EvalResult], run_info: Optional[Dict[str, Any]] = None) -> Path:
         """Save eval results to file."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         results_file = self.results_dir / f"eval_{timestamp}.json"
+        shard = (run_info or {}).get("shard")
+        if shard:
+            results_file = self.results_dir / f"eval_{timestamp}_shard{shard.replace('/', 'of')}.json"
+
+        phase_totals: Dict[str, float] = {}
+        for r in results:
+            for name, seconds in r.timings.items():
+                phase_totals[name] = round(phase_totals.get(name, 0.0) + seconds, 6)
+        by_category: Dict[str, Dict[str, int]] = {}
+        for r in results:
+            counts = by_category.setdefault(r.category, {})
+            counts[r.status.value] = counts.get(r.status.value, 0) + 1
 
         data = {
             "timestamp": datetime.now().isoformat(),
+            "git_commit": _git_commit(),
             "total": len(results),
             "passed": sum(1 for r in results if r.status == EvalStatus.PASSED),
             "failed": sum(1 for r in results if r.status == EvalStatus.FAILED),
             "skipped": sum(1 for r in results if r.status == EvalStatus.SKIPPED),
             "errors": sum(1 for r in results if r.status == EvalStatus.ERROR),
+            "run": run_info or {},
+            "phase_seconds": phase_totals,
+            "by_category": by_category,
             "results": [r.to_dict() for r in results],
         }
 
         results_file.write_text(json.dumps(data, indent=2))
         logger.info(f"Results saved to: {results_file}")
+        return results_file
 
     def print_summary(self, results: List[EvalResult]) -> None:
         """Print summary of eval results."""
@@ -815,6 +1082,12 @@ class EvalRunner:
         print(f"  Failed:  {failed}")
         print(f"  Skipped: {skipped}")
         print(f"  Errors:  {errors}")
+        phases: Dict[str, float] = {}
+        for r in results:
+            for name, seconds in r.timings.items():
+                phases[name] = phases.get(name, 0.0) + seconds
+        if phases:
+            print("Phase time: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(phases.items())))
         print("=" * 60)
 
         # Show failures
@@ -835,6 +1108,32 @@ class EvalRunner:
                 print(f"  - {r.scenario_id}: {r.error}")
 
 
+def _isolate_environment(workdir: Path) -> None:
+    """Point temp files, memory DBs and reflexion logs of this process at ``workdir``."""
+    tmp = workdir / "tmp"
+    tmp.mkdir(parents=True, exist_ok=True)
+    for key in ("TMPDIR", "TEMP", "TMP"):
+        os.environ[key] = str(tmp)
+    tempfile.tempdir = str(tmp)
+    os.environ["AGENT_MEMORY_DB"] = str(workdir / "memory.sqlite3")
+    os.environ["REFLEXION_BASE_DIR"] = str(workdir / "runs")
+    os.environ["REFLEXION_INDEX_PATH"] = str(workdir / "reflexion_index.sqlite3")
+    os.chdir(workdir)
+
+
+def _isolated_worker(runner: "EvalRunner", scenario_id: str, workdir: str, conn: Any) -> None:
+    """Child-process entry point: run one scenario in ``workdir`` and send back its result."""
+    try:
+        _isolate_environment(Path(workdir))
+        result = runner.run(scenario_id)
+    except BaseException as e:  # report anything, including SystemExit, to the parent
+        result = EvalResult(scenario_id=scenario_id, status=EvalStatus.ERROR, error=f"{type(e).__name__}: {e}")
+    try:
+        conn.send(result.to_dict())
+    finally:
+        conn.close()
+
+
 # Convenience functions
 
 def run_eval(scenario_id: str) -> EvalResult:
@@ -843,9 +1142,14 @@ def run_eval(scenario_id: str) -> EvalResult:
     return runner.run(scenario_id)
 
 
-def run_all_evals() -> List[EvalResult]:
+def run_all_evals(
+    categories: Optional[Sequence[str]] = None,
+    shard: Union[str, Tuple[int, int], None] = None,
+    workers: int = 1,
+    timeout: Optional[float] = None,
+) -> List[EvalResult]:
     """Run all eval scenarios."""
     runner = EvalRunner()
-    results = runner.run_all()
+    results = runner.run_all(categories=categories, shard=shard, workers=workers, timeout=timeout)
     runner.print_summary(results)
     return results
@@ -1,49 +1,498 @@
-import time
+"""Deterministic, offline benchmark suite.
+
+Every benchmark runs against local fixtures and scripted LLMs
+(``agent.autonomous.llm.stub.ScriptedLLM``), so numbers are comparable across
+machines and commits without network access or model calls:
+
+  runner      the full AgentRunner loop over scripted file_write/file_read steps
+  memory      SqliteMemoryStore.search over 1k / 10k / 100k seeded records
+  file_search the file_search tool over a synthetic source tree
+  trace       JsonlTracer writing step-sized events
+  checkpoint  IncrementalCheckpointer saves over a growing run
+  swarm       swarm wave scheduling of a subtask DAG with fixed-cost subagents
+
+Each benchmark is timed over ``--repeats`` runs after ``--warmup`` runs and
+reported with p50/p90/p99. Results are written as JSON; ``--baseline`` compares
+p50 against a previous results file and exits 1 on regressions beyond
+``--tolerance``.
+
+Usage:
+  python scripts/benchmark.py --output runs/bench/current.json
+  python scripts/benchmark.py --suite memory --memory-sizes 1000,10000
+  python scripts/benchmark.py --baseline runs/bench/main.json --tolerance 0.2
+"""
+from __future__ import annotations
+
+import argparse
 import json
 import logging
-from pathlib import Path
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
 logger = logging.getLogger(__name__)
 
+SUITES = ("runner", "memory", "file_search", "trace", "checkpoint", "swarm")
+DEFAULT_MEMORY_SIZES = (1_000, 10_000, 100_000)
+
+_WORDS = (
+    "agent planner memory trace tool browser calendar task swarm index search "
+    "file python result error retry budget cache token prompt schema step "
+    "reflection checkpoint summary workspace profile runner worker queue"
+).split()
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile (``q`` in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples_s: Sequence[float]) -> Dict[str, float]:
+    ms = [s * 1000.0 for s in samples_s]
+    if not ms:
+        return {}
+    return {
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "min_ms": round(min(ms), 3),
+        "max_ms": round(max(ms), 3),
+    }
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n))
+
+
+# ----------------------------------------------------------------------
+# Fixtures
+# ----------------------------------------------------------------------
+
+
+def seed_memory(path: Path, count: int, *, seed: int = 7) -> None:
+    """Create a memory DB with ``count`` records and embeddings, in bulk."""
+    from agent.autonomous.memory.embeddings import embed_many
+    from agent.autonomous.memory.sqlite_store import SqliteMemoryStore, _sha256
+
+    store = SqliteMemoryStore(path)  # creates the schema
+    store.close()
+    rng = random.Random(seed)
+    now = time.time()
+    conn = sqlite3.connect(str(path))
+    try:
+        for start in range(0, count, 2_000):
+            texts = [f"{_sentence(rng, 12)} #{i}" for i in range(start, min(count, start + 2_000))]
+            records = [
+                (start + i + 1, "knowledge", None, text, _sha256(text), "{}", now - i, now - i)
+                for i, text in enumerate(texts)
+            ]
+            conn.executemany(
+                "INSERT INTO memory_records(id, kind, key, content, content_hash, metadata_json, created_at, updated_at)"
+                " VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            vectors = embed_many(texts)
+            conn.executemany(
+                "INSERT INTO memory_embeddings(record_id, dim, vector_json, norm, updated_at, model)"
+                " VALUES(?, ?, ?, ?, ?, ?)",
+                [
+                    (rec[0], vec.dim, json.dumps(list(vec.vector)), float(vec.norm), now, vec.model)
+                    for rec, vec in zip(records, vectors)
+                ],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def make_source_tree(root: Path, *, dirs: int = 20, files_per_dir: int = 50, lines: int = 60, seed: int = 11) -> int:
+    """Synthetic repo: ``dirs`` x ``files_per_dir`` Python-ish files. Returns file count."""
+    rng = random.Random(seed)
+    for d in range(dirs):
+        pkg = root / f"pkg_{d:02d}"
+        pkg.mkdir(parents=True, exist_ok=True)
+        for f in range(files_per_dir):
+            body = [f"def fn_{d}_{f}_{i}(x):  # {_sentence(rng, 6)}" for i in range(lines)]
+            if (d * files_per_dir + f) % 97 == 0:
+                body.append("NEEDLE_MARKER = 'benchmark needle'")
+            (pkg / f"mod_{f:03d}.py").write_text("\n".join(body) + "\n", encoding="utf-8")
+    return dirs * files_per_dir
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+
 class BenchmarkRunner:
-    def __init__(self):
-        self.results = []
-    
-    def benchmark_task(self, task_name: str, task_description: str, task_goal: str, timeout: int = 300) -> dict:
-        start_time = time.time()
+    def __init__(
+        self,
+        *,
+        repeats: int = 5,
+        warmup: int = 1,
+        memory_sizes: Sequence[int] = DEFAULT_MEMORY_SIZES,
+        workdir: Optional[Path] = None,
+    ):
+        self.results: List[Dict[str, Any]] = []
+        self.repeats = max(1, repeats)
+        self.warmup = max(0, warmup)
+        self.memory_sizes = tuple(memory_sizes)
+        self._workdir = workdir
+
+    @property
+    def workdir(self) -> Path:
+        if self._workdir is None:
+            self._workdir = Path(tempfile.mkdtemp(prefix="agent-bench-"))
+        self._workdir.mkdir(parents=True, exist_ok=True)
+        return self._workdir
+
+    def measure(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        *,
+        suite: str,
+        description: str = "",
+        repeats: Optional[int] = None,
+        warmup: Optional[int] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Time ``fn`` and record percentiles. ``fn`` returning False counts as a failure."""
+        samples: List[float] = []
+        error = None
+        success = True
         try:
-            time.sleep(1)
-            success = True
-            error = None
+            for _ in range(self.warmup if warmup is None else warmup):
+                fn()
+            for _ in range(self.repeats if repeats is None else max(1, repeats)):
+                start = time.perf_counter()
+                outcome = fn()
+                samples.append(time.perf_counter() - start)
+                if outcome is False:
+                    success = False
         except Exception as exc:
             success = False
-            error = str(exc)
-        duration = time.time() - start_time
-        benchmark = {"task_name": task_name, "task_description": task_description, "duration_seconds": duration, "success": success, "error": error, "timestamp": datetime.now(timezone.utc).isoformat()}
-        self.results.append(benchmark)
-        return benchmark
-    
-    def run_all_benchmarks(self) -> None:
-        benchmarks = [("repo_scan", "Scan repository", "Scan this repository"), ("code_review", "Review code", "Review the code"), ("research", "Research topic", "Research autonomous agents")]
-        for task_name, description, goal in benchmarks:
-            self.benchmark_task(task_name, description, goal)
-    
+            error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Benchmark %s failed", name)
+        record = {
+            "task_name": name,
+            "suite": suite,
+            "task_description": description,
+            "duration_seconds": (sum(samples) / len(samples)) if samples else 0.0,
+            "samples": len(samples),
+            "stats": summarize(samples),
+            "success": success,
+            "error": error,
+            "meta": meta or {},
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        self.results.append(record)
+        return record
+
+    # -- runner loop ---------------------------------------------------
+
+    def _runner_once(self, task_goal: str, *, steps: int = 6) -> bool:
+        from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+        from agent.autonomous.llm.stub import ScriptedLLM
+        from agent.autonomous.runner import AgentRunner
+
+        run_dir = Path(tempfile.mkdtemp(prefix="run-", dir=self.workdir))
+        script = []
+        for i in range(steps // 2):
+            name = f"note_{i}.txt"
+            script.append({
+                "goal": f"write {name}",
+                "tool_name": "file_write",
+                "tool_args": [{"key": "path", "value": name}, {"key": "content", "value": f"{task_goal} #{i}"}],
+                "success_criteria": [],
+            })
+            script.append({
+                "goal": f"read {name}",
+                "tool_name": "file_read",
+                "tool_args": [{"key": "path", "value": name}],
+                "success_criteria": [],
+            })
+        runner = AgentRunner(
+            cfg=RunnerConfig(max_steps=steps + 4, timeout_seconds=60),
+            agent_cfg=AgentConfig(memory_db_path=run_dir / "memory.sqlite3"),
+            planner_cfg=PlannerConfig(mode="react"),
+            llm=ScriptedLLM(steps=script, goal=task_goal),
+            run_dir=run_dir,
+        )
+        result = runner.run(task_goal)
+        shutil.rmtree(run_dir, ignore_errors=True)
+        return bool(result.success) and result.steps_executed == len(script)
+
+    def benchmark_task(self, task_name: str, task_description: str, task_goal: str, timeout: int = 300) -> dict:
+        """One scripted run of the runner loop on ``task_goal`` (no model calls)."""
+        record = self.measure(
+            task_name,
+            lambda: self._runner_once(task_goal),
+            suite="runner",
+            description=task_description,
+            repeats=1,
+            warmup=0,
+            meta={"goal": task_goal, "timeout": timeout},
+        )
+        return record
+
+    def bench_runner(self) -> None:
+        self.measure(
+            "runner.loop.6_steps",
+            lambda: self._runner_once("Write and read back notes", steps=6),
+            suite="runner",
+            description="AgentRunner loop, scripted LLM, 6 file steps",
+            meta={"steps": 6},
+        )
+
+    # -- memory --------------------------------------------------------
+
+    def bench_memory(self) -> None:
+        from agent.autonomous.memory.sqlite_store import SqliteMemoryStore
+
+        rng = random.Random(3)
+        queries = [_sentence(rng, 4) for _ in range(16)]
+        for size in self.memory_sizes:
+            path = self.workdir / f"memory_{size}.sqlite3"
+            if not path.exists():
+                self.measure(
+                    f"memory.seed.{size}",
+                    lambda: seed_memory(path, size),
+                    suite="memory",
+                    description=f"bulk-seed {size} records",
+                    repeats=1,
+                    warmup=0,
+                    meta={"records": size},
+                )
+            store = SqliteMemoryStore(path)
+            cursor = iter(range(1 << 30))
+            try:
+                self.measure(
+                    f"memory.search.{size}",
+                    lambda: bool(store.search(queries[next(cursor) % len(queries)], limit=8)),
+                    suite="memory",
+                    description=f"search top-8 over {size} records",
+                    repeats=max(self.repeats, 10),
+                    meta={"records": size},
+                )
+            finally:
+                store.close()
+
+    # -- file_search ---------------------------------------------------
+
+    def bench_file_search(self, *, dirs: int = 20, files_per_dir: int = 50) -> None:
+        from agent.autonomous.config import AgentConfig, RunContext
+        from agent.autonomous.tools.builtins import FileSearchArgs, file_search_factory
+
+        tree = self.workdir / f"tree_{dirs}x{files_per_dir}"
+        count = files_per_dir * dirs
+        if not tree.exists():
+            make_source_tree(tree, dirs=dirs, files_per_dir=files_per_dir)
+        search = file_search_factory(AgentConfig())
+        ctx = RunContext(run_id="bench", run_dir=self.workdir, workspace_dir=tree)
+        for label, args in (
+            ("literal", FileSearchArgs(query="NEEDLE_MARKER", max_results=500)),
+            ("regex", FileSearchArgs(query=r"def fn_1\d_\d+_5\(", regex=True, max_results=500)),
+        ):
+            self.measure(
+                f"file_search.{label}.{count}_files",
+                lambda args=args: bool(search(ctx, args).success),
+                suite="file_search",
+                description=f"{label} search over {count} files",
+                meta={"files": count},
+            )
+
+    # -- trace ---------------------------------------------------------
+
+    def bench_trace(self, *, events: int = 2_000) -> None:
+        from agent.autonomous.trace import JsonlTracer
+
+        payload = {"type": "step", "action": {"tool_name": "file_read", "tool_args": {"path": "x.txt"}}, "result": {"success": True, "output": "y" * 2_000}}
+        runs = iter(range(1 << 30))
+
+        def _write() -> None:
+            tracer = JsonlTracer(self.workdir / f"trace_{next(runs)}.jsonl")
+            for i in range(events):
+                tracer.log({**payload, "step_index": i})
+            tracer.close()
+
+        self.measure(f"trace.write.{events}_events", _write, suite="trace", description=f"log+close {events} step events", meta={"events": events})
+
+    # -- checkpoint ----------------------------------------------------
+
+    def bench_checkpoint(self, *, steps: int = 200) -> None:
+        from agent.autonomous.checkpointing import IncrementalCheckpointer
+        from agent.autonomous.models import Observation
+        from agent.autonomous.state import AgentState
+
+        runs = iter(range(1 << 30))
+
+        def _run() -> None:
+            ckpt = IncrementalCheckpointer(self.workdir / f"ckpt_{next(runs)}")
+            state = AgentState(task="benchmark")
+            for i in range(steps):
+                state.observations.append(Observation(source=f"tool_{i}", raw={"output": "z" * 500}, salient_facts=[f"fact {i}"]))
+                ckpt.save(state, {"task": "benchmark", "steps_executed": i + 1})
+
+        self.measure(f"checkpoint.save.{steps}_steps", _run, suite="checkpoint", description=f"{steps} incremental saves", meta={"steps": steps})
+
+    # -- swarm ---------------------------------------------------------
+
+    def bench_swarm(self, *, subtasks: int = 24, workers: int = 4, unit_s: float = 0.005) -> None:
+        from agent.modes.swarm import Subtask, _ready_wave
+
+        rng = random.Random(5)
+        graph = []
+        for i in range(subtasks):
+            deps = sorted({f"t{j:02d}" for j in rng.sample(range(i), k=min(i, rng.randint(0, 2)))})
+            graph.append(Subtask(id=f"t{i:02d}", goal=f"subtask {i}", depends_on=deps, notes=""))
+        cost = {s.id: unit_s * (1 + rng.randint(0, 3)) for s in graph}
+
+        finish: Dict[str, float] = {}
+        for s in graph:  # ids are topologically ordered by construction
+            finish[s.id] = cost[s.id] + max((finish[d] for d in s.depends_on), default=0.0)
+        critical_path = max(finish.values())
+        waves: List[int] = []
+
+        def _schedule() -> None:
+            remaining = {s.id: s for s in graph}
+            completed: set = set()
+            waves.clear()
+            while remaining:
+                ready = _ready_wave(remaining, completed)
+                waves.append(len(ready))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for subtask in executor.map(lambda s: (time.sleep(cost[s.id]), s)[1], ready):
+                        completed.add(subtask.id)
+                        remaining.pop(subtask.id, None)
+
+        record = self.measure(
+            f"swarm.schedule.{subtasks}_subtasks",
+            _schedule,
+            suite="swarm",
+            description=f"{subtasks}-node DAG, {workers} workers",
+            meta={"subtasks": subtasks, "workers": workers},
+        )
+        p50 = record["stats"].get("p50_ms") or 0.0
+        record["meta"].update(
+            waves=list(waves),
+            critical_path_ms=round(critical_path * 1000, 3),
+            efficiency=round(critical_path * 1000 / p50, 3) if p50 else None,
+        )
+
+    # ------------------------------------------------------------------
+
+    def run_all_benchmarks(self, suites: Iterable[str] = SUITES) -> None:
+        for suite in suites:
+            getattr(self, f"bench_{suite}")()
+
     def save_results(self, output_path: Path) -> None:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(json.dumps(self.results, indent=2))
-    
+
     def get_summary(self) -> dict:
         if not self.results:
             return {}
         durations = [r["duration_seconds"] for r in self.results]
         successful = sum(1 for r in self.results if r["success"])
-        return {"total_benchmarks": len(self.results), "successful": successful, "failed": len(self.results) - successful, "avg_duration": sum(durations) / len(durations), "min_duration": min(durations), "max_duration": max(durations)}
+        return {
+            "total_benchmarks": len(self.results),
+            "successful": successful,
+            "failed": len(self.results) - successful,
+            "avg_duration": sum(durations) / len(durations),
+            "min_duration": min(durations),
+            "max_duration": max(durations),
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        }
+
+
+def compare_results(
+    current: Sequence[Dict[str, Any]],
+    baseline: Sequence[Dict[str, Any]],
+    *,
+    tolerance: float = 0.2,
+    metric: str = "p50_ms",
+    min_ms: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """Benchmarks whose ``metric`` grew by more than ``tolerance`` over the baseline.
+
+    Entries faster than ``min_ms`` in the baseline are skipped: at that scale
+    the difference is timer noise.
+    """
+    before = {r["task_name"]: r for r in baseline}
+    regressions = []
+    for record in current:
+        old = before.get(record["task_name"])
+        if not old or not old.get("success") or not record.get("success"):
+            continue
+        old_v = (old.get("stats") or {}).get(metric)
+        new_v = (record.get("stats") or {}).get(metric)
+        if not old_v or new_v is None or old_v < min_ms:
+            continue
+        change = (new_v - old_v) / old_v
+        if change > tolerance:
+            regressions.append({"task_name": record["task_name"], "baseline": old_v, "current": new_v, "change": round(change, 3)})
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=SUITES, help="run only these suites (repeatable)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--memory-sizes", default=",".join(str(n) for n in DEFAULT_MEMORY_SIZES))
+    parser.add_argument("--workdir", type=Path, default=None, help="reuse fixtures (seeded DBs, trees) across runs")
+    parser.add_argument("--output", type=Path, default=ROOT / "runs" / "benchmarks" / "latest.json")
+    parser.add_argument("--baseline", type=Path, default=None, help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    os.environ.setdefault("AGENT_QUIET", "1")
+    sizes = [int(s) for s in args.memory_sizes.split(",") if s.strip()]
+    runner = BenchmarkRunner(repeats=args.repeats, warmup=args.warmup, memory_sizes=sizes, workdir=args.workdir)
+    try:
+        runner.run_all_benchmarks(args.suite or SUITES)
+    finally:
+        if args.workdir is None and runner._workdir is not None:
+            shutil.rmtree(runner._workdir, ignore_errors=True)
+    runner.save_results(args.output)
+
+    for r in runner.results:
+        stats = r["stats"]
+        status = "ok" if r["success"] else f"FAILED ({r['error']})"
+        print(f"{r['task_name']:<36} p50={stats.get('p50_ms', 0):>10.2f}ms p90={stats.get('p90_ms', 0):>10.2f}ms p99={stats.get('p99_ms', 0):>10.2f}ms {status}")
+    print(f"results: {args.output}")
+
+    failed = any(not r["success"] for r in runner.results)
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_results(runner.results, baseline, tolerance=args.tolerance)
+        for reg in regressions:
+            print(f"[REGRESSION] {reg['task_name']}: {reg['baseline']:.2f}ms -> {reg['current']:.2f}ms (+{reg['change']:.0%})")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    runner = BenchmarkRunner()
-    runner.run_all_benchmarks()
-    runner.save_results(Path("benchmark_results.json"))
-    summary = runner.get_summary()
-    print(json.dumps(summary, indent=2))
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Import-time budget for the CLI entry points.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter,
+parses the per-module timings from stderr and checks that:
+
+  - the entry point's cumulative import time stays under its budget
+  - none of the heavy optional subsystems (Google API clients, Playwright,
+    sentence-transformers, FAISS, tree-sitter, torch) load at startup
+
+Usage:
+  python scripts/import_budget.py                 # check every entry point
+  python scripts/import_budget.py agent.cli --top 15
+  AGENT_IMPORT_BUDGET_MS=500 python scripts/import_budget.py
+
+The test suite always checks for heavy imports; the timing budget is only
+asserted there with AGENT_IMPORT_TIMING=1.
+
+Exits 1 when a budget is exceeded or a heavy module is imported.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative import time allowed per entry point, in milliseconds. Both sit
+# well under 100 ms on a developer laptop; the budget leaves room for slow CI
+# disks while still catching an eager Google/Playwright import (~400+ ms).
+DEFAULT_BUDGETS_MS: Dict[str, float] = {
+    "agent.cli": 300.0,
+    "agent.treys_agent": 300.0,
+}
+
+HEAVY_MODULES = (
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "google.auth",
+    "playwright",
+    "sentence_transformers",
+    "transformers",
+    "torch",
+    "faiss",
+    "tree_sitter",
+    "tree_sitter_language_pack",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    self_us: Dict[str, int] = field(default_factory=dict)
+    cumulative_us: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_ms(self) -> float:
+        return self.cumulative_us.get(self.module, 0) / 1000.0
+
+    def heavy_imports(self, heavy: Sequence[str] = HEAVY_MODULES) -> List[str]:
+        return sorted(
+            name
+            for name in self.cumulative_us
+            if any(name == prefix or name.startswith(prefix + ".") for prefix in heavy)
+        )
+
+    def slowest(self, n: int = 10) -> List[tuple]:
+        """The ``n`` modules with the largest self time, as (name, ms)."""
+        ranked = sorted(self.self_us.items(), key=lambda item: item[1], reverse=True)
+        return [(name, us / 1000.0) for name, us in ranked[:n]]
+
+
+def parse_importtime(stderr: str, module: str) -> ImportProfile:
+    """Parse ``-X importtime`` output. A module listed twice keeps its first entry."""
+    profile = ImportProfile(module=module)
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        profile.self_us.setdefault(name, int(self_us))
+        profile.cumulative_us.setdefault(name, int(cumulative_us))
+    return profile
+
+
+def measure(module: str, *, runs: int = 3, python: Optional[str] = None) -> ImportProfile:
+    """Best-of-``runs`` import profile of ``module`` in a fresh interpreter."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH", "")]))
+    best: Optional[ImportProfile] = None
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=str(REPO_ROOT),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        if proc.returncode != 0:
+            tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+            raise RuntimeError(f"import {module} failed:\n{tail[-2000:]}")
+        profile = parse_importtime(proc.stderr, module)
+        if best is None or profile.total_ms < best.total_ms:
+            best = profile
+    assert best is not None
+    return best
+
+
+def budget_for(module: str) -> float:
+    override = os.getenv("AGENT_IMPORT_BUDGET_MS")
+    if override:
+        try:
+            return float(override)
+        except ValueError:
+            pass
+    return DEFAULT_BUDGETS_MS.get(module, 300.0)
+
+
+def check(module: str, *, runs: int = 3, top: int = 0) -> List[str]:
+    """Problems found for ``module`` (empty when it is within budget)."""
+    profile = measure(module, runs=runs)
+    budget = budget_for(module)
+    print(f"{module}: {profile.total_ms:.1f} ms (budget {budget:.0f} ms)")
+    for name, ms in profile.slowest(top):
+        print(f"  {ms:8.1f} ms  {name}")
+    problems = []
+    if profile.total_ms > budget:
+        problems.append(f"{module} imports in {profile.total_ms:.1f} ms, over its {budget:.0f} ms budget")
+    heavy = profile.heavy_imports()
+    if heavy:
+        problems.append(f"{module} eagerly imports heavy modules: {', '.join(heavy[:10])}")
+    return problems
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=3, help="take the best of N fresh interpreters")
+    parser.add_argument("--top", type=int, default=0, help="print the N slowest modules by self time")
+    args = parser.parse_args(argv)
+
+    problems: List[str] = []
+    for module in args.modules:
+        problems.extend(check(module, runs=args.runs, top=args.top))
+    for problem in problems:
+        print(f"[FAIL] {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Aggregate the LLM call ledger across runs.
+
+Every LLM call made by the runner, the Codex CLI client and the swarm is
+appended to ``runs/llm_ledger.sqlite3`` (see ``agent.llm.ledger``). This
+groups those rows by call site, model, source, run or schema, slowest total
+wall time first, so the call sites that dominate latency and spend stand out.
+
+Usage:
+  python scripts/llm_report.py                       # by call site, all time
+  python scripts/llm_report.py --by model --since 7d
+  python scripts/llm_report.py --run 20260101T000000Z_ab12cd34 --json
+  python scripts/llm_report.py --source swarm --top 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from agent.llm.ledger import DEFAULT_LEDGER_PATH, GROUP_COLUMNS, LlmLedger, ledger_path, parse_since  # noqa: E402
+
+
+def format_report(groups: List[Dict[str, Any]], *, by: str) -> str:
+    header = f"{by:<32} {'calls':>6} {'wall_s':>9} {'share':>6} {'p50_ms':>9} {'p95_ms':>9} {'queue_s':>8} {'retry':>5} {'cache':>5} {'err':>4} {'tokens':>9} {'cost$':>8}"
+    lines = [header, "-" * len(header)]
+    for g in groups:
+        cost = "-" if g["cost_usd"] is None else f"{g['cost_usd']:.4f}"
+        lines.append(
+            f"{str(g[by])[:32]:<32} {g['calls']:>6} {g['wall_s']:>9.2f} {g['wall_share']:>6.1%} "
+            f"{g['p50_ms']:>9.0f} {g['p95_ms']:>9.0f} {g['queue_wait_s']:>8.2f} {g['retries']:>5} "
+            f"{g['cache_hits']:>5} {g['errors']:>4} {g['tokens']:>9} {cost:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--by", choices=GROUP_COLUMNS, default="agent")
+    parser.add_argument("--since", help="e.g. 24h, 7d or an ISO timestamp")
+    parser.add_argument("--run", dest="run_id")
+    parser.add_argument("--source", help="runner, codex_cli or swarm")
+    parser.add_argument("--top", type=int, default=0, help="only the N slowest groups")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--ledger", type=Path, help="ledger file (default: AGENT_LLM_LEDGER or runs/llm_ledger.sqlite3)")
+    args = parser.parse_args(argv)
+
+    path = args.ledger or ledger_path() or DEFAULT_LEDGER_PATH
+    if not path.exists():
+        print(f"No LLM ledger at {path}", file=sys.stderr)
+        return 1
+    ledger = LlmLedger(path)
+    try:
+        groups = ledger.report(by=args.by, since=parse_since(args.since), run_id=args.run_id, source=args.source)
+    finally:
+        ledger.close()
+    if args.top:
+        groups = groups[: args.top]
+    print(json.dumps(groups, indent=2) if args.json else format_report(groups, by=args.by))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,9 +10,24 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 
+@pytest.fixture(scope="session")
+def _llm_ledger_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("ledger") / "llm_ledger.sqlite3"
+
+
 @pytest.fixture(autouse=True)
-def _set_test_env(monkeypatch: pytest.MonkeyPatch) -> None:
+def _set_test_env(monkeypatch: pytest.MonkeyPatch, _llm_ledger_path: Path, tmp_path: Path) -> None:
     monkeypatch.setenv("AGENT_MEMORY_EMBED_BACKEND", "hash")
     monkeypatch.setenv("AGENT_MEMORY_FAISS_DISABLE", "1")
     monkeypatch.setenv("AUTO_PLANNER_MODE", "react")
+    monkeypatch.setenv("TREYS_AGENT_HTTP_CACHE", "0")
+    monkeypatch.setenv("TREYS_AGENT_SEARCH_INDEX", "0")
+    monkeypatch.setenv("AGENT_INTENT_ROUTER", "0")
+    # The ledger stays on, but writes to a temp file instead of runs/.
+    monkeypatch.setenv("AGENT_LLM_LEDGER", str(_llm_ledger_path))
+    monkeypatch.setenv("REFLEXION_INDEX_PATH", str(tmp_path / "reflexion_index.sqlite3"))
+    # Breakers are process-wide; one test tripping a backend must not fail the next.
+    from agent.autonomous.retry_utils import reset_breakers
+
+    reset_breakers()
     yield
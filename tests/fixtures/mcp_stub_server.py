@@ -0,0 +1,81 @@
+"""Minimal MCP stdio server used by tests/test_mcp_client.py.
+
+Speaks newline-delimited JSON-RPC 2.0 and answers each request on its own
+thread, so slow calls overlap and responses can arrive out of order.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+
+_write_lock = threading.Lock()
+_calls = 0
+
+TOOLS = [
+    {"name": "echo", "description": "Echo text back", "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}}},
+    {"name": "sleep", "description": "Sleep then reply", "inputSchema": {"type": "object", "properties": {"seconds": {"type": "number"}}}},
+    {"name": "fail", "description": "Always fails", "inputSchema": {"type": "object", "properties": {}}},
+    {"name": "info", "description": "Process info", "inputSchema": {"type": "object", "properties": {}}},
+]
+
+
+def send(message: dict) -> None:
+    with _write_lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def text(value: str, *, is_error: bool = False) -> dict:
+    return {"content": [{"type": "text", "text": value}], "isError": is_error}
+
+
+def handle(message: dict) -> None:
+    global _calls
+    method = message.get("method")
+    params = message.get("params") or {}
+    if method == "initialize":
+        result = {"protocolVersion": params.get("protocolVersion"), "capabilities": {"tools": {}}, "serverInfo": {"name": "stub"}}
+    elif method == "tools/list":
+        # Two pages, to exercise cursor handling.
+        if params.get("cursor") == "page2":
+            result = {"tools": TOOLS[2:]}
+        else:
+            result = {"tools": TOOLS[:2], "nextCursor": "page2"}
+    elif method == "tools/call":
+        _calls += 1
+        name = params.get("name")
+        args = params.get("arguments") or {}
+        if name == "echo":
+            result = text(str(args.get("text", "")))
+        elif name == "sleep":
+            time.sleep(float(args.get("seconds", 0)))
+            result = text(str(args.get("tag", "")))
+        elif name == "fail":
+            result = text("boom", is_error=True)
+        elif name == "info":
+            result = {"content": [], "structuredContent": {"pid": os.getpid(), "calls": _calls}}
+        else:
+            send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32602, "message": f"unknown tool {name}"}})
+            return
+    else:
+        send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": "Method not found"}})
+        return
+    send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+
+def main() -> None:
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        message = json.loads(line)
+        if "id" not in message:
+            continue  # notification
+        threading.Thread(target=handle, args=(message,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
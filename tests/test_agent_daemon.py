@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+from agent.autonomous.llm.stub import ScriptedLLM
+from agent.autonomous.runner import AgentRunner
+from agent.daemon.client import DaemonClient, DaemonError, DaemonInfo, format_event
+from agent.daemon.server import AgentDaemon, DaemonServer, TaskRequest
+from agent.llm import codex_cli_client
+
+
+class _FakeRunner:
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+
+    def run(self, task):
+        trace = self.run_dir / "trace.jsonl"
+        for i, tool in enumerate(["file_read", "finish"], start=1):
+            event = {"type": "step", "step_index": i, "action": {"tool_name": tool}, "result": {"success": True, "output": "x" * 5000}}
+            with trace.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+            time.sleep(0.2)
+        if task == "explode":
+            raise RuntimeError("tool crashed")
+        return SimpleNamespace(success=True, stop_reason="goal_reached", steps_executed=2, run_id=self.run_dir.name, trace_path=str(trace))
+
+
+@pytest.fixture
+def daemon_server(tmp_path):
+    daemon = AgentDaemon(workers=2, run_root=tmp_path / "runs", runner_factory=lambda d, req, run_dir: _FakeRunner(run_dir))
+    server = DaemonServer(daemon, port=0)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+
+
+def test_tasks_stream_progress_and_run_concurrently(daemon_server):
+    client = DaemonClient(daemon_server.info)
+    results = {}
+
+    def _run(name):
+        results[name] = list(client.run(f"task {name}", profile="fast"))
+
+    threads = [threading.Thread(target=_run, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    for events in results.values():
+        kinds = [e["event"] for e in events]
+        assert kinds == ["accepted", "trace", "trace", "result"]
+        assert [e["tool"] for e in events if e["event"] == "trace"] == ["file_read", "finish"]
+        assert "output" not in events[1]  # step dumps are summarized
+        assert events[-1]["success"] and events[-1]["stop_reason"] == "goal_reached"
+    assert format_event(results["a"][1]) == "[STEP 1] file_read ok"
+
+    health = client.health()
+    assert health["completed"] == 2 and health["running"] == 0 and health["warm"]
+
+
+def test_task_errors_are_reported_and_requests_are_authenticated(daemon_server):
+    client = DaemonClient(daemon_server.info)
+    events = list(client.run("explode"))
+    assert events[-1]["event"] == "error" and "tool crashed" in events[-1]["message"]
+    assert client.health()["failed"] == 1
+
+    with pytest.raises(DaemonError, match="400"):
+        list(client.run("   "))
+
+    info = daemon_server.info
+    intruder = DaemonClient(DaemonInfo(host=info.host, port=info.port, token="wrong", pid=info.pid))
+    with pytest.raises(DaemonError, match="401"):
+        intruder.health()
+
+
+class _EffortLLM(ScriptedLLM):
+    """Records the reasoning effort a codex client would use for each call."""
+
+    def __init__(self, steps, barrier):
+        super().__init__(steps=steps)
+        self.barrier = barrier
+        self.efforts = []
+
+    def complete_json(self, prompt, *, schema_path, timeout_seconds=None):
+        if not self.efforts:
+            self.barrier.wait(5)  # both runs are now inside an LLM call
+        self.efforts.append(codex_cli_client.resolve_reasoning_effort())
+        return super().complete_json(prompt, schema_path=schema_path, timeout_seconds=timeout_seconds)
+
+
+def test_concurrent_runner_tasks_keep_their_own_reasoning_effort(tmp_path):
+    barrier = threading.Barrier(2)
+    llms = {}
+
+    def _factory(daemon, request, run_dir):
+        effort = request.task.split()[-1]
+        steps = [
+            {
+                "goal": "write note",
+                "tool_name": "file_write",
+                "tool_args": [{"key": "path", "value": "note.txt"}, {"key": "content", "value": effort}],
+                "success_criteria": [],
+            }
+        ]
+        llms[effort] = _EffortLLM(steps, barrier)
+        runner = AgentRunner(
+            cfg=RunnerConfig(max_steps=4, timeout_seconds=60),
+            agent_cfg=AgentConfig(memory_db_path=run_dir / "memory.sqlite3"),
+            planner_cfg=PlannerConfig(mode="react"),
+            llm=llms[effort],
+            run_dir=run_dir,
+        )
+        runner._base_reasoning_effort = runner._current_reasoning_effort = effort
+        return runner
+
+    daemon = AgentDaemon(workers=2, run_root=tmp_path / "runs", runner_factory=_factory)
+    try:
+        tasks = [daemon.submit(TaskRequest(task=f"write a note {effort}")) for effort in ("low", "high")]
+        outcomes = [task.future.result(timeout=60) for task in tasks]
+    finally:
+        daemon.close()
+
+    assert all(outcome["success"] for outcome in outcomes)
+    assert "low" in llms["low"].efforts and "high" not in llms["low"].efforts
+    assert "high" in llms["high"].efforts and "low" not in llms["high"].efforts
@@ -67,3 +67,45 @@ def test_get_summary():
     assert summary["total_benchmarks"] == 2
     assert summary["successful"] == 2
     assert "avg_duration" in summary
+
+
+def test_percentiles_and_baseline_comparison():
+    from scripts.benchmark import compare_results, percentile, summarize
+
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    stats = summarize([0.001, 0.002, 0.003])
+    assert stats["p50_ms"] == 2.0 and stats["max_ms"] == 3.0
+
+    baseline = [
+        {"task_name": "a", "success": True, "stats": {"p50_ms": 10.0}},
+        {"task_name": "b", "success": True, "stats": {"p50_ms": 10.0}},
+        {"task_name": "tiny", "success": True, "stats": {"p50_ms": 0.01}},
+    ]
+    current = [
+        {"task_name": "a", "success": True, "stats": {"p50_ms": 11.0}},
+        {"task_name": "b", "success": True, "stats": {"p50_ms": 15.0}},
+        {"task_name": "tiny", "success": True, "stats": {"p50_ms": 0.05}},
+    ]
+    regressions = compare_results(current, baseline, tolerance=0.2)
+    assert [r["task_name"] for r in regressions] == ["b"]
+
+
+def test_offline_suites_report_percentiles(tmp_path):
+    runner = BenchmarkRunner(repeats=2, warmup=0, memory_sizes=(300,), workdir=tmp_path)
+    runner.bench_memory()
+    runner.bench_trace(events=50)
+    runner.bench_checkpoint(steps=10)
+    runner.bench_swarm(subtasks=6, workers=2, unit_s=0.001)
+
+    names = [r["task_name"] for r in runner.results]
+    assert names == [
+        "memory.seed.300",
+        "memory.search.300",
+        "trace.write.50_events",
+        "checkpoint.save.10_steps",
+        "swarm.schedule.6_subtasks",
+    ]
+    assert all(r["success"] for r in runner.results), [r["error"] for r in runner.results]
+    assert {"p50_ms", "p90_ms", "p99_ms"} <= set(runner.results[1]["stats"])
+    assert runner.results[1]["samples"] == 10
+    assert sum(runner.results[-1]["meta"]["waves"]) == 6
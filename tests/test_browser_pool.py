@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+from agent.autonomous.llm.stub import StubLLM
+from agent.autonomous.models import ToolResult as AgentToolResult
+from agent.autonomous.runner import AgentRunner
+from agent.autonomous.tools import builtins
+from agent.autonomous.tools.builtins import build_default_tool_registry
+from agent.autonomous.tools.registry import ToolSpec
+from agent.tools.base import ToolResult
+from agent.tools.browser_pool import BrowserPool, LoopBound
+
+FIXTURE = Path(__file__).parent / "fixtures" / "web" / "login_form.html"
+
+
+class _FakePage:
+    def __init__(self, heap: int = 0):
+        self.heap = heap
+        self.closed = False
+
+    async def evaluate(self, script):
+        return self.heap
+
+    def is_closed(self):
+        return self.closed
+
+
+class _FakeContext:
+    def __init__(self, browser, kwargs):
+        self.browser = browser
+        self.kwargs = kwargs
+        self.closed = False
+
+    async def new_page(self):
+        return _FakePage(self.browser.heap)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self, heap: int = 0):
+        self.heap = heap
+        self.contexts = []
+        self.closed = False
+
+    async def new_context(self, **kwargs):
+        ctx = _FakeContext(self, kwargs)
+        self.contexts.append(ctx)
+        return ctx
+
+    def is_connected(self):
+        return not self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+def _pool(**kwargs) -> tuple:
+    browsers = []
+    heap = kwargs.pop("heap", 0)
+
+    async def factory(headless):
+        browser = _FakeBrowser(heap)
+        browsers.append(browser)
+        return browser
+
+    return BrowserPool(browser_factory=factory, **kwargs), browsers
+
+
+def test_keyed_contexts_are_reused_and_unkeyed_ones_isolated(tmp_path):
+    pool, browsers = _pool(size=2)
+    state = tmp_path / "state.json"
+    state.write_text("{}")
+
+    async def scenario():
+        await pool.warm(1)
+        first = await pool.acquire(str(state), storage_state=str(state))
+        assert first.context.kwargs["storage_state"] == str(state)
+        await pool.release(first)
+        again = await pool.acquire(str(state), storage_state=str(state))
+        assert again.reused and again.context is first.context
+        await pool.release(again)
+
+        anon = await pool.acquire()
+        await pool.release(anon)
+        assert anon.context.closed
+
+    pool.run(scenario())
+    assert len(browsers) == 1  # one warm browser served every lease
+    snap = pool.snapshot()
+    assert snap["contexts_reused"] == 1 and snap["idle_contexts"] == 1
+    pool.run(pool.close())
+    assert browsers[0].closed
+
+
+def test_browsers_and_contexts_are_recycled_at_thresholds():
+    pool, browsers = _pool(size=1, max_browser_uses=2)
+
+    async def scenario():
+        for _ in range(3):
+            lease = await pool.acquire()
+            await pool.release(lease)
+
+    pool.run(scenario())
+    assert len(browsers) == 2
+    assert browsers[0].closed and not browsers[1].closed
+    assert pool.snapshot()["browsers_recycled"] == 1
+
+    heavy, _ = _pool(heap=600 * 1024 * 1024, max_context_heap_mb=512)
+    lease = heavy.run(heavy.acquire("site"))
+    heavy.run(heavy.release(lease))
+    assert lease.context.closed and heavy.snapshot()["idle_contexts"] == 0
+
+    stale, _ = _pool(max_context_age_s=0)
+    lease = stale.run(stale.acquire("site"))
+    asyncio.run(asyncio.sleep(0.01))
+    stale.run(stale.release(lease))
+    assert lease.context.closed
+
+
+def test_concurrent_leases_spread_over_warm_browsers():
+    pool, browsers = _pool(size=2)
+
+    async def scenario():
+        leases = await asyncio.gather(*(pool.acquire() for _ in range(4)))
+        slots = {id(lease.slot) for lease in leases}
+        for lease in leases:
+            await pool.release(lease)
+        return slots
+
+    assert len(pool.run(scenario())) == 2
+    assert len(browsers) == 2
+
+
+@pytest.fixture
+def real_pool():
+    pytest.importorskip("playwright.async_api")
+    pool = BrowserPool(size=1)
+    try:
+        pool.run(pool.warm(), timeout=60)
+    except Exception as exc:
+        pytest.skip(f"Chromium not available: {exc}")
+    yield pool
+    pool.run(pool.close(), timeout=30)
+
+
+def test_loop_bound_page_drives_a_local_fixture(real_pool):
+    lease = real_pool.run(real_pool.acquire("fixture"))
+    page = LoopBound(lease.page, real_pool)
+    page.goto(FIXTURE.as_uri())
+    page.locator("#user").first.fill("trey")
+    page.locator("#go").click()
+    assert page.locator("#status").inner_text() == "hello trey"
+    assert page.title() == "Fixture Portal"
+    real_pool.run(real_pool.release(lease))
+
+    again = real_pool.run(real_pool.acquire("fixture"))
+    assert again.reused
+    assert LoopBound(again.page, real_pool).locator("#status").inner_text() == "hello trey"
+    real_pool.run(real_pool.release(again))
+
+
+class _NoArgs(BaseModel):
+    pass
+
+
+def _browser_tool_with_pool(monkeypatch, pool, run_steps):
+    from agent.tools import browser
+
+    monkeypatch.setitem(sys.modules, "playwright.async_api", SimpleNamespace(async_playwright=None))
+    monkeypatch.setattr(browser, "pool_enabled", lambda: True)
+    monkeypatch.setattr(browser, "get_browser_pool", lambda headless: pool)
+    monkeypatch.setattr(browser, "build_login_steps", lambda site, start_url=None: [{"action": "login", "site": site}])
+    tool = browser.BrowserTool()
+    monkeypatch.setattr(tool, "_run_steps", run_steps)
+    return tool
+
+
+def test_failed_resume_on_a_reused_context_does_not_rerun_the_steps(monkeypatch):
+    pool, _ = _pool(size=1)
+    ran = []
+
+    async def run_steps(context, page, steps, run_path, session_state_path):
+        ran.append([s["action"] for s in steps])
+        return ToolResult(len(ran) == 1, error=None if len(ran) == 1 else "submit button missing")
+
+    tool = _browser_tool_with_pool(monkeypatch, pool, run_steps)
+    inputs = {"login_site": "portal", "url": "https://portal.test/", "steps": [{"action": "click"}]}
+    assert tool.execute(None, inputs).success  # logs in, context kept warm
+
+    failed = tool.execute(None, inputs)
+    assert not failed.success and "not re-run" in failed.error
+    assert failed.metadata["login_skipped"] is True
+    assert ran == [["login", "click"], ["goto", "click"]]
+    assert pool.snapshot()["idle_contexts"] == 0  # the failed context is not reused
+
+
+def test_pooled_browser_task_times_out_and_returns_its_lease(monkeypatch):
+    pool, browsers = _pool(size=1)
+
+    async def run_steps(context, page, steps, run_path, session_state_path):
+        await asyncio.sleep(30)
+
+    tool = _browser_tool_with_pool(monkeypatch, pool, run_steps)
+    started = time.monotonic()
+    result = tool.execute(None, {"url": "https://slow.test/", "timeout_seconds": 0.2})
+    assert not result.success and "timed out" in result.error
+    assert time.monotonic() - started < 5
+    deadline = time.monotonic() + 2
+    while pool.snapshot()["leased_contexts"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.snapshot()["leased_contexts"] == 0
+    assert browsers[0].contexts[0].closed
+
+
+def test_runner_returns_the_web_lease_when_a_run_stops_without_finish(tmp_path):
+    pool, browsers = _pool(size=1)
+    agent_cfg = AgentConfig(enable_web_gui=False, enable_desktop=False, memory_db_path=tmp_path / "memory.sqlite3")
+    tools = build_default_tool_registry(agent_cfg, tmp_path / "run")
+
+    def lease_browser(ctx, args):
+        lease = pool.run(pool.acquire())
+        builtins._WEB_SESSIONS[ctx.run_id] = {"pool": pool, "lease": lease, "elements": {}}
+        return AgentToolResult(success=True, output={"leased": True})
+
+    tools.register(ToolSpec(name="lease_browser", args_model=_NoArgs, fn=lease_browser))
+    llm = StubLLM(
+        responses=[
+            {"goal": "g", "steps": [{"goal": "open", "tool_name": "lease_browser", "tool_args": [], "success_criteria": []}]},
+            {"status": "success", "explanation_short": "leased", "next_hint": ""},
+        ]
+    )
+    runner = AgentRunner(
+        cfg=RunnerConfig(max_steps=1, timeout_seconds=30),
+        agent_cfg=agent_cfg,
+        planner_cfg=PlannerConfig(mode="react"),
+        llm=llm,
+        tools=tools,
+        run_dir=tmp_path / "run",
+    )
+    result = runner.run(task="open a browser")
+
+    assert result.stop_reason != "goal_achieved"
+    assert runner.run_id not in builtins._WEB_SESSIONS
+    assert pool.snapshot()["open_contexts"] == 0
+    assert browsers[0].contexts[0].closed
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from agent.adapters.http_pool import HttpPool
+from agent.autonomous.cancellation import CancellationToken, KillSwitchWatcher, run_process, use_token
+from agent.autonomous.config import AgentConfig, RunContext
+from agent.autonomous.exceptions import RunCancelledError
+from agent.autonomous.retry_utils import retry_with_backoff
+from agent.autonomous.tools.builtins import PythonExecArgs, python_exec_factory
+
+
+def _cancel_after(token: CancellationToken, seconds: float, reason: str = "test") -> threading.Timer:
+    timer = threading.Timer(seconds, token.cancel, args=(reason,))
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def _alive(pid: int) -> bool:
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return False
+    return stat.rsplit(")", 1)[1].split()[0] != "Z"
+
+
+def test_token_runs_callbacks_once_and_late_registrations_immediately() -> None:
+    token = CancellationToken()
+    calls = []
+    unregister = token.on_cancel(lambda: calls.append("a"))
+    token.on_cancel(lambda: calls.append("b"))()  # unregistered before firing
+    assert token.cancel("stop") is True
+    assert token.cancel("again") is False
+    token.on_cancel(lambda: calls.append("late"))
+    unregister()
+    assert calls == ["a", "late"]
+    assert token.reason == "stop"
+    with pytest.raises(RunCancelledError):
+        token.raise_if_cancelled()
+
+
+@pytest.mark.skipif(not Path("/proc").is_dir(), reason="needs /proc to inspect the grandchild")
+def test_run_process_kills_the_whole_tree_on_cancel(tmp_path: Path) -> None:
+    pid_file = tmp_path / "grandchild.pid"
+    script = (
+        "import subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+        f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+        "time.sleep(30)\n"
+    )
+    token = CancellationToken()
+
+    started = time.monotonic()
+    with pytest.raises(RunCancelledError):
+        _cancel_after(token, 0.5)
+        run_process([sys.executable, "-c", script], capture_output=True, text=True, token=token)
+    assert time.monotonic() - started < 5
+
+    grandchild = int(pid_file.read_text())
+    deadline = time.monotonic() + 2
+    while _alive(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(grandchild)
+
+
+def test_run_process_stops_at_the_token_deadline() -> None:
+    token = CancellationToken(timeout=0.3)
+    started = time.monotonic()
+    with use_token(token), pytest.raises(RunCancelledError) as info:
+        run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=60)
+    assert time.monotonic() - started < 5
+    assert info.value.reason == "deadline"
+
+
+def test_run_process_matches_subprocess_run_without_a_token() -> None:
+    proc = run_process([sys.executable, "-c", "print('hi')"], capture_output=True, text=True)
+    assert proc.returncode == 0 and proc.stdout.strip() == "hi"
+
+
+def test_python_exec_tool_is_terminated_by_the_run_token(tmp_path: Path) -> None:
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path)
+    python_exec = python_exec_factory(AgentConfig())
+    token = CancellationToken()
+
+    started = time.monotonic()
+    with use_token(token), pytest.raises(RunCancelledError):
+        _cancel_after(token, 0.3, "kill_switch")
+        python_exec(ctx, PythonExecArgs(code="import time; time.sleep(30)", timeout_seconds=60))
+    assert time.monotonic() - started < 5
+
+
+class _HangingEndpoint(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(5)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_http_pool_aborts_the_request_in_flight() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HangingEndpoint)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        pool = HttpPool(use_httpx=False)
+        token = CancellationToken()
+        started = time.monotonic()
+        with use_token(token), pytest.raises(RunCancelledError):
+            _cancel_after(token, 0.3)
+            pool.post(f"http://127.0.0.1:{server.server_port}/", json={}, timeout=30)
+        assert time.monotonic() - started < 3
+        with use_token(token), pytest.raises(RunCancelledError):
+            pool.post(f"http://127.0.0.1:{server.server_port}/", json={}, timeout=30)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_kill_switch_watcher_cancels_without_step_polling() -> None:
+    token = CancellationToken()
+    tripped = threading.Event()
+    watcher = KillSwitchWatcher(token, tripped.is_set, interval=0.05).start()
+    try:
+        assert not token.wait(0.1)
+        tripped.set()
+        assert token.wait(2)
+        assert token.reason == "kill_switch"
+    finally:
+        watcher.stop()
+
+
+def test_retry_backoff_sleep_wakes_on_cancel() -> None:
+    token = CancellationToken()
+
+    def _fail():
+        raise ConnectionError("down")
+
+    started = time.monotonic()
+    with use_token(token), pytest.raises(ConnectionError):
+        _cancel_after(token, 0.2)
+        retry_with_backoff(_fail, max_attempts=3, initial_delay=10.0, jitter=0)
+    assert time.monotonic() - started < 3
+
+
+def test_run_process_raises_timeout_like_subprocess_run() -> None:
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.3)
@@ -97,3 +97,63 @@ def test_cleanup_old_checkpoints():
         # Verify only last 3 remain
         remaining = manager.list_checkpoints()
         assert remaining == [8, 9, 10]
+
+
+def _obs(i):
+    from agent.autonomous.models import Observation
+
+    return Observation(source=f"tool_{i}", raw="x" * 100, salient_facts=[f"fact {i}"])
+
+
+def test_incremental_checkpoint_appends_only_deltas(tmp_path):
+    """Each save appends only new observations; load replays the log."""
+    from agent.autonomous.checkpointing import IncrementalCheckpointer
+    from agent.autonomous.state import AgentState
+
+    ckpt = IncrementalCheckpointer(tmp_path, snapshot_every=100)
+    state = AgentState(task="demo")
+    for i in range(10):
+        state.add_observation(_obs(i))
+        ckpt.save(state, {"task": "demo", "steps_executed": i + 1})
+
+    snapshot = json.loads(ckpt.snapshot_path.read_text())
+    assert snapshot["format"] == "incremental"
+    assert len(snapshot["state"]["observations"]) == 1
+    log_lines = ckpt.log_path.read_text().splitlines()
+    assert len(log_lines) == 9
+    assert all(len(json.loads(line)["append"]) == 1 for line in log_lines)
+
+    loaded = IncrementalCheckpointer.load(tmp_path)
+    assert loaded["steps_executed"] == 10
+    assert [o["source"] for o in loaded["state"]["observations"]] == [f"tool_{i}" for i in range(10)]
+
+
+def test_incremental_checkpoint_handles_compaction_and_snapshots(tmp_path):
+    """Dropping from the front is a delta; periodic snapshots restart the log."""
+    from agent.autonomous.checkpointing import IncrementalCheckpointer
+    from agent.autonomous.state import AgentState
+
+    ckpt = IncrementalCheckpointer(tmp_path, snapshot_every=3)
+    state = AgentState(task="demo")
+    for i in range(8):
+        state.add_observation(_obs(i))
+        if i == 5:
+            state.observations = state.observations[-2:]
+            state.rolling_summary = "compacted"
+        ckpt.save(state, {"task": "demo"})
+
+    with ckpt.log_path.open("a", encoding="utf-8") as f:
+        f.write('{"torn": ')  # simulated crash mid-append
+
+    loaded = IncrementalCheckpointer.load(tmp_path / "checkpoint.json")
+    assert loaded["state"]["rolling_summary"] == "compacted"
+    assert [o["source"] for o in loaded["state"]["observations"]] == ["tool_4", "tool_5", "tool_6", "tool_7"]
+
+
+def test_incremental_checkpoint_loads_legacy_file(tmp_path):
+    """Full-state checkpoint.json files from older runs still load."""
+    from agent.autonomous.checkpointing import IncrementalCheckpointer
+
+    legacy = {"task": "old", "state": {"task": "old", "observations": []}, "steps_executed": 3}
+    (tmp_path / "checkpoint.json").write_text(json.dumps(legacy, indent=2))
+    assert IncrementalCheckpointer.load(tmp_path) == legacy
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from agent.autonomous.config import AgentConfig, RunContext
+from agent.autonomous.tools.builtins import FileReadArgs, FileSearchArgs, file_read_factory, file_search_factory
+from agent.autonomous.tools.content_search import SearchOptions, search_files
+from agent.config.profile import RunUsage, resolve_profile
+
+
+def _make_tree(root: Path) -> None:
+    (root / "pkg").mkdir()
+    (root / "pkg" / "a.py").write_text("import os\n\ndef Needle():\n    return 1\n", encoding="utf-8")
+    (root / "pkg" / "b.txt").write_text("nothing here\n", encoding="utf-8")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "skip.js").write_text("needle\n", encoding="utf-8")
+    (root / "blob.dat").write_bytes(b"needle\x00\x01")
+    big = ("filler line\n" * 40_000) + "the needle is here\n"
+    (root / "big.log").write_text(big, encoding="utf-8")
+
+
+def test_search_returns_line_numbers_and_context(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    matches = {Path(m.path).name: m for m in search_files(tmp_path, SearchOptions(query="needle"))}
+    assert set(matches) == {"a.py", "big.log"}
+    hit = matches["a.py"].lines[0]
+    assert hit.line == 3
+    assert hit.text == "def Needle():"
+    assert hit.before == ["import os", ""]
+    assert hit.after == ["    return 1"]
+    assert matches["big.log"].lines[0].line == 40_001
+
+
+def test_search_case_sensitive_and_regex(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    names = {Path(m.path).name for m in search_files(tmp_path, SearchOptions(query="Needle", case_sensitive=True))}
+    assert names == {"a.py"}
+    regex = SearchOptions(query=r"def \w+\(\)", regex=True, paths_only=True)
+    results = list(search_files(tmp_path, regex))
+    assert [Path(m.path).name for m in results] == ["a.py"]
+    assert results[0].lines == []
+
+
+def test_file_search_tool_respects_budget(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    profile = resolve_profile("fast")
+    usage = RunUsage(files_read=profile.max_files_to_read - 1)
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path, profile=profile, usage=usage)
+    tool = file_search_factory(AgentConfig())
+    result = tool(ctx, FileSearchArgs(query="needle"))
+    assert result.success is True
+    assert len(result.output["matches"]) <= 1
+    assert usage.files_read == profile.max_files_to_read
+
+
+def test_file_search_tool_reports_bad_regex(tmp_path: Path) -> None:
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path)
+    tool = file_search_factory(AgentConfig())
+    result = tool(ctx, FileSearchArgs(query="(", regex=True))
+    assert result.success is False
+    assert "invalid regex" in (result.error or "")
+
+
+def test_file_search_tool_returns_the_first_matches_in_path_order(tmp_path: Path) -> None:
+    for name in ("d", "b", "e", "a", "c"):
+        (tmp_path / f"{name}.txt").write_text("needle\n", encoding="utf-8")
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "inner.txt").write_text("needle\n", encoding="utf-8")
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path)
+    tool = file_search_factory(AgentConfig())
+    result = tool(ctx, FileSearchArgs(query="needle", max_results=3))
+    assert [Path(m["path"]).relative_to(tmp_path).as_posix() for m in result.output["matches"]] == [
+        "a.txt",
+        "b.txt",
+        "b/inner.txt",
+    ]
+
+    # A budget that cuts the scan short keeps the same prefix of that order.
+    profile = resolve_profile("fast")
+    usage = RunUsage(files_read=profile.max_files_to_read - 2)
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path, profile=profile, usage=usage)
+    result = tool(ctx, FileSearchArgs(query="needle"))
+    assert [Path(m["path"]).name for m in result.output["matches"]] == ["a.txt", "b.txt"]
+
+
+def test_search_stops_at_max_matches_without_reading_the_rest(tmp_path: Path) -> None:
+    for i in range(40):
+        (tmp_path / f"f{i:02d}.txt").write_text("needle\n", encoding="utf-8")
+    reserved = []
+    opts = SearchOptions(query="needle", workers=2)
+    results = list(search_files(tmp_path, opts, reserve=lambda size: reserved.append(size) or 1_000, max_matches=3))
+    assert [Path(m.path).name for m in results] == ["f00.txt", "f01.txt", "f02.txt"]
+    assert len(reserved) <= 3 + opts.workers - 1
+
+
+def test_run_usage_reserves_atomically_under_contention() -> None:
+    usage = RunUsage()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        granted = list(pool.map(lambda _: usage.try_reserve(300, 10, 2_000), range(64)))
+    kept = [g for g in granted if g is not None]
+    assert usage.files_read == len(kept) <= 10
+    assert usage.bytes_read == sum(kept) == 2_000
+
+
+def test_parallel_file_reads_stay_within_the_file_budget(tmp_path: Path) -> None:
+    for i in range(30):
+        (tmp_path / f"f{i}.txt").write_text("x" * 100, encoding="utf-8")
+    profile = replace(resolve_profile("fast"), max_files_to_read=5)
+    usage = RunUsage()
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path, profile=profile, usage=usage)
+    tool = file_read_factory(AgentConfig())
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: tool(ctx, FileReadArgs(path=f"f{i}.txt")), range(30)))
+    assert sum(r.success for r in results) == usage.files_read == 5
+    assert {r.error for r in results if not r.success} == {"file_read_limit_reached"}
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from agent.autonomous.memory.embeddings import EmbeddingService, ModelHandle
+
+
+class _FakeModel:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.loads = 0
+        self.batches: list[list[str]] = []
+
+    def load(self) -> ModelHandle:
+        self.loads += 1
+        time.sleep(0.01)  # widen the window for racing loaders
+        return ModelHandle("fake-model", self.encode)
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def _model_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("AGENT_MEMORY_EMBED_BACKEND", raising=False)
+
+
+def test_concurrent_requests_share_one_model_and_batch(tmp_path: Path) -> None:
+    fake = _FakeModel(delay=0.05)
+    service = EmbeddingService(loader=fake.load, use_cache=False)
+    results: dict[int, list[float]] = {}
+
+    def worker(i: int) -> None:
+        results[i] = service.embed("x" * (i + 1)).vector
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fake.loads == 1
+    assert {i: v[0] for i, v in results.items()} == {i: float(i + 1) for i in range(12)}
+    assert sum(len(b) for b in fake.batches) == 12
+    assert len(fake.batches) < 12  # requests that queued during a batch were coalesced
+
+
+def test_disk_cache_keyed_by_text_hash(tmp_path: Path) -> None:
+    cache_path = tmp_path / "cache.sqlite3"
+    first = _FakeModel()
+    service = EmbeddingService(loader=first.load, cache_path=cache_path)
+    out = service.embed_many(["alpha", "beta", "alpha"])
+    assert [e.vector[0] for e in out] == [5.0, 4.0, 5.0]
+    assert first.batches == [["alpha", "beta"]]
+    assert out[0].model == "fake-model" and out[0].dim == 3
+
+    second = _FakeModel()
+    reopened = EmbeddingService(loader=second.load, cache_path=cache_path)
+    again = reopened.embed_many(["beta", "gamma"])
+    assert second.batches == [["gamma"]]
+    assert again[0].vector == out[1].vector
+    assert reopened.stats["cache_hits"] == 1
+
+
+def test_hash_backend_and_failed_load_fall_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    def broken():
+        raise RuntimeError("no weights")
+
+    service = EmbeddingService(loader=broken, use_cache=False)
+    assert service.embed("amazon tracking").model == "hash256"
+
+    fake = _FakeModel()
+    monkeypatch.setenv("AGENT_MEMORY_EMBED_BACKEND", "hash")
+    hashed = EmbeddingService(loader=fake.load, use_cache=False).embed("amazon tracking")
+    assert hashed.model == "hash256" and hashed.dim == 256
+    assert fake.loads == 0
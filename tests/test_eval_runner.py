@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+from evals.runner import EvalResult, EvalRunner, EvalScenario, EvalStatus, parse_shard
+
+
+class _FakeRunner(EvalRunner):
+    """Built-in scenarios replaced by cheap ones that exercise the engine."""
+
+    def _get_builtin_scenarios(self):
+        return [
+            EvalScenario(id="fast_one", name="", description="", request=""),
+            EvalScenario(id="fast_two", name="", description="", request=""),
+            EvalScenario(id="slow_hang", name="", description="", request=""),
+            EvalScenario(id="env_probe", name="", description="", request=""),
+        ]
+
+    def _execute_scenario(self, scenario):
+        if scenario.id == "slow_hang":
+            time.sleep(60)
+        with self.phase("llm"):
+            time.sleep(0.01)
+        return EvalResult(
+            scenario_id=scenario.id,
+            status=EvalStatus.PASSED,
+            message=os.environ.get("AGENT_MEMORY_DB", ""),
+        )
+
+
+@pytest.fixture
+def runner(tmp_path):
+    scenarios = tmp_path / "scenarios"
+    scenarios.mkdir()
+    return _FakeRunner(scenarios_dir=scenarios, results_dir=tmp_path / "results")
+
+
+def test_select_by_category_and_shard(runner):
+    assert runner.select(categories=["fast"]) == ["fast_one", "fast_two"]
+    shards = [runner.select(shard=f"{i}/3") for i in (1, 2, 3)]
+    assert sorted(sid for shard in shards for sid in shard) == sorted(runner.load_scenarios())
+    assert runner.select(shard=(1, 3)) == shards[0]
+    with pytest.raises(ValueError):
+        parse_shard("4/3")
+
+
+def test_run_records_phase_timings(runner):
+    result = runner.run("fast_one")
+    assert result.status == EvalStatus.PASSED
+    assert result.category == "fast"
+    assert set(result.timings) == {"setup", "run", "llm"}
+    assert result.timings["run"] >= result.timings["llm"] >= 0.01
+    assert EvalResult.from_dict(result.to_dict()).timings == result.timings
+
+
+def test_isolated_run_kills_hung_scenario_and_isolates_memory(runner, tmp_path):
+    start = time.time()
+    results = runner.run_all(workers=4, timeout=2.0)
+    assert time.time() - start < 30
+
+    by_id = {r.scenario_id: r for r in results}
+    assert [r.scenario_id for r in results] == list(runner.load_scenarios())
+    assert by_id["slow_hang"].status == EvalStatus.ERROR
+    assert "Timed out" in by_id["slow_hang"].error
+    dbs = {by_id[sid].message for sid in ("fast_one", "fast_two", "env_probe")}
+    assert len(dbs) == 3 and all(db.endswith("memory.sqlite3") for db in dbs)
+    assert not any(os.path.exists(os.path.dirname(db)) for db in dbs)
+
+    saved = json.loads(next((tmp_path / "results").glob("eval_*.json")).read_text())
+    assert saved["errors"] == 1 and saved["passed"] == 3
+    assert saved["run"]["workers"] == 4
+    assert saved["phase_seconds"]["llm"] > 0
+    assert saved["by_category"]["slow"] == {"error": 1}
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import pytest
+
+from agent.autonomous import http_client
+from agent.autonomous.http_client import http_get
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits: List[Dict[str, str]] = []
+
+    def log_message(self, *args) -> None:  # pragma: no cover - silence server logs
+        return
+
+    def do_GET(self) -> None:  # noqa: N802
+        type(self).hits.append({"path": self.path, **{k.lower(): v for k, v in self.headers.items()}})
+        if self.path.startswith("/etag"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            body = b"etag body"
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Cache-Control", "no-cache")
+        elif self.path.startswith("/fresh"):
+            body = b"fresh body"
+            self.send_response(200)
+            self.send_header("Cache-Control", "max-age=300")
+        elif self.path.startswith("/nostore"):
+            body = b"secret"
+            self.send_response(200)
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("ETag", '"x"')
+        else:
+            body = b"x" * 200_000
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def server(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    monkeypatch.setenv("TREYS_AGENT_HTTP_CACHE", "1")
+    monkeypatch.setenv("TREYS_AGENT_HTTP_CACHE_DIR", str(tmp_path / "http_cache"))
+    _Handler.hits = []
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_address[1]}"
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_streaming_read_stops_at_max_bytes(server: str) -> None:
+    resp = http_get(f"{server}/big", max_bytes=1000)
+    assert len(resp.content) == 1000
+    assert resp.truncated is True
+    assert resp.cache_status == "miss"
+
+
+def test_etag_revalidation_serves_cached_body(server: str) -> None:
+    first = http_get(f"{server}/etag")
+    second = http_get(f"{server}/etag")
+    assert first.content == second.content == b"etag body"
+    assert second.cache_status == "revalidated"
+    assert _Handler.hits[-1].get("if-none-match") == '"v1"'
+
+
+def test_max_age_skips_network(server: str) -> None:
+    http_get(f"{server}/fresh")
+    resp = http_get(f"{server}/fresh")
+    assert resp.cache_status == "hit"
+    assert resp.content == b"fresh body"
+    assert len(_Handler.hits) == 1
+
+
+def test_no_store_is_not_cached(server: str) -> None:
+    http_get(f"{server}/nostore")
+    resp = http_get(f"{server}/nostore")
+    assert resp.cache_status == "miss"
+    assert "if-none-match" not in _Handler.hits[-1]
+
+
+def test_run_dedupe_reuses_response(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TREYS_AGENT_HTTP_CACHE", "0")
+    run_id = "dedupe-run"
+    try:
+        http_get(f"{server}/nostore", run_id=run_id)
+        resp = http_get(f"{server}/nostore", run_id=run_id)
+        assert resp.cache_status == "run"
+        assert len(_Handler.hits) == 1
+        other = http_get(f"{server}/nostore", run_id="other-run")
+        assert other.cache_status == "miss"
+    finally:
+        http_client.clear_run(run_id)
+        http_client.clear_run("other-run")
+
+
+def test_runner_clears_the_run_memo_without_finish(server: str, tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+    from agent.autonomous.llm.stub import StubLLM
+    from agent.autonomous.runner import AgentRunner
+
+    memo_runs = []
+    original_put = http_client._memo_put
+    monkeypatch.setattr(http_client, "_memo_put", lambda run_id, *a: memo_runs.append(run_id) or original_put(run_id, *a))
+    fetch = {
+        "goal": "fetch",
+        "tool_name": "web_fetch",
+        "tool_args": [{"key": "url", "value": f"{server}/nostore"}],
+        "success_criteria": [],
+    }
+    llm = StubLLM(
+        responses=[
+            {"goal": "fetch", "steps": [fetch]},
+            {"status": "success", "explanation_short": "fetched", "next_hint": ""},
+        ]
+    )
+    runner = AgentRunner(
+        cfg=RunnerConfig(max_steps=1, timeout_seconds=30),
+        agent_cfg=AgentConfig(enable_web_gui=False, enable_desktop=False, memory_db_path=tmp_path / "memory.sqlite3"),
+        planner_cfg=PlannerConfig(mode="react"),
+        llm=llm,
+        run_dir=tmp_path / "run",
+    )
+    result = runner.run(task="Fetch a page")
+
+    assert result.stop_reason != "goal_achieved"
+    assert memo_runs == [runner.run_id]
+    assert runner.run_id not in http_client._run_memo
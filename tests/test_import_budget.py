@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from scripts.import_budget import DEFAULT_BUDGETS_MS, budget_for, measure, parse_importtime
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   json.decoder
+import time:       300 |        420 | json
+import time:      2000 |       2000 |       googleapiclient.discovery
+import time:       500 |       2920 | agent.cli
+"""
+
+
+def test_parse_importtime_reads_self_and_cumulative_times():
+    profile = parse_importtime(SAMPLE, "agent.cli")
+    assert profile.total_ms == pytest.approx(2.92)
+    assert profile.self_us["json"] == 300
+    assert profile.slowest(1) == [("googleapiclient.discovery", 2.0)]
+    assert profile.heavy_imports() == ["googleapiclient.discovery"]
+
+
+@pytest.mark.parametrize("module", sorted(DEFAULT_BUDGETS_MS))
+def test_entry_points_do_not_import_heavy_modules(module):
+    profile = measure(module, runs=1)
+    assert module in profile.cumulative_us
+    assert profile.heavy_imports() == []
+
+
+# Wall-clock budgets are noisy on shared CI machines; opt in explicitly.
+@pytest.mark.skipif(os.getenv("AGENT_IMPORT_TIMING") != "1", reason="set AGENT_IMPORT_TIMING=1 to check import times")
+@pytest.mark.parametrize("module", sorted(DEFAULT_BUDGETS_MS))
+def test_entry_points_stay_within_import_budget(module):
+    profile = measure(module, runs=2)
+    assert profile.total_ms <= budget_for(module), profile.slowest(10)
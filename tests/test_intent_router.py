@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from agent.core.intelligent_orchestrator import IntelligentOrchestrator, Strategy
+from agent.core.intent_router import IntentRouter, RouteDecision
+
+NEWS = {
+    "needs_tools": True,
+    "needs_web": True,
+    "risk_level": "none",
+    "complexity": "simple",
+    "preferred_skill": "browser",
+    "intent": "web.summarize_news",
+}
+
+
+class _CountingLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def chat_json(self, prompt, **kwargs):
+        self.calls += 1
+        return {**NEWS, "reasoning": "llm", "confidence": 0.9}
+
+
+def test_router_needs_agreeing_neighbours(tmp_path: Path) -> None:
+    router = IntentRouter(tmp_path / "history.jsonl", threshold=0.6)
+    router.observe("summarize the latest hacker news headlines", NEWS, success=True)
+    assert router.route("summarize hacker news headlines") is None  # one example is not enough support
+
+    router.observe("summarize latest hacker news headlines please", NEWS, success=True)
+    decision = router.route("summarize the hacker news headlines")
+    assert decision is not None and decision.strategy["intent"] == "web.summarize_news"
+    assert router.route("delete all temp files in downloads") is None
+
+    # History is persisted and reloaded.
+    reloaded = IntentRouter(tmp_path / "history.jsonl", threshold=0.6)
+    assert reloaded.route("summarize the hacker news headlines") is not None
+    assert len(reloaded) == 2
+
+
+def test_failed_outcomes_vote_against(tmp_path: Path) -> None:
+    router = IntentRouter(tmp_path / "history.jsonl", threshold=0.3)
+    for _ in range(2):
+        router.observe("summarize latest hacker news headlines", NEWS, success=True)
+    for _ in range(3):
+        router.observe("summarize latest hacker news headlines", NEWS, success=False)
+    assert router.route("summarize latest hacker news headlines") is None
+
+
+def test_request_specific_strategies_are_not_learned(tmp_path: Path) -> None:
+    router = IntentRouter(tmp_path / "history.jsonl")
+    assert not router.observe("read notes.txt", {**NEWS, "entities": {"filename": "notes.txt"}}, success=True)
+    assert not router.observe("book a flight", {**NEWS, "clarification_questions": ["Where to?"]}, success=True)
+    assert len(router) == 0
+
+
+def test_orchestrator_skips_llm_for_learned_requests(tmp_path: Path) -> None:
+    llm = _CountingLLM()
+    router = IntentRouter(tmp_path / "history.jsonl", threshold=0.6)
+    orchestrator = IntelligentOrchestrator(llm, router=router)
+
+    for request in ("summarize the latest hacker news headlines", "summarize latest hacker news headlines today"):
+        strategy = orchestrator.analyze(request)
+        assert strategy.source == "llm"
+        orchestrator.record_outcome(request, strategy, success=True)
+    assert llm.calls == 2
+
+    routed = orchestrator.analyze("summarize hacker news headlines today")
+    assert llm.calls == 2
+    assert routed.source == "router" and routed.intent == "web.summarize_news"
+    assert routed.entities == {"time_range": "today"}
+
+    # Quick matches and keyword fallbacks are never fed back.
+    orchestrator.record_outcome("check my calendar", Strategy(source="quick_match", intent="calendar.list_events"), True)
+    assert len(router) == 2
+
+    metrics = orchestrator.metrics()
+    assert metrics["requests"] == 3 and metrics["llm_calls"] == 2
+    assert metrics["router_hits"] == 1 and metrics["router_misses"] == 2
+    assert abs(metrics["router_hit_rate"] - 1 / 3) < 1e-9
+    assert metrics["router_examples"] == 2
+
+
+class _RouteTo:
+    def __init__(self, strategy) -> None:
+        self.strategy = strategy
+        self.observed = []
+
+    def route(self, request):
+        return RouteDecision(dict(self.strategy), confidence=0.9, support=3, neighbours=3)
+
+    def observe(self, request, strategy, success):
+        self.observed.append((request, success))
+        return True
+
+
+def test_routed_strategy_with_null_fields_or_bad_values() -> None:
+    llm = _CountingLLM()
+    router = _RouteTo({**NEWS, "needs_memory": None, "needs_ui_automation": None, "preferred_tool": None})
+    routed = IntelligentOrchestrator(llm, router=router).analyze("summarize hacker news")
+    assert routed.source == "router" and routed.needs_memory is False and llm.calls == 0
+
+    router.strategy = {**NEWS, "risk_level": "catastrophic"}
+    fallback = IntelligentOrchestrator(llm, router=router).analyze("summarize hacker news")
+    assert fallback.source == "llm" and llm.calls == 1
+
+
+def test_router_decisions_are_learned_only_when_confirmed() -> None:
+    router = _RouteTo(NEWS)
+    orchestrator = IntelligentOrchestrator(_CountingLLM(), router=router)
+    routed = orchestrator.analyze("summarize hacker news")
+    orchestrator.record_outcome("summarize hacker news", routed, success=True)
+    assert router.observed == []
+    orchestrator.record_outcome("summarize hacker news", routed, success=True, confirmed=True)
+    assert router.observed == [("summarize hacker news", True)]
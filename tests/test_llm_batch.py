@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent.adapters.http_pool import HttpPool
+from agent.adapters.llm_client import LLMClient, LLMError, LLMResponse, MultiProviderClient
+from agent.adapters.openrouter_adapter import OpenRouterAdapter
+
+
+class _SlowEndpoint(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):  # noqa: N802 - http.server API
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.clients.add(self.client_address)
+        time.sleep(0.15)
+        with server.lock:
+            server.in_flight -= 1
+        if body["messages"][-1]["content"] == "fail":
+            data, status = b'{"error": {"message": "bad"}}', 400
+        else:
+            echo = body["messages"][-1]["content"]
+            data = json.dumps({"choices": [{"message": {"content": echo}}], "usage": {}}).encode("utf-8")
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowEndpoint)
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = 0
+    server.clients = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _adapter(server) -> OpenRouterAdapter:
+    adapter = OpenRouterAdapter(api_key="dummy", base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    adapter._session = HttpPool(4, use_httpx=False)
+    return adapter
+
+
+def test_batch_chat_is_concurrent_capped_and_ordered(endpoint):
+    adapter = _adapter(endpoint)
+    prompts = [f"p{i}" for i in range(6)] + ["fail"]
+
+    started = time.perf_counter()
+    results = adapter.batch_chat(prompts, max_concurrency=3)
+    elapsed = time.perf_counter() - started
+
+    assert [r.content for r in results[:6]] == prompts[:6]
+    assert isinstance(results[6], LLMError)
+    assert endpoint.max_in_flight == 3
+    assert elapsed < 7 * 0.15  # serial would take >= 1.05s
+    # Connections are kept alive and reused across the batch.
+    assert len(endpoint.clients) <= 4
+
+
+def test_abatch_chat_matches_batch_chat(endpoint):
+    adapter = _adapter(endpoint)
+    results = asyncio.run(adapter.abatch_chat(["a", "b", "c"], max_concurrency=2))
+    assert [r.content for r in results] == ["a", "b", "c"]
+    assert endpoint.max_in_flight == 2
+
+
+class _FakeProvider(LLMClient):
+    def __init__(self, name: str, delay: float, fail: bool = False):
+        self.name, self.delay, self.fail = name, delay, fail
+        self.calls = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    def is_available(self) -> bool:
+        return True
+
+    def chat(self, message, system_prompt=None, temperature=0.7, max_tokens=2048, timeout=60):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise LLMError("boom", retryable=True, provider=self.name)
+        return LLMResponse(content=self.name, provider=self.name, model="m")
+
+    def chat_json(self, message, system_prompt=None, schema=None, timeout=60):
+        return {}
+
+
+def test_hedged_request_returns_the_faster_provider():
+    slow, fast = _FakeProvider("slow", 1.0), _FakeProvider("fast", 0.01)
+    client = MultiProviderClient([slow, fast], hedge_after=0.05)
+
+    started = time.perf_counter()
+    response = client.chat("hi")
+    assert response.content == "fast"
+    assert time.perf_counter() - started < 0.5
+    assert client.hedge_stats == {"hedged": 1, "hedge_wins": 1}
+
+
+def test_hedging_fails_over_without_waiting_when_leader_errors():
+    broken, backup = _FakeProvider("broken", 0.0, fail=True), _FakeProvider("backup", 0.0)
+    client = MultiProviderClient([broken, backup], hedge_after=5.0)
+
+    started = time.perf_counter()
+    assert client.chat("hi").content == "backup"
+    assert time.perf_counter() - started < 1.0
+    assert client.hedge_stats["hedged"] == 0
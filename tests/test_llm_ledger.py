@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+from agent.autonomous.llm.stub import ScriptedLLM
+from agent.autonomous.runner import AgentRunner
+from agent.llm import ledger as llm_ledger
+from scripts.llm_report import main as report_main
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    path = tmp_path / "ledger.sqlite3"
+    monkeypatch.setenv("AGENT_LLM_LEDGER", str(path))
+    monkeypatch.setenv("LLM_COST_PER_1K_TOKENS_USD", "0.01")
+    yield llm_ledger.get_ledger()
+
+
+def test_nested_tracking_writes_one_row(ledger) -> None:
+    with llm_ledger.bind_run("run-1"), llm_ledger.track("plan", source="runner", prompt_chars=400) as outer:
+        outer.requested()
+        time.sleep(0.01)
+        with llm_ledger.track("codex", source="codex_cli", model="gpt-x", effort="low") as inner:
+            assert inner is outer
+            inner.requested()
+            inner.dispatched()
+            inner.dispatched()
+            inner.response_chars = 100
+
+    (row,) = ledger.rows()
+    assert (row["agent"], row["source"], row["run_id"]) == ("plan", "runner", "run-1")
+    assert (row["model"], row["effort"], row["attempts"]) == ("gpt-x", "low", 2)
+    assert row["queue_wait_ms"] >= 10 and row["wall_ms"] >= row["queue_wait_ms"]
+    assert row["tokens"] == 125 and row["tokens_estimated"] == 1
+    assert row["cost_usd"] == pytest.approx(0.00125)
+
+
+def test_errors_and_cache_hits_are_recorded(ledger) -> None:
+    with pytest.raises(TimeoutError):
+        with llm_ledger.track("reflection", source="runner"):
+            raise TimeoutError("timed out")
+    llm_ledger.record("Static", source="swarm", cached=True, prompt_chars=10)
+
+    failed, cached = ledger.rows()
+    assert failed["status"] == "timeout" and "TimeoutError" in failed["error"]
+    assert cached["status"] == "cached" and cached["cached"] == 1 and cached["cost_usd"] is None
+
+
+def test_report_aggregates_by_call_site(ledger, capsys) -> None:
+    for agent, wall in (("plan", 1), ("plan", 1), ("reflection", 1)):
+        with llm_ledger.track(agent, source="runner", model="m") as call:
+            call.dispatched()
+            time.sleep(wall / 100)
+
+    groups = ledger.report(by="agent")
+    assert [g["agent"] for g in groups] == ["plan", "reflection"]
+    assert groups[0]["calls"] == 2 and groups[0]["wall_share"] > 0.5
+
+    assert report_main(["--by", "model", "--json", "--ledger", str(ledger.path)]) == 0
+    (model_group,) = json.loads(capsys.readouterr().out)
+    assert model_group["model"] == "m" and model_group["calls"] == 3
+
+
+def test_runner_calls_land_in_ledger(ledger, tmp_path) -> None:
+    steps = [
+        {
+            "goal": "write note",
+            "tool_name": "file_write",
+            "tool_args": [{"key": "path", "value": "note.txt"}, {"key": "content", "value": "hi"}],
+            "success_criteria": [],
+        }
+    ]
+    runner = AgentRunner(
+        cfg=RunnerConfig(max_steps=4, timeout_seconds=60),
+        agent_cfg=AgentConfig(memory_db_path=tmp_path / "memory.sqlite3"),
+        planner_cfg=PlannerConfig(mode="react"),
+        llm=ScriptedLLM(steps=steps),
+        run_dir=tmp_path / "run",
+    )
+    result = runner.run("write a note")
+    assert result.success
+
+    rows = ledger.rows(run_id=result.run_id)
+    assert rows and all(r["source"] == "runner" and r["provider"] == "scripted" for r in rows)
+    assert all(r["attempts"] == 1 and r["prompt_chars"] > 0 and r["response_chars"] > 0 for r in rows)
+    assert "plan" in {r["agent"] for r in rows}
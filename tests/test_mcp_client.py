@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from agent.mcp.client import MCPClient, MCPServerConfig
+from agent.tools.mcp_proxy import McpProxy
+
+STUB = Path(__file__).parent / "fixtures" / "mcp_stub_server.py"
+
+
+@pytest.fixture
+def client():
+    c = MCPClient(servers={"stub": MCPServerConfig("stub", sys.executable, [str(STUB)], {})}, request_timeout=10)
+    yield c
+    c.shutdown_sync()
+
+
+def test_discovers_tools_and_reuses_one_process(client: MCPClient) -> None:
+    tools = client.list_tools_sync("stub")
+    assert [t["name"] for t in tools] == ["echo", "sleep", "fail", "info"]
+    assert client.available_tools["stub.echo"]["input_schema"]["properties"]["text"]["type"] == "string"
+
+    assert client.call_tool_sync("stub.echo", {"text": "hi"}) == {
+        "success": True,
+        "tool": "stub.echo",
+        "arguments": {"text": "hi"},
+        "result": "hi",
+    }
+    first = client.call_tool_sync("stub.info", {})["result"]
+    second = client.call_tool_sync("stub.info", {})["result"]
+    assert first["pid"] == second["pid"] == client.sessions["stub"].transport.pid
+    assert second["calls"] == first["calls"] + 1
+
+
+def test_concurrent_calls_are_multiplexed(client: MCPClient) -> None:
+    client.initialize_sync(["stub"])
+    results: dict[int, str] = {}
+
+    def call(i: int) -> None:
+        results[i] = client.call_tool_sync("stub.sleep", {"seconds": 0.4, "tag": f"t{i}"})["result"]
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.perf_counter() - start < 1.5  # 6 x 0.4s sequentially would be 2.4s
+    assert results == {i: f"t{i}" for i in range(6)}
+
+
+def test_errors_and_async_callers(client: MCPClient) -> None:
+    failed = client.call_tool_sync("stub.fail", {})
+    assert failed["success"] is False and failed["error"] == "boom"
+    with pytest.raises(ValueError):
+        client.call_tool_sync("stub.missing", {})
+
+    async def from_another_loop():
+        return await asyncio.gather(*(client.call_tool("stub.echo", {"text": str(i)}) for i in range(3)))
+
+    assert [r["result"] for r in asyncio.run(from_another_loop())] == ["0", "1", "2"]
+
+
+def test_server_restarts_after_exit(client: MCPClient) -> None:
+    pid = client.call_tool_sync("stub.info", {})["result"]["pid"]
+    transport = client.sessions["stub"].transport
+    client._loop.run(transport.close())
+    assert client.call_tool_sync("stub.info", {})["result"]["pid"] != pid
+
+
+def test_proxy_executes_through_shared_transport(client: MCPClient) -> None:
+    proxy = McpProxy(client=client)
+    result = proxy.execute("stub.echo", {"text": "via proxy"})
+    assert result.ok and result.data == "via proxy"
+    assert proxy.get_tool("stub.echo").input_schema["properties"]["text"]["type"] == "string"
+    assert not proxy.execute("nope.tool", {}).ok
@@ -23,3 +23,17 @@ def test_memory_store_hash_embedding_search(tmp_path) -> None:
             assert str(model).startswith("hash")
     finally:
         store.close()
+
+
+def test_memory_store_is_shared_across_threads(tmp_path) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    store = SqliteMemoryStore(tmp_path / "memory.sqlite3")
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            ids = list(pool.map(lambda i: store.upsert(kind="knowledge", content=f"note number {i}"), range(8)))
+            found = list(pool.map(lambda i: store.search(f"note number {i}", limit=1), range(8)))
+        assert len(set(ids)) == 8
+        assert all(results for results in found)
+    finally:
+        store.close()
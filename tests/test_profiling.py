@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+from agent.autonomous.llm.stub import ScriptedLLM
+from agent.autonomous.profiling import Profiler, in_current_context, span, start_span
+from agent.autonomous.runner import AgentRunner
+
+
+def test_span_is_noop_without_active_profiler() -> None:
+    with span("nothing") as handle:
+        handle.set(ignored=True)
+    start_span("nothing").end()
+
+
+def test_spans_nest_across_threads_and_export() -> None:
+    def _tool() -> None:
+        with span("tool.x", cat="tool"):
+            pass
+
+    profiler = Profiler()
+    profiler.activate()
+    try:
+        with span("step", cat="step", index=1):
+            with span("llm.plan", cat="llm"):
+                time.sleep(0.002)
+            worker = threading.Thread(target=in_current_context(_tool))
+            worker.start()
+            worker.join()
+        dangling = start_span("step", index=2)
+    finally:
+        profiler.deactivate()
+
+    by_name = {s.name: s for s in profiler.spans if s.attrs.get("index") != 2}
+    assert by_name["llm.plan"].parent_id == by_name["step"].span_id
+    assert by_name["tool.x"].parent_id == by_name["step"].span_id
+    assert by_name["tool.x"].thread_id != by_name["step"].thread_id
+    assert dangling.span.attrs["unclosed"] is True
+    summary = profiler.summary()
+    assert summary["step"]["count"] == 2
+    assert summary["step"]["self_ms"] < summary["step"]["total_ms"]
+
+    chrome = profiler.to_chrome_trace()
+    complete = [e for e in chrome["traceEvents"] if e["ph"] == "X"]
+    assert {e["name"] for e in complete} == {"step", "llm.plan", "tool.x"}
+    assert all(e["dur"] >= 0 for e in complete)
+
+    otlp = profiler.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    llm = next(s for s in otlp if s["name"] == "llm.plan")
+    assert len(llm["traceId"]) == 32 and len(llm["spanId"]) == 16
+    assert llm["parentSpanId"] == f"{by_name['step'].span_id:016x}"
+    assert int(llm["endTimeUnixNano"]) > int(llm["startTimeUnixNano"]) > 10**18
+
+
+def test_runner_writes_profile_when_enabled(tmp_path) -> None:
+    steps = [
+        {
+            "goal": "write note",
+            "tool_name": "file_write",
+            "tool_args": [{"key": "path", "value": "note.txt"}, {"key": "content", "value": "hi"}],
+            "success_criteria": [],
+        }
+    ]
+    run_dir = tmp_path / "run"
+    runner = AgentRunner(
+        cfg=RunnerConfig(max_steps=4, timeout_seconds=60, profiling=True, profile_sample_interval_ms=1),
+        agent_cfg=AgentConfig(memory_db_path=tmp_path / "memory.sqlite3"),
+        planner_cfg=PlannerConfig(mode="react"),
+        llm=ScriptedLLM(steps=steps),
+        run_dir=run_dir,
+    )
+    result = runner.run("write a note")
+    assert result.success
+
+    events = json.loads((run_dir / "profile.trace.json").read_text())["traceEvents"]
+    names = {e["name"] for e in events if e["ph"] == "X"}
+    for expected in ("run", "step", "memory.retrieve", "prompt.build", "llm.wait", "tool.file_write", "checkpoint", "trace.flush"):
+        assert expected in names
+    assert (run_dir / "profile.otlp.json").exists()
+    assert (run_dir / "profile.folded").read_text().strip()
+    perf = (run_dir / "performance.log").read_text()
+    assert '"cat": "span"' in perf
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel
+
+from agent.autonomous.llm.stub import StubLLM
+from agent.autonomous.models import Observation, ToolResult
+from agent.autonomous.planning.prompt_builder import PromptBudget, PromptBuilder, estimate_tokens
+from agent.autonomous.planning.react import ReActPlanner
+from agent.autonomous.tools.registry import ToolRegistry, ToolSpec
+
+
+def _obs(i: int, size: int = 50) -> Observation:
+    output = {"i": i, "text": "x" * size}
+    return Observation(source=f"tool:t{i}", raw=output, parsed=output, salient_facts=[f"t{i} succeeded"])
+
+
+def test_observations_are_rendered_once_and_dict_output_sent_once():
+    builder = PromptBuilder(PromptBudget())
+    history = [_obs(i) for i in range(5)]
+    first = builder.build("PREFIX", observations=history)
+    assert builder.cache.misses == 5
+    assert first.count('"text"') == 5  # raw and parsed are identical: rendered once
+
+    history.append(_obs(5))
+    second = builder.build("PREFIX", observations=history)
+    assert builder.cache.misses == 6
+    assert builder.cache.hits == 5
+    assert second.startswith(first[: first.index("Recent observations")])
+
+
+def test_budget_keeps_newest_observations_in_order():
+    builder = PromptBuilder(PromptBudget(history_tokens=1_000, observation_tokens=300))
+    history = [_obs(i, size=400) for i in range(20)]
+    prompt = builder.build("PREFIX", sections=[("Goal", "g")], observations=history, max_observations=20)
+
+    stats = builder.last_stats
+    assert 0 < stats["observations"] < 20
+    assert stats["observations_omitted"] == 20 - stats["observations"]
+    assert estimate_tokens(prompt[prompt.index("Recent observations"):]) <= 1_000 + 50
+    kept = [i for i in range(20) if f'"source":"tool:t{i}"' in prompt]
+    assert kept == list(range(20 - stats["observations"], 20))
+
+
+def test_a_large_prefix_does_not_crowd_out_the_history():
+    builder = PromptBuilder(PromptBudget())
+    history = [_obs(i, size=2_000) for i in range(12)]
+    builder.build("P" * 40_000, sections=[("Goal", "g")], memories=[{"content": "m"}], observations=history)
+    assert builder.last_stats["observations"] == 12
+    assert builder.last_stats["memories"] == 1
+
+
+def test_newest_observation_is_kept_even_over_budget():
+    builder = PromptBuilder(PromptBudget(history_tokens=10))
+    prompt = builder.build("PREFIX", observations=[_obs(0, size=400), _obs(1, size=400)])
+    assert builder.last_stats["observations"] == 1
+    assert '"source":"tool:t1"' in prompt and '"source":"tool:t0"' not in prompt
+
+
+def test_concurrent_builds_share_one_builder():
+    builder = PromptBuilder(PromptBudget())
+    histories = [[_obs(i), _obs(100 + n)] for n, i in enumerate(range(16))]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        prompts = list(pool.map(lambda h: builder.build(builder.prefix("p", lambda: "PREFIX"), observations=h), histories))
+    for n, prompt in enumerate(prompts):
+        assert prompt.startswith("PREFIX")
+        assert f'"source":"tool:t{100 + n}"' in prompt
+    assert builder.cache.hits + builder.cache.misses == 32
+
+
+class _Args(BaseModel):
+    path: str = ""
+
+
+def test_react_prompts_share_a_byte_stable_prefix():
+    tools = ToolRegistry()
+    tools.register(
+        ToolSpec(
+            name="file_read",
+            args_model=_Args,
+            fn=lambda ctx, args: ToolResult(success=True),
+            description="Read a file",
+            read_only=True,
+        )
+    )
+    step = {"goal": "read", "tool_name": "file_read", "tool_args": [{"key": "path", "value": "a"}]}
+    llm = StubLLM(responses=[{"goal": "g", "steps": [step]}, {"goal": "g", "steps": [step]}])
+    planner = ReActPlanner(llm=llm, tools=tools, unsafe_mode=False)
+
+    history = [_obs(0)]
+    planner.plan(task="read a", observations=history, memories=[])
+    history.append(_obs(1))
+    planner.plan(task="read a", observations=history, memories=[{"kind": "knowledge", "content": "m"}])
+
+    first, second = llm.calls
+    prefix = first[: first.index("Goal:")]
+    assert second.startswith(prefix)
+    assert '"name":"file_read"' in prefix
+    assert "tool:t1" in second and "tool:t1" not in first
@@ -30,3 +30,69 @@ def test_reflexion_retrieval_matches_objective_and_error(tmp_path, monkeypatch):
     results = retrieve_reflexions("Fix failing tests", "AssertionError", k=3)
     assert results
     assert results[0].objective == "Fix failing tests"
+
+
+def _entry(entry_id: str, objective: str, errors: list[str], ts: datetime | None = None) -> ReflexionEntry:
+    return ReflexionEntry(
+        id=entry_id,
+        timestamp=(ts or datetime.now(timezone.utc)).isoformat(),
+        objective=objective,
+        context_fingerprint="fp",
+        phase="REFLECT",
+        errors=errors,
+        reflection="",
+        fix="",
+        outcome="failure",
+    )
+
+
+def test_written_reflexions_are_indexed_and_ranked(tmp_path, monkeypatch):
+    from agent.autonomous.memory.reflexion import get_reflexion_index, write_reflexion
+
+    runs_root = tmp_path / "runs"
+    monkeypatch.setenv("REFLEXION_BASE_DIR", str(runs_root))
+    monkeypatch.delenv("REFLEXION_INDEX_PATH")  # default location: next to the runs
+    write_reflexion(_entry("plain", "deploy the service", []))
+    write_reflexion(_entry("err", "deploy the service", ["TimeoutError contacting registry"]))
+    write_reflexion(_entry("other", "write docs", []))
+
+    results = retrieve_reflexions("deploy service", "TimeoutError", k=5)
+    assert [r.id for r in results] == ["err", "plain"]
+
+    index = get_reflexion_index()
+    assert index is not None and index.path.parent == runs_root
+    # Re-importing the JSONL written alongside the index must not duplicate entries.
+    from agent.autonomous.memory.reflexion import import_legacy_reflexions
+
+    assert import_legacy_reflexions(index) == 0
+    assert len(retrieve_reflexions("deploy", None, k=10)) == 2
+
+
+def test_legacy_import_is_incremental(tmp_path, monkeypatch):
+    from agent.autonomous.memory.reflexion import get_reflexion_index, import_legacy_reflexions
+
+    runs_root = tmp_path / "runs"
+    legacy = runs_root / "old" / "reflexion.jsonl"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps(_entry("a", "parse config", []).model_dump()) + "\n", encoding="utf-8")
+    monkeypatch.setenv("REFLEXION_BASE_DIR", str(runs_root))
+
+    assert get_reflexion_index() is not None
+    assert [r.id for r in retrieve_reflexions("parse config", None)] == ["a"]
+    with legacy.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(_entry("b", "parse config again", []).model_dump()) + "\n")
+    assert import_legacy_reflexions(get_reflexion_index()) == 1
+    assert {r.id for r in retrieve_reflexions("parse config", None)} == {"a", "b"}
+
+
+def test_retrieval_does_not_create_the_index(tmp_path, monkeypatch):
+    runs_root = tmp_path / "runs"
+    legacy = runs_root / "old" / "reflexion.jsonl"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps(_entry("a", "parse config", []).model_dump()) + "\n", encoding="utf-8")
+    index_path = tmp_path / "index" / "reflexion_index.sqlite3"
+    monkeypatch.setenv("REFLEXION_BASE_DIR", str(runs_root))
+    monkeypatch.setenv("REFLEXION_INDEX_PATH", str(index_path))
+
+    assert [r.id for r in retrieve_reflexions("parse config", None)] == ["a"]
+    assert not index_path.exists()
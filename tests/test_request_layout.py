@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent.adapters.openai_adapter import OpenAIAdapter
+from agent.adapters.openrouter_adapter import OpenRouterAdapter
+from agent.llm.openrouter_client import OpenRouterClient
+
+
+class _CachingEndpoint(BaseHTTPRequestHandler):
+    """Chat completions mock that "caches" system prefixes it has seen before."""
+
+    def do_POST(self):  # noqa: N802 - http.server API
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        system = next((m["content"] for m in body["messages"] if m["role"] == "system"), "")
+        key = json.dumps(system, sort_keys=True)
+        prefix_tokens = len(key) // 4
+        cached = prefix_tokens if key in self.server.seen else 0
+        self.server.seen.add(key)
+        payload = {
+            "model": body["model"],
+            "choices": [{"message": {"content": '{"ok": true}'}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prefix_tokens + 10,
+                "completion_tokens": 3,
+                "total_tokens": prefix_tokens + 13,
+                "prompt_tokens_details": {"cached_tokens": cached},
+            },
+        }
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CachingEndpoint)
+    server.requests = []
+    server.seen = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+SCHEMA = {"type": "object", "properties": {"ok": {"type": "boolean"}, "why": {"type": "string"}}}
+SCHEMA_REORDERED = {"properties": {"why": {"type": "string"}, "ok": {"type": "boolean"}}, "type": "object"}
+
+
+def test_openai_prefix_is_byte_stable_and_cached_tokens_recorded(endpoint):
+    adapter = OpenAIAdapter(api_key="dummy", base_url=_url(endpoint))
+    adapter.chat_json("step 1 at 10:00:01", system_prompt="You plan.", schema=SCHEMA)
+    adapter.chat_json("step 2 at 10:00:07", system_prompt="You plan.", schema=SCHEMA_REORDERED)
+
+    first, second = endpoint.requests
+    assert first["messages"][0] == second["messages"][0]
+    assert first["messages"][0]["content"].startswith("You must respond with valid JSON matching this schema:")
+    assert "10:00" not in first["messages"][0]["content"]
+    assert first["messages"][-1]["content"] == "step 1 at 10:00:01"
+    assert first["prompt_cache_key"] == second["prompt_cache_key"]
+    assert adapter.last_usage["cached_tokens"] > 0
+
+    response = adapter.chat("hello", system_prompt="You plan.")
+    assert response.cached_tokens == 0  # different prefix: no JSON spec
+    again = adapter.chat("hello again", system_prompt="You plan.")
+    assert again.cached_tokens > 0
+    assert again.prefix_hash == response.prefix_hash
+    assert 0 < again.cache_hit_ratio <= 1
+
+
+def test_openrouter_adds_cache_breakpoint_for_anthropic_models(endpoint):
+    adapter = OpenRouterAdapter(api_key="dummy", model="anthropic/claude-3.5-sonnet", base_url=_url(endpoint))
+    adapter.chat("hi", system_prompt="Static spec.")
+    system = endpoint.requests[-1]["messages"][0]["content"]
+    assert system == [{"type": "text", "text": "Static spec.", "cache_control": {"type": "ephemeral"}}]
+
+    plain = OpenRouterAdapter(api_key="dummy", model="openai/gpt-4o-mini", base_url=_url(endpoint))
+    plain.chat("hi", system_prompt="Static spec.")
+    assert endpoint.requests[-1]["messages"][0]["content"] == "Static spec."
+
+
+def test_openrouter_client_tracks_cache_stats(endpoint, tmp_path):
+    schema_path = tmp_path / "s.schema.json"
+    schema_path.write_text(json.dumps(SCHEMA))
+    client = OpenRouterClient(api_key="dummy", api_url=f"{_url(endpoint)}/chat/completions")
+
+    for i in range(3):
+        assert client.complete_json(f"observation {i}", schema_path=schema_path) == {"ok": True}
+
+    systems = {json.dumps(r["messages"][0]["content"]) for r in endpoint.requests}
+    assert len(systems) == 1
+    assert client.cache_stats["requests"] == 3
+    assert client.cache_stats["cached_tokens"] > 0
+    assert client.last_usage["cached_tokens"] > 0
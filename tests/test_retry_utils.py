@@ -1,8 +1,29 @@
 from __future__ import annotations
 
+import time
+from uuid import uuid4
+
 import pytest
 
-from agent.autonomous.retry_utils import RetryConfig, retry_with_backoff
+from agent.adapters.llm_client import LLMClient, LLMRateLimitError, LLMResponse, MultiProviderClient
+from agent.autonomous.config import AgentConfig, PlannerConfig, RunContext, RunnerConfig
+from agent.autonomous.models import ToolResult
+from agent.autonomous.retry_utils import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    LLM_RETRY_CONFIG,
+    TOOL_RETRY_CONFIG,
+    WEB_RETRY_CONFIG,
+    RetryConfig,
+    backoff_delay,
+    clamp_timeout,
+    deadline,
+    get_breaker,
+    host_breaker,
+    retry_with_backoff,
+)
+from agent.autonomous.runner import AgentRunner
 
 
 def test_retry_succeeds_after_transient_failures() -> None:
@@ -65,3 +86,224 @@ def test_retry_does_not_retry_non_transient() -> None:
             transient_exceptions=cfg.transient_exceptions,
         )
     assert calls["count"] == 1
+
+
+class _RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("slow down")
+        self.retry_after = retry_after
+
+
+def test_retry_waits_for_retry_after_hint() -> None:
+    calls = {"count": 0}
+
+    def _fn():
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise _RateLimited(0.05)
+        return "ok"
+
+    started = time.monotonic()
+    assert retry_with_backoff(_fn, max_attempts=2, initial_delay=0, transient_exceptions=(_RateLimited,)) == "ok"
+    assert time.monotonic() - started >= 0.05
+
+
+def test_retry_gives_up_when_backoff_overruns_deadline() -> None:
+    calls = {"count": 0}
+
+    def _fn():
+        calls["count"] += 1
+        raise ValueError("transient")
+
+    started = time.monotonic()
+    with deadline(0.2), pytest.raises(ValueError):
+        retry_with_backoff(_fn, max_attempts=5, initial_delay=5.0, jitter=0, transient_exceptions=(ValueError,))
+    assert calls["count"] == 1
+    assert time.monotonic() - started < 1.0
+
+
+def test_deadline_clamps_timeouts_and_nests_tighter() -> None:
+    assert clamp_timeout(90) == 90
+    with deadline(30):
+        assert clamp_timeout(90) == 30
+        assert clamp_timeout(10) == 10
+        with deadline(600):
+            assert clamp_timeout(90) == 30
+    assert clamp_timeout(None) is None
+
+
+def test_circuit_breaker_opens_fails_fast_and_half_opens() -> None:
+    breaker = CircuitBreaker("svc", failure_threshold=2, reset_timeout=0.05)
+    calls = {"count": 0}
+
+    def _fail():
+        calls["count"] += 1
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        retry_with_backoff(_fail, max_attempts=5, initial_delay=0, breaker=breaker)
+    assert calls["count"] == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        retry_with_backoff(_fail, max_attempts=5, initial_delay=0, breaker=breaker)
+    assert calls["count"] == 2
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert retry_with_backoff(lambda: "ok", breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_budget_is_shared_across_calls() -> None:
+    budget = RetryBudget(ratio=0.0, capacity=1.0)
+    calls = {"count": 0}
+
+    def _fn():
+        calls["count"] += 1
+        raise ValueError("transient")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            retry_with_backoff(_fn, max_attempts=3, initial_delay=0, transient_exceptions=(ValueError,), budget=budget)
+    # Three first attempts plus the single retry the budget allowed.
+    assert calls["count"] == 4
+    assert budget.spent == 1 and budget.denied == 3
+
+
+class _Provider(LLMClient):
+    def __init__(self, name: str, rate_limited: bool = False):
+        self.name, self.rate_limited = name, rate_limited
+        self.calls = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    def is_available(self) -> bool:
+        return True
+
+    def chat(self, message, system_prompt=None, temperature=0.7, max_tokens=2048, timeout=60):
+        self.calls += 1
+        if self.rate_limited:
+            raise LLMRateLimitError("429", provider=self.name, retry_after=30)
+        return LLMResponse(content=self.name, provider=self.name, model="m")
+
+    def chat_json(self, message, system_prompt=None, schema=None, timeout=60):
+        return {}
+
+
+def test_rate_limit_opens_provider_breaker_so_fallback_is_used_directly() -> None:
+    name = f"primary-{uuid4().hex[:8]}"
+    primary, backup = _Provider(name, rate_limited=True), _Provider("backup")
+    client = MultiProviderClient([primary, backup])
+
+    assert client.chat("hi").content == "backup"
+    assert client.chat("again").content == "backup"
+    assert primary.calls == 1
+    assert 0 < get_breaker(f"llm:{name}").retry_in() <= 30
+
+    # The breaker is per provider and process-wide: a second client skips it too.
+    other = _Provider(name)
+    assert MultiProviderClient([other, _Provider("backup")]).chat("hi").content == "backup"
+    assert other.calls == 0
+
+
+def test_backoff_is_not_jittered_unless_asked() -> None:
+    assert backoff_delay(2.0) == 2.0
+    assert RetryConfig().jitter == 0.0
+    jittered = [backoff_delay(2.0, jitter=1.0) for _ in range(50)]
+    assert all(0.0 <= d <= 2.0 for d in jittered) and len(set(jittered)) > 1
+
+
+def test_production_retries_are_jittered(monkeypatch) -> None:
+    assert all(cfg.jitter > 0 for cfg in (LLM_RETRY_CONFIG, TOOL_RETRY_CONFIG, WEB_RETRY_CONFIG))
+
+    sleeps = []
+    monkeypatch.setattr("agent.autonomous.retry_utils.time.sleep", sleeps.append)
+
+    def _fail():
+        raise ConnectionError("down")
+
+    for _ in range(10):
+        with pytest.raises(ConnectionError):
+            LLM_RETRY_CONFIG.retry(_fail)
+    assert len(sleeps) == 20 and len(set(sleeps)) > 1
+    assert all(0 < d <= LLM_RETRY_CONFIG.max_delay for d in sleeps)
+
+    class _Flaky(_Provider):
+        def chat(self, message, system_prompt=None, temperature=0.7, max_tokens=2048, timeout=60):
+            self.calls += 1
+            raise LLMRateLimitError("429", provider=self.name)
+
+    client_sleeps = []
+    monkeypatch.setattr("agent.adapters.llm_client.time.sleep", client_sleeps.append)
+    for _ in range(10):
+        with pytest.raises(LLMRateLimitError):
+            _Flaky("flaky").complete_with_retry("hi", max_retries=2, base_delay=1.0)
+    assert len(client_sleeps) == 10 and len(set(client_sleeps)) > 1
+
+
+def test_content_errors_do_not_trip_the_breaker() -> None:
+    breaker = CircuitBreaker("svc", failure_threshold=1, reset_timeout=0.05)
+
+    def _bad_output():
+        raise ValueError("not valid JSON")
+
+    def _down():
+        raise ConnectionError("down")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            retry_with_backoff(_bad_output, initial_delay=0, breaker=breaker)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    with pytest.raises(ConnectionError):
+        retry_with_backoff(_down, initial_delay=0, breaker=breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # A half-open probe that returns bad output frees the slot for the next probe.
+    time.sleep(0.06)
+    with pytest.raises(ValueError):
+        retry_with_backoff(_bad_output, initial_delay=0, breaker=breaker)
+    assert breaker.allow()
+
+
+class _FailingTools:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def call(self, name, args, ctx):
+        self.calls.append((name, args.get("url")))
+        return ToolResult(success=False, error="down", retryable=True)
+
+
+def test_tool_breakers_are_keyed_by_host_not_tool_name(tmp_path) -> None:
+    dead, alive = f"dead-{uuid4().hex[:8]}.test", f"alive-{uuid4().hex[:8]}.test"
+    assert host_breaker(f"https://{dead}/a") is host_breaker(f"http://{dead.upper()}/b?q=1")
+    assert host_breaker("ls -la") is None and host_breaker(None) is None
+
+    def _runner() -> AgentRunner:
+        return AgentRunner(
+            cfg=RunnerConfig(tool_max_retries=0, tool_retry_backoff_seconds=0),
+            agent_cfg=AgentConfig(),
+            planner_cfg=PlannerConfig(mode="react"),
+            llm=None,
+        )
+
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path)
+    tools = _FailingTools()
+    first = _runner()
+    for _ in range(5):
+        first._call_tool_with_retry(tools, ctx, "web_fetch", {"url": f"https://{dead}/x"}, None)
+        first._call_tool_with_retry(tools, ctx, "shell_exec", {"command": "false"}, None)
+    assert host_breaker(f"https://{dead}/").state == CircuitBreaker.OPEN
+
+    # Another run in the same process: the dead host fails fast, other hosts
+    # and local tools are still called.
+    tools.calls.clear()
+    second = _runner()
+    second._call_tool_with_retry(tools, ctx, "web_fetch", {"url": f"https://{dead}/y"}, None)
+    second._call_tool_with_retry(tools, ctx, "web_fetch", {"url": f"https://{alive}/y"}, None)
+    second._call_tool_with_retry(tools, ctx, "shell_exec", {"command": "false"}, None)
+    assert tools.calls == [("web_fetch", f"https://{alive}/y"), ("shell_exec", None)]
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+from pathlib import Path
+
 import pytest
 
 from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
@@ -50,3 +53,60 @@ def test_agent_runner_smoke(tmp_path) -> None:
 
     assert result.success
     assert result.stop_reason == "goal_achieved"
+
+
+def test_agent_runner_runs_read_only_batch_in_one_step(tmp_path) -> None:
+    run_dir = tmp_path / "run"
+    workspace = run_dir / "workspace"
+    workspace.mkdir(parents=True)
+    for name in ("a", "b", "c"):
+        (workspace / f"{name}.txt").write_text(f"content-{name}", encoding="utf-8")
+
+    def _read(name):
+        return {
+            "goal": f"read {name}",
+            "tool_name": "file_read",
+            "tool_args": [{"key": "path", "value": f"{name}.txt"}],
+            "success_criteria": [],
+        }
+
+    llm = StubLLM(
+        responses=[
+            {"goal": "read", "steps": [_read("a"), _read("b"), _read("c")]},
+            {
+                "goal": "read",
+                "steps": [
+                    {
+                        "goal": "done",
+                        "tool_name": "finish",
+                        "tool_args": [{"key": "summary", "value": "read all"}],
+                    }
+                ],
+            },
+            {"status": "success", "explanation_short": "done", "next_hint": ""},
+        ]
+    )
+    runner = AgentRunner(
+        cfg=RunnerConfig(max_steps=5, timeout_seconds=30),
+        agent_cfg=AgentConfig(
+            enable_web_gui=False,
+            enable_desktop=False,
+            memory_db_path=tmp_path / "memory.sqlite3",
+        ),
+        planner_cfg=PlannerConfig(mode="react"),
+        llm=llm,
+        run_dir=run_dir,
+    )
+    result = runner.run(task="Read a.txt, b.txt and c.txt")
+
+    assert result.success
+    # One plan for the whole batch, no per-file reflection.
+    assert len(llm.calls) == 3
+    events = [json.loads(line) for line in Path(result.trace_path).read_text().splitlines()]
+    batches = [e for e in events if e.get("type") == "parallel_batch"]
+    assert len(batches) == 1
+    assert batches[0]["tools"] == ["file_read"] * 3
+    assert batches[0]["succeeded"] == 3
+    batch_steps = [e for e in events if e.get("type") == "step" and e.get("parallel_batch")]
+    assert [s["action"]["tool_args"]["path"] for s in batch_steps] == ["a.txt", "b.txt", "c.txt"]
+    assert len({s["step_index"] for s in batch_steps}) == 1
@@ -25,7 +25,7 @@ def test_shell_exec_blocks_non_allowlisted(monkeypatch: pytest.MonkeyPatch, tmp_
         called["count"] += 1
         return _Proc()
 
-    monkeypatch.setattr("agent.autonomous.tools.builtins.subprocess.run", _fake_run)
+    monkeypatch.setattr("agent.autonomous.tools.builtins.run_process", _fake_run)
 
     shell_exec = shell_exec_factory(agent_cfg)
     result = shell_exec(ctx, type("Args", (), {"command": "echo hi", "timeout_seconds": 1, "cwd": None})())
@@ -44,7 +44,7 @@ def test_shell_exec_allows_rg(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -
         called["count"] += 1
         return _Proc(returncode=0, stdout="rg 13.0", stderr="")
 
-    monkeypatch.setattr("agent.autonomous.tools.builtins.subprocess.run", _fake_run)
+    monkeypatch.setattr("agent.autonomous.tools.builtins.run_process", _fake_run)
 
     shell_exec = shell_exec_factory(agent_cfg)
     result = shell_exec(ctx, type("Args", (), {"command": "rg --version", "timeout_seconds": 1, "cwd": None})())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from agent.autonomous import skill_library as sl
+from agent.autonomous.skill_library import Skill, SkillLibrary
+
+
+def _skill(name: str, description: str, tags: list[str]) -> Skill:
+    return Skill(name=name, description=description, tags=tags)
+
+
+def _populate(library: SkillLibrary) -> dict[str, str]:
+    ids = {}
+    ids["calendar"] = library.save(_skill("outlook_calendar", "open my outlook calendar events", ["calendar", "outlook"]))
+    ids["notepad"] = library.save(_skill("notepad_hello", "open notepad and write hello", ["notepad"]))
+    ids["tasks"] = library.save(_skill("google_tasks", "list google tasks due today", ["tasks", "google"]))
+    return ids
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_search_ranks_from_matrix(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_numpy: bool) -> None:
+    if not use_numpy:
+        monkeypatch.setattr(sl, "_np", None)
+    elif sl._np is None:
+        pytest.skip("numpy not installed")
+    library = SkillLibrary(tmp_path)
+    ids = _populate(library)
+
+    hits = library.search("open outlook calendar", k=2, min_similarity=0.1)
+    assert hits and hits[0][0].id == ids["calendar"]
+    assert len(hits) <= 2
+
+    meta = json.loads((tmp_path / "skill_vectors.json").read_text())
+    assert meta["model"] == "hash256" and meta["dim"] == 256
+    assert (tmp_path / "skill_vectors.f32").stat().st_size == 3 * 256 * 4
+    assert "embeddings" not in json.loads((tmp_path / "skill_index.json").read_text())
+
+    assert library.delete(ids["calendar"])
+    reopened = SkillLibrary(tmp_path)
+    assert [s.id for s, _ in reopened.search("open outlook calendar", k=3, min_similarity=0.0)] != []
+    assert all(s.id != ids["calendar"] for s, _ in reopened.search("outlook calendar", k=3, min_similarity=0.0))
+    assert (tmp_path / "skill_vectors.f32").stat().st_size == 2 * 256 * 4
+
+
+def test_outcomes_are_appended_not_rewritten(tmp_path: Path) -> None:
+    library = SkillLibrary(tmp_path)
+    ids = _populate(library)
+    index_before = (tmp_path / "skill_index.json").read_bytes()
+
+    library.record_outcome(ids["tasks"], success=True)
+    library.record_outcome(ids["tasks"], success=False, notes="timed out")
+    assert (tmp_path / "skill_index.json").read_bytes() == index_before
+    assert len((tmp_path / "skill_outcomes.jsonl").read_text().splitlines()) == 2
+
+    reopened = SkillLibrary(tmp_path)
+    skill = reopened.get(ids["tasks"])
+    assert (skill.success_count, skill.failure_count) == (1, 1)
+    assert skill.refinement_notes[-1].endswith("timed out")
+
+    # A rewrite folds outcomes into the index; the log restarts and is not replayed twice.
+    reopened.save(_skill("new_skill", "something else entirely", []))
+    assert not (tmp_path / "skill_outcomes.jsonl").exists()
+    again = SkillLibrary(tmp_path).get(ids["tasks"])
+    assert (again.success_count, again.failure_count) == (1, 1)
+
+
+def test_success_rate_boost_reorders_ties(tmp_path: Path) -> None:
+    library = SkillLibrary(tmp_path)
+    a = library.save(_skill("send_report", "send weekly report email", []))
+    b = library.save(_skill("send_report", "send weekly report email", []))
+    library.record_outcome(a, success=False)
+    library.record_outcome(b, success=True)
+    hits = library.search("send weekly report email", k=2, min_similarity=0.0)
+    assert [s.id for s, _ in hits] == [b, a]
+
+
+def test_legacy_index_is_migrated(tmp_path: Path) -> None:
+    skill = _skill("notepad_hello", "open notepad and write hello", ["notepad"])
+    legacy = {
+        "version": 1,
+        "skills": [skill.model_dump()],
+        "embeddings": {skill.id: [0.1] * 384},
+    }
+    (tmp_path / "skill_index.json").write_text(json.dumps(legacy, indent=2))
+
+    library = SkillLibrary(tmp_path)
+    library.initialize()
+    meta = json.loads((tmp_path / "skill_vectors.json").read_text())
+    assert (meta["model"], meta["dim"], meta["ids"]) == ("all-MiniLM-L6-v2", 384, [skill.id])
+
+    # The active embedder differs (hash fallback in tests), so rows are rebuilt.
+    hits = library.search("open notepad", k=1, min_similarity=0.0)
+    assert hits[0][0].id == skill.id
+    assert json.loads((tmp_path / "skill_vectors.json").read_text())["model"] == "hash256"
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from agent.autonomous.cancellation import CancellationToken, current_token, use_token
+from agent.autonomous.config import AgentConfig, PlannerConfig, RunnerConfig
+from agent.autonomous.models import Observation, Plan, Step, ToolResult
+from agent.autonomous.perception import Perceptor
+from agent.autonomous.runner import AgentRunner
+from agent.autonomous.speculation import SpeculativePlanner
+from agent.llm.codex_cli_client import resolve_reasoning_effort
+
+
+def _python_step(code: str) -> dict:
+    return {
+        "goal": "run python",
+        "tool_name": "python_exec",
+        "tool_args": [{"key": "code", "value": code}],
+        "success_criteria": [],
+    }
+
+
+def _write_step(path: str) -> dict:
+    return {
+        "goal": "write a file",
+        "tool_name": "file_write",
+        "tool_args": [{"key": "path", "value": path}, {"key": "content", "value": "hi"}],
+        "success_criteria": [],
+    }
+
+
+_FINISH = {
+    "goal": "done",
+    "steps": [{"goal": "done", "tool_name": "finish", "tool_args": [{"key": "summary", "value": "ok"}]}],
+}
+
+
+class _SchemaLLM:
+    """Answers by schema, so call order between threads does not matter."""
+
+    provider = "stub"
+    model = "stub"
+
+    def __init__(self, plans):
+        self._plans = list(plans)
+        self._lock = threading.Lock()
+        self.plan_calls = 0
+        self.plan_contexts = []
+        self.plan_prompts = []
+
+    def reason_json(self, prompt, *, schema_path, timeout_seconds=None):
+        if Path(schema_path).name == "plan_next_step.schema.json":
+            with self._lock:
+                self.plan_calls += 1
+                self.plan_contexts.append((current_token() is not None, resolve_reasoning_effort(), timeout_seconds))
+                self.plan_prompts.append(prompt)
+                return self._plans.pop(0)
+        return {"status": "success", "explanation_short": "ok", "next_hint": "call finish"}
+
+    complete_json = reason_json
+
+
+def _run(tmp_path, llm) -> list:
+    runner = AgentRunner(
+        cfg=RunnerConfig(max_steps=5, timeout_seconds=60, speculative_planning=True),
+        agent_cfg=AgentConfig(
+            enable_web_gui=False,
+            enable_desktop=False,
+            memory_db_path=tmp_path / "memory.sqlite3",
+        ),
+        planner_cfg=PlannerConfig(mode="react"),
+        llm=llm,
+        run_dir=tmp_path / "run",
+    )
+    result = runner.run(task="Run a script, then finish")
+    assert result.success
+    return [json.loads(line) for line in Path(result.trace_path).read_text().splitlines()]
+
+
+def test_speculative_plan_is_committed_when_tool_succeeds(tmp_path):
+    llm = _SchemaLLM([{"goal": "g", "steps": [_write_step("note.txt")]}, _FINISH])
+    events = _run(tmp_path, llm)
+
+    spec = [e for e in events if e.get("type") == "speculation"]
+    assert len(spec) == 1
+    assert spec[0]["outcome"] == "hit"
+    assert spec[0]["hit_rate"] == 1.0
+    assert llm.plan_calls == 2  # the speculative plan replaced the second planning round
+    stop = [e for e in events if e.get("type") == "stop"][-1]
+    assert stop["speculation"]["hits"] == 1
+    # The speculative call runs like a normal planning call: token, effort, timeout.
+    has_token, effort, timeout = llm.plan_contexts[1]
+    assert has_token and effort and timeout
+    assert llm.plan_contexts[1] == llm.plan_contexts[0]
+
+
+def test_speculative_plan_is_discarded_when_tool_fails(tmp_path):
+    llm = _SchemaLLM([{"goal": "g", "steps": [_write_step("note.txt/inner.txt")]}, _FINISH, _FINISH])
+    (tmp_path / "run" / "workspace").mkdir(parents=True)
+    (tmp_path / "run" / "workspace" / "note.txt").write_text("a file, not a directory", encoding="utf-8")
+    events = _run(tmp_path, llm)
+
+    spec = [e for e in events if e.get("type") == "speculation"]
+    assert spec[0]["outcome"] == "miss"
+    assert spec[0]["reason"].startswith("tool_failed")
+    assert spec[0]["saved_ms"] == 0.0
+    assert llm.plan_calls == 3
+
+
+def test_output_bearing_tools_are_planned_from_their_real_output(tmp_path):
+    llm = _SchemaLLM([{"goal": "g", "steps": [_python_step("print(6 * 7)")]}, _FINISH])
+    events = _run(tmp_path, llm)
+
+    assert not [e for e in events if e.get("type") == "speculation"]
+    assert llm.plan_calls == 2
+    assert "42" in llm.plan_prompts[1]  # the next step saw the real stdout, not a prediction
+
+
+def test_speculation_skips_read_only_and_fast_tools():
+    speculator = SpeculativePlanner(min_tool_seconds=1.0)
+    try:
+        write = Step(goal="w", tool_name="file_write")
+        assert not speculator.should_speculate(Step(goal="r", tool_name="file_read"), read_only=True)
+        for name in ("python_exec", "shell_exec", "finish", "human_ask"):
+            assert not speculator.should_speculate(Step(goal="x", tool_name=name), read_only=False)
+        assert speculator.should_speculate(write, read_only=False)
+        speculator.record_duration("file_write", 0.01)
+        assert not speculator.should_speculate(write, read_only=False)
+
+        perceptor = Perceptor()
+        spec = speculator.start(write, [], lambda obs: Plan(goal="g", steps=[write]))
+        ok = ToolResult(success=True, output={"path": "a"})
+        speculator.observe(spec, ok, perceptor.tool_result_to_observation("file_write", ok), 0.01)
+        assert spec.matched
+        spec = speculator.start(write, [], lambda obs: Plan(goal="g", steps=[write]))
+        other = ToolResult(success=True, output={"bytes": 1})
+        speculator.observe(spec, other, perceptor.tool_result_to_observation("file_write", other), 0.01)
+        assert not spec.matched and spec.reason == "output_shape_changed"
+    finally:
+        speculator.shutdown()
+
+
+def test_speculation_replans_when_the_observation_differs_from_the_prediction():
+    speculator = SpeculativePlanner()
+    try:
+        step = Step(goal="w", tool_name="file_write")
+        seen = []
+        spec = speculator.start(step, [], lambda obs: seen.extend(obs) or Plan(goal="g", steps=[step]))
+        spec.future.result(5)
+        # The plan is made from facts a real success would report, nothing invented.
+        assert seen[-1].salient_facts == ["file_write succeeded"] and seen[-1].parsed is None
+
+        ok = ToolResult(success=True, output={"path": "a"})
+        obs = Observation(source="tool:file_write", parsed={"path": "a"}, salient_facts=["file_write succeeded", "wrote 0 bytes"])
+        assert not speculator.observe(spec, ok, obs, 0.01)
+        assert spec.reason == "observation_differs"
+        plan, event = speculator.resolve(spec, usable=True)
+        assert plan is None and event["outcome"] == "miss"
+    finally:
+        speculator.shutdown()
+
+
+def test_a_miss_cancels_the_speculative_call_in_flight():
+    speculator = SpeculativePlanner()
+    run_token = CancellationToken()
+    started = threading.Event()
+
+    def _slow_plan(obs):
+        started.set()
+        current_token().wait(10)  # stands in for a codex exec killed by the token
+        current_token().raise_if_cancelled()
+        return Plan(goal="g", steps=[])
+
+    try:
+        step = Step(goal="w", tool_name="shell_exec")
+        with use_token(run_token):
+            spec = speculator.start(step, [], _slow_plan)
+        assert started.wait(5)
+        spec.matched, spec.reason = False, "tool_failed"
+        t0 = time.monotonic()
+        plan, event = speculator.resolve(spec, usable=True)
+        assert plan is None and event["reason"] == "tool_failed (cancelled)"
+        assert spec.token.reason == "speculation_miss"
+        spec.future.exception(5)
+        assert time.monotonic() - t0 < 5
+        assert not run_token.cancelled
+
+        # Cancelling the run reaches a speculation that is still running.
+        with use_token(run_token):
+            spec = speculator.start(step, [], _slow_plan)
+        run_token.cancel("kill_switch")
+        spec.future.exception(5)
+        assert spec.token.reason == "kill_switch"
+    finally:
+        speculator.shutdown()
@@ -82,7 +82,7 @@ def test_swarm_runs_with_explicit_cwd(monkeypatch: pytest.MonkeyPatch) -> None:
 
     def fake_run(cmd: List[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
         cwd = kwargs.get("cwd")
-        assert cwd is not None, "swarm must pass explicit cwd to subprocess.run"
+        assert cwd is not None, "swarm must pass explicit cwd to the codex subprocess"
         actual = str(Path(cwd).resolve())
         assert actual == expected_cwd, (
             f"swarm must use repo_root as cwd for codex runs: {actual} != {expected_cwd}"
@@ -104,7 +104,7 @@ def test_swarm_runs_with_explicit_cwd(monkeypatch: pytest.MonkeyPatch) -> None:
 
     from agent.llm import codex_cli_client
 
-    monkeypatch.setattr(codex_cli_client.subprocess, "run", fake_run)
+    monkeypatch.setattr(codex_cli_client, "run_process", fake_run)
 
     mode_swarm("Smoke test objective", unsafe_mode=False)
 
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+from agent.autonomous.trace import JsonlTracer
+
+
+def _read(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+def test_buffered_tracer_preserves_order_across_threads(tmp_path: Path) -> None:
+    path = tmp_path / "trace.jsonl"
+    tracer = JsonlTracer(path, flush_interval=5.0)
+
+    def _emit(worker: int) -> None:
+        for i in range(200):
+            tracer.log({"worker": worker, "i": i})
+
+    threads = [threading.Thread(target=_emit, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    tracer.close()
+
+    events = _read(path)
+    assert len(events) == 800
+    for w in range(4):
+        assert [e["i"] for e in events if e["worker"] == w] == list(range(200))
+
+
+def test_checkpoint_makes_events_visible(tmp_path: Path) -> None:
+    path = tmp_path / "trace.jsonl"
+    tracer = JsonlTracer(path, flush_interval=60.0)
+    event = {"type": "step", "data": {"n": 1}}
+    tracer.log(event)
+    event["data"]["n"] = 2  # serialized at log time, so this must not leak into the trace
+    tracer.checkpoint()
+    assert _read(path) == [{"type": "step", "data": {"n": 1}}]
+    tracer.close()
+    tracer.log({"type": "late"})
+    assert _read(path)[-1] == {"type": "late"}
+
+
+def test_rotation_starts_fresh_file(tmp_path: Path) -> None:
+    path = tmp_path / "trace.jsonl"
+    tracer = JsonlTracer(path, max_batch_bytes=1, rotate_bytes=200)
+    for i in range(20):
+        tracer.log({"i": i, "pad": "x" * 20})
+    tracer.close()
+    rotated = sorted(p.name for p in tmp_path.iterdir() if p.name != "trace.jsonl")
+    assert rotated and all(name.startswith("trace.") for name in rotated)
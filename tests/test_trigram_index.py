@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+from pathlib import Path
+
+import pytest
+
+from agent.autonomous.config import AgentConfig, RunContext
+from agent.autonomous.tools.builtins import FileSearchArgs, build_default_tool_registry, file_search_factory
+from agent.autonomous.tools import trigram_index
+from agent.autonomous.tools.trigram_index import TrigramIndex, get_index
+from agent.config.profile import resolve_profile
+
+
+def _names(stats) -> set[str]:
+    return {Path(s.path).name for s in stats}
+
+
+def test_candidates_narrow_and_track_changes(tmp_path: Path) -> None:
+    root = tmp_path / "ws"
+    root.mkdir()
+    (root / "a.py").write_text("def alpha_handler():\n    pass\n", encoding="utf-8")
+    (root / "b.py").write_text("def beta():\n    pass\n", encoding="utf-8")
+    index = TrigramIndex(root, tmp_path / "idx.sqlite3", refresh_interval=0)
+
+    assert index.candidates("ALPHA_handler") is None  # cold: caller scans
+    assert index.wait(10)
+    assert _names(index.candidates("ALPHA_handler") or []) == {"a.py"}
+
+    target = root / "b.py"
+    target.write_text("alpha_handler = beta\n", encoding="utf-8")
+    st = target.stat()
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    (root / "a.py").unlink()
+    assert _names(index.candidates("alpha_handler") or []) == {"b.py"}
+    index.close()
+
+    reopened = TrigramIndex(root, tmp_path / "idx.sqlite3", refresh_interval=0)
+    assert reopened.is_warm
+    assert _names(reopened.candidates("alpha_handler") or []) == {"b.py"}
+    reopened.close()
+
+
+def test_queries_inside_the_ttl_skip_the_tree_walk(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = tmp_path / "ws"
+    root.mkdir()
+    (root / "a.py").write_text("alpha_handler\n", encoding="utf-8")
+    index = TrigramIndex(root, tmp_path / "idx.sqlite3", refresh_interval=3600)
+    index.build()
+
+    walks = []
+    original = trigram_index.walk_files
+    monkeypatch.setattr(trigram_index, "walk_files", lambda *a, **kw: walks.append(1) or original(*a, **kw))
+    (root / "b.py").write_text("alpha_handler = 1\n", encoding="utf-8")
+    assert _names(index.candidates("alpha_handler") or []) == {"a.py"}
+    assert walks == []
+
+    index.mark_stale()
+    assert _names(index.candidates("alpha_handler") or []) == {"a.py", "b.py"}
+    assert walks == [1]
+    index.close()
+
+
+def test_syncs_read_within_the_profile_limits(tmp_path: Path) -> None:
+    root = tmp_path / "ws"
+    root.mkdir()
+    for i in range(5):
+        (root / f"f{i}.py").write_text("alpha_handler\n" if i == 0 else "beta\n", encoding="utf-8")
+    profile = dataclasses.replace(resolve_profile("fast"), max_files_to_read=2)
+    index = TrigramIndex(root, tmp_path / "idx.sqlite3", refresh_interval=0)
+
+    def _indexed() -> int:
+        return index._conn.execute("SELECT COUNT(*) FROM files WHERE indexed = 1").fetchone()[0]
+
+    index.build(profile)
+    assert _indexed() == 2
+    # Unread files stay candidates, so nothing is missed while the index fills in.
+    assert "f0.py" in _names(index.candidates("alpha_handler", profile=profile) or [])
+    assert _indexed() == 4
+    index.candidates("alpha_handler", profile=profile)
+    assert _indexed() == 5
+    assert _names(index.candidates("alpha_handler", profile=profile) or []) == {"f0.py"}
+    index.close()
+
+
+def test_short_and_non_ascii_queries_bypass_index(tmp_path: Path) -> None:
+    index = TrigramIndex(tmp_path, tmp_path / "idx" / "i.sqlite3")
+    index.build()
+    assert index.candidates("ab") is None
+    assert index.candidates("café") is None
+    index.close()
+
+
+def test_file_search_uses_warm_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TREYS_AGENT_SEARCH_INDEX", "1")
+    monkeypatch.setenv("TREYS_AGENT_SEARCH_INDEX_DIR", str(tmp_path / "index"))
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "one.txt").write_text("first needle\n", encoding="utf-8")
+    (ws / "two.txt").write_text("no match\n", encoding="utf-8")
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=ws)
+    tool = file_search_factory(AgentConfig())
+
+    cold = tool(ctx, FileSearchArgs(query="needle"))
+    assert cold.metadata.get("index") == "cold"
+    assert [Path(m["path"]).name for m in cold.output["matches"]] == ["one.txt"]
+
+    index = get_index(ws)
+    assert index is not None and index.wait(10)
+    warm = tool(ctx, FileSearchArgs(query="needle"))
+    assert warm.metadata.get("index") == "hit"
+    assert [Path(m["path"]).name for m in warm.output["matches"]] == ["one.txt"]
+    index.close()
+
+
+def test_writing_tools_mark_the_index_stale(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TREYS_AGENT_SEARCH_INDEX", "1")
+    monkeypatch.setenv("TREYS_AGENT_SEARCH_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("TREYS_AGENT_SEARCH_INDEX_TTL", "3600")
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "one.txt").write_text("first needle\n", encoding="utf-8")
+    ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=ws)
+    registry = build_default_tool_registry(AgentConfig(unsafe_mode=True), tmp_path)
+    index = get_index(ws)
+    assert index is not None
+    index.build()
+
+    written = registry.call("file_write", {"path": str(ws / "two.txt"), "content": "second needle\n"}, ctx)
+    assert written.success, written.error
+    found = registry.call("file_search", {"query": "needle"}, ctx)
+    assert found.metadata.get("index") == "hit"
+    assert sorted(Path(m["path"]).name for m in found.output["matches"]) == ["one.txt", "two.txt"]
+    index.close()
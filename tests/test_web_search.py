@@ -13,13 +13,16 @@ class _Resp:
         self.content = content
         self.encoding = "utf-8"
 
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
 
 def test_web_search_no_results(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
     def _fake_get(*args, **kwargs):
         html = b"<html><body>No results</body></html>"
         return _Resp(html)
 
-    monkeypatch.setattr("agent.autonomous.tools.builtins.requests.get", _fake_get)
+    monkeypatch.setattr("agent.autonomous.tools.builtins.http_get", _fake_get)
 
     ctx = RunContext(run_id="t", run_dir=tmp_path, workspace_dir=tmp_path)
     args = WebSearchArgs(query="nothing", max_results=3)
@@ -42,7 +45,7 @@ def test_web_search_filters_domains(monkeypatch: pytest.MonkeyPatch, tmp_path) -
         """
         return _Resp(html)
 
-    monkeypatch.setattr("agent.autonomous.tools.builtins.requests.get", _fake_get)
+    monkeypatch.setattr("agent.autonomous.tools.builtins.http_get", _fake_get)
     monkeypatch.setenv("TREYS_AGENT_WEB_ALLOWLIST", "nih.gov")
     monkeypatch.setenv("TREYS_AGENT_WEB_BLOCKLIST", "wikipedia.org")
 
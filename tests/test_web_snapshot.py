@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from agent.autonomous.tools import builtins
+from agent.autonomous.tools.web_snapshot import (
+    block_resources,
+    blocked_resource_types,
+    diff_elements,
+    take_snapshot,
+)
+
+FIXTURE = Path(__file__).parent / "fixtures" / "web" / "login_form.html"
+
+
+def _el(selector: str, text: str = "") -> dict:
+    return {"selector": selector, "role": "button", "name": "", "text": text, "bbox": {"x": 0, "y": 0, "width": 1, "height": 1}}
+
+
+def test_diff_reports_only_changed_elements():
+    before = [_el("#a", "one"), _el("#b", "two"), _el("#c")]
+    after = [_el("#a", "one"), _el("#b", "TWO"), _el("#d")]
+    delta = diff_elements(before, after)
+    assert [e["selector"] for e in delta["added"]] == ["#d"]
+    assert [e["text"] for e in delta["changed"]] == ["TWO"]
+    assert delta["removed"] == ["#c"]
+    assert delta["unchanged"] == 1
+
+
+def test_block_resources_aborts_heavy_types(monkeypatch):
+    handlers = []
+    target = SimpleNamespace(route=lambda pattern, handler: handlers.append(handler))
+    assert block_resources(target, frozenset({"image", "font"}))
+
+    calls = []
+
+    def _route(kind):
+        return SimpleNamespace(
+            request=SimpleNamespace(resource_type=kind),
+            abort=lambda: calls.append(("abort", kind)),
+            continue_=lambda: calls.append(("continue", kind)),
+        )
+
+    for kind in ("image", "document", "font"):
+        handlers[0](_route(kind))
+    assert calls == [("abort", "image"), ("continue", "document"), ("abort", "font")]
+
+    monkeypatch.delenv("AGENT_WEB_BLOCK_RESOURCES", raising=False)
+    assert blocked_resource_types(default=frozenset()) == frozenset()  # web sessions: opt-in
+    monkeypatch.setenv("AGENT_WEB_BLOCK_RESOURCES", "image")
+    assert blocked_resource_types(default=frozenset()) == frozenset({"image"})
+    monkeypatch.setenv("AGENT_WEB_BLOCK_RESOURCES", "none")
+    assert blocked_resource_types() == frozenset()
+    assert not block_resources(target)
+
+
+class _FakePage:
+    def __init__(self, tables):
+        self.tables = list(tables)
+        self.routes = 0
+        self.accessibility = SimpleNamespace(snapshot=lambda: {"role": "WebArea"})
+
+    def content(self):
+        return "<html></html>"
+
+    def route(self, pattern, handler):
+        self.routes += 1
+
+    def goto(self, url, **kwargs):
+        self.url = url
+
+    def wait_for_timeout(self, ms):
+        pass
+
+    def evaluate(self, script, opts):
+        assert "querySelectorAll" in script  # one bulk call, not per element
+        return {"url": self.url, "title": "t", "visible_text": "x", "elements": self.tables.pop(0)}
+
+
+def test_default_snapshots_keep_the_full_output(tmp_path):
+    ctx = SimpleNamespace(run_id="run-full", run_dir=tmp_path)
+    page = _FakePage([[_el("#a")], [_el("#a"), _el("#b")]])
+    args = builtins.WebGuiSnapshotArgs(url="http://example.test/")
+    try:
+        outputs = [builtins._web_snapshot_output(ctx, args, page) for _ in range(2)]
+    finally:
+        builtins._WEB_SNAPSHOTS.clear("run-full")
+
+    for out in outputs:
+        assert out["accessibility_tree"] == {"role": "WebArea"}
+        assert out["html_preview"] == "<html></html>"
+        assert out["visible_text"] == "x" and out["untrusted"] is True
+    assert [e["selector"] for e in outputs[1]["elements"]] == ["#a", "#b"]
+    assert "elements_diff" not in outputs[1]
+    assert page.routes == 0
+
+
+def test_repeat_snapshots_send_a_diff(tmp_path):
+    ctx = SimpleNamespace(run_id="run-diff", run_dir=tmp_path)
+    page = _FakePage([[_el("#a"), _el("#b")], [_el("#a"), _el("#b", "now visible")]])
+    args = builtins.WebGuiSnapshotArgs(url="http://example.test/", mode="lite", diff=True, block_resources=True)
+    try:
+        first = builtins._web_snapshot_output(ctx, args, page)
+        second = builtins._web_snapshot_output(ctx, args, page)
+    finally:
+        builtins._WEB_SNAPSHOTS.clear("run-diff")
+
+    assert len(first["elements"]) == 2 and "accessibility_tree" not in first
+    assert "elements" not in second
+    assert second["elements_diff"]["changed"] == [_el("#b", "now visible")]
+    assert second["snapshot_stats"]["sent"] == 1
+    assert page.routes == 2
+
+
+def test_bulk_snapshot_against_local_fixture():
+    sync_api = pytest.importorskip("playwright.sync_api")
+    try:
+        with sync_api.sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            block_resources(page)
+            page.goto(FIXTURE.as_uri())
+            data = take_snapshot(page)
+            browser.close()
+    except Exception as exc:  # pragma: no cover - no browser binaries
+        pytest.skip(f"Chromium not available: {exc}")
+    selectors = {e["selector"] for e in data["elements"]}
+    assert {"#user", "#go", "#heading"} <= selectors
+    assert data["title"] == "Fixture Portal"